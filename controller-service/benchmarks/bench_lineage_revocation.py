@@ -0,0 +1,112 @@
+"""
+Benchmark lineage revocation on large delegation trees.
+
+Usage:
+    python -m benchmarks.bench_lineage_revocation [descendants] [redis_url]
+
+Builds trees of ``descendants`` tokens (default 100000) under one root in
+three shapes (a chain, a flat fan-out and a tree with 10 children per
+token) and times:
+
+- the previous recursive walk (lists concatenated at every level, no
+  de-duplication), which hits the recursion limit on deep chains;
+- TokenManager.revoke_token on the root: iterative walk plus one batched
+  store write.
+
+Tokens are written to the store directly (no RSA signing). The in-memory
+store is used unless ``redis_url`` is given.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import structlog
+
+from src.core.token_manager import TokenManager
+from src.core.token_store import MemoryTokenStore, RedisTokenStore
+from src.models.agent_models import EphemeralToken
+
+
+def make_token(parent_token_id, now):
+    return EphemeralToken(
+        token_id=str(uuid.uuid4()),
+        jwt_token="",
+        agent_role="dev",
+        tenant_id="bench-tenant",
+        scopes=["azure:repo:write"],
+        issued_at=now,
+        expires_at=now + timedelta(minutes=60),
+        parent_token_id=parent_token_id,
+        revoked=False,
+        reason="benchmark"
+    )
+
+
+async def build_tree(store, shape: str, descendants: int) -> str:
+    now = datetime.utcnow()
+    root = make_token(None, now)
+    await store.add(root)
+    parents = [root.token_id]
+    for index in range(descendants):
+        if shape == "chain":
+            parent = parents[-1]
+        elif shape == "flat":
+            parent = root.token_id
+        else:
+            parent = parents[index // 10]
+        token = make_token(parent, now)
+        await store.add(token)
+        parents.append(token.token_id)
+    return root.token_id
+
+
+async def recursive_descendants(store, token_id):
+    """The previous implementation of TokenManager._get_child_tokens"""
+    child_tokens = []
+    direct_children = await store.children(token_id)
+    child_tokens.extend(direct_children)
+    for child_id in direct_children:
+        grandchildren = await recursive_descendants(store, child_id)
+        child_tokens.extend(grandchildren)
+    return child_tokens
+
+
+def make_store(redis_url):
+    if redis_url:
+        import redis.asyncio as aioredis
+        return RedisTokenStore(aioredis.from_url(redis_url), timedelta(minutes=60),
+                               key_prefix=f"bench:{uuid.uuid4().hex[:8]}")
+    return MemoryTokenStore(timedelta(minutes=60))
+
+
+async def main(descendants: int, redis_url) -> None:
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    print(f"{descendants} descendants, {'redis' if redis_url else 'memory'} store")
+    print(f"{'shape':<10}{'recursive walk (s)':>20}{'revoke_token (s)':>18}{'revoked':>10}")
+    for shape in ("chain", "flat", "tree10"):
+        manager = TokenManager(store=make_store(redis_url))
+        root = await build_tree(manager.store, shape, descendants)
+
+        started = time.perf_counter()
+        try:
+            await recursive_descendants(manager.store, root)
+            recursive = f"{time.perf_counter() - started:.3f}"
+        except RecursionError:
+            recursive = "RecursionError"
+
+        started = time.perf_counter()
+        result = await manager.revoke_token(root)
+        elapsed = time.perf_counter() - started
+        print(f"{shape:<10}{recursive:>20}{elapsed:>18.3f}{len(result['revoked_tokens']):>10}")
+        await manager.store.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    url = sys.argv[2] if len(sys.argv) > 2 else None
+    asyncio.run(main(count, url))
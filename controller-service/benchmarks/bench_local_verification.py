@@ -0,0 +1,98 @@
+"""
+Benchmark factory-side token checks: controller round trip vs local verification.
+
+Usage:
+    python -m benchmarks.bench_local_verification [tokens] [checks]
+
+Mints ``tokens`` tokens (default 100, at most TOKEN_BULK_MINT_MAX) per signing algorithm, serves the
+controller's JWKS and a validation endpoint (TokenManager.validate_token,
+verified-token cache enabled) over HTTP on localhost, then runs ``checks``
+checks (default 5000):
+
+- a round trip to the controller per check, as factories did before;
+- ControllerTokenVerifier.verify with its verified-claims cache disabled
+  (cached JWKS key, signature check and revocation list lookup per check);
+- ControllerTokenVerifier.verify with the cache (signature checked once
+  per token).
+
+Localhost understates the round trip; across a real network every remote
+check also pays the network latency.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+
+import aiohttp
+import structlog
+from aiohttp import web
+
+from src.core.token_manager import TokenManager
+from src.core.token_signer import SUPPORTED_ALGORITHMS, generate_signing_key
+from src.integrations.token_verifier import ControllerTokenVerifier
+
+PORT = 8799
+
+
+async def main(tokens: int, checks: int) -> None:
+    # Per-call log lines would dominate the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+    logging.getLogger("src.integrations.token_verifier").setLevel(logging.ERROR)
+
+    print(f"{tokens} tokens, {checks} checks per run")
+    print(f"{'algorithm':<11}{'round trip checks/s':>21}{'local, no cache':>17}{'speedup':>9}"
+          f"{'local, cached':>15}{'speedup':>9}")
+    for algorithm in SUPPORTED_ALGORITHMS:
+        manager = TokenManager()
+        manager.signing_algorithm = algorithm
+        await manager.set_signing_key(generate_signing_key(algorithm))
+        jwt_tokens = [token.jwt_token for token in await manager.mint_tokens(
+            [{"agent_role": "dev", "tenant_id": "bench-tenant", "ttl_minutes": 60,
+              "scopes": ["azure:repo:write"], "reason": "benchmark"}] * tokens)]
+        picks = [random.choice(jwt_tokens) for _ in range(checks)]
+
+        async def jwks(request):
+            return web.json_response(manager.get_jwks())
+
+        async def validate(request):
+            token = await manager.validate_token((await request.json())["token"])
+            return web.json_response({"valid": token is not None})
+
+        app = web.Application()
+        app.router.add_get("/.well-known/jwks.json", jwks)
+        app.router.add_post("/tokens/validate", validate)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", PORT).start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                started = time.perf_counter()
+                for jwt_token in picks:
+                    async with session.post(f"http://127.0.0.1:{PORT}/tokens/validate",
+                                            json={"token": jwt_token}) as response:
+                        if not (await response.json())["valid"]:
+                            raise RuntimeError("Unexpected validation result")
+                remote = checks / (time.perf_counter() - started)
+
+            local = []
+            for cache_size in (0, 10000):
+                async with ControllerTokenVerifier(f"http://127.0.0.1:{PORT}/.well-known/jwks.json",
+                                                   cache_size=cache_size) as verifier:
+                    started = time.perf_counter()
+                    for jwt_token in picks:
+                        await verifier.verify(jwt_token, required_scopes=["azure:repo:write"])
+                    local.append(checks / (time.perf_counter() - started))
+        finally:
+            await runner.cleanup()
+            await manager.signer.close()
+
+        print(f"{algorithm:<11}{remote:>21.0f}{local[0]:>17.0f}{local[0] / remote:>8.1f}x"
+              f"{local[1]:>15.0f}{local[1] / remote:>8.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    asyncio.run(main(count, runs))
@@ -0,0 +1,100 @@
+"""
+Benchmark role scope checks against the compiled policy index.
+
+Usage:
+    python -m benchmarks.bench_policy_index [checks]
+
+Runs ``checks`` scope validations (default 200000) over random roles and
+scope requests from role_templates.yaml:
+
+- the previous TokenManager._validate_agent_scopes: the role -> scopes
+  dict literal rebuilt on every call and list membership per scope;
+- TokenManager._validate_agent_scopes on the compiled index (frozenset
+  membership, file change check throttled);
+- a full policy evaluation as served by /policies/validate.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+
+import structlog
+
+from src.core.policy_index import create_policy_index
+from src.core.token_manager import TokenManager
+
+
+logger = structlog.get_logger()
+
+
+async def previous_validate_agent_scopes(agent_role, requested_scopes):
+    """The previous TokenManager._validate_agent_scopes"""
+    role_scope_mappings = {
+        "github_bootstrap": ["github:org:create", "github:repo:create", "github:team:create",
+                             "github:actions:write", "github:secrets:write"],
+        "founder": ["ai:reasoning", "ai:analysis", "ai:writing", "db:tenant:config:write",
+                    "db:business:metrics:read"],
+        "dev": ["azure:project:create", "azure:repo:write", "azure:pipeline:write",
+                "azure:workitem:write", "github:repo:write"],
+        "ops": ["azure:pipeline:manage", "azure:serviceconnection:create", "azure:agentpool:manage",
+                "azure:monitoring:write"],
+        "security": ["azure:security:scan", "azure:compliance:validate", "azure:policy:enforce",
+                     "github:security:read"],
+        "finance": ["db:cost:tracking:write", "db:budget:read", "azure:usage:read", "ai:cost:optimization"]
+    }
+    allowed_scopes = role_scope_mappings.get(agent_role, [])
+    validated_scopes = [scope for scope in requested_scopes if scope in allowed_scopes]
+    if not validated_scopes:
+        raise ValueError(f"No valid scopes for agent role {agent_role}")
+    logger.info("Scopes validated", agent_role=agent_role, requested=requested_scopes, validated=validated_scopes)
+    return validated_scopes
+
+
+async def main(checks: int) -> None:
+    # Per-call log lines would dominate the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    index = create_policy_index()
+    manager = TokenManager(policy_index=index)
+    policies = index.policies
+    roles = sorted(policies.roles)
+    requests = []
+    for _ in range(checks):
+        role = random.choice(roles)
+        scopes = sorted(policies.roles[role].scopes)
+        requests.append((role, random.sample(scopes, random.randint(1, len(scopes)))))
+    # The previous mapping only knew the persona roles (and other github_bootstrap scope names)
+    previous_requests = [(role, scopes) for role, scopes in requests
+                         if role in ("founder", "dev", "ops", "security", "finance")]
+
+    print(f"{checks} checks over {len(roles)} roles, {len(policies.all_scopes)} scopes")
+    print(f"{'check':<34}{'checks/s':>12}{'speedup':>10}")
+
+    started = time.perf_counter()
+    for role, scopes in previous_requests:
+        try:
+            await previous_validate_agent_scopes(role, scopes)
+        except ValueError:
+            pass  # Scopes the previous mapping did not know yet
+    baseline = len(previous_requests) / (time.perf_counter() - started)
+    print(f"{'previous _validate_agent_scopes':<34}{baseline:>12.0f}{1:>9.1f}x")
+
+    started = time.perf_counter()
+    for role, scopes in requests:
+        await manager._validate_agent_scopes(role, scopes)
+    indexed = checks / (time.perf_counter() - started)
+    print(f"{'_validate_agent_scopes (index)':<34}{indexed:>12.0f}{indexed / baseline:>9.1f}x")
+
+    started = time.perf_counter()
+    for role, scopes in requests:
+        index.validate_operation("mint_token", {"agent_role": role, "scopes": scopes,
+                                                "tenant_id": "acme-bench", "ttl_minutes": 30})
+    evaluated = checks / (time.perf_counter() - started)
+    print(f"{'validate_operation (full policy)':<34}{evaluated:>12.0f}{evaluated / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    asyncio.run(main(count))
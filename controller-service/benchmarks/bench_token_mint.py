@@ -0,0 +1,103 @@
+"""
+Benchmark token minting throughput and event loop stalls per signing setup.
+
+Usage:
+    python -m benchmarks.bench_token_mint [tokens] [workers]
+
+For each signing algorithm (RS256, ES256, EdDSA) and signer mode (inline
+signing on the event loop as before, a thread pool, a process pool with
+``workers`` processes, default 2) mints ``tokens`` tokens (default 2000):
+
+- as a burst of concurrent mint_token calls, the way agents of a new
+  startup request them;
+- with mint_tokens in bulk calls of TOKEN_BULK_MINT_MAX tokens.
+
+Alongside throughput, a ticker task sleeping 1 ms reports the longest time
+the event loop was blocked during the burst. Keys are generated fresh and
+tokens go to the in-memory store.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+import structlog
+
+from src.core.token_manager import TokenManager
+from src.core.token_signer import SUPPORTED_ALGORITHMS, generate_signing_key
+
+MINT_ARGS = {
+    "agent_role": "dev",
+    "tenant_id": "bench-tenant",
+    "ttl_minutes": 60,
+    "scopes": ["azure:repo:write"],
+    "reason": "benchmark",
+}
+
+
+async def max_loop_stall(stop: asyncio.Event) -> float:
+    """Longest gap between 1 ms ticks beyond the sleep itself, in ms"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - started - 0.001)
+    return worst * 1000
+
+
+async def measure(mint, tokens: int):
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_stall(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    minted = await mint()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall = await ticker
+    if len(minted) != tokens or not all(token.jwt_token for token in minted):
+        raise RuntimeError("Unexpected mint result")
+    return tokens / elapsed, stall
+
+
+async def main(tokens: int, workers: int) -> None:
+    # Per-call log lines would dominate the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    print(f"{tokens} tokens per run, {workers} pool workers")
+    print(f"{'algorithm':<11}{'mode':<9}{'burst tokens/s':>16}{'max stall ms':>14}"
+          f"{'bulk tokens/s':>15}{'max stall ms':>14}")
+    baseline = None
+    for algorithm in SUPPORTED_ALGORITHMS:
+        signing_key = generate_signing_key(algorithm)
+        for mode in ("inline", "thread", "process"):
+            manager = TokenManager()
+            manager.signing_algorithm = algorithm
+            manager.signer_mode = mode
+            manager.signer_workers = workers
+            await manager.set_signing_key(signing_key)
+            await manager.mint_tokens([MINT_ARGS] * 10)  # Start the pool
+
+            async def burst():
+                return await asyncio.gather(*(manager.mint_token(**MINT_ARGS) for _ in range(tokens)))
+
+            async def bulk():
+                minted = []
+                for start in range(0, tokens, manager.bulk_mint_max):
+                    count = min(manager.bulk_mint_max, tokens - start)
+                    minted.extend(await manager.mint_tokens([MINT_ARGS] * count))
+                return minted
+
+            burst_rate, burst_stall = await measure(burst, tokens)
+            bulk_rate, bulk_stall = await measure(bulk, tokens)
+            baseline = baseline or burst_rate
+            print(f"{algorithm:<11}{mode:<9}{burst_rate:>16.0f}{burst_stall:>14.1f}"
+                  f"{bulk_rate:>15.0f}{bulk_stall:>14.1f}")
+            await manager.signer.close()
+    print(f"(RS256 inline burst is the previous behaviour: {baseline:.0f} tokens/s)")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pool_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    asyncio.run(main(count, pool_workers))
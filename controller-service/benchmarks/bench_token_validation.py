@@ -0,0 +1,78 @@
+"""
+Benchmark TokenManager.validate_token with and without the validation fast paths.
+
+Usage:
+    python -m benchmarks.bench_token_validation [tokens] [validations]
+
+Mints ``tokens`` RS256 tokens (default 1000) with a freshly generated key,
+then validates ``validations`` random picks (default 20000):
+
+- live tokens with the verified-token cache disabled (every call runs the
+  RSA verification, as before) and enabled;
+- revoked tokens with an empty revocation filter (rejected after the RSA
+  verification) and with the filter populated by revoke_token.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+
+import structlog
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.core.token_cache import RevocationFilter, VerifiedTokenCache
+from src.core.token_manager import TokenManager
+
+
+async def validations_per_second(manager: TokenManager, jwt_tokens, validations: int, expect_valid: bool) -> float:
+    picks = [random.choice(jwt_tokens) for _ in range(validations)]
+    started = time.perf_counter()
+    for jwt_token in picks:
+        if (await manager.validate_token(jwt_token) is not None) != expect_valid:
+            raise RuntimeError("Unexpected validation result")
+    return validations / (time.perf_counter() - started)
+
+
+async def main(tokens: int, validations: int) -> None:
+    # Per-call log lines would dominate the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    manager = TokenManager()
+    await manager.set_signing_key(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+
+    minted = [await manager.mint_token("dev", "bench-tenant", 60, ["azure:repo:write"], "benchmark")
+              for _ in range(tokens)]
+    revoked = minted[:tokens // 10]
+    live = [token.jwt_token for token in minted[tokens // 10:]]
+    for token in revoked:
+        await manager.revoke_token(token.token_id)
+    revoked_jwts = [token.jwt_token for token in revoked]
+
+    print(f"{tokens} tokens, {validations} validations per run")
+    print(f"{'case':<36}{'validations/s':>16}{'speedup':>10}")
+
+    cache = manager.verified_cache
+    manager.verified_cache = VerifiedTokenCache(max_entries=0)
+    baseline = await validations_per_second(manager, live, validations, True)
+    print(f"{'live, no verified cache':<36}{baseline:>16.0f}{1:>9.1f}x")
+    manager.verified_cache = cache
+    for jwt_token in live:  # Steady state: every live token verified once
+        await manager.validate_token(jwt_token)
+    cached = await validations_per_second(manager, live, validations, True)
+    print(f"{'live, verified cache':<36}{cached:>16.0f}{cached / baseline:>9.1f}x")
+
+    revocation_filter = manager.revocation_filter
+    manager.revocation_filter = RevocationFilter()
+    baseline = await validations_per_second(manager, revoked_jwts, validations, False)
+    print(f"{'revoked, empty revocation filter':<36}{baseline:>16.0f}{1:>9.1f}x")
+    manager.revocation_filter = revocation_filter
+    filtered = await validations_per_second(manager, revoked_jwts, validations, False)
+    print(f"{'revoked, revocation filter':<36}{filtered:>16.0f}{filtered / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    asyncio.run(main(count, runs))
@@ -0,0 +1,289 @@
+"""
+Policy Index - Compiled role and scope policies
+Built from role_templates.yaml, the single source of truth for role scopes,
+TTLs and approval rules, and rebuilt when the file changes. Scope and
+approval checks are set lookups against the compiled snapshot instead of
+scans over per-call dict literals.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import fnmatch
+import hashlib
+import os
+import re
+import time
+import structlog
+import yaml
+
+logger = structlog.get_logger()
+
+DEFAULT_ROLE_TEMPLATES_PATH = Path(__file__).resolve().parents[3] / "role_templates.yaml"
+
+
+def _compile_patterns(patterns: Iterable[str]) -> Optional[Pattern]:
+    """One regex matching any of the shell-style ``patterns`` (None if there are none)"""
+    translated = [fnmatch.translate(pattern) for pattern in patterns]
+    return re.compile("|".join(translated)) if translated else None
+
+
+@dataclass(frozen=True)
+class RolePolicy:
+    """Compiled template of one role"""
+    name: str
+    display_name: str
+    platform: str
+    scopes: FrozenSet[str]
+    ttl_minutes: int
+    approval_required: bool
+    auto_revoke: bool
+
+
+@dataclass(frozen=True)
+class ApprovalWorkflow:
+    """Compiled approval workflow; ``auto_approve_tenants`` None means never by tenant"""
+    name: str
+    approvers: Tuple[str, ...]
+    timeout_minutes: int
+    auto_approve_tenants: Optional[Pattern]
+    auto_approve_environments: FrozenSet[str]
+
+    def auto_approves(self, tenant_id: Optional[str], environment: Optional[str]) -> bool:
+        if environment is not None and environment in self.auto_approve_environments:
+            return True
+        return bool(tenant_id and self.auto_approve_tenants and self.auto_approve_tenants.match(tenant_id))
+
+
+class CompiledPolicies:
+    """
+    Immutable snapshot of the role templates
+
+    Every scope any role grants is resolved up front against the
+    ``scope_contains`` triggers and the ``require_approval`` list, so an
+    evaluation only does dict and frozenset lookups per requested scope.
+    """
+
+    def __init__(self, templates: Dict[str, Any], version: str):
+        self.version = version
+
+        self.roles: Dict[str, RolePolicy] = {}
+        for name, role in (templates.get("roles") or {}).items():
+            self.roles[name] = RolePolicy(
+                name=name,
+                display_name=role.get("name", name),
+                platform=role.get("platform", ""),
+                scopes=frozenset(role.get("scopes") or ()),
+                ttl_minutes=int(role.get("ttl_minutes", 60)),
+                approval_required=bool(role.get("approval_required", False)),
+                auto_revoke=bool(role.get("auto_revoke", True))
+            )
+        self.all_scopes: FrozenSet[str] = frozenset().union(*(role.scopes for role in self.roles.values()))
+
+        # POC tenant patterns auto-approve every workflow that allows auto-approval at all
+        poc_mode = templates.get("poc_mode") or {}
+        poc_patterns = [item["tenant_id"] for item in poc_mode.get("auto_approve_patterns") or ()
+                        if "tenant_id" in item] if poc_mode.get("enabled") else []
+
+        self.workflows: Dict[str, ApprovalWorkflow] = {}
+        role_workflows: Dict[str, set] = {}
+        scope_workflows: Dict[str, set] = {}
+        action_workflows: Dict[str, set] = {}
+        for name, workflow in (templates.get("approval_workflows") or {}).items():
+            if not workflow.get("approval_required", True):
+                continue
+            conditions = workflow.get("auto_approve_conditions") or []
+            tenant_patterns = [c["tenant_id_matches"] for c in conditions if "tenant_id_matches" in c]
+            if conditions:
+                tenant_patterns += poc_patterns
+            self.workflows[name] = ApprovalWorkflow(
+                name=name,
+                approvers=tuple(workflow.get("approvers") or ()),
+                timeout_minutes=int(workflow.get("timeout_minutes", 60)),
+                auto_approve_tenants=_compile_patterns(tenant_patterns),
+                auto_approve_environments=frozenset(c["environment"] for c in conditions if "environment" in c)
+            )
+            for trigger in workflow.get("triggers") or ():
+                if "role_template" in trigger:
+                    role_workflows.setdefault(trigger["role_template"], set()).add(name)
+                if "action" in trigger:
+                    action_workflows.setdefault(trigger["action"], set()).add(name)
+                if "scope_contains" in trigger:
+                    for scope in self.all_scopes:
+                        if trigger["scope_contains"] in scope:
+                            scope_workflows.setdefault(scope, set()).add(name)
+        self.role_workflows = {key: frozenset(value) for key, value in role_workflows.items()}
+        self.scope_workflows = {key: frozenset(value) for key, value in scope_workflows.items()}
+        self.action_workflows = {key: frozenset(value) for key, value in action_workflows.items()}
+
+        constraints = templates.get("security_constraints") or {}
+        lifetime = constraints.get("token_lifetime") or {}
+        self.max_ttl_minutes = int(lifetime.get("max_ttl_minutes", 240))
+        self.high_privilege_max_ttl = int(lifetime.get("high_privilege_max_ttl", self.max_ttl_minutes))
+        self.default_ttl_minutes = int(lifetime.get("default_ttl_minutes", 30))
+        restrictions = constraints.get("scope_restrictions") or {}
+        self.never_combine: Tuple[FrozenSet[str], ...] = tuple(
+            frozenset(group) for group in restrictions.get("never_combine") or ())
+        self.approval_scopes: FrozenSet[str] = frozenset(restrictions.get("require_approval") or ())
+        audit = constraints.get("audit_requirements") or {}
+        self.audited_operations: FrozenSet[str] = frozenset(
+            list(audit.get("always_audit") or ()) + list(audit.get("sensitive_operations") or ()))
+        self.sensitive_operations: FrozenSet[str] = frozenset(audit.get("sensitive_operations") or ())
+
+    def allowed_scopes(self, agent_role: str) -> FrozenSet[str]:
+        role = self.roles.get(agent_role)
+        return role.scopes if role else frozenset()
+
+    def evaluate(
+        self,
+        operation: str,
+        agent_role: Optional[str] = None,
+        scopes: Iterable[str] = (),
+        tenant_id: Optional[str] = None,
+        ttl_minutes: Optional[int] = None,
+        environment: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Decision for ``operation`` by ``agent_role`` with ``scopes``
+
+        ``decision`` is 'denied' when a rule is violated, 'approval_required'
+        when an approval workflow applies and does not auto-approve, and
+        'approved' otherwise.
+        """
+        violations: List[str] = []
+        requested = list(scopes)
+        workflows = set(self.action_workflows.get(operation, ()))
+        role = None
+
+        if agent_role is not None:
+            role = self.roles.get(agent_role)
+            if role is None:
+                violations.append(f"Unknown role {agent_role}")
+            else:
+                workflows.update(self.role_workflows.get(agent_role, ()))
+        allowed = role.scopes if role else frozenset()
+        granted = [scope for scope in requested if scope in allowed]
+        denied = [scope for scope in requested if scope not in allowed]
+        if role is not None and denied:
+            violations.append(f"Scopes not allowed for role {agent_role}: {', '.join(denied)}")
+
+        granted_set = frozenset(granted)
+        for group in self.never_combine:
+            if group <= granted_set:
+                violations.append(f"Scopes cannot be combined: {', '.join(sorted(group))}")
+        for scope in granted:
+            workflows.update(self.scope_workflows.get(scope, ()))
+
+        approval_required = bool(workflows) or not granted_set.isdisjoint(self.approval_scopes) or \
+            bool(role and role.approval_required)
+
+        max_ttl = self.max_ttl_minutes
+        if role is not None:
+            max_ttl = min(max_ttl, role.ttl_minutes)
+        if approval_required:
+            max_ttl = min(max_ttl, self.high_privilege_max_ttl)
+        if ttl_minutes is not None and ttl_minutes > max_ttl:
+            violations.append(f"TTL {ttl_minutes} minutes exceeds the {max_ttl} minute limit")
+
+        auto_approved = approval_required and bool(workflows) and all(
+            self.workflows[name].auto_approves(tenant_id, environment) for name in workflows)
+
+        if violations:
+            decision = "denied"
+        elif approval_required and not auto_approved:
+            decision = "approval_required"
+        else:
+            decision = "approved"
+
+        return {
+            "operation": operation,
+            "decision": decision,
+            "approved": decision == "approved",
+            "agent_role": agent_role,
+            "granted_scopes": granted,
+            "denied_scopes": denied,
+            "approval_required": approval_required,
+            "auto_approved": auto_approved,
+            "approval_workflows": sorted(workflows),
+            "approvers": sorted({approver for name in workflows for approver in self.workflows[name].approvers}),
+            "max_ttl_minutes": max_ttl,
+            "audit_required": operation in self.audited_operations,
+            "sensitive": operation in self.sensitive_operations,
+            "violations": violations,
+            "policy_version": self.version
+        }
+
+
+class PolicyIndex:
+    """
+    Compiled policies for a role templates file, rebuilt when it changes
+
+    The file's mtime and size are checked at most every
+    ``check_interval_seconds`` on access; a changed file is recompiled and
+    swapped in atomically. A file that fails to load leaves the previous
+    policies in place.
+    """
+
+    def __init__(self, path: Path, check_interval_seconds: float = 2.0,
+                 clock=time.monotonic):
+        self.path = Path(path)
+        self.check_interval_seconds = check_interval_seconds
+        self.clock = clock
+        self._policies: Optional[CompiledPolicies] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked_at = clock()
+        self.reloads = 0
+        self.reload()
+
+    def reload(self):
+        """Compile the templates file now (raises if it cannot be loaded)"""
+        stat = os.stat(self.path)
+        content = self.path.read_bytes()
+        policies = CompiledPolicies(yaml.safe_load(content) or {}, hashlib.sha256(content).hexdigest()[:12])
+        self._policies = policies
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+        self.reloads += 1
+        logger.info("Role templates compiled",
+                   path=str(self.path),
+                   roles=len(policies.roles),
+                   scopes=len(policies.all_scopes),
+                   version=policies.version)
+
+    @property
+    def policies(self) -> CompiledPolicies:
+        now = self.clock()
+        if now - self._checked_at >= self.check_interval_seconds:
+            self._checked_at = now
+            self._reload_if_changed()
+        return self._policies
+
+    def _reload_if_changed(self):
+        try:
+            stat = os.stat(self.path)
+            if (stat.st_mtime_ns, stat.st_size) != self._stamp:
+                self.reload()
+        except Exception as e:
+            logger.error("Failed to reload role templates, keeping previous policies",
+                        path=str(self.path), error=str(e))
+
+    def allowed_scopes(self, agent_role: str) -> FrozenSet[str]:
+        return self.policies.allowed_scopes(agent_role)
+
+    def validate_operation(self, operation: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate ``operation`` with agent_role, scopes, tenant_id, ttl_minutes and environment from ``context``"""
+        return self.policies.evaluate(
+            operation,
+            agent_role=context.get("agent_role"),
+            scopes=context.get("scopes") or (),
+            tenant_id=context.get("tenant_id"),
+            ttl_minutes=context.get("ttl_minutes"),
+            environment=context.get("environment")
+        )
+
+
+def create_policy_index() -> PolicyIndex:
+    """Policy index for POLICY_ROLE_TEMPLATES_PATH (default: role_templates.yaml at the repo root)"""
+    return PolicyIndex(
+        Path(os.getenv("POLICY_ROLE_TEMPLATES_PATH", str(DEFAULT_ROLE_TEMPLATES_PATH))),
+        check_interval_seconds=float(os.getenv("POLICY_RELOAD_INTERVAL_SECONDS", "2"))
+    )
@@ -0,0 +1,135 @@
+"""
+Token Cache - Local fast paths for ephemeral token validation
+Keeps RSA verification off the hot path for tokens seen recently and
+rejects revoked token IDs before any signature check runs
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import math
+import time
+
+
+class VerifiedTokenCache:
+    """
+    Verified tokens keyed by the digest of their JWT
+
+    Entries live until the token's ``exp`` or ``ttl_seconds``, whichever
+    comes first, and are dropped immediately when their token is revoked.
+    Keys are SHA-256 digests of the full JWT, so only byte-identical tokens
+    that passed verification before can hit.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[Any, float]]" = OrderedDict()  # digest -> (token, valid_until)
+        self._digests: Dict[str, bytes] = {}  # token_id -> digest
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(jwt_token: str) -> bytes:
+        return hashlib.sha256(jwt_token.encode()).digest()
+
+    def get(self, jwt_token: str) -> Optional[Any]:
+        """Token of a previously verified JWT, or None"""
+        if not self.max_entries:
+            return None
+        digest = self._digest(jwt_token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        token, valid_until = entry
+        if self.clock() >= valid_until:
+            self._drop(digest, token.token_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return token
+
+    def put(self, jwt_token: str, token: Any, exp: float):
+        """Remember a verified JWT's token until ``exp`` (epoch seconds) or the cache TTL"""
+        if not self.max_entries:
+            return
+        digest = self._digest(jwt_token)
+        self._entries[digest] = (token, min(exp, self.clock() + self.ttl_seconds))
+        self._entries.move_to_end(digest)
+        self._digests[token.token_id] = digest
+        while len(self._entries) > self.max_entries:
+            _, (old_token, _) = self._entries.popitem(last=False)
+            self._digests.pop(old_token.token_id, None)
+
+    def invalidate(self, token_id: str):
+        digest = self._digests.get(token_id)
+        if digest is not None:
+            self._drop(digest, token_id)
+
+    def clear(self):
+        """Drop every entry (e.g. after revocations may have been missed)"""
+        self._entries.clear()
+        self._digests.clear()
+
+    def _drop(self, digest: bytes, token_id: str):
+        self._entries.pop(digest, None)
+        self._digests.pop(token_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevocationFilter:
+    """
+    Bloom filter of revoked token IDs
+
+    Two generations are rotated every ``retention_seconds`` (the longest
+    token TTL), so an ID is remembered for at least that long while memory
+    stays fixed at about 1.8 bytes per revocation per generation (at a 0.1%
+    false positive rate). A hit means "possibly revoked" and is confirmed
+    against the token record; a miss is definitive.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001, retention_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.retention_seconds = retention_seconds
+        self.clock = clock
+        self._current = bytearray((self.size + 7) // 8)
+        self._previous = bytearray((self.size + 7) // 8)
+        self._rotated_at = clock()
+
+    def _positions(self, token_id: str):
+        digest = hashlib.blake2b(token_id.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def _rotate(self):
+        elapsed = self.clock() - self._rotated_at
+        if elapsed < self.retention_seconds:
+            return
+        if elapsed >= 2 * self.retention_seconds:
+            self._previous = bytearray(len(self._current))
+        else:
+            self._previous = self._current
+        self._current = bytearray(len(self._previous))
+        self._rotated_at = self.clock()
+
+    def add(self, token_id: str):
+        self._rotate()
+        for position in self._positions(token_id):
+            self._current[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, token_id: str) -> bool:
+        self._rotate()
+        positions = self._positions(token_id)
+        return any(
+            all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+            for bits in (self._current, self._previous)
+        )
@@ -1,34 +1,110 @@
 """
 Token Manager - Ephemeral token lifecycle management
 Handles minting, validation, and revocation of short-lived agent tokens
+
+Token state lives in a TokenStore (src/core/token_store.py): in process for
+a single replica, or in Redis so every replica validates and revokes the
+same tokens. Revoked and expired tokens stay as tombstones for a retention
+window (status lookups, audit) and are then compacted; metrics are counters
+maintained by the store instead of scans over every token.
+
+Signing runs in a TokenSigner pool (src/core/token_signer.py) with the
+algorithm chosen by TOKEN_SIGNING_ALGORITHM (RS256, ES256 or EdDSA).
+Role scopes come from the compiled role templates (src/core/policy_index.py).
+
+Public keys are published as a JWKS (tokens carry the key's ``kid``) and
+revocations as signed revocation lists, so governance factories can verify
+tokens locally (src/integrations/token_verifier.py).
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import json
+import os
 import uuid
 import jwt
 import structlog
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 
 from ..models.agent_models import EphemeralToken
 from ..integrations.vault_client import VaultClient
+from .policy_index import PolicyIndex, create_policy_index
+from .token_cache import RevocationFilter, VerifiedTokenCache
+from .token_signer import SUPPORTED_ALGORITHMS, TokenSigner, generate_signing_key, private_key_pem
+from .token_store import MAX_TOKEN_TTL, TokenStore, create_token_store
 
 logger = structlog.get_logger()
 
+# Audience of signed revocation lists; distinct from token audiences so a
+# list can never pass as an access token or the other way round
+REVOCATION_LIST_AUDIENCE = "governance-factories:revocations"
+
+# Receives each signed revocation list (e.g. to push it to the factories)
+RevocationListener = Callable[[str], Awaitable[None]]
+
 class TokenManager:
     """
     Manages ephemeral tokens for autonomous agents
     Integrates with Azure Key Vault for secure key storage
     """
     
-    def __init__(self):
-        self.vault_client = VaultClient()
-        self.active_tokens: Dict[str, EphemeralToken] = {}
-        self.token_lineage: Dict[str, List[str]] = {}  # parent_id -> [child_ids]
+    def __init__(
+        self,
+        tombstone_retention_minutes: Optional[int] = None,
+        cleanup_interval_seconds: Optional[float] = None,
+        store: Optional[TokenStore] = None,
+        policy_index: Optional[PolicyIndex] = None,
+        vault_client: Optional[VaultClient] = None
+    ):
+        # Created on first use (initialize) from AZURE_KEY_VAULT_URL, so a
+        # manager given its signing key directly never needs Key Vault
+        self.vault_client = vault_client
         self.signing_key = None
         self.public_key = None
+        self.signer: Optional[TokenSigner] = None
+        
+        # kid -> public key, algorithm, JWK and retirement time; retired
+        # keys stay published until the tokens they signed have expired
+        self.verification_keys: Dict[str, Dict[str, Any]] = {}
+        self.revocation_listeners: List[RevocationListener] = []
+        self._publish_tasks: set = set()
+        
+        # Signing algorithm and the pool that signs off the event loop
+        self.signing_algorithm = os.getenv("TOKEN_SIGNING_ALGORITHM", "RS256")
+        if self.signing_algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"TOKEN_SIGNING_ALGORITHM must be one of {', '.join(SUPPORTED_ALGORITHMS)}")
+        self.signer_mode = os.getenv("TOKEN_SIGNER_MODE", "thread")
+        self.signer_workers = int(os.getenv("TOKEN_SIGNER_WORKERS", "2"))
+        self.signer_max_batch = int(os.getenv("TOKEN_SIGNER_MAX_BATCH", "32"))
+        self.signer_batch_window_ms = float(os.getenv("TOKEN_SIGNER_BATCH_WINDOW_MS", "1"))
+        self.bulk_mint_max = int(os.getenv("TOKEN_BULK_MINT_MAX", "100"))
+        
+        # Revoked/expired tokens are kept this long before being compacted
+        if tombstone_retention_minutes is None:
+            tombstone_retention_minutes = int(os.getenv("TOKEN_TOMBSTONE_RETENTION_MINUTES", "60"))
+        if cleanup_interval_seconds is None:
+            cleanup_interval_seconds = float(os.getenv("TOKEN_CLEANUP_INTERVAL_SECONDS", "30"))
+        self.tombstone_retention = timedelta(minutes=tombstone_retention_minutes)
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        
+        # Token records and lineage (TOKEN_STORE_BACKEND=memory or redis)
+        self.store = store or create_token_store(self.tombstone_retention)
+        self._cleanup_task: Optional[asyncio.Task] = None
+        
+        # Role scopes compiled from role_templates.yaml (reloaded on change)
+        self.policy_index = policy_index or create_policy_index()
+        
+        # Validation fast paths: recently verified JWTs and revoked token IDs
+        self.verified_cache = VerifiedTokenCache(
+            max_entries=int(os.getenv("TOKEN_VERIFY_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("TOKEN_VERIFY_CACHE_TTL_SECONDS", "60"))
+        )
+        self.revocation_filter = RevocationFilter(
+            capacity=int(os.getenv("TOKEN_REVOCATION_FILTER_CAPACITY", "100000")),
+            retention_seconds=60 * 60  # Maximum token TTL
+        )
         
     async def initialize(self):
         """Initialize token manager with signing keys"""
@@ -37,44 +113,93 @@ class TokenManager:
         # Get or create signing keys from Azure Key Vault
         await self._initialize_signing_keys()
         
+        # Revocations made by other replicas invalidate local caches
+        await self.store.start(self._on_revoked, self._on_revocations_missed)
+        
+        # Expire and compact tokens in the background
+        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        
         logger.info("Token Manager initialized")
     
     async def _initialize_signing_keys(self):
         """Initialize JWT signing keys from Azure Key Vault"""
         try:
+            # RS256 keeps the original secret name; other algorithms get their own
+            secret_name = "jwt-signing-key"
+            if self.signing_algorithm != "RS256":
+                secret_name = f"jwt-signing-key-{self.signing_algorithm.lower()}"
+            loop = asyncio.get_running_loop()
+            if self.vault_client is None:
+                vault_url = os.getenv("AZURE_KEY_VAULT_URL")
+                if not vault_url:
+                    raise ValueError("AZURE_KEY_VAULT_URL must be set to load the signing key")
+                self.vault_client = VaultClient(vault_url)
+            
             # Try to get existing keys from vault
-            private_key_pem = await self.vault_client.get_secret("jwt-signing-key")
+            stored_pem = await self.vault_client.get_secret(secret_name)
             
-            if private_key_pem:
-                self.signing_key = serialization.load_pem_private_key(
-                    private_key_pem.encode(),
+            if stored_pem:
+                signing_key = serialization.load_pem_private_key(
+                    stored_pem.encode(),
                     password=None
                 )
             else:
-                # Generate new key pair
-                self.signing_key = rsa.generate_private_key(
-                    public_exponent=65537,
-                    key_size=2048
-                )
+                # Generate new key pair (seconds for RSA, so off the event loop)
+                signing_key = await loop.run_in_executor(None, generate_signing_key, self.signing_algorithm)
                 
                 # Store in vault
-                private_pem = self.signing_key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.PKCS8,
-                    encryption_algorithm=serialization.NoEncryption()
-                )
-                
-                await self.vault_client.set_secret("jwt-signing-key", private_pem.decode())
+                await self.vault_client.set_secret(secret_name, private_key_pem(signing_key).decode())
             
-            # Extract public key
-            self.public_key = self.signing_key.public_key()
+            await self.set_signing_key(signing_key)
             
-            logger.info("JWT signing keys initialized")
+            logger.info("JWT signing keys initialized", algorithm=self.signing_algorithm)
             
         except Exception as e:
             logger.error("Failed to initialize signing keys", error=str(e))
             raise e
     
+    async def set_signing_key(self, signing_key):
+        """Sign new tokens with ``signing_key`` (must match the signing algorithm)"""
+        signer = TokenSigner(
+            signing_key,
+            algorithm=self.signing_algorithm,
+            mode=self.signer_mode,
+            workers=self.signer_workers,
+            max_batch=self.signer_max_batch,
+            batch_window_ms=self.signer_batch_window_ms
+        )
+        previous, self.signer = self.signer, signer
+        self.signing_key = signing_key
+        self.public_key = signing_key.public_key()
+        
+        current_time = datetime.utcnow()
+        for kid, entry in list(self.verification_keys.items()):
+            if kid == signer.kid:
+                entry["retired_at"] = None
+            elif entry["retired_at"] is None:
+                entry["retired_at"] = current_time
+            elif current_time - entry["retired_at"] > MAX_TOKEN_TTL:
+                del self.verification_keys[kid]
+        self.verification_keys[signer.kid] = {
+            "public_key": self.public_key,
+            "algorithm": self.signing_algorithm,
+            "jwk": signer.jwk,
+            "retired_at": None
+        }
+        
+        if previous is not None:
+            await previous.close()
+    
+    def get_jwks(self) -> Dict[str, Any]:
+        """JSON Web Key Set of the current and recently retired verification keys"""
+        cutoff = datetime.utcnow() - MAX_TOKEN_TTL
+        return {
+            "keys": [
+                entry["jwk"] for entry in self.verification_keys.values()
+                if entry["retired_at"] is None or entry["retired_at"] > cutoff
+            ]
+        }
+    
     async def mint_token(
         self,
         agent_role: str,
@@ -99,72 +224,22 @@ class TokenManager:
             EphemeralToken with JWT and metadata
         """
         try:
-            # Validate TTL limits
-            if ttl_minutes > 60:
-                raise ValueError("Maximum TTL is 60 minutes for security")
-            
-            if ttl_minutes < 5:
-                raise ValueError("Minimum TTL is 5 minutes")
-            
-            # Generate token ID and timestamps
-            token_id = str(uuid.uuid4())
-            issued_at = datetime.utcnow()
-            expires_at = issued_at + timedelta(minutes=ttl_minutes)
-            
-            # Validate scopes against agent role
-            validated_scopes = await self._validate_agent_scopes(agent_role, scopes)
-            
-            # Create JWT payload
-            jwt_payload = {
-                "jti": token_id,  # JWT ID
-                "iss": "controller-service",  # Issuer
-                "sub": f"agent:{agent_role}",  # Subject
-                "aud": "governance-factories",  # Audience
-                "iat": int(issued_at.timestamp()),  # Issued at
-                "exp": int(expires_at.timestamp()),  # Expires at
-                "tenant_id": tenant_id,
-                "agent_role": agent_role,
-                "scopes": validated_scopes,
-                "reason": reason,
-                "parent_token_id": parent_token_id
-            }
-            
-            # Sign JWT
-            jwt_token = jwt.encode(
-                jwt_payload,
-                self.signing_key,
-                algorithm="RS256"
-            )
-            
-            # Create ephemeral token object
-            ephemeral_token = EphemeralToken(
-                token_id=token_id,
-                jwt_token=jwt_token,
-                agent_role=agent_role,
-                tenant_id=tenant_id,
-                scopes=validated_scopes,
-                issued_at=issued_at,
-                expires_at=expires_at,
-                parent_token_id=parent_token_id,
-                revoked=False,
-                reason=reason
+            jwt_payload, ephemeral_token = await self._prepare_token(
+                agent_role, tenant_id, ttl_minutes, scopes, reason, parent_token_id
             )
             
-            # Store in active tokens
-            self.active_tokens[token_id] = ephemeral_token
+            # Sign in the signer pool, batched with concurrent mints
+            ephemeral_token.jwt_token = await self._get_signer().sign(jwt_payload)
             
-            # Track lineage
-            if parent_token_id:
-                if parent_token_id not in self.token_lineage:
-                    self.token_lineage[parent_token_id] = []
-                self.token_lineage[parent_token_id].append(token_id)
+            # Store token and track lineage
+            await self.store.add(ephemeral_token)
             
             logger.info("Ephemeral token minted",
-                       token_id=token_id,
+                       token_id=ephemeral_token.token_id,
                        agent_role=agent_role,
                        tenant_id=tenant_id,
                        ttl_minutes=ttl_minutes,
-                       scopes=validated_scopes)
+                       scopes=ephemeral_token.scopes)
             
             return ephemeral_token
             
@@ -172,6 +247,110 @@ class TokenManager:
             logger.error("Failed to mint token", error=str(e))
             raise e
     
+    async def mint_tokens(self, requests: List[Dict[str, Any]]) -> List[EphemeralToken]:
+        """
+        Mint several ephemeral tokens in one call
+        
+        Every request is validated before anything is signed, so either all
+        tokens are minted or none are. Signatures are produced in pool
+        batches and the tokens stored in one batched write.
+        
+        Args:
+            requests: mint_token keyword arguments for each token
+            
+        Returns:
+            EphemeralTokens in request order
+        """
+        try:
+            if len(requests) > self.bulk_mint_max:
+                raise ValueError(f"At most {self.bulk_mint_max} tokens can be minted per call")
+            
+            prepared = []
+            for index, request in enumerate(requests):
+                try:
+                    prepared.append(await self._prepare_token(**request))
+                except ValueError as e:
+                    raise ValueError(f"Token request {index}: {e}") from e
+            
+            jwt_tokens = await self._get_signer().sign_many([jwt_payload for jwt_payload, _ in prepared])
+            ephemeral_tokens = []
+            for (_, ephemeral_token), jwt_token in zip(prepared, jwt_tokens):
+                ephemeral_token.jwt_token = jwt_token
+                ephemeral_tokens.append(ephemeral_token)
+            
+            await self.store.add_many(ephemeral_tokens)
+            
+            logger.info("Ephemeral tokens minted",
+                       count=len(ephemeral_tokens),
+                       token_ids=[token.token_id for token in ephemeral_tokens[:100]])
+            
+            return ephemeral_tokens
+            
+        except Exception as e:
+            logger.error("Failed to mint tokens", count=len(requests), error=str(e))
+            raise e
+    
+    async def _prepare_token(
+        self,
+        agent_role: str,
+        tenant_id: str,
+        ttl_minutes: int,
+        scopes: List[str],
+        reason: str,
+        parent_token_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], EphemeralToken]:
+        """Validate a mint request; returns the JWT payload and the unsigned token"""
+        # Validate TTL limits
+        if ttl_minutes > 60:
+            raise ValueError("Maximum TTL is 60 minutes for security")
+        
+        if ttl_minutes < 5:
+            raise ValueError("Minimum TTL is 5 minutes")
+        
+        # Generate token ID and timestamps
+        token_id = str(uuid.uuid4())
+        issued_at = datetime.utcnow()
+        expires_at = issued_at + timedelta(minutes=ttl_minutes)
+        
+        # Validate scopes against agent role
+        validated_scopes = await self._validate_agent_scopes(agent_role, scopes)
+        
+        # Create JWT payload
+        jwt_payload = {
+            "jti": token_id,  # JWT ID
+            "iss": "controller-service",  # Issuer
+            "sub": f"agent:{agent_role}",  # Subject
+            "aud": "governance-factories",  # Audience
+            "iat": int(issued_at.timestamp()),  # Issued at
+            "exp": int(expires_at.timestamp()),  # Expires at
+            "tenant_id": tenant_id,
+            "agent_role": agent_role,
+            "scopes": validated_scopes,
+            "reason": reason,
+            "parent_token_id": parent_token_id
+        }
+        
+        # Create ephemeral token object (JWT filled in once signed)
+        ephemeral_token = EphemeralToken(
+            token_id=token_id,
+            jwt_token="",
+            agent_role=agent_role,
+            tenant_id=tenant_id,
+            scopes=validated_scopes,
+            issued_at=issued_at,
+            expires_at=expires_at,
+            parent_token_id=parent_token_id,
+            revoked=False,
+            reason=reason
+        )
+        
+        return jwt_payload, ephemeral_token
+    
+    def _get_signer(self) -> TokenSigner:
+        if self.signer is None:
+            raise RuntimeError("Token manager has no signing key; call initialize() first")
+        return self.signer
+    
     async def _validate_agent_scopes(
         self, 
         agent_role: str, 
@@ -179,51 +358,8 @@ class TokenManager:
     ) -> List[str]:
         """Validate and filter scopes based on agent role permissions"""
         
-        # Define role-based scope mappings
-        role_scope_mappings = {
-            "github_bootstrap": [
-                "github:org:create",
-                "github:repo:create", 
-                "github:team:create",
-                "github:actions:write",
-                "github:secrets:write"
-            ],
-            "founder": [
-                "ai:reasoning",
-                "ai:analysis", 
-                "ai:writing",
-                "db:tenant:config:write",
-                "db:business:metrics:read"
-            ],
-            "dev": [
-                "azure:project:create",
-                "azure:repo:write",
-                "azure:pipeline:write",
-                "azure:workitem:write",
-                "github:repo:write"
-            ],
-            "ops": [
-                "azure:pipeline:manage",
-                "azure:serviceconnection:create",
-                "azure:agentpool:manage",
-                "azure:monitoring:write"
-            ],
-            "security": [
-                "azure:security:scan",
-                "azure:compliance:validate",
-                "azure:policy:enforce",
-                "github:security:read"
-            ],
-            "finance": [
-                "db:cost:tracking:write",
-                "db:budget:read",
-                "azure:usage:read",
-                "ai:cost:optimization"
-            ]
-        }
-        
-        # Get allowed scopes for role
-        allowed_scopes = role_scope_mappings.get(agent_role, [])
+        # Allowed scopes for the role, compiled from the role templates
+        allowed_scopes = self.policy_index.allowed_scopes(agent_role)
         
         # Filter requested scopes to only allowed ones
         validated_scopes = [
@@ -252,11 +388,37 @@ class TokenManager:
             EphemeralToken if valid, None if invalid
         """
         try:
+            # Fast path: this exact JWT was verified recently (entries are
+            # dropped on revocation, including revocations on other replicas)
+            token = self.verified_cache.get(jwt_token)
+            if token is not None:
+                return token
+            
+            # Reject revoked token IDs before any signature verification
+            token_id = self._unverified_token_id(jwt_token)
+            if token_id is not None and token_id in self.revocation_filter:
+                token = await self.store.get(token_id)
+                if token is None or token.revoked:
+                    logger.warning("Token has been revoked", token_id=token_id)
+                    return None
+            
+            # Key named by the kid header; tokens minted before kids were
+            # added have none and were signed with the current key
+            kid = (self._unverified_segment(jwt_token, 0) or {}).get("kid")
+            if kid is None:
+                public_key, algorithm = self.public_key, self.signing_algorithm
+            elif kid in self.verification_keys:
+                public_key = self.verification_keys[kid]["public_key"]
+                algorithm = self.verification_keys[kid]["algorithm"]
+            else:
+                logger.warning("Token signed with unknown key", kid=kid)
+                return None
+            
             # Decode and verify JWT
             payload = jwt.decode(
                 jwt_token,
-                self.public_key,
-                algorithms=["RS256"],
+                public_key,
+                algorithms=[algorithm],
                 audience="governance-factories",
                 issuer="controller-service"
             )
@@ -264,23 +426,24 @@ class TokenManager:
             token_id = payload["jti"]
             
             # Check if token exists and is not revoked
-            if token_id not in self.active_tokens:
+            token = await self.store.get(token_id)
+            if token is None:
                 logger.warning("Token not found in active tokens", token_id=token_id)
                 return None
-            
-            token = self.active_tokens[token_id]
+            token.jwt_token = token.jwt_token or jwt_token
             
             if token.revoked:
                 logger.warning("Token has been revoked", token_id=token_id)
                 return None
             
             # Check expiration
-            if datetime.utcnow() > token.expires_at:
+            current_time = datetime.utcnow()
+            if current_time > token.expires_at:
                 logger.warning("Token has expired", token_id=token_id)
-                # Auto-revoke expired token
-                await self.revoke_token(token_id)
+                await self.store.retire([token_id], "expired", current_time)
                 return None
             
+            self.verified_cache.put(jwt_token, token, payload["exp"])
             logger.info("Token validated successfully", token_id=token_id)
             return token
             
@@ -305,30 +468,20 @@ class TokenManager:
             Revocation result with affected tokens
         """
         try:
-            if token_id not in self.active_tokens:
+            if await self.store.get(token_id) is None:
                 raise ValueError(f"Token {token_id} not found")
             
-            revoked_tokens = []
-            
-            # Revoke the target token
-            token = self.active_tokens[token_id]
-            token.revoked = True
-            token.revoked_at = datetime.utcnow()
-            revoked_tokens.append(token_id)
-            
-            # Recursively revoke child tokens
-            child_tokens = await self._get_child_tokens(token_id)
-            for child_token_id in child_tokens:
-                if child_token_id in self.active_tokens:
-                    child_token = self.active_tokens[child_token_id]
-                    child_token.revoked = True
-                    child_token.revoked_at = datetime.utcnow()
-                    revoked_tokens.append(child_token_id)
+            # Revoke the target token and all its descendants in one store write
+            revoked_tokens = [token_id] + await self._get_child_tokens(token_id)
+            revoked_at = datetime.utcnow()
+            await self.store.retire(revoked_tokens, "revoked", revoked_at)
+            await self._on_revoked(revoked_tokens)
+            self._publish_revocations([(revoked_id, revoked_at) for revoked_id in revoked_tokens])
             
             logger.info("Tokens revoked",
                        primary_token=token_id,
                        revoked_count=len(revoked_tokens),
-                       revoked_tokens=revoked_tokens)
+                       revoked_tokens=revoked_tokens[:100])  # Subtrees can be very large
             
             return {
                 "revoked_tokens": revoked_tokens,
@@ -341,27 +494,35 @@ class TokenManager:
             raise e
     
     async def _get_child_tokens(self, parent_token_id: str) -> List[str]:
-        """Recursively get all child tokens"""
-        child_tokens = []
+        """
+        Get all descendant tokens, breadth first
         
-        direct_children = self.token_lineage.get(parent_token_id, [])
-        child_tokens.extend(direct_children)
+        One batched store read per lineage level; the visited set lists each
+        token once and stops on cycles.
+        """
+        descendants = []
+        visited = {parent_token_id}
+        frontier = [parent_token_id]
         
-        # Recursively get children of children
-        for child_id in direct_children:
-            grandchildren = await self._get_child_tokens(child_id)
-            child_tokens.extend(grandchildren)
+        while frontier:
+            next_frontier = []
+            for children in await self.store.children_of(frontier):
+                for child_id in children:
+                    if child_id not in visited:
+                        visited.add(child_id)
+                        next_frontier.append(child_id)
+            descendants.extend(next_frontier)
+            frontier = next_frontier
         
-        return child_tokens
+        return descendants
     
     async def get_token_status(self, token_id: str) -> Dict[str, Any]:
         """Get detailed token status and metadata"""
         
-        if token_id not in self.active_tokens:
+        token = await self.store.get(token_id)
+        if token is None:
             return {"status": "not_found"}
         
-        token = self.active_tokens[token_id]
-        
         status = "active"
         if token.revoked:
             status = "revoked"
@@ -378,55 +539,142 @@ class TokenManager:
             "expires_at": token.expires_at,
             "revoked_at": getattr(token, 'revoked_at', None),
             "parent_token_id": token.parent_token_id,
-            "child_tokens": self.token_lineage.get(token_id, []),
+            "child_tokens": await self.store.children(token_id),
             "reason": token.reason
         }
     
+    @staticmethod
+    def _unverified_segment(jwt_token: str, index: int) -> Optional[Dict[str, Any]]:
+        """Header (0) or payload (1) without verifying the signature"""
+        try:
+            segment = jwt_token.split(".")[index]
+            decoded = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+        except (IndexError, ValueError):
+            return None
+        return decoded if isinstance(decoded, dict) else None
+    
+    @classmethod
+    def _unverified_token_id(cls, jwt_token: str) -> Optional[str]:
+        """``jti`` claim without verifying the signature (only used to reject early)"""
+        return (cls._unverified_segment(jwt_token, 1) or {}).get("jti")
+    
+    async def signed_revocation_list(
+        self,
+        revocations: Optional[List[Tuple[str, datetime]]] = None
+    ) -> str:
+        """
+        Revocation list as a JWT signed with the token signing key
+        
+        Args:
+            revocations: (token_id, revoked_at) pairs to include; defaults to
+                every token revoked within the maximum token TTL (snapshot)
+        """
+        current_time = datetime.utcnow()
+        snapshot = revocations is None
+        if snapshot:
+            revocations = await self.store.revoked_since(current_time - MAX_TOKEN_TTL)
+        
+        return await self._get_signer().sign({
+            "iss": "controller-service",
+            "aud": REVOCATION_LIST_AUDIENCE,
+            "iat": int(current_time.timestamp()),
+            "exp": int((current_time + MAX_TOKEN_TTL).timestamp()),
+            "snapshot": snapshot,
+            "revocations": [[token_id, int(revoked_at.timestamp())] for token_id, revoked_at in revocations]
+        })
+    
+    def _publish_revocations(self, revocations: List[Tuple[str, datetime]]):
+        """Hand a signed list of new revocations to the listeners without delaying the caller"""
+        if not self.revocation_listeners or not revocations:
+            return
+        task = asyncio.create_task(self._notify_revocation_listeners(revocations))
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+    
+    async def _notify_revocation_listeners(self, revocations: List[Tuple[str, datetime]]):
+        try:
+            revocation_list = await self.signed_revocation_list(revocations)
+            results = await asyncio.gather(
+                *(listener(revocation_list) for listener in self.revocation_listeners),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error("Revocation listener failed", error=str(result))
+        except Exception as e:
+            logger.error("Failed to publish revocations", count=len(revocations), error=str(e))
+    
+    async def _on_revoked(self, token_ids: List[str]):
+        """Drop revoked tokens from the local validation caches"""
+        for token_id in token_ids:
+            self.verified_cache.invalidate(token_id)
+            self.revocation_filter.add(token_id)
+    
+    async def _on_revocations_missed(self):
+        """
+        Broadcast revocations may have been lost (listener reconnected):
+        forget every verified JWT and reload recent revocations from the store
+        """
+        self.verified_cache.clear()
+        for token_id, _ in await self.store.revoked_since(datetime.utcnow() - MAX_TOKEN_TTL):
+            self.revocation_filter.add(token_id)
+        logger.warning("Cleared verified token cache after a revocation broadcast gap")
+    
     async def cleanup_expired_tokens(self):
-        """Background task to cleanup expired tokens"""
+        """Expire due tokens and compact old tombstones (cost proportional to what changed)"""
         try:
             current_time = datetime.utcnow()
-            expired_tokens = []
-            
-            for token_id, token in self.active_tokens.items():
-                if current_time > token.expires_at and not token.revoked:
-                    token.revoked = True
-                    token.revoked_at = current_time
-                    expired_tokens.append(token_id)
+            expired_tokens = await self.store.expire_due(current_time)
+            for token_id in expired_tokens:
+                self.verified_cache.invalidate(token_id)
+            compacted = await self.store.compact(current_time)
             
-            if expired_tokens:
+            if expired_tokens or compacted:
                 logger.info("Cleaned up expired tokens", 
                            count=len(expired_tokens),
+                           compacted=compacted,
                            tokens=expired_tokens)
             
         except Exception as e:
             logger.error("Failed to cleanup expired tokens", error=str(e))
     
+    async def _cleanup_loop(self):
+        """Background task running cleanup_expired_tokens every cleanup_interval_seconds"""
+        try:
+            while True:
+                await asyncio.sleep(self.cleanup_interval_seconds)
+                await self.cleanup_expired_tokens()
+        except asyncio.CancelledError:
+            logger.debug("Token cleanup loop cancelled")
+    
     async def get_metrics(self) -> Dict[str, Any]:
-        """Get token manager metrics"""
-        current_time = datetime.utcnow()
-        
-        active_count = len([
-            t for t in self.active_tokens.values()
-            if not t.revoked and current_time <= t.expires_at
-        ])
-        
-        expired_count = len([
-            t for t in self.active_tokens.values()
-            if current_time > t.expires_at
-        ])
+        """
+        Get token manager metrics
         
-        revoked_count = len([
-            t for t in self.active_tokens.values()
-            if t.revoked
-        ])
+        Counts come from incrementally maintained counters; revoked_tokens and
+        expired_tokens cover tombstones still within the retention window.
+        """
+        current_time = datetime.utcnow()
+        counters = await self.store.metrics(current_time)
         
         return {
-            "total_tokens": len(self.active_tokens),
-            "active_tokens": active_count,
-            "expired_tokens": expired_count,
-            "revoked_tokens": revoked_count,
-            "token_lineages": len(self.token_lineage),
+            "total_tokens": counters["total"],
+            "active_tokens": counters["active"],
+            "expired_tokens": counters["expired"],
+            "revoked_tokens": counters["revoked"],
+            "tokens_minted_total": counters["minted_total"],
+            "tokens_revoked_total": counters["revoked_total"],
+            "tokens_expired_total": counters["expired_total"],
+            "tokens_compacted_total": counters["compacted_total"],
+            "token_lineages": counters.get("lineages"),
+            "token_store": type(self.store).__name__,
+            "verified_cache_entries": len(self.verified_cache),
+            "verified_cache_hits": self.verified_cache.hits,
+            "verified_cache_misses": self.verified_cache.misses,
+            "signing_algorithm": self.signing_algorithm,
+            "signing_key_id": self.signer.kid if self.signer else None,
+            "tokens_signed": self.signer.tokens_signed if self.signer else 0,
+            "signing_batches": self.signer.batches_signed if self.signer else 0,
             "last_updated": current_time
         }
     
@@ -434,14 +682,21 @@ class TokenManager:
         """Cleanup on service shutdown"""
         logger.info("Cleaning up Token Manager")
         
-        # Revoke all active tokens
-        active_tokens = [
-            token_id for token_id, token in self.active_tokens.items()
-            if not token.revoked and datetime.utcnow() <= token.expires_at
-        ]
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
         
-        for token_id in active_tokens:
-            await self.revoke_token(token_id)
+        # Revoke all active tokens, unless other replicas still serve them
+        active_tokens = [] if self.store.shared else await self.store.live_token_ids()
+        if active_tokens:
+            revoked_at = datetime.utcnow()
+            await self.store.retire(active_tokens, "revoked", revoked_at)
+            # Factories keep trusting the published keys after this process is gone
+            self._publish_revocations([(token_id, revoked_at) for token_id in active_tokens])
+        if self._publish_tasks:
+            await asyncio.gather(*self._publish_tasks, return_exceptions=True)
+        if self.signer is not None:
+            await self.signer.close()
+        await self.store.close()
         
         logger.info("Token Manager cleanup completed",
                    revoked_count=len(active_tokens))
@@ -0,0 +1,216 @@
+"""
+Token Signer - JWT signing off the event loop
+Signs ephemeral tokens in a small thread or process pool, coalescing
+concurrent mints into batches so a burst of agents does not stall the
+controller's event loop on RSA operations
+
+Every token carries the ``kid`` of its key (RFC 7638 thumbprint) so
+consumers can pick the verification key from the published JWKS.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import jwt
+from jwt.algorithms import get_default_algorithms
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+# RS256 is the default; ES256 (P-256) and EdDSA (Ed25519) sign several
+# times faster with much smaller keys and signatures
+SUPPORTED_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+SIGNER_MODES = ("inline", "thread", "process")
+
+_KEY_TYPES = {
+    "RS256": rsa.RSAPrivateKey,
+    "ES256": ec.EllipticCurvePrivateKey,
+    "EdDSA": ed25519.Ed25519PrivateKey,
+}
+
+
+def generate_signing_key(algorithm: str):
+    """New private key for ``algorithm`` (blocking; run it in an executor)"""
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported signing algorithm {algorithm}")
+
+
+def check_signing_key(signing_key, algorithm: str):
+    """Raise ValueError unless ``signing_key`` can sign ``algorithm`` tokens"""
+    key_type = _KEY_TYPES.get(algorithm)
+    if key_type is None:
+        raise ValueError(f"Unsupported signing algorithm {algorithm}")
+    if not isinstance(signing_key, key_type):
+        raise ValueError(f"Signing key {type(signing_key).__name__} cannot sign {algorithm} tokens")
+    if algorithm == "ES256" and not isinstance(signing_key.curve, ec.SECP256R1):
+        raise ValueError(f"ES256 requires a P-256 key, not {signing_key.curve.name}")
+
+
+# JWK members hashed into the RFC 7638 thumbprint, per key type
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+
+
+def public_jwk(public_key, algorithm: str) -> Dict[str, str]:
+    """Public JWK for ``public_key`` with its ``kid``, ``alg`` and ``use``"""
+    jwk = get_default_algorithms()[algorithm].to_jwk(public_key, as_dict=True)
+    jwk.pop("key_ops", None)
+    thumbprint_input = json.dumps({member: jwk[member] for member in _THUMBPRINT_MEMBERS[jwk["kty"]]},
+                                  separators=(",", ":"), sort_keys=True)
+    kid = base64.urlsafe_b64encode(hashlib.sha256(thumbprint_input.encode()).digest()).rstrip(b"=").decode()
+    return dict(jwk, kid=kid, alg=algorithm, use="sig")
+
+
+def private_key_pem(signing_key) -> bytes:
+    return signing_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+def _sign_batch(signing_key, algorithm: str, kid: str, payloads: List[Dict[str, Any]]) -> List[str]:
+    headers = {"kid": kid}
+    return [jwt.encode(payload, signing_key, algorithm=algorithm, headers=headers) for payload in payloads]
+
+
+# Signing key of a process pool worker, loaded once by _init_worker
+_worker_key = None
+_worker_algorithm: Optional[str] = None
+_worker_kid: Optional[str] = None
+
+
+def _init_worker(pem: bytes, algorithm: str, kid: str):
+    global _worker_key, _worker_algorithm, _worker_kid
+    _worker_key = serialization.load_pem_private_key(pem, password=None)
+    _worker_algorithm = algorithm
+    _worker_kid = kid
+
+
+def _sign_batch_in_worker(payloads: List[Dict[str, Any]]) -> List[str]:
+    return _sign_batch(_worker_key, _worker_algorithm, _worker_kid, payloads)
+
+
+class TokenSigner:
+    """
+    Signs JWT payloads in a worker pool
+
+    ``sign`` coalesces calls made within ``batch_window_ms`` of each other
+    (up to ``max_batch``) into one pool task, which amortises the hand-off to
+    the pool and, in process mode, the pickling round trip. ``sign_many``
+    splits an already known list into batches directly.
+
+    Modes:
+    - ``thread``: a thread pool; keeps the event loop responsive
+    - ``process``: a process pool holding a copy of the key in each worker;
+      spreads RSA signing over several cores
+    - ``inline``: sign on the event loop (previous behaviour)
+    """
+
+    def __init__(self, signing_key, algorithm: str = "RS256", mode: str = "thread",
+                 workers: int = 2, max_batch: int = 32, batch_window_ms: float = 1.0):
+        if mode not in SIGNER_MODES:
+            raise ValueError(f"Unsupported signer mode {mode}")
+        check_signing_key(signing_key, algorithm)
+        self.signing_key = signing_key
+        self.algorithm = algorithm
+        self.jwk = public_jwk(signing_key.public_key(), algorithm)
+        self.kid = self.jwk["kid"]
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window_ms / 1000
+        self._executor: Optional[Executor] = None
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+        self.batches_signed = 0
+        self.tokens_signed = 0
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.mode == "inline":
+            return None
+        if self._executor is None:
+            if self.mode == "process":
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(private_key_pem(self.signing_key), self.algorithm, self.kid)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jwt-signer")
+        return self._executor
+
+    async def _sign_batch(self, payloads: List[Dict[str, Any]]) -> List[str]:
+        executor = self._get_executor()
+        if executor is None:
+            tokens = _sign_batch(self.signing_key, self.algorithm, self.kid, payloads)
+        elif self.mode == "process":
+            tokens = await asyncio.get_running_loop().run_in_executor(executor, _sign_batch_in_worker, payloads)
+        else:
+            tokens = await asyncio.get_running_loop().run_in_executor(
+                executor, _sign_batch, self.signing_key, self.algorithm, self.kid, payloads)
+        self.batches_signed += 1
+        self.tokens_signed += len(tokens)
+        return tokens
+
+    async def sign(self, payload: Dict[str, Any]) -> str:
+        """Signed JWT for ``payload``, batched with concurrent calls"""
+        if self.mode == "inline":
+            return (await self._sign_batch([payload]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await future
+
+    async def sign_many(self, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Signed JWTs for ``payloads``, in order"""
+        if not payloads:
+            return []
+        batches = [payloads[i:i + self.max_batch] for i in range(0, len(payloads), self.max_batch)]
+        results = await asyncio.gather(*(self._sign_batch(batch) for batch in batches))
+        return [jwt_token for batch in results for jwt_token in batch]
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _resolve(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        try:
+            tokens = await self._sign_batch([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), jwt_token in zip(batch, tokens):
+            if not future.done():
+                future.set_result(jwt_token)
+
+    async def close(self):
+        """Sign what is queued and shut the pool down"""
+        self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
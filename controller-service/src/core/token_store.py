@@ -0,0 +1,455 @@
+"""
+Token Store - Pluggable persistence for ephemeral token state
+Keeps token records, lineage and lifecycle counters either in process
+(single replica) or in Redis, so every controller replica sees the same
+tokens and revocations
+
+Both backends retire tokens as "revoked" or "expired" tombstones that are
+compacted after a retention window, and keep metrics as counters instead of
+scanning records. Revocations are broadcast to every replica so local
+validation caches can drop the affected tokens immediately.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import asyncio
+import heapq
+import os
+import structlog
+
+from ..models.agent_models import EphemeralToken
+
+logger = structlog.get_logger()
+
+# Longest token TTL accepted by TokenManager.mint_token
+MAX_TOKEN_TTL = timedelta(minutes=60)
+
+RevocationHandler = Callable[[List[str]], Awaitable[None]]
+# Called when broadcast revocations may have been missed (listener reconnected)
+GapHandler = Callable[[], Awaitable[None]]
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch seconds of a naive UTC datetime"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+
+
+class TokenStore(ABC):
+    """
+    Interface of token state backends
+
+    ``shared`` is True when other replicas see the same state (the store
+    then outlives any single controller process).
+    """
+
+    shared = False
+
+    async def add(self, token: EphemeralToken):
+        """Store a newly minted token and link it to its parent"""
+        await self.add_many([token])
+
+    @abstractmethod
+    async def add_many(self, tokens: List[EphemeralToken]):
+        """Store newly minted tokens in one batched write"""
+
+    @abstractmethod
+    async def get(self, token_id: str) -> Optional[EphemeralToken]:
+        """Token record (revoked and expired tombstones included), or None"""
+
+    async def children(self, token_id: str) -> List[str]:
+        """Direct children of a token"""
+        return (await self.children_of([token_id]))[0]
+
+    @abstractmethod
+    async def children_of(self, token_ids: List[str]) -> List[List[str]]:
+        """Direct children of each token, in one batched read"""
+
+    @abstractmethod
+    async def retire(self, token_ids: List[str], kind: str, retired_at: datetime) -> List[str]:
+        """
+        Mark live tokens revoked (kind 'revoked' or 'expired') in one batch
+        and broadcast revocations; returns the IDs that were still live
+        """
+
+    @abstractmethod
+    async def expire_due(self, current_time: datetime) -> List[str]:
+        """Retire tokens whose expiry has passed"""
+
+    @abstractmethod
+    async def compact(self, current_time: datetime) -> int:
+        """Drop tombstones older than the retention window"""
+
+    @abstractmethod
+    async def metrics(self, current_time: datetime) -> Dict[str, int]:
+        """Lifecycle counters (active, revoked, expired, *_total, total)"""
+
+    @abstractmethod
+    async def live_token_ids(self) -> List[str]:
+        """IDs of tokens that are neither revoked nor expired"""
+
+    @abstractmethod
+    async def revoked_since(self, cutoff: datetime) -> List[Tuple[str, datetime]]:
+        """(token_id, revoked_at) of tokens revoked at or after ``cutoff`` and not compacted yet"""
+
+    async def start(self, on_revoked: RevocationHandler, on_gap: Optional[GapHandler] = None):
+        """
+        Start delivering revocations made by other replicas to ``on_revoked``;
+        ``on_gap`` runs whenever some of them may have been missed
+        """
+
+    async def close(self):
+        pass
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Process-local store
+
+    Expiry is indexed in a min-heap keyed by expires_at, so a cleanup pass
+    only touches tokens that actually expired; tombstones are compacted in
+    the order they were created.
+    """
+
+    def __init__(self, tombstone_retention: timedelta):
+        self.tombstone_retention = tombstone_retention
+        self.tokens: Dict[str, EphemeralToken] = {}
+        self.lineage: Dict[str, Set[str]] = {}  # Adjacency index: parent_id -> {child_ids}
+        # (expires_at, token_id); entries of tokens revoked early are skipped when they surface
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        # (tombstoned_at, token_id, kind) in tombstoning order, so compaction pops from the left
+        self._tombstones: Deque[Tuple[datetime, str, str]] = deque()
+        self._counters: Dict[str, int] = {
+            "active": 0,
+            "revoked": 0,
+            "expired": 0,
+            "minted_total": 0,
+            "revoked_total": 0,
+            "expired_total": 0,
+            "compacted_total": 0
+        }
+
+    async def add_many(self, tokens: List[EphemeralToken]):
+        for token in tokens:
+            self.tokens[token.token_id] = token
+            heapq.heappush(self._expiry_heap, (token.expires_at, token.token_id))
+            if token.parent_token_id:
+                self.lineage.setdefault(token.parent_token_id, set()).add(token.token_id)
+        self._counters["active"] += len(tokens)
+        self._counters["minted_total"] += len(tokens)
+
+    async def get(self, token_id: str) -> Optional[EphemeralToken]:
+        return self.tokens.get(token_id)
+
+    async def children_of(self, token_ids: List[str]) -> List[List[str]]:
+        lineage = self.lineage
+        return [list(lineage.get(token_id, ())) for token_id in token_ids]
+
+    async def retire(self, token_ids: List[str], kind: str, retired_at: datetime) -> List[str]:
+        retired = []
+        for token_id in token_ids:
+            token = self.tokens.get(token_id)
+            if token is None:
+                continue
+            if not token.revoked:
+                self._counters["active"] -= 1
+                self._counters[kind] += 1
+                self._counters[f"{kind}_total"] += 1
+                self._tombstones.append((retired_at, token_id, kind))
+                retired.append(token_id)
+            token.revoked = True
+            token.revoked_at = retired_at
+        return retired
+
+    async def expire_due(self, current_time: datetime) -> List[str]:
+        due = []
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            due.append(heapq.heappop(self._expiry_heap)[1])
+        return await self.retire(due, "expired", current_time) if due else []
+
+    async def compact(self, current_time: datetime) -> int:
+        cutoff = current_time - self.tombstone_retention
+        compacted = 0
+        while self._tombstones and self._tombstones[0][0] <= cutoff:
+            _, token_id, kind = self._tombstones.popleft()
+            token = self.tokens.pop(token_id, None)
+            if token is None:
+                continue
+            self._counters[kind] -= 1
+            compacted += 1
+
+            # Unlink from the parent and hand live children over to it, so
+            # lineage revocation still reaches them
+            children = self.lineage.pop(token_id, ())
+            siblings = self.lineage.get(token.parent_token_id)
+            if siblings is not None:
+                siblings.discard(token_id)
+                siblings.update(child_id for child_id in children if child_id in self.tokens)
+                if not siblings:
+                    del self.lineage[token.parent_token_id]
+
+        self._counters["compacted_total"] += compacted
+        return compacted
+
+    async def metrics(self, current_time: datetime) -> Dict[str, int]:
+        await self.expire_due(current_time)
+        return dict(self._counters, total=len(self.tokens), lineages=len(self.lineage))
+
+    async def live_token_ids(self) -> List[str]:
+        return [token_id for token_id, token in self.tokens.items() if not token.revoked]
+
+    async def revoked_since(self, cutoff: datetime) -> List[Tuple[str, datetime]]:
+        revoked = []
+        for retired_at, token_id, kind in reversed(self._tombstones):
+            if retired_at < cutoff:
+                break
+            if kind == "revoked":
+                revoked.append((token_id, retired_at))
+        revoked.reverse()
+        return revoked
+
+
+class RedisTokenStore(TokenStore):
+    """
+    Redis store shared by all controller replicas (redis.asyncio client)
+
+    Keys (``key_prefix`` defaults to ``tokens``):
+        {prefix}:t:{token_id}     hash with short field names, EXPIREAT exp + retention
+        {prefix}:c:{token_id}     set of child token IDs
+        {prefix}:live             sorted set of unrevoked token IDs by exp
+        {prefix}:revoked          sorted set of revoked token IDs by revocation time
+        {prefix}:stats            hash of cumulative counters
+        {prefix}:revocations      pub/sub channel of revoked token IDs
+
+    Records and lineage sets expire through their TTLs; the sorted sets are
+    trimmed by score, so expiry and compaction cost O(log n + changed).
+    Tokens past exp stay in ``live`` until compaction and count as expired.
+
+    Pub/sub does not buffer: when the subscription drops, the listener
+    resubscribes with backoff (``reconnect_delay`` doubling up to
+    ``max_reconnect_delay``) and reports the gap so callers can drop state
+    that a missed revocation could have invalidated.
+    """
+
+    shared = True
+
+    def __init__(self, redis_client, tombstone_retention: timedelta, key_prefix: str = "tokens",
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.redis = redis_client
+        self.tombstone_retention = tombstone_retention
+        self.key_prefix = key_prefix
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.key_prefix,) + parts)
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def add_many(self, tokens: List[EphemeralToken]):
+        pipe = self.redis.pipeline(transaction=False)
+        for token in tokens:
+            expires_at = _epoch(token.expires_at)
+            record = {
+                "r": token.agent_role,
+                "n": token.tenant_id,
+                "s": " ".join(token.scopes),
+                "i": int(_epoch(token.issued_at)),
+                "e": int(expires_at),
+                "w": token.reason,
+            }
+            if token.parent_token_id:
+                record["p"] = token.parent_token_id
+
+            pipe.hset(self._key("t", token.token_id), mapping=record)
+            pipe.expireat(self._key("t", token.token_id), int(expires_at + self.tombstone_retention.total_seconds()))
+            pipe.zadd(self._key("live"), {token.token_id: expires_at})
+            if token.parent_token_id:
+                # Outlives every child: children expire within MAX_TOKEN_TTL of being minted
+                children_key = self._key("c", token.parent_token_id)
+                pipe.sadd(children_key, token.token_id)
+                pipe.expire(children_key, int((MAX_TOKEN_TTL + self.tombstone_retention).total_seconds()))
+        pipe.hincrby(self._key("stats"), "minted_total", len(tokens))
+        await pipe.execute()
+
+    async def get(self, token_id: str) -> Optional[EphemeralToken]:
+        raw = await self.redis.hgetall(self._key("t", token_id))
+        if not raw:
+            return None
+        record = {self._decode(k): self._decode(v) for k, v in raw.items()}
+        revoked_at = _from_epoch(float(record["x"])) if "x" in record else None
+        token = EphemeralToken(
+            token_id=token_id,
+            jwt_token="",  # Not stored; validate_token fills in the presented JWT
+            agent_role=record["r"],
+            tenant_id=record["n"],
+            scopes=record["s"].split(),
+            issued_at=_from_epoch(float(record["i"])),
+            expires_at=_from_epoch(float(record["e"])),
+            parent_token_id=record.get("p"),
+            revoked=revoked_at is not None,
+            reason=record["w"]
+        )
+        if revoked_at is not None:
+            token.revoked_at = revoked_at
+        return token
+
+    async def children_of(self, token_ids: List[str]) -> List[List[str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for token_id in token_ids:
+            pipe.smembers(self._key("c", token_id))
+        return [[self._decode(child) for child in children] for children in await pipe.execute()]
+
+    async def retire(self, token_ids: List[str], kind: str, retired_at: datetime) -> List[str]:
+        if not token_ids or kind == "expired":
+            return []  # Expiry is implicit in the live index scores
+        stamp = _epoch(retired_at)
+
+        # Only IDs still in the live index change state
+        pipe = self.redis.pipeline(transaction=False)
+        for token_id in token_ids:
+            pipe.zscore(self._key("live"), token_id)
+            pipe.zrem(self._key("live"), token_id)
+        results = await pipe.execute()
+        retired = [(token_id, expires_at) for token_id, expires_at, removed
+                   in zip(token_ids, results[::2], results[1::2]) if removed]
+        if not retired:
+            return []
+
+        retention = self.tombstone_retention.total_seconds()
+        pipe = self.redis.pipeline(transaction=False)
+        for token_id, expires_at in retired:
+            record_key = self._key("t", token_id)
+            pipe.hset(record_key, "x", stamp)
+            pipe.expireat(record_key, int(expires_at + retention))
+        pipe.zadd(self._key("revoked"), {token_id: stamp for token_id, _ in retired})
+        pipe.hincrby(self._key("stats"), "revoked_total", len(retired))
+        pipe.publish(self._key("revocations"), " ".join(token_id for token_id, _ in retired))
+        await pipe.execute()
+        return [token_id for token_id, _ in retired]
+
+    async def expire_due(self, current_time: datetime) -> List[str]:
+        # Expiry is implicit: the live index is scored by exp and records carry TTLs
+        return []
+
+    async def compact(self, current_time: datetime) -> int:
+        cutoff = _epoch(current_time - self.tombstone_retention)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(self._key("live"), "-inf", cutoff)
+        pipe.zremrangebyscore(self._key("revoked"), "-inf", cutoff)
+        expired, revoked = await pipe.execute()
+        if expired or revoked:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(self._key("stats"), "expired_compacted", expired)
+            pipe.hincrby(self._key("stats"), "compacted_total", expired + revoked)
+            await pipe.execute()
+        return expired + revoked
+
+    async def metrics(self, current_time: datetime) -> Dict[str, int]:
+        now = _epoch(current_time)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zcount(self._key("live"), f"({now}", "+inf")
+        pipe.zcount(self._key("live"), "-inf", now)
+        pipe.zcard(self._key("revoked"))
+        pipe.hgetall(self._key("stats"))
+        active, expired, revoked, raw_stats = await pipe.execute()
+        stats = {self._decode(k): int(v) for k, v in raw_stats.items()}
+        return {
+            "active": active,
+            "revoked": revoked,
+            "expired": expired,
+            "minted_total": stats.get("minted_total", 0),
+            "revoked_total": stats.get("revoked_total", 0),
+            "expired_total": stats.get("expired_compacted", 0) + expired,
+            "compacted_total": stats.get("compacted_total", 0),
+            "total": active + expired + revoked
+        }
+
+    async def live_token_ids(self) -> List[str]:
+        now = _epoch(datetime.utcnow())
+        return [self._decode(token_id) for token_id in await self.redis.zrangebyscore(self._key("live"), f"({now}", "+inf")]
+
+    async def revoked_since(self, cutoff: datetime) -> List[Tuple[str, datetime]]:
+        revoked = await self.redis.zrangebyscore(self._key("revoked"), _epoch(cutoff), "+inf", withscores=True)
+        return [(self._decode(token_id), _from_epoch(stamp)) for token_id, stamp in revoked]
+
+    async def start(self, on_revoked: RevocationHandler, on_gap: Optional[GapHandler] = None):
+        # Subscribed before returning, so revocations made from now on are delivered
+        pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub, on_revoked, on_gap))
+
+    async def _subscribe(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._key("revocations"))
+        return pubsub
+
+    @staticmethod
+    async def _close_pubsub(pubsub):
+        try:
+            await pubsub.close()
+        except Exception as e:
+            logger.debug("Error closing revocation subscription", error=str(e))
+
+    async def _listen(self, pubsub, on_revoked: RevocationHandler, on_gap: Optional[GapHandler]):
+        delay = self.reconnect_delay
+        try:
+            while True:
+                try:
+                    if pubsub is None:
+                        pubsub = await self._subscribe()
+                        self.reconnects += 1
+                        logger.info("Revocation listener resubscribed", reconnects=self.reconnects)
+                        if on_gap is not None:
+                            try:
+                                await on_gap()
+                            except Exception as e:
+                                logger.error("Failed to handle missed revocations", error=str(e))
+                    async for message in pubsub.listen():
+                        delay = self.reconnect_delay
+                        if message.get("type") != "message":
+                            continue
+                        try:
+                            await on_revoked(self._decode(message["data"]).split())
+                        except Exception as e:
+                            logger.error("Failed to apply broadcast revocation", error=str(e))
+                    raise ConnectionError("Revocation subscription ended")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Revocation listener disconnected, resubscribing",
+                                   error=str(e), retry_in=delay)
+                    if pubsub is not None:
+                        await self._close_pubsub(pubsub)
+                        pubsub = None
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        except asyncio.CancelledError:
+            logger.debug("Revocation listener cancelled")
+        finally:
+            if pubsub is not None:
+                await self._close_pubsub(pubsub)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+        await self.redis.close()
+
+
+def create_token_store(tombstone_retention: timedelta) -> TokenStore:
+    """Build the store selected by TOKEN_STORE_BACKEND (memory or redis)"""
+    backend = os.getenv("TOKEN_STORE_BACKEND", "memory").lower()
+    if backend == "redis":
+        import redis.asyncio as aioredis
+        redis_url = os.getenv("TOKEN_STORE_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        return RedisTokenStore(aioredis.from_url(redis_url), tombstone_retention,
+                               key_prefix=os.getenv("TOKEN_STORE_KEY_PREFIX", "tokens"))
+    return MemoryTokenStore(tombstone_retention)
@@ -132,6 +132,11 @@ class GovernanceFactoryClient:
             return False
         
         return self._health_status
+    
+    async def push_revocation_list(self, revocation_list: str) -> Dict[str, Any]:
+        """Deliver a signed revocation list to the factory's token verifier"""
+        return await self._make_request("POST", "/api/v1/token-revocations",
+                                        {"revocation_list": revocation_list})
 
 class GitHubGovernanceClient(GovernanceFactoryClient):
     """Client for GitHub Governance Factory"""
@@ -325,6 +330,14 @@ class GovernanceFactoryManager:
     def __init__(self):
         self.clients: Dict[str, GovernanceFactoryClient] = {}
         self._initialized = False
+        # Factories serving POST /api/v1/token-revocations; the others pick up
+        # revocations through their periodic GET /tokens/revocations sync
+        self.revocation_push_factories = [
+            name.strip() for name in os.getenv("REVOCATION_PUSH_FACTORIES", "").split(",") if name.strip()
+        ]
+        # Whole-push retries for factories still failing after the client's own request retries
+        self.revocation_push_attempts = int(os.getenv("REVOCATION_PUSH_ATTEMPTS", "3"))
+        self.revocation_push_retry_seconds = float(os.getenv("REVOCATION_PUSH_RETRY_SECONDS", "5"))
     
     async def initialize(self, configs: Dict[str, GovernanceFactoryConfig]):
         """Initialize all governance factory clients"""
@@ -388,6 +401,45 @@ class GovernanceFactoryManager:
         
         return health_status
     
+    async def push_revocation_list(self, revocation_list: str) -> Dict[str, bool]:
+        """
+        Push a signed revocation list to the ``revocation_push_factories``
+        
+        Factories that fail are retried (``revocation_push_attempts`` rounds,
+        backing off from ``revocation_push_retry_seconds``); one still failing
+        after that gets the revocations on its next periodic sync.
+        """
+        pending = [name for name in self.revocation_push_factories if name in self.clients]
+        delivered: Dict[str, bool] = {}
+        failed: List[str] = []
+        delay = self.revocation_push_retry_seconds
+        
+        if not pending:
+            return delivered
+        
+        for attempt in range(1, max(1, self.revocation_push_attempts) + 1):
+            results = await asyncio.gather(
+                *(self.clients[name].push_revocation_list(revocation_list) for name in pending),
+                return_exceptions=True
+            )
+            failed = []
+            for name, result in zip(pending, results):
+                delivered[name] = not isinstance(result, Exception)
+                if not delivered[name]:
+                    failed.append(name)
+                    logger.warning(f"Revocation push failed for {name} (attempt {attempt}): {result}")
+            if not failed or attempt >= self.revocation_push_attempts:
+                break
+            await asyncio.sleep(delay)
+            delay *= 2
+            pending = failed
+        
+        for name in failed:
+            logger.error(f"Revocation push to {name} failed after {self.revocation_push_attempts} attempts; "
+                         f"it will catch up on its next revocation sync")
+        
+        return delivered
+    
     async def get_system_status(self) -> Dict[str, Any]:
         """Get comprehensive system status"""
         health_status = await self.health_check_all()
@@ -0,0 +1,320 @@
+"""
+Controller Token Verifier
+Local verification of controller-issued ephemeral tokens for governance
+factory services, without a call back into the controller per operation
+
+- Signing keys come from the controller's JWKS endpoint and are cached;
+  a token with an unknown ``kid`` triggers a refresh (rate limited, so
+  made-up kids cannot turn into a request flood).
+- Verified claims are cached per token (until exp or ``cache_ttl``), so a
+  token used for many operations is checked cryptographically once;
+  revocation and scopes are still checked on every call.
+- Revocations arrive as signed revocation lists, pushed by the controller to
+  ``POST /api/v1/token-revocations`` (pass the body's ``revocation_list`` to
+  ``apply_revocation_list``), and are pulled on connect and then every
+  ``revocation_sync_interval`` seconds, so a push that never arrived is
+  picked up within one interval.
+
+Typical use in a factory service:
+
+    verifier = ControllerTokenVerifier.from_env()
+    await verifier.connect()
+    claims = await verifier.verify(bearer_token, required_scopes=["repo"])
+"""
+
+import asyncio
+import aiohttp
+import hashlib
+import jwt
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Must match the controller (src/core/token_manager.py)
+TOKEN_ISSUER = "controller-service"
+TOKEN_AUDIENCE = "governance-factories"
+REVOCATION_LIST_AUDIENCE = "governance-factories:revocations"
+MAX_TOKEN_TTL_SECONDS = 60 * 60
+
+
+class TokenVerificationError(Exception):
+    """Token is malformed, forged, expired, revoked or lacks a required scope"""
+
+
+class ControllerTokenVerifier:
+    """Verifies controller tokens against cached JWKS keys and a pushed revocation list"""
+
+    def __init__(self, jwks_url: str,
+                 revocations_url: Optional[str] = None,
+                 api_key: Optional[str] = None,
+                 min_refresh_interval: float = 30.0,
+                 jwks_max_age: float = 3600.0,
+                 leeway: float = 0.0,
+                 timeout: int = 10,
+                 cache_size: int = 10000,
+                 cache_ttl: float = 60.0,
+                 revocation_sync_interval: float = 60.0,
+                 clock=time.time):
+        self.jwks_url = jwks_url
+        self.revocations_url = revocations_url
+        self.api_key = api_key
+        self.min_refresh_interval = min_refresh_interval
+        self.jwks_max_age = jwks_max_age
+        self.leeway = leeway
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.revocation_sync_interval = revocation_sync_interval
+        self.clock = clock
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._keys_fetched_at: Optional[float] = None
+        self._refresh_attempted_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        # token_id -> time after which the token has expired anyway
+        self._revoked: Dict[str, float] = {}
+        self._pruned_at = clock()
+        # SHA-256 of the JWT -> (claims, valid_until)
+        self._verified: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._sync_task: Optional[asyncio.Task] = None
+        self.key_refreshes = 0
+        self.revocation_syncs = 0
+        self.revocation_sync_failures = 0
+
+    @classmethod
+    def from_env(cls) -> "ControllerTokenVerifier":
+        """Verifier for CONTROLLER_SERVICE_URL (JWKS and revocation list endpoints)"""
+        controller_url = os.getenv("CONTROLLER_SERVICE_URL", "http://localhost:8000").rstrip("/")
+        return cls(
+            jwks_url=os.getenv("CONTROLLER_JWKS_URL", f"{controller_url}/.well-known/jwks.json"),
+            revocations_url=os.getenv("CONTROLLER_REVOCATIONS_URL", f"{controller_url}/tokens/revocations"),
+            api_key=os.getenv("CONTROLLER_API_KEY"),
+            min_refresh_interval=float(os.getenv("CONTROLLER_JWKS_MIN_REFRESH_SECONDS", "30")),
+            jwks_max_age=float(os.getenv("CONTROLLER_JWKS_MAX_AGE_SECONDS", "3600")),
+            cache_size=int(os.getenv("CONTROLLER_TOKEN_CACHE_SIZE", "10000")),
+            revocation_sync_interval=float(os.getenv("CONTROLLER_REVOCATION_SYNC_SECONDS", "60"))
+        )
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def connect(self):
+        """Open the HTTP session, load the keys and the current revocation list,
+        and start the periodic revocation sync"""
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self.session = aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        await self.refresh_keys()
+        if self.revocations_url:
+            try:
+                await self.sync_revocations()
+            except Exception as e:
+                self.revocation_sync_failures += 1
+                logger.warning(f"Initial revocation list sync failed: {e}")
+            if self.revocation_sync_interval > 0:
+                self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def _sync_loop(self):
+        """Pull the full revocation list every ``revocation_sync_interval`` seconds"""
+        while True:
+            await asyncio.sleep(self.revocation_sync_interval)
+            try:
+                await self.sync_revocations()
+            except Exception as e:
+                self.revocation_sync_failures += 1
+                logger.warning(f"Revocation list sync failed, retrying in {self.revocation_sync_interval}s: {e}")
+
+    async def verify(self, jwt_token: str,
+                     required_scopes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Verify a controller token locally
+
+        Args:
+            jwt_token: Bearer token presented to the factory
+            required_scopes: Scopes the operation needs (all must be granted)
+
+        Returns:
+            Verified token claims
+        """
+        claims = await self._verified_claims(jwt_token)
+
+        if self.is_revoked(claims["jti"]):
+            raise TokenVerificationError("Token has been revoked")
+
+        if required_scopes:
+            missing = set(required_scopes).difference(claims.get("scopes") or ())
+            if missing:
+                raise TokenVerificationError(f"Token lacks scopes: {', '.join(sorted(missing))}")
+
+        return dict(claims)
+
+    async def _verified_claims(self, jwt_token: str) -> Dict[str, Any]:
+        digest = hashlib.sha256(jwt_token.encode()).digest()
+        entry = self._verified.get(digest)
+        if entry is not None:
+            if self.clock() < entry[1]:
+                self._verified.move_to_end(digest)
+                return entry[0]
+            del self._verified[digest]
+
+        try:
+            kid = jwt.get_unverified_header(jwt_token).get("kid")
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(f"Malformed token: {e}")
+
+        key = await self._key(kid)
+        try:
+            claims = jwt.decode(
+                jwt_token,
+                key.key,
+                algorithms=[key.algorithm_name],
+                audience=TOKEN_AUDIENCE,
+                issuer=TOKEN_ISSUER,
+                leeway=self.leeway,
+                options={"require": ["exp", "iat", "jti"]}
+            )
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(f"Invalid token: {e}")
+
+        if self.cache_size:
+            self._verified[digest] = (claims, min(claims["exp"], self.clock() + self.cache_ttl))
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return claims
+
+    async def _key(self, kid: Optional[str]) -> jwt.PyJWK:
+        if kid is None:
+            raise TokenVerificationError("Token has no kid header")
+
+        stale = self._keys_fetched_at is None or self.clock() - self._keys_fetched_at > self.jwks_max_age
+        if kid not in self._keys or stale:
+            await self.refresh_keys()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"Unknown signing key {kid}")
+        return key
+
+    async def refresh_keys(self):
+        """
+        Fetch the JWKS, at most once per ``min_refresh_interval``
+
+        Concurrent callers share one fetch; on failure the cached keys are
+        kept.
+        """
+        async with self._refresh_lock:
+            now = self.clock()
+            if self._refresh_attempted_at is not None and now - self._refresh_attempted_at < self.min_refresh_interval:
+                return
+            self._refresh_attempted_at = now
+
+            try:
+                jwks = await self._get_json(self.jwks_url)
+            except Exception as e:
+                logger.error(f"JWKS refresh failed, keeping {len(self._keys)} cached keys: {e}")
+                return
+
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                if jwk.get("use", "sig") != "sig" or "kid" not in jwk:
+                    continue
+                try:
+                    keys[jwk["kid"]] = jwt.PyJWK(jwk)
+                except jwt.PyJWTError as e:
+                    logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+
+            self._keys = keys
+            self._keys_fetched_at = now
+            self.key_refreshes += 1
+            logger.info(f"Loaded {len(keys)} controller signing keys")
+
+    def is_revoked(self, token_id: str) -> bool:
+        return token_id in self._revoked
+
+    async def apply_revocation_list(self, revocation_list: str) -> int:
+        """
+        Merge a signed revocation list pushed (or served) by the controller
+
+        Returns the number of newly revoked tokens. Entries are kept until
+        the tokens they name have expired.
+        """
+        try:
+            kid = jwt.get_unverified_header(revocation_list).get("kid")
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(f"Malformed revocation list: {e}")
+
+        key = await self._key(kid)
+        try:
+            claims = jwt.decode(
+                revocation_list,
+                key.key,
+                algorithms=[key.algorithm_name],
+                audience=REVOCATION_LIST_AUDIENCE,
+                issuer=TOKEN_ISSUER,
+                leeway=self.leeway
+            )
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(f"Invalid revocation list: {e}")
+
+        added = 0
+        for token_id, revoked_at in claims.get("revocations", []):
+            if token_id not in self._revoked:
+                added += 1
+            self._revoked[token_id] = max(self._revoked.get(token_id, 0), revoked_at + MAX_TOKEN_TTL_SECONDS)
+
+        self._prune_revocations()
+        if added:
+            logger.info(f"Applied revocation list: {added} new, {len(self._revoked)} tracked")
+        return added
+
+    async def sync_revocations(self) -> int:
+        """Pull the controller's current revocation list"""
+        response = await self._get_json(self.revocations_url)
+        added = await self.apply_revocation_list(response["revocation_list"])
+        self.revocation_syncs += 1
+        if added:
+            logger.warning(f"Revocation sync found {added} revocations that were not pushed")
+        return added
+
+    def _prune_revocations(self):
+        now = self.clock()
+        if now - self._pruned_at < 60:
+            return
+        self._pruned_at = now
+        self._revoked = {token_id: until for token_id, until in self._revoked.items() if until > now}
+
+    async def _get_json(self, url: str) -> Dict[str, Any]:
+        if not self.session:
+            raise RuntimeError("Verifier not connected")
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "signing_keys": sorted(self._keys),
+            "keys_fetched_at": self._keys_fetched_at,
+            "key_refreshes": self.key_refreshes,
+            "revoked_tokens": len(self._revoked),
+            "cached_tokens": len(self._verified),
+            "revocation_syncs": self.revocation_syncs,
+            "revocation_sync_failures": self.revocation_sync_failures
+        }
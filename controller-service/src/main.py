@@ -5,6 +5,7 @@ Core FastAPI application for autonomous agent management
 
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -15,8 +16,10 @@ from pydantic import BaseModel
 from .core.controller import ControllerEngine
 from .core.token_manager import TokenManager
 from .core.policy_engine import PolicyEngine
+from .core.policy_index import create_policy_index
 from .core.tenant_manager import TenantManager
 from .core.audit_manager import AuditManager
+from .integrations.governance_factories import get_governance_manager, governance_manager
 from .agents.agent_spawner import AgentSpawner
 from .models.startup_spec import StartupSpec
 from .models.agent_models import AgentSpawnRequest, AgentStatus, EphemeralToken
@@ -45,7 +48,8 @@ logger = structlog.get_logger()
 
 # Initialize core services
 controller = ControllerEngine()
-token_manager = TokenManager()
+policy_index = create_policy_index()
+token_manager = TokenManager(policy_index=policy_index)
 policy_engine = PolicyEngine()
 tenant_manager = TenantManager()
 audit_manager = AuditManager()
@@ -81,6 +85,9 @@ class TokenMintRequest(BaseModel):
     scopes: List[str]
     reason: str
 
+class BulkTokenMintRequest(BaseModel):
+    tokens: List[TokenMintRequest]
+
 class ApprovalResponse(BaseModel):
     approval_id: str
     operation: str
@@ -331,6 +338,78 @@ async def mint_token(
         logger.error("Failed to mint token", error=str(e))
         raise HTTPException(status_code=500, detail=f"Token minting failed: {str(e)}")
 
+@app.post("/tokens/mint/bulk", response_model=List[EphemeralToken])
+async def mint_tokens(
+    request: BulkTokenMintRequest,
+    token: str = Depends(security)
+):
+    """Mint several ephemeral tokens in one call (all or none)"""
+    try:
+        # Validate every token mint request before minting any
+        for index, mint_request in enumerate(request.tokens):
+            policy_result = await policy_engine.validate_token_mint(mint_request)
+            if not policy_result.approved:
+                raise HTTPException(
+                    status_code=403,
+                    detail=f"Token mint denied for request {index}: {policy_result.reason}"
+                )
+        
+        # Mint ephemeral tokens, signed in batches
+        ephemeral_tokens = await token_manager.mint_tokens([
+            {
+                "agent_role": mint_request.agent_role,
+                "tenant_id": mint_request.tenant_id,
+                "ttl_minutes": mint_request.ttl_minutes,
+                "scopes": mint_request.scopes,
+                "reason": mint_request.reason
+            }
+            for mint_request in request.tokens
+        ])
+        
+        # Log audit events
+        for mint_request, ephemeral_token in zip(request.tokens, ephemeral_tokens):
+            audit_event = AuditEvent(
+                event_type="token_minted",
+                startup_id=mint_request.tenant_id,
+                details={
+                    "token_id": ephemeral_token.token_id,
+                    "agent_role": mint_request.agent_role,
+                    "scopes": mint_request.scopes,
+                    "ttl_minutes": mint_request.ttl_minutes,
+                    "reason": mint_request.reason,
+                    "bulk_size": len(ephemeral_tokens)
+                },
+                timestamp=datetime.utcnow()
+            )
+            await audit_manager.log_event(audit_event)
+        
+        return ephemeral_tokens
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to mint tokens", count=len(request.tokens), error=str(e))
+        raise HTTPException(status_code=500, detail=f"Token minting failed: {str(e)}")
+
+@app.get("/.well-known/jwks.json")
+async def get_jwks():
+    """Public token verification keys (JWKS), looked up by the tokens' kid header"""
+    return JSONResponse(token_manager.get_jwks(), headers={"Cache-Control": "public, max-age=300"})
+
+@app.get("/tokens/revocations")
+async def get_revocation_list(token: str = Depends(security)):
+    """Signed list of tokens revoked within the maximum token TTL"""
+    try:
+        return {"revocation_list": await token_manager.signed_revocation_list()}
+    except Exception as e:
+        logger.error("Failed to build revocation list", error=str(e))
+        raise HTTPException(status_code=500, detail=f"Revocation list failed: {str(e)}")
+
+async def push_revocation_list(revocation_list: str):
+    """Push signed revocation lists to the factories listed in REVOCATION_PUSH_FACTORIES"""
+    governance_manager = await get_governance_manager()
+    await governance_manager.push_revocation_list(revocation_list)
+
 @app.post("/tokens/{token_id}/revoke")
 async def revoke_token(token_id: str, token: str = Depends(security)):
     """Revoke ephemeral token"""
@@ -370,9 +449,9 @@ async def validate_operation(
     context: Dict[str, Any],
     token: str = Depends(security)
 ):
-    """Validate operation against governance policies"""
+    """Validate operation against governance policies (compiled role templates)"""
     try:
-        validation_result = await policy_engine.validate_operation(operation, context)
+        validation_result = policy_index.validate_operation(operation, context)
         return validation_result
     except Exception as e:
         logger.error("Failed to validate operation", error=str(e))
@@ -406,6 +485,8 @@ async def startup_event():
     logger.info("Controller Service starting up")
     await controller.initialize()
     await token_manager.initialize()
+    if governance_manager.revocation_push_factories:
+        token_manager.revocation_listeners.append(push_revocation_list)
     await policy_engine.initialize()
     await tenant_manager.initialize()
     await audit_manager.initialize()
@@ -205,7 +205,7 @@ class AgentInstance(BaseModel):
                 "failed_requests": 2,
                 "created_at": "2025-09-07T10:00:00Z",
                 "started_at": "2025-09-07T10:02:00Z",
-                "error_message": null,
+                "error_message": None,
                 "health_status": "healthy"
             }
         }
@@ -330,3 +330,22 @@ class AgentTask(BaseModel):
                 "progress_percentage": 65.0
             }
         }
+
+class EphemeralToken(BaseModel):
+    """Short-lived, scoped JWT minted by the controller for an agent"""
+    
+    token_id: str = Field(..., description="Unique token identifier (JWT jti)")
+    jwt_token: str = Field(..., description="Signed JWT")
+    agent_role: str = Field(..., description="Role the token was minted for")
+    tenant_id: str = Field(..., description="Tenant the token is bound to")
+    scopes: List[str] = Field(default_factory=list, description="Granted scopes")
+    
+    # Lifetime
+    issued_at: datetime = Field(..., description="Issue time (UTC)")
+    expires_at: datetime = Field(..., description="Expiry time (UTC)")
+    
+    # Lineage and revocation
+    parent_token_id: Optional[str] = Field(None, description="Token this one was minted from")
+    revoked: bool = Field(default=False, description="Revoked or expired")
+    revoked_at: Optional[datetime] = Field(None, description="Revocation or expiry time")
+    reason: str = Field(default="", description="Reason given for minting")
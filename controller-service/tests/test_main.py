@@ -0,0 +1,71 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from src.core.token_manager import TokenManager
+from src.core.token_signer import generate_signing_key
+from src.core.token_store import MemoryTokenStore
+
+main = pytest.importorskip("src.main", exc_type=ImportError)
+
+HEADERS = {"Authorization": "Bearer operator-token"}
+
+
+def mint_request(ttl_minutes=30):
+    return {"agent_role": "dev", "tenant_id": "acme", "ttl_minutes": ttl_minutes,
+            "scopes": ["azure:repo:write"], "reason": "test"}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = TokenManager(store=MemoryTokenStore(timedelta(minutes=60)))
+    monkeypatch.setattr(main, "token_manager", manager)
+    monkeypatch.setattr(main, "audit_manager", SimpleNamespace(log_event=AsyncMock()))
+    return manager
+
+
+def approve_all_but(monkeypatch, denied_index=None):
+    calls = []
+
+    async def validate_token_mint(mint_request):
+        calls.append(mint_request)
+        return SimpleNamespace(approved=len(calls) - 1 != denied_index, reason="denied by test")
+
+    monkeypatch.setattr(main, "policy_engine", SimpleNamespace(validate_token_mint=validate_token_mint))
+
+
+async def post_bulk(tokens):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://controller") as client:
+        return await client.post("/tokens/mint/bulk", json={"tokens": tokens}, headers=HEADERS)
+
+
+@pytest.mark.asyncio
+async def test_bulk_mint_denied_at_index_mints_nothing(manager, monkeypatch):
+    await manager.set_signing_key(generate_signing_key(manager.signing_algorithm))
+    approve_all_but(monkeypatch, denied_index=2)
+
+    response = await post_bulk([mint_request() for _ in range(4)])
+
+    assert response.status_code == 403
+    assert "request 2" in response.json()["detail"]
+    assert (await manager.get_metrics())["tokens_minted_total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_mint_invalid_request_at_index_mints_nothing(manager, monkeypatch):
+    await manager.set_signing_key(generate_signing_key(manager.signing_algorithm))
+    approve_all_but(monkeypatch)
+
+    response = await post_bulk([mint_request(), mint_request(ttl_minutes=120), mint_request()])
+
+    assert response.status_code == 500
+    assert "Token request 1" in response.json()["detail"]
+    metrics = await manager.get_metrics()
+    assert metrics["tokens_minted_total"] == 0
+    assert metrics["tokens_signed"] == 0
+    main.audit_manager.log_event.assert_not_awaited()
+
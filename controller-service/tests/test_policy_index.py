@@ -0,0 +1,136 @@
+import os
+
+import pytest
+import yaml
+
+from src.core.policy_index import CompiledPolicies, PolicyIndex
+
+TEMPLATES = {
+    "roles": {
+        "dev": {"name": "Developer", "scopes": ["repo:read", "repo:write", "secrets:read"], "ttl_minutes": 60},
+        "ops": {"scopes": ["deploy:prod", "secrets:write"], "ttl_minutes": 30},
+        "sec": {"scopes": ["audit:read"], "approval_required": True}
+    },
+    "approval_workflows": {
+        "prod_deploy": {
+            "approvers": ["cto"],
+            "triggers": [{"scope_contains": "deploy"}],
+            "auto_approve_conditions": [{"tenant_id_matches": "poc-*"}, {"environment": "staging"}]
+        },
+        "repo_deletion": {"approvers": ["sec-lead"], "triggers": [{"action": "delete_repo"}]},
+        "disabled": {"approval_required": False, "triggers": [{"role_template": "dev"}]}
+    },
+    "security_constraints": {
+        "token_lifetime": {"max_ttl_minutes": 240, "high_privilege_max_ttl": 15},
+        "scope_restrictions": {"never_combine": [["repo:write", "secrets:read"]],
+                               "require_approval": ["secrets:write"]},
+        "audit_requirements": {"always_audit": ["mint_token"], "sensitive_operations": ["delete_repo"]}
+    }
+}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def write_templates(path, templates, mtime_ns):
+    path.write_text(templates if isinstance(templates, str) else yaml.safe_dump(templates))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def policies():
+    return CompiledPolicies(TEMPLATES, "test")
+
+
+def test_evaluate_approves_allowed_scopes(policies):
+    result = policies.evaluate("mint_token", agent_role="dev", scopes=["repo:read"], ttl_minutes=30)
+
+    assert result["decision"] == "approved"
+    assert result["granted_scopes"] == ["repo:read"]
+    assert result["max_ttl_minutes"] == 60
+    assert result["audit_required"] and not result["sensitive"]
+    assert result["approval_workflows"] == []  # Workflows with approval_required false never apply
+
+
+def test_evaluate_denies_rule_violations(policies):
+    result = policies.evaluate("mint_token", agent_role="dev", scopes=["repo:write", "secrets:read", "deploy:prod"],
+                               ttl_minutes=90)
+
+    assert result["decision"] == "denied"
+    assert result["denied_scopes"] == ["deploy:prod"]
+    assert len(result["violations"]) == 3  # Scope not allowed, never_combine and TTL over the role's 60
+    assert policies.evaluate("mint_token", agent_role="intern")["violations"] == ["Unknown role intern"]
+
+
+def test_evaluate_requires_approval_unless_auto_approved(policies):
+    result = policies.evaluate("mint_token", agent_role="ops", scopes=["deploy:prod"], tenant_id="acme")
+    assert result["decision"] == "approval_required"
+    assert result["approval_workflows"] == ["prod_deploy"]
+    assert result["approvers"] == ["cto"]
+    assert result["max_ttl_minutes"] == 15
+
+    for context in ({"tenant_id": "poc-42"}, {"tenant_id": "acme", "environment": "staging"}):
+        result = policies.evaluate("mint_token", agent_role="ops", scopes=["deploy:prod"], **context)
+        assert result["decision"] == "approved"
+        assert result["auto_approved"]
+
+    # Approval from require_approval scopes or the role itself has no workflow to auto-approve it
+    assert policies.evaluate("mint_token", agent_role="ops", scopes=["secrets:write"],
+                             tenant_id="poc-42")["decision"] == "approval_required"
+    assert policies.evaluate("mint_token", agent_role="sec", scopes=["audit:read"])["decision"] == "approval_required"
+
+    result = policies.evaluate("delete_repo")
+    assert result["decision"] == "approval_required"
+    assert result["approvers"] == ["sec-lead"]
+    assert result["sensitive"]
+
+
+def test_index_reloads_changed_file_after_check_interval(tmp_path):
+    path = tmp_path / "role_templates.yaml"
+    write_templates(path, TEMPLATES, 1_000_000_000)
+    clock = FakeClock()
+    index = PolicyIndex(path, check_interval_seconds=2, clock=clock)
+    version = index.policies.version
+
+    updated = dict(TEMPLATES, roles=dict(TEMPLATES["roles"], qa={"scopes": ["tests:run"]}))
+    write_templates(path, updated, 2_000_000_000)
+    clock.now += 1
+    assert index.allowed_scopes("qa") == frozenset()
+
+    clock.now += 1
+    assert index.allowed_scopes("qa") == frozenset({"tests:run"})
+    assert index.policies.version != version
+    assert index.reloads == 2
+
+    # Unchanged files are not recompiled
+    clock.now += 2
+    index.policies
+    assert index.reloads == 2
+
+
+@pytest.mark.parametrize("broken", ["roles: [unclosed", "roles: [dev, ops]", None])
+def test_index_keeps_previous_policies_when_file_fails_to_load(tmp_path, broken):
+    path = tmp_path / "role_templates.yaml"
+    write_templates(path, TEMPLATES, 1_000_000_000)
+    clock = FakeClock()
+    index = PolicyIndex(path, check_interval_seconds=2, clock=clock)
+    previous = index.policies
+
+    if broken is None:
+        path.unlink()
+    else:
+        write_templates(path, broken, 2_000_000_000)
+    clock.now += 2
+    assert index.policies is previous
+    assert index.validate_operation("mint_token", {"agent_role": "dev", "scopes": ["repo:read"]})["approved"]
+
+    # A fixed file is picked up on the next check
+    write_templates(path, dict(TEMPLATES, roles={"dev": {"scopes": ["repo:read"]}}), 3_000_000_000)
+    clock.now += 2
+    assert index.policies is not previous
+    assert list(index.policies.roles) == ["dev"]
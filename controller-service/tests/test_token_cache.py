@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from src.core.token_cache import RevocationFilter, VerifiedTokenCache
+from src.core.token_manager import TokenManager
+from src.core.token_signer import generate_signing_key
+from src.core.token_store import MemoryTokenStore, RedisTokenStore
+
+SCOPES = ["azure:repo:write"]
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def vault():
+    """Key Vault is not reached: tests install signing keys directly."""
+    with patch("src.core.token_manager.VaultClient"):
+        yield
+
+
+async def start_manager(store=None):
+    manager = TokenManager(store=store or MemoryTokenStore(timedelta(minutes=60)))
+    manager.signing_algorithm = "ES256"
+    await manager.set_signing_key(generate_signing_key("ES256"))
+    return manager
+
+
+async def eventually(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+def test_verified_cache_expires_and_invalidates():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_entries=2, ttl_seconds=60, clock=clock)
+    token = SimpleNamespace(token_id="t1")
+
+    # Entries live until exp when that comes before the cache TTL
+    cache.put("jwt-1", token, exp=clock.now + 30)
+    assert cache.get("jwt-1") is token
+    clock.now += 31
+    assert cache.get("jwt-1") is None
+
+    cache.put("jwt-1", token, exp=clock.now + 300)
+    cache.invalidate("t1")
+    assert cache.get("jwt-1") is None and len(cache) == 0
+
+    for i in range(3):
+        cache.put(f"jwt-{i}", SimpleNamespace(token_id=f"t{i}"), exp=clock.now + 300)
+    assert len(cache) == 2 and cache.get("jwt-0") is None
+
+
+def test_revocation_filter_remembers_ids_for_one_retention_window():
+    clock = FakeClock()
+    revoked = RevocationFilter(capacity=1000, retention_seconds=3600, clock=clock)
+    revoked.add("revoked-id")
+
+    assert "revoked-id" in revoked and "live-id" not in revoked
+    clock.now += 3600  # Rotated into the previous generation
+    assert "revoked-id" in revoked
+    clock.now += 3600
+    assert "revoked-id" not in revoked
+
+
+@pytest.mark.asyncio
+async def test_revocation_drops_lineage_from_verified_cache(vault):
+    manager = await start_manager()
+    parent = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+    child = await manager.mint_token("dev", "acme", 30, SCOPES, "test", parent_token_id=parent.token_id)
+
+    assert await manager.validate_token(child.jwt_token) is not None
+    assert await manager.validate_token(child.jwt_token) is not None
+    assert manager.verified_cache.hits == 1
+
+    result = await manager.revoke_token(parent.token_id)
+
+    assert result["revoked_tokens"] == [parent.token_id, child.token_id]
+    assert len(manager.verified_cache) == 0
+    assert await manager.validate_token(child.jwt_token) is None
+    assert await manager.validate_token(parent.jwt_token) is None
+    await manager.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_revocation_on_another_replica_invalidates_local_cache(vault):
+    server = fakeredis.FakeServer()
+    replica_a = await start_manager(RedisTokenStore(fakeredis.FakeAsyncRedis(server=server), timedelta(minutes=60)))
+    replica_b = await start_manager(RedisTokenStore(fakeredis.FakeAsyncRedis(server=server), timedelta(minutes=60)))
+    # Both replicas trust the same key, as they would after loading it from Key Vault
+    await replica_b.set_signing_key(replica_a.signing_key)
+    await replica_a.store.start(replica_a._on_revoked)
+
+    token = await replica_a.mint_token("dev", "acme", 30, SCOPES, "test")
+    assert await replica_a.validate_token(token.jwt_token) is not None
+    assert len(replica_a.verified_cache) == 1
+
+    await replica_b.revoke_token(token.token_id)
+
+    assert await eventually(lambda: len(replica_a.verified_cache) == 0)
+    assert token.token_id in replica_a.revocation_filter
+    assert await replica_a.validate_token(token.jwt_token) is None
+    await replica_a.cleanup()
+    await replica_b.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_revocation_gap_clears_verified_cache(vault):
+    manager = await start_manager()
+    token = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+    revoked = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+    assert await manager.validate_token(token.jwt_token) is not None
+    # Revoked elsewhere while the broadcast listener was disconnected
+    await manager.store.retire([revoked.token_id], "revoked", datetime.utcnow())
+
+    await manager._on_revocations_missed()
+
+    assert len(manager.verified_cache) == 0
+    assert revoked.token_id in manager.revocation_filter
+    assert await manager.validate_token(token.jwt_token) is not None
+    await manager.cleanup()
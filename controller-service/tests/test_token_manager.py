@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.core.token_manager import TokenManager
+from src.core.token_signer import generate_signing_key, private_key_pem
+from src.core.token_store import MemoryTokenStore
+from src.models.agent_models import EphemeralToken
+
+SCOPES = ["azure:repo:write"]
+
+
+def make_manager(**kwargs):
+    return TokenManager(store=MemoryTokenStore(timedelta(minutes=60)), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_key_vault_is_only_reached_when_loading_the_signing_key(monkeypatch):
+    monkeypatch.delenv("AZURE_KEY_VAULT_URL", raising=False)
+    with patch("src.core.token_manager.VaultClient") as vault_client:
+        manager = make_manager()
+        await manager.set_signing_key(generate_signing_key(manager.signing_algorithm))
+        token = await manager.mint_token("dev", "acme", 5, SCOPES, "test")
+        assert await manager.validate_token(token.jwt_token) is not None
+        vault_client.assert_not_called()
+
+        with pytest.raises(ValueError):
+            await manager._initialize_signing_keys()
+
+
+@pytest.mark.asyncio
+async def test_initialize_uses_injected_vault_client():
+    signing_key = generate_signing_key("RS256")
+    vault = MagicMock()
+    vault.get_secret = AsyncMock(return_value=private_key_pem(signing_key).decode())
+    manager = make_manager(vault_client=vault)
+    manager.signing_algorithm = "RS256"
+
+    await manager._initialize_signing_keys()
+
+    vault.get_secret.assert_awaited_once_with("jwt-signing-key")
+    assert manager.signing_key.private_numbers() == signing_key.private_numbers()
+
+
+def lineage_token(token_id, parent_token_id=None):
+    issued_at = datetime.utcnow()
+    return EphemeralToken(token_id=token_id, jwt_token="", agent_role="dev", tenant_id="acme",
+                          scopes=SCOPES, issued_at=issued_at, expires_at=issued_at + timedelta(minutes=30),
+                          parent_token_id=parent_token_id, reason="test")
+
+
+@pytest.mark.asyncio
+async def test_child_tokens_are_listed_once_and_cycles_terminate():
+    manager = make_manager()
+    # root -> a -> (c, d), root -> b -> d, and d -> root closes a cycle
+    await manager.store.add_many([lineage_token("root", parent_token_id="d"), lineage_token("a", "root"),
+                                  lineage_token("b", "root"), lineage_token("c", "a"), lineage_token("d", "a")])
+    manager.store.lineage["b"] = {"d"}
+    children_of = AsyncMock(side_effect=manager.store.children_of)
+    manager.store.children_of = children_of
+
+    descendants = await manager._get_child_tokens("root")
+
+    assert sorted(descendants[:2]) == ["a", "b"]
+    assert sorted(descendants[2:]) == ["c", "d"]
+    # One batched read per lineage level, plus the empty last level
+    assert children_of.await_args_list[0].args[0] == ["root"]
+    assert children_of.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_revoke_retires_whole_subtree_in_one_store_call():
+    manager = make_manager()
+    await manager.store.add_many([lineage_token("root"), lineage_token("a", "root"), lineage_token("b", "a"),
+                                  lineage_token("c", "b"), lineage_token("other")])
+    retire = AsyncMock(side_effect=manager.store.retire)
+    manager.store.retire = retire
+
+    result = await manager.revoke_token("root")
+
+    assert result["revoked_tokens"] == ["root", "a", "b", "c"]
+    retire.assert_awaited_once()
+    assert retire.await_args.args[:2] == (["root", "a", "b", "c"], "revoked")
+    assert not (await manager.store.get("other")).revoked
+    assert all([(await manager.store.get(token_id)).revoked for token_id in ["root", "a", "b", "c"]])
+
+
+def mint_request(ttl_minutes=30):
+    return {"agent_role": "dev", "tenant_id": "acme", "ttl_minutes": ttl_minutes,
+            "scopes": SCOPES, "reason": "test"}
+
+
+@pytest.mark.asyncio
+async def test_mint_tokens_mints_all_or_none():
+    manager = make_manager()
+    await manager.set_signing_key(generate_signing_key(manager.signing_algorithm))
+
+    with pytest.raises(ValueError, match="Token request 2"):
+        await manager.mint_tokens([mint_request(), mint_request(), mint_request(ttl_minutes=120), mint_request()])
+    metrics = await manager.get_metrics()
+    assert metrics["tokens_minted_total"] == 0
+    assert metrics["tokens_signed"] == 0
+
+    tokens = await manager.mint_tokens([mint_request() for _ in range(4)])
+    assert len({token.token_id for token in tokens}) == 4
+    for token in tokens:
+        assert (await manager.validate_token(token.jwt_token)).token_id == token.token_id
+
+
+@pytest.mark.asyncio
+async def test_mint_tokens_enforces_bulk_mint_max(monkeypatch):
+    monkeypatch.setenv("TOKEN_BULK_MINT_MAX", "3")
+    manager = make_manager()
+    await manager.set_signing_key(generate_signing_key(manager.signing_algorithm))
+
+    with pytest.raises(ValueError, match="At most 3"):
+        await manager.mint_tokens([mint_request() for _ in range(4)])
+    assert (await manager.get_metrics())["tokens_minted_total"] == 0
+    assert len(await manager.mint_tokens([mint_request() for _ in range(3)])) == 3
@@ -0,0 +1,73 @@
+import asyncio
+
+import jwt
+import pytest
+
+from src.core.token_signer import TokenSigner, check_signing_key, generate_signing_key, public_jwk
+
+
+def payload(i):
+    return {"jti": f"token-{i}", "aud": "governance-factories"}
+
+
+def decode(jwt_token, signer):
+    assert jwt.get_unverified_header(jwt_token)["kid"] == signer.kid
+    return jwt.decode(jwt_token, signer.signing_key.public_key(), algorithms=[signer.algorithm],
+                      audience="governance-factories")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_signs_are_coalesced_into_batches():
+    signer = TokenSigner(generate_signing_key("ES256"), algorithm="ES256", mode="thread",
+                         max_batch=8, batch_window_ms=50)
+
+    tokens = await asyncio.gather(*(signer.sign(payload(i)) for i in range(10)))
+
+    # 8 fill a batch at once, the other 2 go out when the window closes
+    assert signer.batches_signed == 2 and signer.tokens_signed == 10
+    assert [decode(jwt_token, signer)["jti"] for jwt_token in tokens] == [f"token-{i}" for i in range(10)]
+    await signer.close()
+
+
+@pytest.mark.asyncio
+async def test_sign_many_splits_into_max_batch_chunks():
+    signer = TokenSigner(generate_signing_key("EdDSA"), algorithm="EdDSA", max_batch=4)
+
+    tokens = await signer.sign_many([payload(i) for i in range(10)])
+
+    assert signer.batches_signed == 3
+    assert [decode(jwt_token, signer)["jti"] for jwt_token in tokens] == [f"token-{i}" for i in range(10)]
+    assert await signer.sign_many([]) == []
+    await signer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_signs_queued_payloads():
+    signer = TokenSigner(generate_signing_key("ES256"), algorithm="ES256", batch_window_ms=10000)
+    pending = asyncio.ensure_future(signer.sign(payload(1)))
+    await asyncio.sleep(0)
+
+    await signer.close()
+
+    assert decode(await pending, signer)["jti"] == "token-1"
+
+
+@pytest.mark.asyncio
+async def test_inline_mode_signs_one_at_a_time():
+    signer = TokenSigner(generate_signing_key("ES256"), algorithm="ES256", mode="inline")
+
+    await asyncio.gather(*(signer.sign(payload(i)) for i in range(3)))
+
+    assert signer.batches_signed == 3
+    await signer.close()
+
+
+def test_keys_must_match_algorithm():
+    with pytest.raises(ValueError):
+        check_signing_key(generate_signing_key("ES256"), "RS256")
+    with pytest.raises(ValueError):
+        TokenSigner(generate_signing_key("ES256"), algorithm="ES256", mode="gpu")
+
+    key = generate_signing_key("EdDSA")
+    # RFC 7638 thumbprints are stable for the same key
+    assert public_jwk(key.public_key(), "EdDSA")["kid"] == public_jwk(key.public_key(), "EdDSA")["kid"]
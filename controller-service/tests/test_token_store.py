@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import redis
+
+from src.core.token_store import MemoryTokenStore, RedisTokenStore, TokenStore
+from src.models.agent_models import EphemeralToken
+
+NOW = datetime(2025, 9, 7, 10, 0, 0)
+RETENTION = timedelta(minutes=60)
+
+
+def make_token(token_id, parent_token_id=None, issued_at=NOW, ttl=timedelta(minutes=30)):
+    return EphemeralToken(token_id=token_id, jwt_token="", agent_role="dev", tenant_id="acme",
+                          scopes=["azure:repo:write"], issued_at=issued_at, expires_at=issued_at + ttl,
+                          parent_token_id=parent_token_id, reason="test")
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_through_heap():
+    store = MemoryTokenStore(RETENTION)
+    await store.add_many([make_token("short", ttl=timedelta(minutes=5)), make_token("long")])
+
+    assert await store.expire_due(NOW + timedelta(minutes=10)) == ["short"]
+    assert await store.expire_due(NOW + timedelta(minutes=10)) == []
+    metrics = await store.metrics(NOW + timedelta(minutes=10))
+    assert (metrics["active"], metrics["expired"], metrics["expired_total"]) == (1, 1, 1)
+    assert await store.live_token_ids() == ["long"]
+
+
+@pytest.mark.asyncio
+async def test_compaction_hands_live_children_to_grandparent():
+    store = MemoryTokenStore(RETENTION)
+    await store.add_many([make_token("root"), make_token("middle", "root"),
+                          make_token("leaf-a", "middle"), make_token("leaf-b", "middle")])
+
+    assert await store.retire(["middle"], "revoked", NOW) == ["middle"]
+    assert await store.retire(["middle"], "revoked", NOW) == []  # Already a tombstone
+    assert await store.compact(NOW + RETENTION - timedelta(seconds=1)) == 0
+
+    assert await store.compact(NOW + RETENTION) == 1
+    assert await store.get("middle") is None
+    assert sorted(await store.children("root")) == ["leaf-a", "leaf-b"]
+    assert "middle" not in store.lineage
+
+    metrics = await store.metrics(NOW)
+    assert metrics["revoked"] == 0 and metrics["revoked_total"] == 1 and metrics["compacted_total"] == 1
+    assert metrics["total"] == 3 and metrics["lineages"] == 1
+
+
+@pytest.mark.asyncio
+async def test_compaction_drops_dead_children_from_lineage():
+    store = MemoryTokenStore(RETENTION)
+    await store.add_many([make_token("root"), make_token("child", "root")])
+    await store.retire(["child"], "revoked", NOW)
+
+    await store.compact(NOW + RETENTION)
+
+    assert await store.children("root") == []
+    assert store.lineage == {}
+
+
+@pytest.mark.asyncio
+async def test_memory_store_revoked_since():
+    store = MemoryTokenStore(RETENTION)
+    await store.add_many([make_token("a"), make_token("b"), make_token("c", ttl=timedelta(minutes=1))])
+    await store.retire(["a"], "revoked", NOW)
+    await store.expire_due(NOW + timedelta(minutes=2))
+    await store.retire(["b"], "revoked", NOW + timedelta(minutes=5))
+
+    assert await store.revoked_since(NOW + timedelta(minutes=1)) == [("b", NOW + timedelta(minutes=5))]
+    assert [token_id for token_id, _ in await store.revoked_since(NOW)] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_retire_and_metrics():
+    now = datetime.utcnow().replace(microsecond=0)
+    store = RedisTokenStore(fakeredis.FakeAsyncRedis(), RETENTION)
+    await store.add_many([make_token("root", issued_at=now), make_token("child", "root", issued_at=now),
+                          make_token("other", issued_at=now)])
+
+    assert await store.children("root") == ["child"]
+    assert sorted(await store.retire(["root", "child"], "revoked", now)) == ["child", "root"]
+    assert await store.retire(["root"], "revoked", now) == []  # Only live tokens change state
+    assert await store.retire(["other"], "expired", now) == []  # Expiry is implicit
+
+    token = await store.get("child")
+    assert token.revoked and token.revoked_at == now and token.parent_token_id == "root"
+    assert token.scopes == ["azure:repo:write"] and token.expires_at == now + timedelta(minutes=30)
+    assert await store.live_token_ids() == ["other"]
+    assert sorted(token_id for token_id, _ in await store.revoked_since(now)) == ["child", "root"]
+
+    metrics = await store.metrics(now)
+    assert metrics == {"active": 1, "revoked": 2, "expired": 0, "minted_total": 3, "revoked_total": 2,
+                       "expired_total": 0, "compacted_total": 0, "total": 3}
+
+    # Past exp the live token counts as expired; compaction drops it and the tombstones
+    later = now + timedelta(minutes=31)
+    assert (await store.metrics(later))["expired"] == 1
+    assert await store.compact(later + RETENTION) == 3
+    metrics = await store.metrics(later + RETENTION)
+    assert (metrics["total"], metrics["expired_total"], metrics["compacted_total"]) == (0, 1, 3)
+    await store.close()
+
+
+def test_token_store_is_abstract():
+    with pytest.raises(TypeError):
+        TokenStore()
+
+    class Partial(TokenStore):
+        async def get(self, token_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.asyncio
+async def test_revocation_listener_resubscribes_after_connection_loss():
+    server = fakeredis.FakeServer()
+    listener = RedisTokenStore(fakeredis.FakeAsyncRedis(server=server), RETENTION, reconnect_delay=0.01)
+    publisher = RedisTokenStore(fakeredis.FakeAsyncRedis(server=server), RETENTION)
+    subscribe = listener._subscribe
+    subscriptions = []
+
+    async def flaky_subscribe():
+        pubsub = await subscribe()
+        subscriptions.append(pubsub)
+        if len(subscriptions) == 1:
+            async def lost_connection():
+                raise redis.ConnectionError("Connection closed by server")
+                yield
+            pubsub.listen = lost_connection
+        return pubsub
+
+    listener._subscribe = flaky_subscribe
+    revoked, gaps = [], []
+
+    async def on_revoked(token_ids):
+        revoked.extend(token_ids)
+
+    async def on_gap():
+        gaps.append(len(revoked))
+
+    await listener.start(on_revoked, on_gap)
+    for _ in range(200):
+        if gaps:
+            break
+        await asyncio.sleep(0.01)
+    assert gaps == [0] and listener.reconnects == 1
+
+    now = datetime.utcnow()
+    await publisher.add_many([make_token("t1", issued_at=now)])
+    await publisher.retire(["t1"], "revoked", now)
+    for _ in range(200):
+        if revoked:
+            break
+        await asyncio.sleep(0.01)
+
+    assert revoked == ["t1"]
+    await listener.close()
+    await publisher.close()
@@ -0,0 +1,192 @@
+import asyncio
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.token_manager import TokenManager
+from src.core.token_signer import generate_signing_key
+from src.core.token_store import MemoryTokenStore
+from src.integrations.governance_factories import GovernanceFactoryManager
+from src.integrations.token_verifier import ControllerTokenVerifier, TokenVerificationError
+
+SCOPES = ["azure:repo:write"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class Controller:
+    """TokenManager behind the JWKS and revocation list endpoints factories call."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.jwks_requests = 0
+        app = web.Application()
+        app.router.add_get("/.well-known/jwks.json", self.jwks)
+        app.router.add_get("/tokens/revocations", self.revocations)
+        self.server = TestServer(app)
+
+    async def jwks(self, request):
+        self.jwks_requests += 1
+        return web.json_response(self.manager.get_jwks())
+
+    async def revocations(self, request):
+        return web.json_response({"revocation_list": await self.manager.signed_revocation_list()})
+
+    def verifier(self, **kwargs):
+        return ControllerTokenVerifier(str(self.server.make_url("/.well-known/jwks.json")),
+                                       revocations_url=str(self.server.make_url("/tokens/revocations")),
+                                       **kwargs)
+
+
+@pytest_asyncio.fixture
+async def controller():
+    with patch("src.core.token_manager.VaultClient"):
+        manager = TokenManager(store=MemoryTokenStore(timedelta(minutes=60)))
+    manager.signing_algorithm = "ES256"
+    await manager.set_signing_key(generate_signing_key("ES256"))
+    controller = Controller(manager)
+    await controller.server.start_server()
+    yield controller
+    await controller.server.close()
+    await manager.cleanup()
+
+
+def forged(kid, **claims):
+    payload = {"iss": "controller-service", "aud": "governance-factories", "jti": "forged",
+               "iat": int(time.time()), "exp": int(time.time()) + 600, "scopes": SCOPES, **claims}
+    return jwt.encode(payload, generate_signing_key("ES256"), algorithm="ES256", headers={"kid": kid})
+
+
+@pytest.mark.asyncio
+async def test_key_is_selected_by_kid_across_rotation(controller):
+    manager = controller.manager
+    old = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+    async with controller.verifier(revocation_sync_interval=0, min_refresh_interval=0) as verifier:
+        assert (await verifier.verify(old.jwt_token, required_scopes=SCOPES))["jti"] == old.token_id
+
+        # Rotated key: its kid is unknown to the verifier until it refreshes the JWKS
+        await manager.set_signing_key(generate_signing_key("ES256"))
+        new = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+        assert jwt.get_unverified_header(new.jwt_token)["kid"] != jwt.get_unverified_header(old.jwt_token)["kid"]
+        assert (await verifier.verify(new.jwt_token))["jti"] == new.token_id
+        assert (await verifier.verify(old.jwt_token))["jti"] == old.token_id
+        assert len(verifier.get_status()["signing_keys"]) == 2
+
+        with pytest.raises(TokenVerificationError, match="scopes"):
+            await verifier.verify(new.jwt_token, required_scopes=["github:org:create"])
+        # A known kid does not make a token signed with another key valid
+        with pytest.raises(TokenVerificationError, match="Invalid token"):
+            await verifier.verify(forged(jwt.get_unverified_header(new.jwt_token)["kid"]))
+
+
+@pytest.mark.asyncio
+async def test_unknown_kids_refresh_jwks_at_most_once_per_interval(controller):
+    clock = FakeClock()
+    async with controller.verifier(revocation_sync_interval=0, min_refresh_interval=30, clock=clock) as verifier:
+        assert controller.jwks_requests == 1
+
+        # Made-up kids right after the fetch on connect do not reach the controller
+        for i in range(20):
+            with pytest.raises(TokenVerificationError, match="Unknown signing key"):
+                await verifier.verify(forged(f"made-up-{i}"))
+        assert controller.jwks_requests == 1
+
+        clock.now += 31
+        for i in range(20):
+            with pytest.raises(TokenVerificationError, match="Unknown signing key"):
+                await verifier.verify(forged(f"made-up-{i}"))
+        assert controller.jwks_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_revocation_lists_and_tokens_have_separate_audiences(controller):
+    manager = controller.manager
+    token = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+    revocation_list = await manager.signed_revocation_list([(token.token_id, manager.store.tokens[token.token_id].issued_at)])
+
+    async with controller.verifier(revocation_sync_interval=0) as verifier:
+        # Signed with the same key, but neither passes for the other
+        with pytest.raises(TokenVerificationError, match="Invalid token"):
+            await verifier.verify(revocation_list)
+        with pytest.raises(TokenVerificationError, match="Invalid revocation list"):
+            await verifier.apply_revocation_list(token.jwt_token)
+
+        assert await verifier.verify(token.jwt_token)
+        assert await verifier.apply_revocation_list(revocation_list) == 1
+        # Revocation is checked on every call, including cached tokens
+        with pytest.raises(TokenVerificationError, match="revoked"):
+            await verifier.verify(token.jwt_token)
+
+
+@pytest.mark.asyncio
+async def test_periodic_sync_picks_up_revocations_that_were_not_pushed(controller):
+    manager = controller.manager
+    token = await manager.mint_token("dev", "acme", 30, SCOPES, "test")
+
+    async with controller.verifier(revocation_sync_interval=0.05) as verifier:
+        assert await verifier.verify(token.jwt_token)
+        await manager.revoke_token(token.token_id)  # No listener: the push is lost
+
+        for _ in range(100):
+            if verifier.is_revoked(token.token_id):
+                break
+            await asyncio.sleep(0.01)
+
+        assert verifier.is_revoked(token.token_id)
+        assert verifier.get_status()["revocation_syncs"] >= 2
+    assert verifier._sync_task is None
+
+
+class PushFactory:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.received = []
+
+    async def push_revocation_list(self, revocation_list):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("factory unavailable")
+        self.received.append(revocation_list)
+        return {"status": "applied"}
+
+
+@pytest.mark.asyncio
+async def test_failed_revocation_pushes_are_retried():
+    manager = GovernanceFactoryManager()
+    manager.revocation_push_retry_seconds = 0
+    manager.revocation_push_factories = ["github", "azure", "database"]
+    manager.clients = {"github": PushFactory(0), "azure": PushFactory(2), "database": PushFactory(5)}
+
+    delivered = await manager.push_revocation_list("signed-list")
+
+    assert delivered == {"github": True, "azure": True, "database": False}
+    # Only failing factories are pushed to again
+    assert manager.clients["github"].received == ["signed-list"]
+    assert manager.clients["azure"].received == ["signed-list"]
+    assert manager.clients["database"].failures == 2
+
+
+@pytest.mark.asyncio
+async def test_revocations_are_only_pushed_to_factories_that_accept_them(monkeypatch):
+    monkeypatch.delenv("REVOCATION_PUSH_FACTORIES", raising=False)
+    manager = GovernanceFactoryManager()
+    manager.clients = {"github": PushFactory(), "azure": PushFactory()}
+    assert await manager.push_revocation_list("signed-list") == {}
+
+    monkeypatch.setenv("REVOCATION_PUSH_FACTORIES", "azure, unknown")
+    manager = GovernanceFactoryManager()
+    manager.clients = {"github": PushFactory(), "azure": PushFactory()}
+    assert await manager.push_revocation_list("signed-list") == {"azure": True}
+    assert manager.clients["github"].received == []
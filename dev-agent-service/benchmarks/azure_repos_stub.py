@@ -0,0 +1,83 @@
+"""
+In-process Azure Repos REST stub for benchmarks.
+
+Serves the endpoints AzureReposClient uses for scaffolds (refs, items,
+pushes, pull requests) under ``{url}/{org}/_apis/git/repositories/{repo}``
+with a fixed per-request latency. Repositories are created on first use
+with a ``main`` branch; pushes enforce ``oldObjectId`` like the real service.
+"""
+
+import asyncio
+import hashlib
+import itertools
+from typing import Dict
+
+from aiohttp import web
+
+from src.codec import dumps, loads
+
+
+class AzureReposStub:
+    def __init__(self, latency: float = 0.03):
+        self.latency = latency
+        self.requests = 0
+        self.repos: Dict[str, Dict] = {}
+        self._ids = itertools.count(1)
+        self._runner = None
+        self.url = ""
+
+    def _repo(self, name: str) -> Dict:
+        if name not in self.repos:
+            self.repos[name] = {"refs": {"refs/heads/main": hashlib.sha1(name.encode()).hexdigest()},
+                                "items": {"/README.md"}}
+        return self.repos[name]
+
+    @staticmethod
+    def _json(body, status: int = 200) -> web.Response:
+        return web.Response(body=dumps(body), status=status, content_type="application/json")
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        repo = self._repo(request.match_info["repo"])
+        resource = request.match_info["resource"]
+
+        if resource == "refs" and request.method == "GET":
+            prefix = request.query.get("filter", "")
+            return self._json({"value": [{"name": name, "objectId": sha}
+                                         for name, sha in repo["refs"].items() if name.startswith(prefix)]})
+        if resource == "refs":
+            updates = loads(await request.read())
+            for update in updates:
+                repo["refs"][update["name"]] = update["newObjectId"]
+            return self._json({"value": [dict(update, success=True) for update in updates]})
+        if resource == "items":
+            return self._json({"value": [{"path": path, "gitObjectType": "blob"} for path in repo["items"]]})
+        if resource == "pushes":
+            push = loads(await request.read())
+            ref = push["refUpdates"][0]
+            if repo["refs"].get(ref["name"]) != ref["oldObjectId"]:
+                return self._json({"message": "TF401028: The reference has already been updated"}, status=409)
+            commit_id = hashlib.sha1(f"{ref['oldObjectId']}{next(self._ids)}".encode()).hexdigest()
+            repo["refs"][ref["name"]] = commit_id
+            for change in push["commits"][0]["changes"]:
+                repo["items"].add(change["item"]["path"])
+            return self._json({"commits": [{"commitId": commit_id}]}, status=201)
+        if resource == "pullRequests":
+            return self._json({"pullRequestId": next(self._ids), "status": "active",
+                               "repository": {"id": request.match_info["repo"]}}, status=201)
+        return self._json({"message": "not found"}, status=404)
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_route("*", "/{org}/_apis/git/repositories/{repo}/{resource}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
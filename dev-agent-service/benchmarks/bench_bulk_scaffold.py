@@ -0,0 +1,75 @@
+"""
+Benchmark bulk scaffolding throughput against a local Azure Repos stub.
+
+Usage:
+    python -m benchmarks.bench_bulk_scaffold [targets] [latency_ms]
+
+Scaffolds ``targets`` repositories (default 40) in one bulk job with the
+per-organization limit at 1 (the sequential baseline: one target after the
+other, as with separate POST /scaffolds calls) and at higher settings. Each
+target makes five stub calls (base ref, create ref, head ref, item index,
+push) plus the pull request, each with ``latency_ms`` (default 30) latency.
+"""
+
+import asyncio
+import sys
+import time
+
+import fakeredis
+
+from benchmarks.azure_repos_stub import AzureReposStub
+from src.azure_repos import AzureReposClient
+from src.client_pool import ClientPool
+from src.scaffold import ScaffoldSpec, render_scaffold
+from src.scaffold_jobs import OrgLimiter, ScaffoldJobStore, ScaffoldWorkerPool, run_scaffold_phases
+
+
+async def run_bulk(stub_url: str, targets: int, per_org: int) -> float:
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    pool = ClientPool()
+    organization_url = f"{stub_url}/org"
+
+    async def handler(job, store):
+        request = job["request"]
+        files = await asyncio.to_thread(render_scaffold, ScaffoldSpec(framework="fastapi"),
+                                        request["repository_name"], job["work_item_id"])
+        key = ("repos", organization_url, request["repository_name"])
+        factory = lambda: AzureReposClient(organization_url, "project", request["repository_name"], "pat",
+                                           session=pool.session_for(organization_url))
+        async with pool.lease(key, "azure_repos", organization_url, factory) as repos_client:
+            return await run_scaffold_phases(job, store, repos_client, files)
+
+    requests = [{"organization_url": organization_url, "project_name": "project",
+                 "repository_name": f"svc-{per_org}-{i}", "work_item_id": 1000 + i} for i in range(targets)]
+    bulk, _ = await store.create_bulk(1000, {"framework": "fastapi"}, requests)
+    workers = ScaffoldWorkerPool(store, handler)
+
+    started = time.perf_counter()
+    summary = await workers.run_children(await store.get(bulk["job_id"]), OrgLimiter(per_org=per_org))
+    elapsed = time.perf_counter() - started
+
+    await pool.close()
+    if summary["counts"]["completed"] != targets:
+        raise RuntimeError(f"Bulk scaffold failed: {summary['counts']}")
+    return elapsed
+
+
+async def main(targets: int, latency_ms: float) -> None:
+    stub = AzureReposStub(latency=latency_ms / 1000)
+    stub_url = await stub.start()
+    try:
+        print(f"{targets} targets, {latency_ms:.0f} ms stub latency")
+        print(f"{'per-org limit':<16}{'seconds':>10}{'targets/s':>12}{'speedup':>10}")
+        baseline = None
+        for per_org in (1, 4, 8, 16):
+            elapsed = await run_bulk(stub_url, targets, per_org)
+            baseline = baseline or elapsed
+            print(f"{per_org:<16}{elapsed:>10.2f}{targets / elapsed:>12.1f}{baseline / elapsed:>9.1f}x")
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    asyncio.run(main(count, latency))
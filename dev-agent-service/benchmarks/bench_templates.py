@@ -0,0 +1,66 @@
+"""
+Benchmark scaffold rendering across all supported frameworks.
+
+Usage:
+    python -m benchmarks.bench_templates [template_repo_url ...]
+
+For every framework (with and without the React frontend) it compares:
+    uncached   - compile + render on every call (previous behaviour)
+    compiled   - precompiled template, render on every call
+    memoized   - precompiled template, memoized render (dict copy)
+
+Template repository URLs passed as arguments (https on any host, or file://) are also
+measured for the first fetch versus renders served from the caches.
+"""
+
+import sys
+import tempfile
+import time
+import timeit
+
+from src.scaffold import SUPPORTED_FRAMEWORKS, ScaffoldSpec, _builtin_template, render_scaffold
+from src.templates import CompiledTemplate, TemplateStore
+
+
+def _best(func, number: int) -> float:
+    """Best-of-five per-call time in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def bench_builtin(store: TemplateStore, number: int = 2000) -> None:
+    print(f"{'template':<22}{'files':>6}{'uncached us':>14}{'compiled us':>14}{'memoized us':>14}")
+    params = {"project_name": "bench-service", "work_item_id": 4242}
+
+    for framework in SUPPORTED_FRAMEWORKS:
+        for include_frontend in (False, True):
+            compiled = _builtin_template(store, framework, include_frontend)
+            files = {path: (body.template if hasattr(body, "template") else body)
+                     for path, body in compiled._files.items()}
+            spec = ScaffoldSpec(framework=framework, include_frontend=include_frontend)
+
+            uncached = _best(lambda: CompiledTemplate("bench", files).render(params), number)
+            rendered = _best(lambda: compiled.render(params), number)
+            render_scaffold(spec, "bench-service", 4242, store=store)
+            memoized = _best(lambda: render_scaffold(spec, "bench-service", 4242, store=store), number)
+
+            label = framework + ("+frontend" if include_frontend else "")
+            print(f"{label:<22}{len(compiled):>6}{uncached:>14.1f}{rendered:>14.1f}{memoized:>14.1f}")
+
+
+def bench_remote(store: TemplateStore, urls) -> None:
+    print(f"\n{'template_url':<40}{'first fetch ms':>16}{'cached ms':>12}")
+    for url in urls:
+        spec = ScaffoldSpec(template_url=url)
+        started = time.perf_counter()
+        render_scaffold(spec, "bench-service", 4242, store=store)
+        first = (time.perf_counter() - started) * 1000
+        cached = _best(lambda: render_scaffold(spec, "bench-service", 4242, store=store), 200) / 1000
+        print(f"{url[-40:]:<40}{first:>16.1f}{cached:>12.3f}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = TemplateStore(cache_dir=cache_dir, schemes=("https", "file"), allowed_hosts=None)
+        bench_builtin(store)
+        if sys.argv[1:]:
+            bench_remote(store, sys.argv[1:])
@@ -1,14 +1,22 @@
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_shutdown
 from typing import Dict, Optional
 from datetime import datetime
 from src.models import TaskStatus, WorkStartRequest, AuditEvent
-from src.azure_devops import AzureDevOpsClient
+from src.azure_devops import AzureDevOpsClient, AsyncAzureDevOpsClient
+from src.async_runner import AsyncTaskRunner
 from src.github import GitHubClient
-from src.utils import get_logger, send_audit_event, get_env_var
+from src.github_graphql import GitHubGraphQLClient, get_github_graphql_client, repository_path
+from src.hierarchy import get_hierarchy_cache, has_traceability_chain
+from src.pr_tracker import MERGED, github_pr_key, track_pull_request
+from src.workspace import basic_auth_header, get_workspace_manager
+from src.audit import get_audit_buffer, get_task_state_store
+from src.utils import get_logger, get_env_var
 import structlog
 import uuid
 import time
 import random
+import asyncio
 
 
 # Celery app configuration
@@ -19,16 +27,97 @@ app = Celery(
 )
 app.conf.worker_prefetch_multiplier = 1  # Handle tasks in order
 
+# Execution mode: 'sync' runs one blocking task per worker process, 'async'
+# runs many tasks per worker on a shared event loop (see src/async_runner.py)
+EXECUTION_MODE = get_env_var('DEV_AGENT_EXECUTION_MODE', 'sync')
+TASK_CONCURRENCY = int(get_env_var('DEV_AGENT_TASK_CONCURRENCY', '50'))
+TASK_TIMEOUT_SECONDS = float(get_env_var('DEV_AGENT_TASK_TIMEOUT_SECONDS', '900'))
 
-def create_clients():
-    """Create Azure DevOps and GitHub clients from environment variables."""
-    ado_client = AzureDevOpsClient(
+# Commit backend: 'api' builds commits through the GitHub Git Data API, 'git'
+# pushes from a local worktree backed by a cached clone (see src/workspace.py)
+COMMIT_BACKEND = get_env_var('DEV_AGENT_COMMIT_BACKEND', 'api')
+
+# GitHub backend: 'rest' (PyGithub, about ten sequential calls per task) or
+# 'graphql' (branch, commit and pull request in two round trips, see
+# src/github_graphql.py; DEV_AGENT_COMMIT_BACKEND does not apply)
+GITHUB_BACKEND = get_env_var('DEV_AGENT_GITHUB_BACKEND', 'rest')
+
+if EXECUTION_MODE == 'async':
+    # Celery threads only wait on the runner; the loop does the I/O
+    app.conf.worker_pool = 'threads'
+    app.conf.worker_concurrency = TASK_CONCURRENCY
+
+task_runner = AsyncTaskRunner(max_concurrency=TASK_CONCURRENCY, default_timeout=TASK_TIMEOUT_SECONDS)
+_async_clients = None
+_graphql_client = None
+
+
+def create_ado_client() -> AzureDevOpsClient:
+    """Create the Azure DevOps client from environment variables."""
+    return AzureDevOpsClient(
         organization_url=get_env_var('AZURE_DEVOPS_ORG_URL'),
         personal_access_token=get_env_var('AZURE_DEVOPS_PAT'),
         project_name=get_env_var('AZURE_DEVOPS_PROJECT')
     )
+
+
+def create_clients():
+    """Create Azure DevOps and GitHub clients from environment variables."""
     github_client = GitHubClient(access_token=get_env_var('GITHUB_TOKEN'))
-    return ado_client, github_client
+    return create_ado_client(), github_client
+
+
+def get_async_clients():
+    """Worker-wide clients for async mode, shared by all tasks on the runner loop."""
+    global _async_clients
+    if _async_clients is None:
+        ado_client, github_client = create_clients()
+        async_ado_client = AsyncAzureDevOpsClient(
+            organization_url=get_env_var('AZURE_DEVOPS_ORG_URL'),
+            personal_access_token=get_env_var('AZURE_DEVOPS_PAT'),
+            project_name=get_env_var('AZURE_DEVOPS_PROJECT'),
+            max_connections=TASK_CONCURRENCY
+        )
+        _async_clients = (ado_client, async_ado_client, github_client)
+    return _async_clients
+
+
+def get_graphql_client() -> GitHubGraphQLClient:
+    """Worker-wide GraphQL client; its HTTP session is shared by all tasks."""
+    global _graphql_client
+    if _graphql_client is None:
+        _graphql_client = get_github_graphql_client()
+    return _graphql_client
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def shutdown_task_runner(**kwargs):
+    """
+    Stop the runner loop and ship queued audit events when the Celery worker
+    exits. Prefork pool children run tasks (and buffer their audit events)
+    but only see worker_process_shutdown, so both signals are connected.
+    """
+    task_runner.shutdown()
+    get_audit_buffer().close()
+
+
+def commit_task_files(github_client: GitHubClient, repo, task: WorkStartRequest, branch_name: str,
+                      files: Dict[str, str], message: str) -> None:
+    """Create ``branch_name`` from the task's base branch with ``files`` committed on it."""
+    if COMMIT_BACKEND == 'git':
+        remote_url = task.repository if '://' in task.repository else f"https://github.com/{task.repository}.git"
+        auth_header = basic_auth_header('x-access-token', get_env_var('GITHUB_TOKEN'))
+        with get_workspace_manager().checkout(remote_url, task.branch, branch_name, task.task_id,
+                                              auth_header=auth_header) as workspace:
+            workspace.write_files(files)
+            workspace.commit(message)
+            workspace.push()
+        return
+
+    github_client.create_branch(repo, task.branch, branch_name)
+    # One commit for all files (Git Data API) instead of one per file
+    github_client.commit_files(repo, branch_name, files, message)
 
 
 def validate_cmme_links(ado_client: AzureDevOpsClient, work_item_id: int) -> bool:
@@ -36,16 +125,19 @@ def validate_cmme_links(ado_client: AzureDevOpsClient, work_item_id: int) -> boo
     logger = structlog.get_logger()
     logger.info("Validating CMMI links for work item", work_item_id=work_item_id)
 
-    links = ado_client.get_links(work_item_id)
-    task_links = [link for link in links if link.rel in ['System.LinkTypes.Hierarchy-Forward', 'System.LinkTypes.Hierarchy-Reverse']]
+    # Ancestors come from the shared hierarchy cache; misses are batch-loaded
+    ancestors = get_hierarchy_cache().get_ancestors(work_item_id, ado_client.get_hierarchy_nodes)
+    ancestor_types = [node.get("type") for node in ancestors]
 
-    has_requirement = any('Requirement' in (link.attributes.get('name', '') if link.attributes else '') for link in task_links)
-    if not has_requirement:
+    if "Requirement" not in ancestor_types:
         logger.warning("No Requirement link found for task", work_item_id=work_item_id)
         return False
 
-    # For simplicity, assume Feature and Epic exist if Requirement exists
-    # In production, you'd need to traverse the hierarchy
+    if not has_traceability_chain(ancestors):
+        logger.warning("Incomplete Requirement → Feature → Epic hierarchy",
+                       work_item_id=work_item_id, ancestors=ancestor_types)
+        return False
+
     return True
 
 
@@ -54,89 +146,155 @@ def simulate_development_time() -> None:
     time.sleep(random.uniform(5, 15))
 
 
+async def simulate_development_time_async() -> None:
+    """Simulate coding time (5-15 seconds) without blocking the runner loop."""
+    await asyncio.sleep(random.uniform(5, 15))
+
+
 @app.task(bind=True)
 def process_dev_task(self, task_data: Dict, correlation_id: str):
     """Celery task for processing dev work."""
+    if EXECUTION_MODE == 'async':
+        try:
+            return task_runner.run(lambda: run_dev_task(task_data, correlation_id, blocking=False))
+        except asyncio.TimeoutError:
+            get_logger(correlation_id).error("Task timed out",
+                                             task_id=task_data['task_id'],
+                                             timeout_seconds=TASK_TIMEOUT_SECONDS)
+            return
+
+    asyncio.run(run_dev_task(task_data, correlation_id, blocking=True))
+
+
+async def run_dev_task(task_data: Dict, correlation_id: str, blocking: bool):
+    """
+    Body of process_dev_task shared by both execution modes.
+
+    With ``blocking`` ('sync' mode) it runs on a private loop in the worker
+    process and calls the clients inline. Otherwise it runs on the worker's
+    AsyncTaskRunner: ADO updates go through the pooled AsyncAzureDevOpsClient
+    and the PyGithub and SDK-backed calls, and task state writes, are
+    offloaded to threads so the loop keeps serving other tasks.
+    """
     logger = get_logger(correlation_id)
-    logger.info("Starting dev task processing", task_id=task_data['task_id'])
+    logger.info("Starting dev task processing", task_id=task_data['task_id'], mode=EXECUTION_MODE)
 
-    # Clients
-    ado_client, github_client = create_clients()
-    task = WorkStartRequest(**task_data)
+    if blocking:
+        ado_client, github_client = create_clients()
+        async_ado_client = None
+
+        async def call(func, *args):
+            return func(*args)
+    else:
+        ado_client, async_ado_client, github_client = get_async_clients()
+        call = asyncio.to_thread
 
+    task = WorkStartRequest(**task_data)
     current_status = None
-    new_status = TaskStatus.VALIDATING
 
-    try:
-        # Validate and update status
-        update_task_status(logger, ado_client, task, correlation_id, current_status, new_status)
+    async def advance(new_status):
+        nonlocal current_status
+        await call(update_task_status, logger, ado_client, task, correlation_id, current_status, new_status)
         current_status = new_status
 
+    try:
+        await advance(TaskStatus.VALIDATING)
+
         # CMMI Validation
-        if not validate_cmme_links(ado_client, task.azure_workitem_id):
+        if not await call(validate_cmme_links, ado_client, task.azure_workitem_id):
             logger.warning("CMMI validation failed", task_id=task.task_id)
-            ado_client.create_comment(
-                task.azure_workitem_id,
-                "Missing traceability links: please link to Feature/Requirement"
-            )
-            ado_client.update_state(task.azure_workitem_id, "Blocked")
-            update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.BLOCKED)
+            comment = "Missing traceability links: please link to Feature/Requirement"
+            if async_ado_client is not None:
+                await async_ado_client.update_work_item(task.azure_workitem_id, state="Blocked", comment=comment)
+            else:
+                ado_client.create_comment(task.azure_workitem_id, comment)
+                ado_client.update_state(task.azure_workitem_id, "Blocked")
+            await advance(TaskStatus.BLOCKED)
             return
 
-        # Setup phase
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.SETUP)
-        current_status = TaskStatus.SETUP
+        await advance(TaskStatus.SETUP)
 
         # Coding simulation
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.CODING)
-        current_status = TaskStatus.CODING
-        simulate_development_time()
+        await advance(TaskStatus.CODING)
+        if blocking:
+            simulate_development_time()
+        else:
+            await simulate_development_time_async()
 
         # Commit to GitHub
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.COMMITTING)
-        current_status = TaskStatus.COMMITTING
-
-        repo = github_client.get_repo(task.repository.split('/')[-1])  # Extract org/repo
+        await advance(TaskStatus.COMMITTING)
         branch_name = f"dev-{task.task_id.lower()}"
-        github_client.create_branch(repo, task.branch, branch_name)
 
         # Simulate code changes
         files_to_create = [
             ("sample_code.py", "# Sample code\nimport os\nprint('Hello World')"),
             ("README.md", f"# Feature for {task.task_id}\n\n{task.requirements or 'No requirements specified.'}")
         ]
+        pr_title = f"Implement {task.task_id}"
+        pr_body = f"Requirements: {task.requirements or 'See task details'}\n\nCloses #{task.task_id}"
 
-        for filename, content in files_to_create:
-            github_client.commit_file(repo, branch_name, filename, content,
-                                    f"Implement {task.task_id}: {filename}")
+        if GITHUB_BACKEND == 'graphql':
+            pr = await call(get_graphql_client().open_pull_request, task.repository, task.branch, branch_name,
+                            dict(files_to_create), f"Implement {task.task_id}", pr_title, pr_body)
+            logger.info("Pull request opened", task_id=task.task_id, pr_number=pr["number"],
+                        round_trips=pr["round_trips"])
+            pr_key = github_pr_key(repository_path(task.repository), pr["number"])
+            await advance(TaskStatus.PR_CREATED)
+        else:
+            repo = await call(github_client.get_repo, task.repository.split('/')[-1])  # Extract org/repo
+            await call(commit_task_files, github_client, repo, task, branch_name,
+                       dict(files_to_create), f"Implement {task.task_id}")
+
+            # Create PR
+            await advance(TaskStatus.PR_CREATED)
+            pr = await call(github_client.create_pull_request, repo, branch_name, task.branch, pr_title, pr_body)
+            pr_key = github_pr_key(repo.full_name, pr.number)
+
+        # The PR tracker runs complete_dev_task when the PR merges or closes
+        # (webhook or batched poll); the worker does not wait for it
+        await track_pull_request(pr_key, tracking_context(task_data, correlation_id))
+        logger.info("Waiting for pull request", task_id=task.task_id, pull_request=pr_key)
+
+    except asyncio.CancelledError:
+        # Per-task timeout from the runner; record the failure before unwinding
+        logger.error("Task cancelled", task_id=task.task_id, status=current_status)
+        await call(update_task_status, logger, ado_client, task, correlation_id, current_status, TaskStatus.FAILED)
+        raise
+    except Exception as e:
+        logger.error("Task failed", task_id=task.task_id, error=str(e))
+        await call(update_task_status, logger, ado_client, task, correlation_id, current_status, TaskStatus.FAILED)
 
-        # Create PR
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.PR_CREATED)
-        current_status = TaskStatus.PR_CREATED
 
-        pr_title = f"Implement {task.task_id}"
-        pr_body = f"Requirements: {task.requirements or 'See task details'}\n\nCloses #{task.task_id}"
-        pr = github_client.create_pull_request(repo, branch_name, task.branch, pr_title, pr_body)
+def tracking_context(task_data: Dict, correlation_id: str) -> Dict:
+    """What the PR tracker hands back to complete_dev_task."""
+    return {"kind": "dev_task", "task_data": task_data, "correlation_id": correlation_id}
 
-        # Wait for PR to be merged (in real scenario, this would be polled)
-        # For simulation, just mark complete after short wait
-        time.sleep(2)
 
-        # Complete
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.COMPLETED)
-        current_status = TaskStatus.COMPLETED
+@app.task(bind=True)
+def complete_dev_task(self, task_data: Dict, correlation_id: str, outcome: str):
+    """Finish a dev task once its pull request merged or closed (queued by the PR tracker)."""
+    logger = get_logger(correlation_id)
+    ado_client = create_ado_client()
+    task = WorkStartRequest(**task_data)
 
+    if outcome == MERGED:
+        update_task_status(logger, ado_client, task, correlation_id, TaskStatus.PR_CREATED, TaskStatus.COMPLETED)
         ado_client.update_state(task.azure_workitem_id, "Done")
-
         logger.info("Task completed successfully", task_id=task.task_id)
+        return
 
-    except Exception as e:
-        logger.error("Task failed", task_id=task.task_id, error=str(e))
-        update_task_status(logger, ado_client, task, correlation_id, current_status, TaskStatus.FAILED)
+    logger.warning("Pull request closed without merging", task_id=task.task_id)
+    ado_client.create_comment(task.azure_workitem_id, "Pull request was closed without merging")
+    update_task_status(logger, ado_client, task, correlation_id, TaskStatus.PR_CREATED, TaskStatus.FAILED)
 
 
 def update_task_status(logger, ado_client, task, correlation_id, old_status, new_status):
-    """Helper to update status and send audit event."""
+    """
+    Persist the task state to Redis and queue the audit event.
+
+    Audit events are shipped in batches by a background thread (see
+    src/audit.py), so a slow audit service does not slow the task down.
+    """
     audit_event = AuditEvent(
         correlation_id=correlation_id,
         task_id=task.task_id,
@@ -146,9 +304,14 @@ def update_task_status(logger, ado_client, task, correlation_id, old_status, new
         timestamp=datetime.utcnow().isoformat()
     )
 
-    # Send audit event
-    audit_service_url = get_env_var('AUDIT_SERVICE_URL', 'http://localhost:8001')
-    send_audit_event(audit_service_url, audit_event.dict(), logger)
+    try:
+        get_task_state_store().record(task.task_id, task.azure_workitem_id, correlation_id,
+                                      old_status.value if old_status else None, new_status.value,
+                                      audit_event.timestamp)
+    except Exception as e:
+        logger.warning("Failed to persist task state", task_id=task.task_id, error=str(e))
+
+    get_audit_buffer().record(audit_event.model_dump(mode="json"))
 
     # Log state change
     logger.info("Task status changed", task_id=task.task_id, old_status=old_status, new_status=new_status)
@@ -0,0 +1,100 @@
+"""
+Per-worker asyncio runner for concurrent dev-task execution.
+
+Celery runs the dev-agent task with a thread pool in async mode; every Celery
+thread hands its coroutine to one shared event loop owned by the worker and
+waits for the result. Network waits are multiplexed on that loop, a semaphore
+caps how many tasks run at once, and each task gets its own timeout.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+from src.utils import get_logger
+
+
+class AsyncTaskRunner:
+    """Runs coroutines on a background event loop with bounded concurrency."""
+
+    def __init__(self, max_concurrency: int = 50, default_timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.logger = get_logger()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.timed_out = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name="dev-agent-async-runner", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                self.logger.info("Async task runner started", max_concurrency=self.max_concurrency)
+            return self._loop
+
+    async def _guarded(self, coro_factory: Callable[[], Awaitable[Any]], timeout: Optional[float]) -> Any:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await asyncio.wait_for(coro_factory(), timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def run(self, coro_factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``coro_factory()`` on the worker loop and block the calling thread
+        until it finishes. Raises asyncio.TimeoutError when the task exceeds
+        ``timeout`` (or the runner's default timeout).
+        """
+        loop = self._ensure_loop()
+        timeout = timeout if timeout is not None else self.default_timeout
+        future = asyncio.run_coroutine_threadsafe(self._guarded(coro_factory, timeout), loop)
+        return future.result()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the loop thread; in-flight tasks are cancelled."""
+        with self._lock:
+            if self._loop is None:
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = None
+
+        async def _cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+        self.logger.info("Async task runner stopped", completed=self.completed, timed_out=self.timed_out)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,245 @@
+"""
+Batched audit reporting and task state persistence.
+
+Status transitions used to POST each audit event synchronously (5 s timeout)
+from inside the task, so a slow audit service stretched every task. Now:
+
+- ``AuditBuffer.record`` only appends to an in-process queue; a daemon
+  thread ships batches to ``{AUDIT_SERVICE_URL}/audit/events`` over a
+  keep-alive session. If the audit service has no batch endpoint (404/405)
+  the shipper falls back to one POST per event, still off the task's path.
+- ``TaskStateStore`` keeps the current state and history of every task in
+  Redis, so status queries do not depend on the audit service.
+
+The shipper thread is started lazily in the process that records events, so
+it survives Celery's prefork workers forking after import.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from prometheus_client import Counter, Gauge
+
+from src.codec import dumps, loads
+from src.utils import get_logger, get_env_var
+
+AUDIT_EVENTS = Counter('dev_agent_audit_events_total', 'Audit events by delivery outcome', ['outcome'])
+AUDIT_BATCHES = Counter('dev_agent_audit_batches_total', 'Audit batches shipped', ['mode'])
+AUDIT_BUFFERED = Gauge('dev_agent_audit_buffered_events', 'Audit events waiting to be shipped')
+
+
+class AuditBuffer:
+    """Bounded in-process queue of audit events shipped in batches by a background thread."""
+
+    def __init__(
+        self,
+        audit_service_url: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_events: int = 10000,
+        max_attempts: int = 3,
+        timeout: float = 5.0
+    ):
+        self.audit_service_url = audit_service_url.rstrip("/")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.logger = get_logger()
+        self.batch_supported = True
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=self.max_events)
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session = requests.Session()
+        self._session.headers["Content-Type"] = "application/json"
+
+    def _ensure_started(self) -> None:
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's thread and queue did not come along
+                self._reset()
+                self._pid = os.getpid()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-shipper", daemon=True)
+                self._thread.start()
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Queue ``event`` for delivery; never blocks on the audit service."""
+        self._ensure_started()
+        try:
+            self._idle.clear()
+            self._queue.put_nowait(event)
+            AUDIT_BUFFERED.inc()
+        except queue.Full:
+            AUDIT_EVENTS.labels(outcome="dropped").inc()
+            self.logger.warning("Audit buffer full, dropping event", max_events=self.max_events)
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if not batch:
+                if self._queue.empty():
+                    self._idle.set()
+                continue
+            AUDIT_BUFFERED.dec(len(batch))
+            self._ship(batch)
+            if self._queue.empty():
+                self._idle.set()
+        self._idle.set()
+
+    def _ship(self, batch: List[Dict[str, Any]]) -> None:
+        wait = 0.5
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if self.batch_supported and self._post_batch(batch):
+                    AUDIT_BATCHES.labels(mode="batch").inc()
+                else:
+                    batch = self._post_each(batch)
+                    if batch:
+                        raise RuntimeError(f"{len(batch)} audit events rejected")
+                    AUDIT_BATCHES.labels(mode="single").inc()
+                AUDIT_EVENTS.labels(outcome="sent").inc(len(batch) if self.batch_supported else 0)
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    AUDIT_EVENTS.labels(outcome="failed").inc(len(batch))
+                    self.logger.warning("Dropping audit events after retries", events=len(batch), error=str(e))
+                    return
+                time.sleep(wait)
+                wait *= 2
+
+    def _post_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """True when the batch endpoint accepted the batch; False if it does not exist."""
+        response = self._session.post(f"{self.audit_service_url}/audit/events",
+                                      data=dumps({"events": batch}), timeout=self.timeout)
+        if response.status_code in (404, 405):
+            self.batch_supported = False
+            self.logger.info("Audit service has no batch endpoint, posting events individually")
+            return False
+        if response.status_code >= 300:
+            raise RuntimeError(f"Audit batch rejected with HTTP {response.status_code}")
+        return True
+
+    def _post_each(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """POST events one by one; returns the ones that failed."""
+        failed = []
+        for event in batch:
+            try:
+                response = self._session.post(f"{self.audit_service_url}/audit/event",
+                                              data=dumps(event), timeout=self.timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                AUDIT_EVENTS.labels(outcome="sent").inc()
+            else:
+                failed.append(event)
+        return failed
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued event was shipped (or dropped); False on timeout."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        return self._idle.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Ship what is queued and stop the shipper thread."""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._session.close()
+
+
+class TaskStateStore:
+    """Current state and transition history of dev tasks in Redis (sync client)."""
+
+    def __init__(self, redis_client, key_prefix: str = "dev_task", ttl_seconds: int = 30 * 24 * 3600):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.key_prefix}:{task_id}"
+
+    def record(self, task_id: str, work_item_id: int, correlation_id: str,
+               old_status: Optional[str], new_status: str, timestamp: str) -> None:
+        transition = {"old_state": old_status, "new_state": new_status, "timestamp": timestamp}
+        key = self._key(task_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            "task_id": task_id,
+            "work_item_id": work_item_id,
+            "correlation_id": correlation_id,
+            "status": new_status,
+            "updated_at": timestamp,
+        })
+        pipe.rpush(f"{key}:history", dumps(transition))
+        pipe.expire(key, self.ttl_seconds)
+        pipe.expire(f"{key}:history", self.ttl_seconds)
+        pipe.execute()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.redis.hgetall(self._key(task_id))
+        if not raw:
+            return None
+        state = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                 for k, v in raw.items()}
+        state["work_item_id"] = int(state["work_item_id"])
+        state["history"] = [loads(item) for item in self.redis.lrange(f"{self._key(task_id)}:history", 0, -1)]
+        return state
+
+
+_audit_buffer: Optional[AuditBuffer] = None
+_task_state_store: Optional[TaskStateStore] = None
+
+
+def get_audit_buffer() -> AuditBuffer:
+    """Process-wide buffer for AUDIT_SERVICE_URL (defaults to http://localhost:8001)."""
+    global _audit_buffer
+    if _audit_buffer is None:
+        _audit_buffer = AuditBuffer(
+            get_env_var("AUDIT_SERVICE_URL", "http://localhost:8001"),
+            batch_size=int(get_env_var("AUDIT_BATCH_SIZE", "100")),
+            flush_interval=float(get_env_var("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0")),
+            max_events=int(get_env_var("AUDIT_BUFFER_MAX_EVENTS", "10000"))
+        )
+    return _audit_buffer
+
+
+def get_task_state_store() -> TaskStateStore:
+    """Process-wide task state store on TASK_STATE_REDIS_URL (defaults to REDIS_URL)."""
+    global _task_state_store
+    if _task_state_store is None:
+        import redis
+        _task_state_store = TaskStateStore(redis.from_url(
+            get_env_var("TASK_STATE_REDIS_URL", get_env_var("REDIS_URL", "redis://localhost:6379/0"))
+        ))
+    return _task_state_store
@@ -1,6 +1,11 @@
 import os
 import time
-from typing import List, Optional
+import base64
+import random
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
 from azure.devops.connection import Connection
 from azure.devops.v7_1.work_item_tracking.models import WorkItem
 from azure.devops.v7_1.work_item_tracking.models import WorkItemUpdate
@@ -9,6 +14,9 @@ from msrest.authentication import BasicTokenAuthentication
 from azure.devops.exceptions import AzureDevOpsServiceError
 import structlog
 
+from src.hierarchy import build_node
+from src.codec import dumps, loads
+
 
 class AzureDevOpsClient:
     def __init__(self, organization_url: str, personal_access_token: str, project_name: str):
@@ -92,3 +100,170 @@ class AzureDevOpsClient:
                 'fields': work_item.fields or {}
             }
         return self._retry_with_backoff(_get_item)
+
+    def get_hierarchy_nodes(self, work_item_ids: List[int]) -> List[dict]:
+        """Batch-fetch work items with relations as hierarchy cache nodes."""
+        def _get_items():
+            work_items = self.wit_client.get_work_items(ids=work_item_ids,
+                                                      project=self.project_name,
+                                                      expand='Relations',
+                                                      error_policy='Omit')
+            nodes = []
+            for work_item in work_items or []:
+                if work_item is None:  # Omitted (deleted or inaccessible)
+                    continue
+                relations = [
+                    {'rel': relation.rel, 'url': relation.url, 'attributes': relation.attributes or {}}
+                    for relation in work_item.relations or []
+                ]
+                work_item_type = (work_item.fields or {}).get('System.WorkItemType', 'Unknown')
+                nodes.append(build_node(work_item.id, work_item_type, relations))
+            return nodes
+        return self._retry_with_backoff(_get_items)
+
+
+class AzureDevOpsAPIError(Exception):
+    """HTTP error returned by the Azure DevOps REST API."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Azure DevOps API error: HTTP {status} - {message}")
+        self.status = status
+
+
+class AsyncAzureDevOpsClient:
+    """
+    Non-blocking Azure DevOps work item client for async FastAPI handlers.
+
+    Same surface as AzureDevOpsClient, backed by a pooled httpx.AsyncClient
+    with asyncio-based backoff so ADO round trips never block the event loop.
+    """
+
+    api_version = "7.1"
+
+    def __init__(
+        self,
+        organization_url: str,
+        personal_access_token: str,
+        project_name: str,
+        max_connections: int = 20,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.organization_url = organization_url.rstrip('/')
+        self.project_name = project_name
+        self.logger = structlog.get_logger()
+
+        token = base64.b64encode(f":{personal_access_token}".encode()).decode()
+        self.client = httpx.AsyncClient(
+            base_url=f"{self.organization_url}/{project_name}/_apis/wit",
+            headers={'Authorization': f'Basic {token}', 'Accept': 'application/json'},
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport
+        )
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        params: Optional[Dict[str, str]] = None,
+        content_type: str = 'application/json',
+        max_attempts: int = 3,
+        backoff_factor: int = 2
+    ) -> Dict[str, Any]:
+        """Send a request, retrying 5xx/429/network errors with non-blocking backoff."""
+        params = {**(params or {}), 'api-version': self.api_version}
+        headers = {'Content-Type': content_type}
+        content = dumps(body) if body is not None else None
+
+        wait_time = 1.0
+        for attempt in range(1, max_attempts + 1):
+            try:
+                response = await self.client.request(method, path, params=params,
+                                                     content=content, headers=headers)
+            except httpx.TransportError as e:
+                if attempt >= max_attempts:
+                    self.logger.error("Max retries exceeded", error=str(e))
+                    raise
+                self.logger.warning("Azure DevOps network error, retrying", attempt=attempt, error=str(e), wait_time=wait_time)
+                await asyncio.sleep(wait_time)
+                wait_time *= backoff_factor
+                continue
+
+            if response.status_code < 400:
+                return loads(response.content) if response.content else {}
+
+            error = AzureDevOpsAPIError(response.status_code, response.text)
+            if response.status_code in (401, 403):
+                self.logger.error("Authentication error", error=str(error))
+                raise error
+            if response.status_code != 429 and response.status_code < 500:
+                self.logger.error("Non-retryable Azure DevOps error", error=str(error))
+                raise error
+            if attempt >= max_attempts:
+                self.logger.error("Max retries exceeded", error=str(error))
+                raise error
+
+            delay = wait_time
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else wait_time * 2
+            delay += random.uniform(0, delay / 4)  # Jitter so concurrent callers spread out
+            self.logger.warning("Azure DevOps API error, retrying", attempt=attempt,
+                                status_code=response.status_code, wait_time=delay)
+            await asyncio.sleep(delay)
+            wait_time *= backoff_factor
+
+        raise Exception("Max retries exceeded")
+
+    async def update_work_item(
+        self,
+        work_item_id: int,
+        state: Optional[str] = None,
+        comment: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Apply a comment and/or state change as a single JSON-patch document."""
+        operations = []
+        if comment:
+            operations.append({"op": "add", "path": "/fields/System.History", "value": comment})
+        if state:
+            operations.append({"op": "add", "path": "/fields/System.State", "value": state})
+        if not operations:
+            raise ValueError("Nothing to update: provide a state and/or comment")
+
+        return await self._request("PATCH", f"/workitems/{work_item_id}", body=operations,
+                                   content_type='application/json-patch+json')
+
+    async def create_comment(self, work_item_id: int, text: str) -> Dict[str, Any]:
+        """Add a comment to a work item."""
+        return await self.update_work_item(work_item_id, comment=text)
+
+    async def update_state(self, work_item_id: int, state: str) -> Dict[str, Any]:
+        """Update work item state."""
+        return await self.update_work_item(work_item_id, state=state)
+
+    async def get_links(self, work_item_id: int) -> List[dict]:
+        """Get work item relations (links) as dicts with rel, url and attributes."""
+        work_item = await self._request("GET", f"/workitems/{work_item_id}",
+                                        params={'$expand': 'Relations'})
+        return work_item.get('relations') or []
+
+    async def get_work_item(self, work_item_id: int) -> dict:
+        """Get work item details."""
+        work_item = await self._request("GET", f"/workitems/{work_item_id}")
+        return {
+            'id': work_item['id'],
+            'fields': work_item.get('fields') or {}
+        }
+
+    async def close(self):
+        """Close pooled connections."""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
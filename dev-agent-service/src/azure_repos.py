@@ -1,11 +1,134 @@
 import os
+import re
+import json
+import time
+import base64
+import random
 import asyncio
 import aiohttp
-from typing import Optional, Dict, Any, List
-from tenacity import retry, stop_after_attempt, wait_exponential
-
-from src.utils import get_logger, send_audit_event, get_env_var
-from src.models import AuditEvent
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, AsyncIterator, List, Set, Tuple, Union
+from prometheus_client import Counter, Histogram
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from src.audit import get_audit_buffer
+from src.utils import get_logger, get_env_var, generate_correlation_id
+from src.codec import dumps, loads
+from src.workspace import get_workspace_manager
+
+# Push contention metrics
+PUSH_CONFLICTS = Counter('dev_agent_push_conflicts_total',
+                         'Pushes rejected because the branch head moved', ['repository'])
+PUSH_CONTENT_CONFLICTS = Counter('dev_agent_push_content_conflicts_total',
+                                 'Pushes abandoned because another commit touched the same paths', ['repository'])
+PUSH_ATTEMPTS = Histogram('dev_agent_push_attempts', 'Push attempts per commit_changes call',
+                          ['repository'], buckets=(1, 2, 3, 4, 5, 8))
+PUSH_LOCK_WAIT = Histogram('dev_agent_push_lock_wait_seconds', 'Time waiting for the per-branch push lock',
+                           ['repository'])
+
+PUSH_MODES = Counter('dev_agent_push_mode_total', 'Pushes by upload mode (inline, streamed or git)',
+                    ['repository', 'mode'])
+
+# Azure Repos error codes for a stale oldObjectId on a ref update
+STALE_REF_MARKERS = ("TF401028", "GitReferenceStaleException", "has already been updated by another client")
+
+# Streamed push bodies: binary chunks are a multiple of 3 bytes so each one
+# base64-encodes on its own without padding in the middle of the content
+STREAM_CHUNK_BYTES = 3 * 64 * 1024
+STREAM_CHUNK_CHARS = 64 * 1024
+
+# New file content: text, raw bytes, or a file on disk read in chunks
+ChangeContent = Union[str, bytes, Path]
+
+
+class AzureReposAPIError(Exception):
+    """Non-success response from the Azure Repos REST API."""
+
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+        super().__init__(f"Azure Repos API error: HTTP {status} - {detail}")
+
+
+class StaleRefError(AzureReposAPIError):
+    """A push was rejected because the branch moved since its head was read."""
+
+
+class PushConflictError(Exception):
+    """Commits that landed on the branch meanwhile touched paths in this push."""
+
+    def __init__(self, branch: str, paths: List[str]):
+        self.branch = branch
+        self.paths = paths
+        super().__init__(f"Push to '{branch}' conflicts with concurrent changes to: {', '.join(paths)}")
+
+
+def _is_stale_ref(status: int, detail: str) -> bool:
+    return status in (400, 409) and any(marker in detail for marker in STALE_REF_MARKERS)
+
+
+def content_size(content: ChangeContent) -> int:
+    """Size of change content in bytes (characters for text)."""
+    if isinstance(content, Path):
+        return content.stat().st_size
+    return len(content)
+
+
+def _json_bytes(value: Any) -> bytes:
+    encoded = dumps(value)
+    return encoded if isinstance(encoded, bytes) else encoded.encode("utf-8")
+
+
+async def _content_chunks(content: ChangeContent) -> AsyncIterator[bytes]:
+    """The JSON string value of ``newContent.content``, without quotes, in chunks."""
+    if isinstance(content, str):
+        for offset in range(0, len(content), STREAM_CHUNK_CHARS):
+            yield json.dumps(content[offset:offset + STREAM_CHUNK_CHARS])[1:-1].encode("ascii")
+    elif isinstance(content, Path):
+        with content.open("rb") as source:
+            while True:
+                chunk = await asyncio.to_thread(source.read, STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+    else:
+        view = memoryview(content)
+        for offset in range(0, len(view), STREAM_CHUNK_BYTES):
+            yield base64.b64encode(view[offset:offset + STREAM_CHUNK_BYTES])
+
+
+async def stream_push_body(
+    ref_updates: List[Dict[str, Any]],
+    commit_data: Dict[str, Any],
+    contents: Dict[str, ChangeContent]
+) -> AsyncIterator[bytes]:
+    """
+    Serialize a /pushes request incrementally.
+
+    ``commit_data["changes"]`` holds the changes without ``newContent``; the
+    content of each non-delete change is taken from ``contents`` (keyed by
+    path) and encoded chunk by chunk, so no change is ever held in memory
+    in its encoded form.
+    """
+    header = {key: value for key, value in commit_data.items() if key != "changes"}
+    yield b'{"refUpdates":' + _json_bytes(ref_updates) + b',"commits":[' + _json_bytes(header)[:-1]
+    yield b',"changes":[' if header else b'"changes":['
+    for index, change in enumerate(commit_data["changes"]):
+        if index:
+            yield b","
+        if change["changeType"] == "delete":
+            yield _json_bytes(change)
+            continue
+        content = contents[change["item"]["path"]]
+        content_type = "rawtext" if isinstance(content, str) else "base64encoded"
+        yield (_json_bytes(change)[:-1] + b',"newContent":{"contentType":"' + content_type.encode("ascii")
+               + b'","content":"')
+        async for chunk in _content_chunks(content):
+            yield chunk
+        yield b'"}}'
+    yield b"]}]}"
 
 
 class AzureReposClient:
@@ -16,17 +139,63 @@ class AzureReposClient:
         organization_url: str,
         project_name: str,
         repository_name: str,
-        personal_access_token: str
+        personal_access_token: str,
+        lock_redis=None,
+        push_lock_mode: Optional[str] = None,
+        max_push_attempts: int = 5,
+        conflict_backoff: float = 0.25,
+        contention_window: int = 300,
+        session: Optional[aiohttp.ClientSession] = None,
+        stream_threshold: Optional[int] = None,
+        max_push_file_bytes: Optional[int] = None
     ):
+        """
+        Args:
+            lock_redis: redis.asyncio client for per-branch push locks; not
+                closed by the client (default: an own client for
+                AZURE_REPOS_PUSH_LOCK_REDIS_URL when set, closed by close())
+            push_lock_mode: 'auto' serializes pushes on branches that saw a
+                conflict within ``contention_window`` seconds, 'always' on
+                every push, 'off' never (default AZURE_REPOS_PUSH_LOCK_MODE or 'auto')
+            max_push_attempts: Push attempts on stale-ref conflicts
+            conflict_backoff: Upper bound of the first retry's jitter, in seconds
+            session: Shared aiohttp session (e.g. one per organization host);
+                the client does not close sessions it did not create
+            stream_threshold: Pushes whose content exceeds this many bytes are
+                streamed in chunks instead of serialized in memory (default
+                AZURE_REPOS_STREAM_THRESHOLD_BYTES or 1 MiB)
+            max_push_file_bytes: Changes containing a file larger than this go
+                out as a git push from a local worktree instead of the REST
+                API; 0 disables (default AZURE_REPOS_MAX_PUSH_FILE_BYTES or 25 MiB)
+        """
         self.organization_url = organization_url.rstrip('/')
         self.project_name = project_name
         self.repository_name = repository_name
         self.personal_access_token = personal_access_token
         self.base_url = f"{self.organization_url}/_apis/git/repositories/{self.repository_name}"
         self.logger = get_logger()
-
-        # Async HTTP session with authentication
-        self.session = aiohttp.ClientSession(
+        self._item_index: Dict[str, Set[str]] = {}
+
+        # Push conflict handling
+        self._owns_lock_redis = lock_redis is None and bool(get_env_var("AZURE_REPOS_PUSH_LOCK_REDIS_URL"))
+        if self._owns_lock_redis:
+            import redis.asyncio
+            lock_redis = redis.asyncio.from_url(get_env_var("AZURE_REPOS_PUSH_LOCK_REDIS_URL"))
+        self.lock_redis = lock_redis
+        self.push_lock_mode = (push_lock_mode or get_env_var("AZURE_REPOS_PUSH_LOCK_MODE", "auto")).lower()
+        self.max_push_attempts = max_push_attempts
+        self.conflict_backoff = conflict_backoff
+        self.contention_window = contention_window
+
+        # Large content handling
+        self.stream_threshold = stream_threshold if stream_threshold is not None else int(
+            get_env_var("AZURE_REPOS_STREAM_THRESHOLD_BYTES", str(1024 * 1024)))
+        self.max_push_file_bytes = max_push_file_bytes if max_push_file_bytes is not None else int(
+            get_env_var("AZURE_REPOS_MAX_PUSH_FILE_BYTES", str(25 * 1024 * 1024)))
+
+        # Async HTTP session with authentication (headers are also set per request)
+        self._owns_session = session is None
+        self.session = session or aiohttp.ClientSession(
             headers={
                 'Content-Type': 'application/json',
                 'Authorization': f'Basic {personal_access_token}'
@@ -34,9 +203,11 @@ class AzureReposClient:
         )
 
     async def close(self):
-        """Clean up HTTP session."""
-        if self.session:
+        """Clean up the HTTP session and lock client, unless they are shared."""
+        if self.session and self._owns_session:
             await self.session.close()
+        if self.lock_redis is not None and self._owns_lock_redis:
+            await self.lock_redis.aclose()
 
     async def _make_request(
         self,
@@ -44,9 +215,15 @@ class AzureReposClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, str]] = None,
-        api_version: str = "7.0"
+        api_version: str = "7.0",
+        body: Optional[AsyncIterator[bytes]] = None
     ) -> Dict[str, Any]:
-        """Make authenticated request to Azure DevOps REST API."""
+        """
+        Make authenticated request to Azure DevOps REST API.
+
+        ``body`` is a pre-serialized JSON body sent with chunked transfer
+        encoding, for payloads too large to build in memory.
+        """
         url = f"{self.base_url}{endpoint}"
         if params:
             import urllib.parse
@@ -64,8 +241,10 @@ class AzureReposClient:
             }
         }
 
-        if data:
-            request_kwargs['json'] = data
+        if body is not None:
+            request_kwargs['data'] = body
+        elif data:
+            request_kwargs['data'] = dumps(data)
 
         try:
             async with self.session.request(**request_kwargs) as response:
@@ -75,12 +254,14 @@ class AzureReposClient:
                                     status_code=response.status,
                                     endpoint=endpoint,
                                     error=error_detail)
-                    raise Exception(f"Azure Repos API error: HTTP {response.status} - {error_detail}")
+                    if _is_stale_ref(response.status, error_detail):
+                        raise StaleRefError(response.status, error_detail)
+                    raise AzureReposAPIError(response.status, error_detail)
 
                 if method.upper() == 'PATCH' or response.status == 204:
                     return {}
 
-                return await response.json()
+                return loads(await response.read())
 
         except aiohttp.ClientError as e:
             self.logger.error(f"Network error in Azure Repos API",
@@ -119,7 +300,7 @@ class AzureReposClient:
 
         branch_ref = await self._make_request(
             "POST",
-            f"/refs?api-version=7.0",
+            "/refs",
             data=[branch_data]
         )
 
@@ -129,23 +310,11 @@ class AzureReposClient:
                         commit_id=base_commit_id)
 
         # Send audit event
-        from datetime import datetime
-        from src.utils import generate_correlation_id
-
-        audit_event = AuditEvent(
-            correlation_id=generate_correlation_id(),
-            event_type="branch_created",
-            project_name=self.project_name,
-            repo_name=self.repository_name,
-            timestamp=datetime.utcnow().isoformat(),
-            service="dev-agent-service",
-            details={
-                "base_branch": base_branch,
-                "new_branch": new_branch,
-                "commit_id": base_commit_id
-            }
-        )
-        await send_audit_event(get_env_var("AUDIT_SERVICE_URL"), audit_event, self.logger)
+        await self._send_audit("branch_created", None, {
+            "base_branch": base_branch,
+            "new_branch": new_branch,
+            "commit_id": base_commit_id
+        })
 
         return base_commit_id
 
@@ -162,20 +331,172 @@ class AzureReposClient:
         result = await self._make_request("GET", "/refs", params=params)
         return result.get("value", [])
 
+    async def get_item_paths(self, commit_id: str) -> Set[str]:
+        """
+        Index of file paths present at a commit.
+
+        Cached per commit ID; after a push the index for the new head is
+        derived locally, so consecutive pushes to a branch skip this call.
+        """
+        if commit_id in self._item_index:
+            return self._item_index[commit_id]
+
+        result = await self._make_request("GET", "/items", params={
+            "scopePath": "/",
+            "recursionLevel": "Full",
+            "versionDescriptor.version": commit_id,
+            "versionDescriptor.versionType": "commit"
+        })
+        paths = {item['path'] for item in result.get('value', []) if item.get('gitObjectType') == 'blob'}
+        self._remember_index(commit_id, paths)
+        return paths
+
+    def _remember_index(self, commit_id: str, paths: Set[str]):
+        self._item_index[commit_id] = paths
+        while len(self._item_index) > 16:  # Only recent heads are useful
+            self._item_index.pop(next(iter(self._item_index)))
+
+    @staticmethod
+    def _new_content(content: ChangeContent) -> Dict[str, str]:
+        if isinstance(content, Path):
+            content = content.read_bytes()  # Small files only; larger pushes are streamed
+        if isinstance(content, bytes):
+            return {"content": base64.b64encode(content).decode("ascii"), "contentType": "base64encoded"}
+        return {"content": content, "contentType": "rawtext"}
+
+    async def get_changed_paths(self, base_commit_id: str, target_commit_id: str) -> Optional[Dict[str, str]]:
+        """
+        Paths changed between two commits, mapped to their change type.
+
+        Returns None when the diff is too large to be listed in full.
+        """
+        result = await self._make_request("GET", "/diffs/commits", params={
+            "baseVersion": base_commit_id,
+            "baseVersionType": "commit",
+            "targetVersion": target_commit_id,
+            "targetVersionType": "commit",
+            "$top": "2000"
+        })
+        if not result.get('allChangesIncluded', True):
+            return None
+
+        changed = {}
+        for change in result.get('changes', []):
+            item = change.get('item', {})
+            if item.get('isFolder') or item.get('gitObjectType') == 'tree':
+                continue
+            changed[item['path']] = change.get('changeType', 'edit')
+            if change.get('sourceServerItem'):
+                changed[change['sourceServerItem']] = 'delete'
+        return changed
+
+    async def _rebase_index(self, old_head: str, new_head: str, paths: Set[str]) -> Tuple[Optional[Set[str]], Set[str]]:
+        """
+        Move an item index from ``old_head`` to ``new_head``.
+
+        Returns (paths touched in between, index at new_head); touched is None
+        when the intervening changes could not be listed.
+        """
+        changed = await self.get_changed_paths(old_head, new_head)
+        if changed is None:
+            return None, await self.get_item_paths(new_head)
+
+        new_paths = set(paths)
+        for path, change_type in changed.items():
+            if 'delete' in change_type:
+                new_paths.discard(path)
+            else:
+                new_paths.add(path)
+        self._remember_index(new_head, new_paths)
+        return set(changed), new_paths
+
+    async def _branch_head(self, branch_ref: str) -> str:
+        refs = await self.get_refs(branch_ref)
+        if not refs:
+            raise Exception(f"Branch '{branch_ref[len('refs/heads/'):]}' not found")
+        return refs[0]['objectId']
+
+    def _contention_key(self, branch: str) -> str:
+        return f"azrepos:contended:{self.repository_name}:{branch}"
+
+    async def _should_serialize(self, branch: str) -> bool:
+        if self.lock_redis is None or self.push_lock_mode == "off":
+            return False
+        if self.push_lock_mode == "always":
+            return True
+        return bool(await self.lock_redis.exists(self._contention_key(branch)))
+
+    async def _record_conflict(self, branch: str):
+        PUSH_CONFLICTS.labels(repository=self.repository_name).inc()
+        if self.lock_redis is not None:
+            try:
+                await self.lock_redis.set(self._contention_key(branch), 1, ex=self.contention_window)
+            except Exception as e:
+                self.logger.warning("Failed to mark branch as contended", branch=branch, error=str(e))
+
+    @asynccontextmanager
+    async def _branch_lock(self, branch: str):
+        """Serialize pushes to a contended branch across workers."""
+        if not await self._should_serialize(branch):
+            yield
+            return
+
+        lock = self.lock_redis.lock(
+            f"azrepos:push-lock:{self.repository_name}:{branch}",
+            timeout=60,
+            blocking_timeout=30
+        )
+        started = time.monotonic()
+        acquired = await lock.acquire()
+        PUSH_LOCK_WAIT.labels(repository=self.repository_name).observe(time.monotonic() - started)
+        if not acquired:
+            # Fall back to optimistic pushing rather than failing the task
+            self.logger.warning("Push lock not acquired, pushing optimistically", branch=branch)
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            try:
+                await lock.release()
+            except Exception as e:
+                self.logger.warning("Failed to release push lock", branch=branch, error=str(e))
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=60)
+        wait=wait_exponential(multiplier=1, min=4, max=60),
+        retry=retry_if_not_exception_type((StaleRefError, PushConflictError, ValueError))
     )
-    async def commit_file(
+    async def commit_changes(
         self,
         branch: str,
-        filename: str,
-        content: str,
+        changes: Dict[str, Optional[ChangeContent]],
         message: str,
         work_item_id: Optional[int] = None
     ) -> tuple[str, str]:
         """
-        Commit a new file to the repository.
+        Commit many file changes to a branch in a single push.
+
+        Args:
+            changes: path -> new content (str, bytes, or a Path read from
+                disk); None deletes the path
+
+        Change types (add/edit/delete) are resolved against the item index of
+        the branch head, so the push is one ref lookup, at most one index
+        lookup and one /pushes call regardless of the number of files.
+
+        If the branch moves before the push lands, only the new head is
+        re-read and the change set is re-applied on top of it, provided the
+        intervening commits did not touch the same paths (PushConflictError
+        otherwise). Retries use short jittered delays instead of the
+        exponential backoff used for API failures.
+
+        Pushes larger than ``stream_threshold`` are encoded chunk by chunk
+        into the request body. If any file exceeds ``max_push_file_bytes``
+        the whole change set is committed in a cached git worktree (see
+        src/workspace.py) and sent with ``git push`` instead; the work item
+        is then linked through the ``#id`` in the commit message.
 
         Returns: (commit_id, commit_url)
         """
@@ -184,86 +505,210 @@ class AzureReposClient:
             message = f"{message} (#{work_item_id})"
         else:
             # Try to extract work item ID from message if already present
-            import re
             work_item_match = re.search(r'#(\d+)', message)
             if work_item_match:
                 work_item_id = int(work_item_match.group(1))
 
-        # Get current branch ref
+        changes = {(path if path.startswith('/') else f"/{path}"): content for path, content in changes.items()}
         branch_ref = f"refs/heads/{branch}"
-        refs = await self.get_refs(branch_ref)
 
-        if not refs:
-            raise Exception(f"Branch '{branch}' not found")
-
-        # Get latest commit on branch
-        latest_commit_id = refs[0]['objectId']
-        latest_commit = await self._make_request("GET", f"/commits/{latest_commit_id}")
-
-        # Create change object
-        change = {
-            "changeType": "add" if filename not in [item['path'] for item in latest_commit.get('changes', [])]
-                       else "edit",
-            "item": {
-                "path": filename
-            },
-            "newContent": {
-                "content": content,
-                "contentType": "rawtext"
-            }
-        }
+        oversized = [path for path, content in changes.items()
+                     if content is not None and self.max_push_file_bytes
+                     and content_size(content) > self.max_push_file_bytes]
+
+        async with self._branch_lock(branch):
+            if oversized:
+                # Too large for a REST push body; git streams packs from disk
+                self.logger.info("Pushing large files with git", branch=branch, files=oversized,
+                                max_push_file_bytes=self.max_push_file_bytes)
+                PUSH_MODES.labels(repository=self.repository_name, mode="git").inc()
+                commit_id, push_changes = await asyncio.to_thread(self._push_with_git, branch, changes, message)
+                attempt = 1
+            else:
+                head = await self._branch_head(branch_ref)
+                existing_paths = await self.get_item_paths(head)
+
+                attempt = 1
+                while True:
+                    try:
+                        commit_id, push_changes = await self._push(
+                            branch, head, existing_paths, changes, message, work_item_id
+                        )
+                        break
+                    except StaleRefError:
+                        await self._record_conflict(branch)
+                        if attempt >= self.max_push_attempts:
+                            PUSH_ATTEMPTS.labels(repository=self.repository_name).observe(attempt)
+                            raise
+
+                        new_head = await self._branch_head(branch_ref)
+                        touched, existing_paths = await self._rebase_index(head, new_head, existing_paths)
+                        overlap = sorted(set(changes) & touched) if touched is not None else sorted(changes)
+                        if overlap:
+                            PUSH_CONTENT_CONFLICTS.labels(repository=self.repository_name).inc()
+                            raise PushConflictError(branch, overlap)
+
+                        self.logger.info("Branch moved during push, re-applying changes",
+                                        branch=branch, old_head=head, new_head=new_head, attempt=attempt)
+                        head = new_head
+                        await asyncio.sleep(random.uniform(0, self.conflict_backoff * attempt))
+                        attempt += 1
+
+        PUSH_ATTEMPTS.labels(repository=self.repository_name).observe(attempt)
+        commit_url = f"{self.organization_url}/{self.project_name}/_git/{self.repository_name}/commit/{commit_id}"
+
+        change_counts = {}
+        for change in push_changes:
+            change_counts[change["changeType"]] = change_counts.get(change["changeType"], 0) + 1
+
+        self.logger.info("Changes pushed",
+                        branch=branch,
+                        commit_id=commit_id,
+                        changes=change_counts,
+                        push_attempts=attempt,
+                        work_item_id=work_item_id)
+
+        # One audit event per push, not per file
+        await self._send_audit("commit_pushed", work_item_id, {
+            "files": [change["item"]["path"] for change in push_changes],
+            "change_counts": change_counts,
+            "branch": branch,
+            "commit_id": commit_id,
+            "message": message,
+            "push_attempts": attempt,
+            "work_item_linked": work_item_id is not None
+        })
+
+        return commit_id, commit_url
+
+    async def _push(
+        self,
+        branch: str,
+        head: str,
+        existing_paths: Set[str],
+        changes: Dict[str, Optional[ChangeContent]],
+        message: str,
+        work_item_id: Optional[int]
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Build the change list against ``head`` and POST a single push."""
+        streamed = sum(content_size(content) for content in changes.values()
+                       if content is not None) > self.stream_threshold
+        push_changes = []
+        new_paths = set(existing_paths)
+        for path, content in changes.items():
+            if content is None:
+                if path not in existing_paths:
+                    self.logger.warning("Skipping delete of missing file", filename=path, branch=branch)
+                    continue
+                push_changes.append({"changeType": "delete", "item": {"path": path}})
+                new_paths.discard(path)
+            else:
+                change = {"changeType": "edit" if path in existing_paths else "add", "item": {"path": path}}
+                if not streamed:
+                    change["newContent"] = self._new_content(content)
+                push_changes.append(change)
+                new_paths.add(path)
+
+        if not push_changes:
+            raise ValueError("No changes to commit")
 
         # Create commit
         commit_data = {
             "comment": message,
-            "changes": [change]
+            "changes": push_changes
         }
 
         if work_item_id:
             # Add work item reference if specified
             commit_data["workItems"] = [{"id": str(work_item_id)}]
 
-        commit_result = await self._make_request(
-            "POST",
-            f"/pushes?api-version=7.0",
-            data={
-                "refUpdates": [{
-                    "name": branch_ref,
-                    "oldObjectId": latest_commit_id
-                }],
-                "commits": [commit_data]
-            }
-        )
+        ref_updates = [{
+            "name": f"refs/heads/{branch}",
+            "oldObjectId": head
+        }]
+        if streamed:
+            PUSH_MODES.labels(repository=self.repository_name, mode="streamed").inc()
+            commit_result = await self._make_request(
+                "POST",
+                "/pushes",
+                body=stream_push_body(ref_updates, commit_data, changes)
+            )
+        else:
+            PUSH_MODES.labels(repository=self.repository_name, mode="inline").inc()
+            commit_result = await self._make_request(
+                "POST",
+                "/pushes",
+                data={
+                    "refUpdates": ref_updates,
+                    "commits": [commit_data]
+                }
+            )
 
         commit_id = commit_result['commits'][0]['commitId']
-        commit_url = f"{self.organization_url}/{self.project_name}/_git/{self.repository_name}/commit/{commit_id}"
-
-        self.logger.info("File committed",
-                        filename=filename,
-                        branch=branch,
-                        commit_id=commit_id,
-                        work_item_id=work_item_id)
+        self._remember_index(commit_id, new_paths)
+        return commit_id, push_changes
 
-        # Send audit event
-        audit_event = AuditEvent(
-            correlation_id=generate_correlation_id(),
-            event_type="commit_pushed",
-            project_name=self.project_name,
-            repo_name=self.repository_name,
-            work_item_id=work_item_id,
-            timestamp=datetime.utcnow().isoformat(),
-            service="dev-agent-service",
-            details={
-                "filename": filename,
-                "branch": branch,
-                "commit_id": commit_id,
-                "message": message,
-                "work_item_linked": work_item_id is not None
-            }
+    def _push_with_git(
+        self,
+        branch: str,
+        changes: Dict[str, Optional[ChangeContent]],
+        message: str
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Commit ``changes`` on top of ``branch`` in a cached worktree and git push it (blocking)."""
+        workspace = get_workspace_manager().checkout(
+            f"{self.organization_url}/{self.project_name}/_git/{self.repository_name}",
+            base_branch=branch,
+            branch=branch,
+            task_id=f"push-{generate_correlation_id()}",
+            auth_header=f"Authorization: Basic {self.personal_access_token}"
         )
-        await send_audit_event(get_env_var("AUDIT_SERVICE_URL"), audit_event, self.logger)
+        with workspace:
+            base = workspace.base_blobs()
+            written = workspace.write_files({path: content for path, content in changes.items() if content is not None})
+            removed = workspace.delete_files([path for path, content in changes.items() if content is None])
+            if workspace.commit(message) is None:
+                raise ValueError("No changes to commit")
+            commit_id = workspace.push()
+
+        push_changes = [{"changeType": "edit" if path in base else "add", "item": {"path": f"/{path}"}}
+                        for path in written]
+        push_changes += [{"changeType": "delete", "item": {"path": f"/{path}"}} for path in removed]
+        return commit_id, push_changes
 
-        return commit_id, commit_url
+    async def commit_file(
+        self,
+        branch: str,
+        filename: str,
+        content: ChangeContent,
+        message: str,
+        work_item_id: Optional[int] = None
+    ) -> tuple[str, str]:
+        """
+        Commit a single file to the repository.
+
+        Returns: (commit_id, commit_url)
+        """
+        return await self.commit_changes(branch, {filename: content}, message, work_item_id)
+
+    async def _send_audit(
+        self,
+        event_type: str,
+        work_item_id: Optional[int],
+        details: Dict[str, Any],
+        correlation_id: Optional[str] = None
+    ):
+        """Queue a repository audit event for batched delivery (see src/audit.py)."""
+        event = {
+            "correlation_id": correlation_id or generate_correlation_id(),
+            "event_type": event_type,
+            "project_name": self.project_name,
+            "repo_name": self.repository_name,
+            "work_item_id": work_item_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "service": "dev-agent-service",
+            "details": details
+        }
+        get_audit_buffer().record(event)
 
     @retry(
         stop=stop_after_attempt(3),
@@ -314,7 +759,7 @@ class AzureReposClient:
 
         pr_result = await self._make_request(
             "POST",
-            f"/pullRequests?api-version=7.0",
+            "/pullRequests",
             data=pr_data
         )
 
@@ -328,22 +773,12 @@ class AzureReposClient:
                         work_item_id=work_item_id)
 
         # Send audit event
-        audit_event = AuditEvent(
-            correlation_id=correlation_id,
-            event_type="pr_created",
-            project_name=self.project_name,
-            repo_name=self.repository_name,
-            work_item_id=work_item_id,
-            timestamp=datetime.utcnow().isoformat(),
-            service="dev-agent-service",
-            details={
-                "pr_id": pr_id,
-                "source_branch": source_branch,
-                "target_branch": target_branch,
-                "title": title
-            }
-        )
-        await send_audit_event(get_env_var("AUDIT_SERVICE_URL"), audit_event, self.logger)
+        await self._send_audit("pr_created", work_item_id, {
+            "pr_id": pr_id,
+            "source_branch": source_branch,
+            "target_branch": target_branch,
+            "title": title
+        }, correlation_id=correlation_id)
 
         return {
             "pullRequestId": pr_id,
@@ -376,7 +811,7 @@ class AzureReposClient:
 
         tag_result = await self._make_request(
             "POST",
-            "/refs?api-version=7.0",
+            "/refs",
             data=[tag_data]
         )
 
@@ -386,21 +821,11 @@ class AzureReposClient:
                         work_item_id=work_item_id)
 
         # Send audit event
-        audit_event = AuditEvent(
-            correlation_id=generate_correlation_id(),
-            event_type="tag_created",
-            project_name=self.project_name,
-            repo_name=self.repository_name,
-            work_item_id=work_item_id,
-            timestamp=datetime.utcnow().isoformat(),
-            service="dev-agent-service",
-            details={
-                "tag_name": tag_name,
-                "commit_id": commit_id,
-                "description": description
-            }
-        )
-        await send_audit_event(get_env_var("AUDIT_SERVICE_URL"), audit_event, self.logger)
+        await self._send_audit("tag_created", work_item_id, {
+            "tag_name": tag_name,
+            "commit_id": commit_id,
+            "description": description
+        })
 
         return tag_name
 
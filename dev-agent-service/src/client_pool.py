@@ -0,0 +1,208 @@
+"""
+Bounded pool of per-tenant Azure clients.
+
+Clients are keyed by what they are bound to (organization/project for work
+item clients, plus repository for repo clients), capped at ``max_size`` with
+least-recently-used eviction, and closed after ``idle_ttl`` seconds without a
+lease. Clients for the same organization host share one aiohttp session
+(Azure Repos) or one httpx transport (work items), so connection pools grow
+with the number of hosts rather than the number of tenants. Redis clients
+the pooled clients need (push locks) are shared the same way, per URL.
+
+Leased clients are never evicted; the pool can briefly exceed ``max_size``
+while every entry is in use.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import httpx
+from prometheus_client import Counter, Gauge
+
+from src.utils import get_logger
+
+POOL_SIZE = Gauge('dev_agent_client_pool_size', 'Pooled Azure clients', ['kind'])
+POOL_HITS = Counter('dev_agent_client_pool_hits_total', 'Client leases served from the pool', ['kind'])
+POOL_CREATED = Counter('dev_agent_client_pool_created_total', 'Clients created by the pool', ['kind'])
+POOL_EVICTED = Counter('dev_agent_client_pool_evicted_total', 'Clients closed by the pool', ['kind', 'reason'])
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """httpx transport wrapper whose lifetime is owned by the pool, not the client."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class _Entry:
+    __slots__ = ("client", "kind", "host", "last_used", "leases")
+
+    def __init__(self, client: Any, kind: str, host: str):
+        self.client = client
+        self.kind = kind
+        self.host = host
+        self.last_used = time.monotonic()
+        self.leases = 0
+
+
+class ClientPool:
+    """LRU + idle-TTL pool of clients exposing ``async close()``."""
+
+    def __init__(self, max_size: int = 64, idle_ttl: float = 600.0, max_connections_per_host: int = 100):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.max_connections_per_host = max_connections_per_host
+        self.logger = get_logger()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self._redis: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+
+    # Shared per-host connection pools
+
+    def session_for(self, url: str) -> aiohttp.ClientSession:
+        """aiohttp session shared by all Azure Repos clients of a host."""
+        host = host_of(url)
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_connections_per_host, ttl_dns_cache=300)
+            )
+            self._sessions[host] = session
+        return session
+
+    def transport_for(self, url: str) -> SharedTransport:
+        """httpx transport shared by all work item clients of a host."""
+        host = host_of(url)
+        transport = self._transports.get(host)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=self.max_connections_per_host,
+                                    max_keepalive_connections=self.max_connections_per_host)
+            )
+            self._transports[host] = transport
+        return SharedTransport(transport)
+
+    def redis_for(self, url: str):
+        """redis.asyncio client shared by all pooled clients using ``url``; closed with the pool."""
+        client = self._redis.get(url)
+        if client is None:
+            import redis.asyncio
+            client = redis.asyncio.from_url(url)
+            self._redis[url] = client
+        return client
+
+    # Leasing
+
+    @asynccontextmanager
+    async def lease(self, key: Hashable, kind: str, url: str, factory: Callable[[], Any]):
+        """Yield the client for ``key``, creating it with ``factory`` on a miss."""
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(factory(), kind, host_of(url))
+                self._entries[key] = entry
+                POOL_CREATED.labels(kind=kind).inc()
+                POOL_SIZE.labels(kind=kind).inc()
+            else:
+                POOL_HITS.labels(kind=kind).inc()
+            self._entries.move_to_end(key)
+            entry.leases += 1
+            evicted = self._evict_over_capacity()
+
+        await self._close_entries(evicted, "lru")
+        try:
+            yield entry.client
+        finally:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+
+    def _evict_over_capacity(self) -> List[_Entry]:
+        evicted = []
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_size:
+                break
+            if self._entries[key].leases == 0:
+                evicted.append(self._entries.pop(key))
+        return evicted
+
+    async def _close_entries(self, entries: List[_Entry], reason: str) -> None:
+        for entry in entries:
+            POOL_SIZE.labels(kind=entry.kind).dec()
+            POOL_EVICTED.labels(kind=entry.kind, reason=reason).inc()
+            try:
+                await entry.client.close()
+            except Exception as e:
+                self.logger.error("Error closing pooled client", kind=entry.kind, error=str(e))
+
+    async def sweep(self) -> int:
+        """Close clients idle longer than ``idle_ttl`` and unused host pools."""
+        now = time.monotonic()
+        async with self._lock:
+            idle = [key for key, entry in self._entries.items()
+                    if entry.leases == 0 and now - entry.last_used > self.idle_ttl]
+            evicted = [self._entries.pop(key) for key in idle]
+            live_hosts = {entry.host for entry in self._entries.values()}
+            sessions = [self._sessions.pop(host) for host in list(self._sessions) if host not in live_hosts]
+            transports = [self._transports.pop(host) for host in list(self._transports) if host not in live_hosts]
+
+        await self._close_entries(evicted, "idle")
+        for session in sessions:
+            await session.close()
+        for transport in transports:
+            await transport.aclose()
+        return len(evicted)
+
+    async def run_sweeper(self, interval: float = 60.0) -> None:
+        """Background loop calling sweep(); cancel the task to stop it."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.logger.error("Client pool sweep failed", error=str(e))
+
+    async def close(self) -> None:
+        """Close every pooled client and shared connection pool."""
+        async with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            sessions, self._sessions = list(self._sessions.values()), {}
+            transports, self._transports = list(self._transports.values()), {}
+            redis_clients, self._redis = list(self._redis.values()), {}
+
+        await self._close_entries(entries, "shutdown")
+        for session in sessions:
+            await session.close()
+        for transport in transports:
+            await transport.aclose()
+        for redis_client in redis_clients:
+            await redis_client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        kinds: Dict[str, int] = {}
+        for entry in self._entries.values():
+            kinds[entry.kind] = kinds.get(entry.kind, 0) + 1
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "leased": sum(1 for entry in self._entries.values() if entry.leases),
+            "by_kind": kinds,
+            "hosts": len(set(self._sessions) | set(self._transports)),
+        }
@@ -0,0 +1,115 @@
+"""
+Pluggable JSON codec for Azure Repos responses and audit payloads.
+
+Uses msgspec or orjson when installed and falls back to the stdlib ``json``
+module otherwise. The backend can be pinned with the ``JSON_CODEC``
+environment variable (``auto``, ``msgspec``, ``orjson`` or ``json``).
+"""
+
+import json
+import os
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+JSONInput = Union[bytes, bytearray, memoryview, str]
+
+
+class JSONCodec:
+    """Encode/decode pair backed by a specific JSON library."""
+
+    def __init__(self, name: str, loads: Callable[[JSONInput], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return f"JSONCodec({self.name!r})"
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder matching orjson/msgspec output for datetimes."""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _stdlib_codec() -> JSONCodec:
+    def _loads(data: JSONInput) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), default=_default).encode("utf-8")
+
+    return JSONCodec("json", _loads, _dumps)
+
+
+def _orjson_codec() -> JSONCodec:
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    return JSONCodec("orjson", orjson.loads, _dumps)
+
+
+def _msgspec_codec() -> JSONCodec:
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+    return JSONCodec("msgspec", decoder.decode, encoder.encode)
+
+
+_BACKENDS = {
+    "msgspec": (lambda: msgspec is not None, _msgspec_codec),
+    "orjson": (lambda: orjson is not None, _orjson_codec),
+    "json": (lambda: True, _stdlib_codec),
+}
+
+# Preference order when JSON_CODEC=auto
+_AUTO_ORDER = ["orjson", "msgspec", "json"]
+
+_codec: Optional[JSONCodec] = None
+
+
+def select_codec(name: str = "auto") -> JSONCodec:
+    """Build a codec by backend name, falling back to stdlib if unavailable."""
+    name = (name or "auto").lower()
+    candidates = _AUTO_ORDER if name == "auto" else [name, "json"]
+    for candidate in candidates:
+        backend = _BACKENDS.get(candidate)
+        if backend and backend[0]():
+            return backend[1]()
+    return _stdlib_codec()
+
+
+def get_codec() -> JSONCodec:
+    """Return the process-wide codec, selecting it on first use."""
+    global _codec
+    if _codec is None:
+        _codec = select_codec(os.getenv("JSON_CODEC", "auto"))
+    return _codec
+
+
+def set_codec(codec: Optional[JSONCodec]) -> None:
+    """Override the process-wide codec (``None`` re-selects from the environment)."""
+    global _codec
+    _codec = codec
+
+
+def loads(data: JSONInput) -> Any:
+    """Decode JSON bytes/str with the active codec."""
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object to JSON bytes with the active codec."""
+    return get_codec().dumps(obj)
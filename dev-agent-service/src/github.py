@@ -1,17 +1,43 @@
 import time
-from typing import Optional
-from github import Github
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Union
+from github import Github, InputGitTreeElement
 from github.GithubException import GithubException
 from github.Repository import Repository
 from github.Branch import Branch
+from github.GitCommit import GitCommit
 import structlog
 
+from src.github_cache import CacheStats, get_etag_store, install_conditional_cache
+from src.github_ratelimit import RateLimitScheduler, get_rate_limit_scheduler, token_id
+
+
+# Text files up to this size are sent inline in the tree request instead of
+# as separate blobs; larger or binary files get their own (parallel) blob.
+INLINE_CONTENT_LIMIT = 64 * 1024
+
 
 class GitHubClient:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, etag_store=None, rate_limiter: Optional[RateLimitScheduler] = None):
+        """
+        Args:
+            etag_store: Store for the conditional-request cache (see
+                src/github_cache.py); defaults to GITHUB_ETAG_CACHE
+            rate_limiter: Shared quota scheduler (see src/github_ratelimit.py);
+                defaults to GITHUB_RATE_LIMIT_SCHEDULER
+        """
         self.github = Github(access_token)
         self.logger = structlog.get_logger()
 
+        # Revalidate GETs with ETags (304s do not count against the rate
+        # limit) and pace requests against the shared quota
+        etag_store = etag_store if etag_store is not None else get_etag_store()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limit_scheduler()
+        self.cache_stats: Optional[CacheStats] = None
+        if etag_store is not None or self.rate_limiter is not None:
+            self.cache_stats = install_conditional_cache(self.github, etag_store, scheduler=self.rate_limiter)
+
     def _retry_with_backoff(self, func, max_attempts=3, backoff_factor=2):
         """Generic retry with exponential backoff for GitHub API."""
         attempt = 0
@@ -25,8 +51,12 @@ class GitHubClient:
                     self.logger.warning("GitHub API error, retrying", attempt=attempt, error=str(e), wait_time=wait_time)
                     time.sleep(wait_time)
                     wait_time *= backoff_factor
-                elif e.status == 403 and "rate limit" in str(e).lower():
+                elif e.status in (403, 429) and "rate limit" in str(e).lower():
                     attempt += 1
+                    if self.rate_limiter is not None and self._quota_blocked():
+                        # The scheduler saw the limit headers; the next request waits for quota
+                        self.logger.warning("GitHub rate limit hit, retrying after quota wait", attempt=attempt, error=str(e))
+                        continue
                     self.logger.warning("GitHub rate limit hit, retrying", attempt=attempt, error=str(e), wait_time=wait_time*2)
                     time.sleep(wait_time * 2)  # Longer wait for rate limits
                     wait_time *= backoff_factor
@@ -45,6 +75,13 @@ class GitHubClient:
                 wait_time *= backoff_factor
         raise Exception("Max retries exceeded for GitHub")
 
+    def _quota_blocked(self) -> bool:
+        """Whether the scheduler will hold the next request (otherwise back off here)."""
+        headers: Dict[str, str] = {}
+        if self.github.requester.auth is not None:
+            self.github.requester.auth.authentication(headers)
+        return self.rate_limiter.blocked_for(token_id(headers.get("Authorization"))) > 0
+
     def get_repo(self, repo_path: str) -> Repository:
         """Get GitHub repository object."""
         def _get_repo():
@@ -83,6 +120,56 @@ class GitHubClient:
                 )
         return self._retry_with_backoff(_commit_file)
 
+    def commit_files(
+        self,
+        repo: Repository,
+        branch: str,
+        files: Dict[str, Union[str, bytes]],
+        message: str,
+        max_workers: int = 8
+    ) -> GitCommit:
+        """
+        Commit many files as a single commit via the Git Data API.
+
+        Builds blobs (in parallel), one tree on top of the branch head, one
+        commit, then moves the branch ref once.
+        """
+        def _commit_files():
+            ref = repo.get_git_ref(f"heads/{branch}")
+            head = repo.get_git_commit(ref.object.sha)
+
+            inline = {}
+            blobs = {}
+            for path, content in files.items():
+                if isinstance(content, str) and len(content.encode("utf-8")) <= INLINE_CONTENT_LIMIT:
+                    inline[path] = content
+                else:
+                    blobs[path] = content
+
+            def _create_blob(content):
+                if isinstance(content, bytes):
+                    return repo.create_git_blob(base64.b64encode(content).decode("ascii"), "base64").sha
+                return repo.create_git_blob(content, "utf-8").sha
+
+            blob_shas = {}
+            if blobs:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(blobs))) as executor:
+                    blob_shas = dict(zip(blobs, executor.map(_create_blob, blobs.values())))
+
+            elements = [InputGitTreeElement(path, "100644", "blob", content=content)
+                        for path, content in inline.items()]
+            elements += [InputGitTreeElement(path, "100644", "blob", sha=sha)
+                         for path, sha in blob_shas.items()]
+
+            tree = repo.create_git_tree(elements, base_tree=head.tree)
+            commit = repo.create_git_commit(message, tree, [head])
+            ref.edit(commit.sha)
+
+            self.logger.info("Files committed", branch=branch, commit_sha=commit.sha,
+                             files=len(files), blobs=len(blob_shas))
+            return commit
+        return self._retry_with_backoff(_commit_files)
+
     def create_pull_request(self, repo: Repository, source_branch: str, target_branch: str, title: str, body: str):
         """Create a pull request."""
         def _create_pr():
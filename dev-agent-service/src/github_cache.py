@@ -0,0 +1,286 @@
+"""
+Conditional-request (ETag) cache for the GitHub REST API.
+
+GitHub answers ``If-None-Match`` / ``If-Modified-Since`` requests with
+``304 Not Modified`` when nothing changed, and 304s do not count against the
+primary rate limit. ``ConditionalRequestAdapter`` is a requests transport
+adapter mounted on PyGithub's session: it stores validators and bodies of GET
+responses, revalidates on the next GET, and turns a 304 back into the cached
+200 response so PyGithub objects are built as usual.
+
+Stores: in-process LRU (default), Redis (shared by workers) or local disk.
+"""
+
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from prometheus_client import Counter
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.codec import dumps, loads
+from src.github_ratelimit import resource_for_path, token_id
+from src.utils import get_logger, get_env_var
+
+GITHUB_CACHE_REQUESTS = Counter('dev_agent_github_cache_requests_total',
+                                'GitHub GET requests by conditional cache outcome', ['outcome'])
+
+# Response headers refreshed from a 304 so rate-limit tracking stays current
+_FRESH_HEADERS = ("date", "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset",
+                  "x-ratelimit-used", "x-ratelimit-resource", "etag", "last-modified")
+
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    return dumps(dict(entry, body=base64.b64encode(entry["body"]).decode("ascii")))
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    entry = loads(data)
+    entry["body"] = base64.b64decode(entry["body"])
+    return entry
+
+
+class MemoryETagStore:
+    """In-process LRU store."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisETagStore:
+    """Redis store shared by all workers; entries expire after ``ttl_seconds``."""
+
+    def __init__(self, redis_client, ttl_seconds: int = 24 * 3600, key_prefix: str = "github:etag"):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = self.redis.get(f"{self.key_prefix}:{key}")
+        return _decode(data) if data else None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        self.redis.setex(f"{self.key_prefix}:{key}", self.ttl_seconds, _encode(entry))
+
+
+class DiskETagStore:
+    """One file per cached response under ``cache_dir``."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return _decode((self.cache_dir / key).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        tmp = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        tmp.write_bytes(_encode(entry))
+        os.replace(tmp, self.cache_dir / key)
+
+
+class CacheStats:
+    """Counters for the conditional cache (also exported to Prometheus)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.conditional = 0
+        self.not_modified = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.requests += 1
+            if outcome in ("not_modified", "changed"):
+                self.conditional += 1
+            if outcome == "not_modified":
+                self.not_modified += 1
+        GITHUB_CACHE_REQUESTS.labels(outcome=outcome).inc()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "conditional_requests": self.conditional,
+            "not_modified": self.not_modified,
+            "stored": self.stored,
+            # Share of GETs answered from cache (304), i.e. without rate-limit cost
+            "hit_ratio": self.not_modified / self.requests if self.requests else 0.0,
+            # Share of revalidations that came back 304
+            "not_modified_ratio": self.not_modified / self.conditional if self.conditional else 0.0,
+        }
+
+
+class ConditionalRequestAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that revalidates GETs with ETags and serves 304s from a store.
+
+    With a RateLimitScheduler (src/github_ratelimit.py) every request also
+    waits for quota first and reports the response's rate-limit headers.
+    Either ``store`` or ``scheduler`` may be None.
+    """
+
+    def __init__(self, store, stats: Optional[CacheStats] = None, scheduler=None, **kwargs):
+        self.store = store
+        self.stats = stats or CacheStats()
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def cache_key(request: requests.PreparedRequest) -> str:
+        # Responses differ per token (private repos) and media type
+        parts = [request.url or "", request.headers.get("Authorization", ""), request.headers.get("Accept", "")]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs) -> requests.Response:
+        if self.scheduler is None:
+            return self._send(request, stream=stream, **kwargs)
+
+        token = token_id(request.headers.get("Authorization"))
+        resource = resource_for_path(urlparse(request.url or "").path)
+        self.scheduler.acquire(token, resource)
+        response = self._send(request, stream=stream, **kwargs)
+        self.scheduler.update(token, response.headers, response.status_code, default_resource=resource)
+        return response
+
+    def _send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs) -> requests.Response:
+        if self.store is None or request.method != "GET" or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self.cache_key(request)
+        cached = self.store.get(key)
+        if cached:
+            if cached.get("etag"):
+                request.headers["If-None-Match"] = cached["etag"]
+            elif cached.get("last_modified"):
+                request.headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and cached:
+            self.stats.record("not_modified")
+            return self._from_cache(response, cached)
+
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.store.set(key, {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "headers": dict(response.headers),
+                    "body": response.content,
+                })
+                self.stats.stored += 1
+        self.stats.record("changed" if cached else "miss")
+        return response
+
+    @staticmethod
+    def _from_cache(response: requests.Response, cached: Dict[str, Any]) -> requests.Response:
+        headers = CaseInsensitiveDict(cached["headers"])
+        for name in _FRESH_HEADERS:
+            if name in response.headers:
+                headers[name] = response.headers[name]
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = headers
+        response._content = cached["body"]
+        response._content_consumed = True
+        return response
+
+
+def install_conditional_cache(github, store, stats: Optional[CacheStats] = None, scheduler=None) -> CacheStats:
+    """
+    Route a PyGithub client's HTTP traffic through ConditionalRequestAdapter
+    (ETag cache when ``store`` is set, quota pacing when ``scheduler`` is set).
+
+    PyGithub has no per-instance transport hook, so this swaps the requester's
+    (name-mangled, private) connection class for a subclass that mounts the
+    caching adapter. The global ``Requester.injectConnectionClasses`` would
+    affect every client and disable connection reuse. The private attribute
+    is checked against the PyGithub version pinned in requirements.txt
+    (tests/test_github_cache.py); a RuntimeError is raised rather than
+    silently running uncached if it is missing.
+    """
+    from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+
+    stats = stats or CacheStats()
+    requester = github.requester
+
+    def _mount(connection):
+        adapter = ConditionalRequestAdapter(
+            store, stats,
+            scheduler=scheduler,
+            max_retries=connection.retry,
+            pool_connections=connection.pool_size,
+            pool_maxsize=connection.pool_size
+        )
+        connection.adapter = adapter
+        connection.session.mount(f"{connection.protocol}://", adapter)
+
+    class CachingHTTPSConnection(HTTPSRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            _mount(self)
+
+    class CachingHTTPConnection(HTTPRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            _mount(self)
+
+    if not hasattr(requester, "_Requester__connectionClass") or not hasattr(requester, "_Requester__connection"):
+        raise RuntimeError(
+            "PyGithub Requester no longer has a per-instance connection class; "
+            "install_conditional_cache supports the PyGithub version pinned in requirements.txt"
+        )
+    if requester._Requester__connection is not None:
+        raise RuntimeError("install_conditional_cache must run before the client's first request")
+
+    base = requester._Requester__connectionClass
+    requester._Requester__connectionClass = (
+        CachingHTTPConnection if issubclass(base, HTTPRequestsConnectionClass) else CachingHTTPSConnection
+    )
+    return stats
+
+
+def get_etag_store():
+    """Build the store selected by GITHUB_ETAG_CACHE (memory, redis, disk or off)."""
+    backend = get_env_var("GITHUB_ETAG_CACHE", "memory").lower()
+    if backend == "redis":
+        import redis
+        return RedisETagStore(
+            redis.from_url(get_env_var("GITHUB_ETAG_CACHE_REDIS_URL", get_env_var("REDIS_URL", "redis://localhost:6379/0"))),
+            ttl_seconds=int(get_env_var("GITHUB_ETAG_CACHE_TTL_SECONDS", str(24 * 3600)))
+        )
+    if backend == "disk":
+        return DiskETagStore(get_env_var("GITHUB_ETAG_CACHE_DIR", "/tmp/dev-agent-github-cache"))
+    if backend == "memory":
+        return MemoryETagStore()
+    get_logger().info("GitHub conditional cache disabled", backend=backend)
+    return None
@@ -0,0 +1,252 @@
+"""
+GitHub GraphQL backend for publishing a task's changes.
+
+The REST flow makes about ten sequential calls per task (repository, base
+ref, create ref, branch, blobs, tree, commit, ref update, pull request).
+``GitHubGraphQLClient.open_pull_request`` does the same in two round trips:
+
+1. one query for the repository ID, the base and task branch heads and any
+   open pull request for the task branch;
+2. one mutation document with ``createRef``, ``createCommitOnBranch`` (all
+   files in a single commit) and ``createPullRequest``. Top-level mutation
+   fields run serially, so each step sees the result of the previous one.
+
+Steps that already happened (branch exists, files already committed on it,
+pull request open) are left out of the mutation, so a retried task picks up
+where it stopped.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Union
+
+import requests
+from prometheus_client import Counter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+from src.github_cache import ConditionalRequestAdapter
+from src.github_ratelimit import get_rate_limit_scheduler
+from src.utils import get_logger, get_env_var
+
+GITHUB_GRAPHQL_REQUESTS = Counter('dev_agent_github_graphql_requests_total',
+                                  'GitHub GraphQL requests', ['operation'])
+
+# The task branch head also reports the blob OID of each file to commit
+# (aliased f0, f1, ... for $path0, $path1, ...)
+_STATE_QUERY = """
+query TaskState($owner: String!, $name: String!, $base: String!, $headRef: String!, $head: String!{paths}) {{
+  repository(owner: $owner, name: $name) {{
+    id
+    nameWithOwner
+    base: ref(qualifiedName: $base) {{ target {{ oid }} }}
+    head: ref(qualifiedName: $headRef) {{ target {{ oid{files} }} }}
+    pullRequests(headRefName: $head, states: OPEN, first: 1) {{ nodes {{ number url }} }}
+  }}
+}}
+"""
+
+_MUTATION_FIELDS = {
+    "ref": ("$ref: CreateRefInput!", "createRef(input: $ref) { ref { name } }"),
+    "commit": ("$commit: CreateCommitOnBranchInput!",
+               "createCommitOnBranch(input: $commit) { commit { oid url } }"),
+    "pr": ("$pr: CreatePullRequestInput!", "createPullRequest(input: $pr) { pullRequest { number url } }"),
+}
+
+
+class GitHubGraphQLError(Exception):
+    """GraphQL request failed or returned errors."""
+
+    def __init__(self, message: str, status: Optional[int] = None, errors: Optional[list] = None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors or []
+
+
+def _is_transient(error: BaseException) -> bool:
+    if isinstance(error, requests.ConnectionError):
+        return True
+    return isinstance(error, GitHubGraphQLError) and error.status is not None and error.status >= 500
+
+
+def repository_path(repository: str) -> str:
+    """``owner/name`` from ``owner/name``, an HTTPS clone URL or a github.com URL."""
+    path = repository.split("://", 1)[-1].strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    return "/".join(path.split("/")[-2:])
+
+
+def _bytes(content: Union[str, bytes]) -> bytes:
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+def _encode(content: Union[str, bytes]) -> str:
+    return base64.b64encode(_bytes(content)).decode("ascii")
+
+
+def blob_oid(content: Union[str, bytes]) -> str:
+    """Git blob OID of ``content`` (what GitHub reports for a file at a commit)."""
+    content = _bytes(content)
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GitHubGraphQLClient:
+    """Thin client for the GitHub GraphQL API that counts round trips."""
+
+    def __init__(
+        self,
+        access_token: str,
+        endpoint: str = "https://api.github.com/graphql",
+        rate_limiter=None,
+        timeout: float = 30.0
+    ):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.round_trips = 0
+        self.logger = get_logger()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"bearer {access_token}",
+            "Accept": "application/vnd.github+json",
+        })
+        if rate_limiter is not None:
+            # No ETag store: GraphQL POSTs are not cacheable, only paced
+            adapter = ConditionalRequestAdapter(None, scheduler=rate_limiter)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+    def execute(self, query: str, variables: Dict[str, Any], operation: str = "query",
+                partial: bool = False, trips: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        POST one GraphQL document; returns ``data`` or raises GitHubGraphQLError.
+        With ``partial``, field errors are tolerated and the available data returned.
+        ``trips`` collects the operation of each request made for one caller
+        (``round_trips`` counts the whole client, shared by concurrent calls).
+        """
+        self.round_trips += 1
+        if trips is not None:
+            trips.append(operation)
+        GITHUB_GRAPHQL_REQUESTS.labels(operation=operation).inc()
+        response = self.session.post(self.endpoint, json={"query": query, "variables": variables},
+                                     timeout=self.timeout)
+        if response.status_code != 200:
+            raise GitHubGraphQLError(f"GitHub GraphQL returned {response.status_code}: {response.text[:200]}",
+                                     status=response.status_code)
+        payload = response.json()
+        if payload.get("errors") and not (partial and payload.get("data")):
+            messages = "; ".join(error.get("message", "") for error in payload["errors"])
+            raise GitHubGraphQLError(f"GitHub GraphQL errors: {messages}", status=200, errors=payload["errors"])
+        return payload["data"]
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception(_is_transient),
+        reraise=True
+    )
+    def _task_state(self, owner: str, name: str, base_branch: str, branch: str,
+                    paths: List[str] = (), trips: Optional[List[str]] = None) -> Dict[str, Any]:
+        query = _STATE_QUERY.format(
+            paths="".join(f", $path{i}: String!" for i in range(len(paths))),
+            files=" ... on Commit {{ {} }}".format(
+                " ".join(f"f{i}: file(path: $path{i}) {{ oid }}" for i in range(len(paths)))
+            ) if paths else ""
+        )
+        variables = {
+            "owner": owner,
+            "name": name,
+            "base": f"refs/heads/{base_branch}",
+            "headRef": f"refs/heads/{branch}",
+            "head": branch,
+        }
+        variables.update({f"path{i}": path for i, path in enumerate(paths)})
+        data = self.execute(query, variables, trips=trips)
+        repository = data.get("repository")
+        if repository is None:
+            raise GitHubGraphQLError(f"Repository {owner}/{name} not found")
+        if repository.get("base") is None:
+            raise GitHubGraphQLError(f"Base branch {base_branch} not found in {owner}/{name}")
+        return repository
+
+    def open_pull_request(
+        self,
+        repository: str,
+        base_branch: str,
+        branch: str,
+        files: Dict[str, Union[str, bytes]],
+        message: str,
+        title: str,
+        body: str
+    ) -> Dict[str, Any]:
+        """
+        Create ``branch`` from ``base_branch``, commit ``files`` on it and open
+        a pull request, in two round trips.
+
+        Returns the pull request ``number`` and ``url``, the ``commit_oid``
+        (None if nothing was committed, e.g. every file already matches the
+        branch) and the ``round_trips`` used.
+        """
+        trips: List[str] = []
+        owner, name = repository_path(repository).split("/")
+        paths = list(files)
+        state = self._task_state(owner, name, base_branch, branch, paths, trips=trips)
+
+        head_oid = (state["head"] or state["base"])["target"]["oid"]
+        open_pulls = state["pullRequests"]["nodes"]
+        variables: Dict[str, Any] = {}
+
+        if state["head"] is None:
+            variables["ref"] = {"repositoryId": state["id"], "name": f"refs/heads/{branch}", "oid": head_oid}
+        else:
+            # A retry after the commit landed (e.g. the pull request step
+            # failed) finds the files already on the branch: commit only what
+            # differs, so no duplicate commit is pushed
+            target = state["head"]["target"]
+            files = {path: content for i, (path, content) in enumerate(files.items())
+                     if (target.get(f"f{i}") or {}).get("oid") != blob_oid(content)}
+        if files:
+            headline, _, description = message.partition("\n")
+            variables["commit"] = {
+                "branch": {"repositoryNameWithOwner": state["nameWithOwner"], "branchName": branch},
+                "expectedHeadOid": head_oid,
+                "message": {"headline": headline, "body": description.strip() or None},
+                "fileChanges": {"additions": [{"path": path, "contents": _encode(content)}
+                                              for path, content in files.items()]},
+            }
+        if not open_pulls:
+            variables["pr"] = {"repositoryId": state["id"], "baseRefName": base_branch,
+                               "headRefName": branch, "title": title, "body": body}
+
+        data = {}
+        if variables:
+            fields = [_MUTATION_FIELDS[key] for key in variables]
+            document = "mutation PublishTask({}) {{\n  {}\n}}".format(
+                ", ".join(declaration for declaration, _ in fields),
+                "\n  ".join(selection for _, selection in fields)
+            )
+            data = self.execute(document, variables, operation="mutation", trips=trips)
+
+        pull = data["createPullRequest"]["pullRequest"] if "pr" in variables else open_pulls[0]
+        commit_oid = data["createCommitOnBranch"]["commit"]["oid"] if "commit" in variables else None
+        result = {
+            "number": pull["number"],
+            "url": pull["url"],
+            "commit_oid": commit_oid,
+            "round_trips": len(trips),
+        }
+        self.logger.info("Pull request published via GraphQL", repository=state["nameWithOwner"],
+                         branch=branch, files=len(files), unchanged=len(paths) - len(files),
+                         created_branch="ref" in variables, **result)
+        return result
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def get_github_graphql_client() -> GitHubGraphQLClient:
+    """Client for GITHUB_TOKEN against GITHUB_GRAPHQL_URL, paced by the shared scheduler."""
+    return GitHubGraphQLClient(
+        access_token=get_env_var("GITHUB_TOKEN"),
+        endpoint=get_env_var("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql"),
+        rate_limiter=get_rate_limit_scheduler()
+    )
@@ -0,0 +1,245 @@
+"""
+Predictive GitHub rate-limit scheduler shared across dev-agent workers.
+
+Quota is tracked per token and per resource (core, search, graphql) from the
+``X-RateLimit-*`` headers of every response, in Redis when configured so all
+Celery workers see the same budget. Before each request the scheduler
+reserves a slot:
+
+- interactive requests go out immediately while quota remains;
+- background requests are paced so the remaining quota lasts until the
+  reset time, and never consume the last ``background_reserve`` share of it;
+- secondary limits (``Retry-After`` on 403/429) block the resource for
+  everyone until they expire.
+
+Priority is taken from ``request_priority()`` (a context variable), so call
+sites mark background work without threading a flag through PyGithub.
+"""
+
+import contextvars
+import hashlib
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from src.utils import get_logger, get_env_var
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Primary limits for an authenticated token when no headers have been seen yet
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+RATELIMIT_WAIT = Histogram('dev_agent_github_ratelimit_wait_seconds', 'Time requests waited for GitHub quota',
+                           ['resource', 'priority'], buckets=(0, 0.1, 0.5, 1, 5, 15, 60, 300, 900))
+RATELIMIT_REMAINING = Gauge('dev_agent_github_ratelimit_remaining', 'Last seen remaining GitHub quota',
+                            ['resource'])
+RATELIMIT_BLOCKED = Counter('dev_agent_github_ratelimit_blocked_total',
+                            'Responses that hit a GitHub primary or secondary limit', ['resource'])
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("github_request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: str):
+    """Run GitHub calls in this block with ``priority`` (interactive or background)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def token_id(authorization: Optional[str]) -> str:
+    """Stable, non-reversible ID for the token in an Authorization header."""
+    return hashlib.sha256((authorization or "anonymous").encode("utf-8")).hexdigest()[:16]
+
+
+def resource_for_path(path: str) -> str:
+    if path.startswith("/graphql"):
+        return "graphql"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+class RateLimitWaitExceeded(Exception):
+    """Quota will not be available within the scheduler's ``max_wait``."""
+
+
+class RateLimitScheduler:
+    """Token-bucket scheduler over GitHub's reported quota."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        background_reserve: float = 0.1,
+        max_wait: float = 900.0,
+        key_prefix: str = "github:ratelimit",
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.redis = redis_client
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait
+        self.key_prefix = key_prefix
+        self.clock = clock
+        self.sleep = sleep
+        self.logger = get_logger()
+        self._local: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, token: str, resource: str) -> str:
+        return f"{self.key_prefix}:{token}:{resource}"
+
+    # State access: a Redis WATCH/MULTI transaction, or a local lock
+
+    def _update_state(self, key: str, func: Callable[[Dict[str, float]], Tuple[Dict[str, float], object]]):
+        if self.redis is None:
+            with self._lock:
+                state, result = func(dict(self._local.get(key, {})))
+                self._local[key] = state
+                return result
+
+        outcome = {}
+
+        def _transaction(pipe):
+            raw = pipe.hgetall(key)
+            state = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+            state, outcome["result"] = func(state)
+            pipe.multi()
+            if state:  # HSET with an empty mapping is an error (first request, expired key)
+                pipe.hset(key, mapping=state)
+                pipe.expire(key, 2 * 3600)
+
+        self.redis.transaction(_transaction, key)
+        return outcome["result"]
+
+    def _reserve(self, state: Dict[str, float], resource: str, priority: str, now: float):
+        """Returns (state, (granted, wait_seconds))."""
+        blocked_until = state.get("blocked_until", 0.0)
+        if blocked_until > now:
+            return state, (False, blocked_until - now)
+
+        if "remaining" not in state:
+            return state, (True, 0.0)  # Nothing observed yet; the response will tell us
+
+        limit = state.get("limit", DEFAULT_LIMITS.get(resource, 5000))
+        reset = state.get("reset", now)
+        if reset <= now:
+            # Window rolled over since the last response
+            state["remaining"] = limit
+            state["reset"] = reset = now + 3600
+            state["next_at"] = now
+
+        reserve = math.ceil(limit * self.background_reserve) if priority == BACKGROUND else 0
+        if state["remaining"] <= reserve:
+            return state, (False, reset - now)
+
+        wait = 0.0
+        if priority == BACKGROUND:
+            # Spread the usable quota evenly over the rest of the window
+            start = max(now, state.get("next_at", now))
+            interval = max(reset - start, 0.0) / max(state["remaining"] - reserve, 1)
+            wait = start - now
+            state["next_at"] = start + interval
+        state["remaining"] -= 1
+        return state, (True, wait)
+
+    def acquire(self, token: str, resource: str = "core", priority: Optional[str] = None) -> float:
+        """Block until a request may be sent; returns the time waited."""
+        priority = priority or current_priority()
+        key = self._key(token, resource)
+        waited = 0.0
+
+        while True:
+            granted, wait = self._update_state(
+                key, lambda state: self._reserve(state, resource, priority, self.clock())
+            )
+            if waited + wait > self.max_wait:
+                raise RateLimitWaitExceeded(
+                    f"GitHub {resource} quota unavailable for {waited + wait:.0f}s (max {self.max_wait:.0f}s)"
+                )
+            if wait > 0:
+                self.sleep(wait)
+                waited += wait
+            if granted:
+                RATELIMIT_WAIT.labels(resource=resource, priority=priority).observe(waited)
+                return waited
+
+    def update(self, token: str, headers: Mapping[str, str], status: int, default_resource: str = "core") -> None:
+        """Record quota from a response's headers (authoritative over local counts)."""
+        resource = headers.get("X-RateLimit-Resource") or default_resource
+        now = self.clock()
+
+        def _apply(state):
+            if headers.get("X-RateLimit-Remaining") is not None:
+                state["remaining"] = float(headers["X-RateLimit-Remaining"])
+                RATELIMIT_REMAINING.labels(resource=resource).set(state["remaining"])
+            if headers.get("X-RateLimit-Limit") is not None:
+                state["limit"] = float(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Reset") is not None:
+                state["reset"] = float(headers["X-RateLimit-Reset"])
+
+            if status in (403, 429):
+                retry_after = headers.get("Retry-After")
+                if retry_after is not None:
+                    state["blocked_until"] = now + float(retry_after)  # Secondary limit
+                elif state.get("remaining") == 0 and "reset" in state:
+                    state["blocked_until"] = state["reset"]
+                else:
+                    return state, False
+                return state, True
+            return state, False
+
+        if self._update_state(self._key(token, resource), _apply):
+            RATELIMIT_BLOCKED.labels(resource=resource).inc()
+            self.logger.warning("GitHub rate limit hit", resource=resource, status=status,
+                                retry_after=headers.get("Retry-After"))
+
+    def blocked_for(self, token: str, resource: str = "core") -> float:
+        """Seconds until a primary or secondary limit on ``resource`` lifts (0 when not blocked)."""
+        key = self._key(token, resource)
+        if self.redis is not None:
+            blocked_until = float(self.redis.hget(key, "blocked_until") or 0)
+        else:
+            blocked_until = self._local.get(key, {}).get("blocked_until", 0.0)
+        return max(blocked_until - self.clock(), 0.0)
+
+    def stats(self, token: str) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for resource in DEFAULT_LIMITS:
+            key = self._key(token, resource)
+            if self.redis is not None:
+                raw = self.redis.hgetall(key)
+                state = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+            else:
+                state = dict(self._local.get(key, {}))
+            if state:
+                result[resource] = state
+        return result
+
+
+def get_rate_limit_scheduler() -> Optional[RateLimitScheduler]:
+    """Build the scheduler selected by GITHUB_RATE_LIMIT_SCHEDULER (redis, local or off)."""
+    backend = get_env_var("GITHUB_RATE_LIMIT_SCHEDULER", "local").lower()
+    if backend == "off":
+        return None
+    redis_client = None
+    if backend == "redis":
+        import redis
+        redis_client = redis.from_url(get_env_var("GITHUB_RATE_LIMIT_REDIS_URL",
+                                                  get_env_var("REDIS_URL", "redis://localhost:6379/0")))
+    return RateLimitScheduler(
+        redis_client=redis_client,
+        background_reserve=float(get_env_var("GITHUB_RATE_LIMIT_BACKGROUND_RESERVE", "0.1")),
+        max_wait=float(get_env_var("GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", "900"))
+    )
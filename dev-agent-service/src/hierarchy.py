@@ -0,0 +1,201 @@
+"""
+Work item hierarchy graph cache for CMMI traceability validation.
+
+Holds parent/child edges and work item types keyed by work item ID so the
+Task → Requirement → Feature → Epic walk becomes an in-memory traversal.
+Missing nodes are loaded in batches (one batched call per hierarchy level),
+and entries are invalidated by the orchestrator's webhook handler when a work
+item or its links change.
+
+The node layout and Redis key scheme are shared with
+``orchestrator-service/src/hierarchy.py``; pointing both services at the same
+Redis (``HIERARCHY_CACHE_REDIS_URL``) lets webhook invalidations reach the
+dev-agent workers.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.codec import dumps, loads
+from src.utils import get_logger, get_env_var
+
+PARENT_LINK = "System.LinkTypes.Hierarchy-Reverse"
+CHILD_LINK = "System.LinkTypes.Hierarchy-Forward"
+
+# CMMI traceability chain expected above a Task, nearest first
+TRACEABILITY_CHAIN = ["Requirement", "Feature", "Epic"]
+
+# Bound on parent hops, protects against malformed (cyclic) hierarchies
+MAX_HIERARCHY_DEPTH = 10
+
+NodeLoader = Callable[[List[int]], List[Dict[str, Any]]]
+
+
+def work_item_id_from_url(url: Optional[str]) -> Optional[int]:
+    """Extract the work item ID from a relation URL (``.../workItems/123``)."""
+    if not url:
+        return None
+    tail = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def build_node(work_item_id: int, work_item_type: str, relations: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a cache node from a work item's type and relation dicts."""
+    relations = list(relations or [])
+    parent = None
+    children = []
+    for relation in relations:
+        target = work_item_id_from_url(relation.get("url"))
+        if target is None:
+            continue
+        if relation.get("rel") == PARENT_LINK:
+            parent = target
+        elif relation.get("rel") == CHILD_LINK:
+            children.append(target)
+
+    return {
+        "id": work_item_id,
+        "type": work_item_type,
+        "parent": parent,
+        "children": children,
+        "relations": relations,
+        "cached_at": time.time(),
+    }
+
+
+class WorkItemHierarchyCache:
+    """Parent/child graph of work items with TTL and explicit invalidation."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: int = 900,
+        key_prefix: str = "wit:hierarchy",
+        batch_size: int = 200
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.batch_size = batch_size
+        self.logger = get_logger()
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, work_item_id: int) -> str:
+        return f"{self.key_prefix}:{work_item_id}"
+
+    def _read(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if self.redis is not None:
+            values = self.redis.mget([self._key(i) for i in ids])
+            return {i: loads(v) for i, v in zip(ids, values) if v}
+
+        now = time.time()
+        found = {}
+        for work_item_id in ids:
+            node = self._nodes.get(work_item_id)
+            if node and now - node["cached_at"] < self.ttl_seconds:
+                found[work_item_id] = node
+        return found
+
+    def _write(self, nodes: List[Dict[str, Any]]) -> None:
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            for node in nodes:
+                pipe.setex(self._key(node["id"]), self.ttl_seconds, dumps(node))
+            pipe.execute()
+            return
+
+        for node in nodes:
+            self._nodes[node["id"]] = node
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        """Drop cached nodes so the next lookup reloads them."""
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return
+        if self.redis is not None:
+            self.redis.delete(*[self._key(i) for i in ids])
+        for work_item_id in ids:
+            self._nodes.pop(work_item_id, None)
+
+    def get_nodes(self, ids: Iterable[int], loader: NodeLoader) -> Dict[int, Dict[str, Any]]:
+        """Return nodes for ``ids``, loading all misses with batched calls."""
+        ids = list(dict.fromkeys(ids))
+        nodes = self._read(ids)
+        self.hits += len(nodes)
+
+        missing = [i for i in ids if i not in nodes]
+        if missing:
+            self.misses += len(missing)
+            for start in range(0, len(missing), self.batch_size):
+                loaded = loader(missing[start:start + self.batch_size])
+                self._write(loaded)
+                nodes.update({node["id"]: node for node in loaded})
+        return nodes
+
+    def get_node(self, work_item_id: int, loader: NodeLoader) -> Optional[Dict[str, Any]]:
+        return self.get_nodes([work_item_id], loader).get(work_item_id)
+
+    def get_ancestors(self, work_item_id: int, loader: NodeLoader) -> List[Dict[str, Any]]:
+        """Walk parent edges upwards, nearest ancestor first."""
+        ancestors = []
+        seen = {work_item_id}
+        node = self.get_node(work_item_id, loader)
+
+        while node and node.get("parent") and len(ancestors) < MAX_HIERARCHY_DEPTH:
+            parent_id = node["parent"]
+            if parent_id in seen:
+                self.logger.warning("Cycle in work item hierarchy", work_item_id=parent_id)
+                break
+            seen.add(parent_id)
+            node = self.get_node(parent_id, loader)
+            if node:
+                ancestors.append(node)
+        return ancestors
+
+    def warm(self, root_ids: Iterable[int], loader: NodeLoader) -> int:
+        """Load whole subtrees below ``root_ids``, one batch per level."""
+        level = list(root_ids)
+        loaded = 0
+        for _ in range(MAX_HIERARCHY_DEPTH):
+            if not level:
+                break
+            nodes = self.get_nodes(level, loader)
+            loaded += len(nodes)
+            level = [child for node in nodes.values() for child in node.get("children", [])]
+        return loaded
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "local_nodes": len(self._nodes)}
+
+
+def has_traceability_chain(ancestors: List[Dict[str, Any]], chain: List[str] = TRACEABILITY_CHAIN) -> bool:
+    """Check the ancestor types contain ``chain`` in order (nearest first)."""
+    expected = iter(chain)
+    wanted = next(expected, None)
+    for node in ancestors:
+        if wanted is None:
+            break
+        if node.get("type") == wanted:
+            wanted = next(expected, None)
+    return wanted is None
+
+
+_hierarchy_cache: Optional[WorkItemHierarchyCache] = None
+
+
+def get_hierarchy_cache() -> WorkItemHierarchyCache:
+    """Return the process-wide cache, backed by Redis when configured."""
+    global _hierarchy_cache
+    if _hierarchy_cache is None:
+        redis_client = None
+        redis_url = get_env_var("HIERARCHY_CACHE_REDIS_URL")
+        if redis_url:
+            import redis
+            redis_client = redis.from_url(redis_url)
+        _hierarchy_cache = WorkItemHierarchyCache(
+            redis_client=redis_client,
+            ttl_seconds=int(get_env_var("HIERARCHY_CACHE_TTL_SECONDS", "900"))
+        )
+    return _hierarchy_cache
@@ -17,15 +17,29 @@ import asyncio
 from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+import redis.asyncio as aioredis
+from celery import Celery
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel, Field
 
-from src.agent import DevAgent, ScaffoldSpec, DevAgentResponse
-from src.models import WorkItemRequest, WorkItemStatus, HealthResponse
-from src.utils import get_logger, setup_logging
-from src.azure_devops import AzureDevOpsClient
+from src.codec import dumps, loads
+from src.models import WorkItemStatus, HealthResponse, ScaffoldJobStatus
+from src.utils import configure_logging, get_logger
+from src.azure_devops import AsyncAzureDevOpsClient, AzureDevOpsAPIError
 from src.azure_repos import AzureReposClient
+from src.audit import get_task_state_store
+from src.client_pool import ClientPool
+from src.github_graphql import get_github_graphql_client
+from src.pr_tracker import (
+    PRTracker, azure_outcome, azure_pr_key, fetch_github_outcomes, get_pr_tracker, parse_azure_event,
+    parse_github_event, verify_basic_auth_secret, verify_github_signature
+)
+from src.scaffold import ScaffoldSpec, SUPPORTED_FRAMEWORKS, precompile_templates, render_scaffold
+from src.scaffold_jobs import OrgLimiter, ScaffoldJobStore, ScaffoldWorkerPool, run_scaffold_phases
+from src.templates import get_template_store
 
 # Service configuration
 SERVICE_NAME = "dev-agent-service"
@@ -33,7 +47,8 @@ SERVICE_VERSION = "0.1.0"
 SERVICE_DESCRIPTION = "AI DevOps Development Agent - Program Factory Worker"
 
 # Initialize logger
-logger = setup_logging()
+configure_logging()
+logger = get_logger()
 
 # Pydantic models for API
 class ScaffoldRequest(BaseModel):
@@ -45,15 +60,40 @@ class ScaffoldRequest(BaseModel):
     framework: str = Field("fastapi", description="Framework to scaffold: 'fastapi', 'flask', 'django'")
     include_frontend: bool = Field(False, description="Include React frontend scaffolding")
     template_url: Optional[str] = Field(None, description="Custom template repository URL")
+    base_branch: str = Field("main", description="Branch the scaffold pull request targets")
+
+class BulkScaffoldTarget(BaseModel):
+    """One target repository of a bulk scaffold"""
+    project_name: str = Field(..., description="Target Azure DevOps project name")
+    repository_name: str = Field(..., description="Target repository name")
+    organization_url: Optional[str] = Field(None, description="Defaults to the bulk request's organization")
+    work_item_id: Optional[int] = Field(None, description="Defaults to the bulk request's work item")
+
+class BulkScaffoldRequest(BaseModel):
+    """Request model for scaffolding the same program into many repositories"""
+    work_item_id: int = Field(..., description="Azure DevOps work item ID to associate with scaffolded code")
+    organization_url: str = Field(..., description="Azure DevOps organization URL")
+    targets: List[BulkScaffoldTarget] = Field(..., min_length=1, max_length=500)
+    framework: str = Field("fastapi", description="Framework to scaffold: 'fastapi', 'flask', 'django'")
+    include_frontend: bool = Field(False, description="Include React frontend scaffolding")
+    template_url: Optional[str] = Field(None, description="Custom template repository URL")
+    base_branch: str = Field("main", description="Branch the scaffold pull requests target")
+
+class BulkScaffoldResponse(BaseModel):
+    """Response model for a queued bulk scaffold"""
+    job_id: str
+    work_item_id: int
+    status: str
+    status_url: str
+    targets: List[Dict[str, Any]]
 
-class ScaffoldResponse(BaseModel):
-    """Response model for scaffolding operations"""
+class ScaffoldJobResponse(BaseModel):
+    """Response model for a queued scaffolding job"""
+    job_id: str
     work_item_id: int
-    repository_url: str
-    branch: str
-    commit_hash: str
-    pull_request_url: Optional[str] = None
     status: str
+    status_url: str
+    events_url: str
 
 class WorkItemUpdateRequest(BaseModel):
     """Request model for updating Azure DevOps work items"""
@@ -61,31 +101,176 @@ class WorkItemUpdateRequest(BaseModel):
     status: WorkItemStatus
     comment: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    organization_url: Optional[str] = Field(None, description="Defaults to AZURE_DEVOPS_ORG_URL")
+    project_name: Optional[str] = Field(None, description="Defaults to AZURE_DEVOPS_PROJECT")
+
+# Pooled Azure clients, bounded and sharing one connection pool per organization host
+client_pool = ClientPool(
+    max_size=int(os.getenv("CLIENT_POOL_MAX_SIZE", "64")),
+    idle_ttl=float(os.getenv("CLIENT_POOL_IDLE_TTL_SECONDS", "600"))
+)
+
+# Scaffold job queue (Redis) and in-service workers
+redis_client = None
+job_store: Optional[ScaffoldJobStore] = None
+worker_pool: Optional[ScaffoldWorkerPool] = None
+org_limiter = OrgLimiter(per_org=int(os.getenv("SCAFFOLD_ORG_CONCURRENCY", "8")))
+
+# Pull requests waiting to merge (dev tasks, scaffolds); dev tasks resume on the Celery workers
+pr_tracker: Optional[PRTracker] = None
+celery_client = Celery('dev_agent', broker=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+def _pat() -> str:
+    pat = os.getenv("AZURE_DEVOPS_PAT")
+    if not pat:
+        raise RuntimeError("Azure DevOps PAT not configured")
+    return pat
+
+def check_scaffold_template(framework: str, template_url: Optional[str]) -> None:
+    """Reject unknown frameworks and template URLs git must not be pointed at (400)"""
+    if template_url:
+        try:
+            get_template_store().check_url(template_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif framework not in SUPPORTED_FRAMEWORKS:
+        raise HTTPException(status_code=400, detail=f"Unsupported framework '{framework}'")
+
+def lease_repos_client(organization_url: str, project_name: str, repository_name: str):
+    """Lease the pooled Azure Repos client for a repository"""
+    pat = _pat()
+    lock_redis_url = os.getenv("AZURE_REPOS_PUSH_LOCK_REDIS_URL")
+    return client_pool.lease(
+        ("repos", organization_url, project_name, repository_name), "azure_repos", organization_url,
+        lambda: AzureReposClient(
+            organization_url=organization_url,
+            project_name=project_name,
+            repository_name=repository_name,
+            personal_access_token=pat,
+            session=client_pool.session_for(organization_url),
+            lock_redis=client_pool.redis_for(lock_redis_url) if lock_redis_url else None
+        )
+    )
+
+def lease_work_item_client(organization_url: str, project_name: str):
+    """Lease the pooled (non-blocking) Azure DevOps work item client for a project"""
+    pat = _pat()
+    return client_pool.lease(
+        ("work_items", organization_url, project_name), "azure_devops", organization_url,
+        lambda: AsyncAzureDevOpsClient(
+            organization_url=organization_url,
+            project_name=project_name,
+            personal_access_token=pat,
+            transport=client_pool.transport_for(organization_url)
+        )
+    )
+
+async def execute_scaffold_job(job: Dict[str, Any], store: ScaffoldJobStore) -> Dict[str, Any]:
+    """Worker handler: render the scaffold and run its repository phases"""
+    if job.get("children"):
+        return await execute_bulk_scaffold_job(job)
 
-# Global state for Azure DevOps clients
-azure_devops_clients = {}
-azure_repos_clients = {}
-dev_agents = {}
+    request = ScaffoldRequest(**job["request"])
+    scaffold_spec = ScaffoldSpec(
+        framework=request.framework,
+        include_frontend=request.include_frontend,
+        template_url=request.template_url
+    )
+    # Memory copy for built-in and cached templates; a first-use remote fetch blocks
+    files = await asyncio.to_thread(render_scaffold, scaffold_spec, request.repository_name, request.work_item_id)
+
+    async with lease_repos_client(request.organization_url, request.project_name,
+                                  request.repository_name) as repos_client:
+        result = await run_scaffold_phases(job, store, repos_client, files, base_branch=request.base_branch)
+
+    if result.get("repository_id"):
+        await pr_tracker.track(azure_pr_key(result["repository_id"], result["pull_request_id"]), {
+            "kind": "scaffold",
+            "job_id": job["job_id"],
+            "organization_url": request.organization_url,
+            "project_name": request.project_name,
+            "repository_name": request.repository_name,
+            "pull_request_id": result["pull_request_id"],
+        })
+    return result
+
+async def execute_bulk_scaffold_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Fan a bulk job's targets out, bounded per organization"""
+    request = BulkScaffoldRequest(**job["request"])
+    # Fetch/compile the template once up front instead of racing on it in every target
+    await asyncio.to_thread(
+        render_scaffold,
+        ScaffoldSpec(framework=request.framework, include_frontend=request.include_frontend,
+                     template_url=request.template_url),
+        request.targets[0].repository_name, request.work_item_id
+    )
+    return await worker_pool.run_children(job, org_limiter)
+
+async def on_pull_request_resolved(key: str, context: Dict[str, Any], outcome: str) -> None:
+    """Resume whatever was waiting on a merged or closed pull request"""
+    if context.get("kind") == "dev_task":
+        await asyncio.to_thread(celery_client.send_task, "src.agent.complete_dev_task",
+                                args=[context["task_data"], context["correlation_id"], outcome])
+    elif context.get("kind") == "scaffold":
+        await job_store.record(context["job_id"], f"pull_request_{outcome}", ScaffoldJobStatus.COMPLETED,
+                               pull_request=key)
+    logger.info(f"Pull request {key} {outcome}", kind=context.get("kind"))
+
+async def fetch_azure_pr_outcomes(entries) -> Dict[str, str]:
+    """Poll fallback for Azure Repos PRs, bounded-concurrent on the pooled clients"""
+    semaphore = asyncio.Semaphore(16)
+
+    async def _outcome(key, context):
+        async with semaphore, lease_repos_client(context["organization_url"], context["project_name"],
+                                                 context["repository_name"]) as repos_client:
+            pr = await repos_client.get_pull_request(context["pull_request_id"])
+        return key, azure_outcome(pr.get("status"))
+
+    results = await asyncio.gather(*(_outcome(key, context) for key, context in entries), return_exceptions=True)
+    return dict(result for result in results if not isinstance(result, BaseException) and result[1])
+
+def pr_fetchers() -> Dict[str, Any]:
+    """Batched poll fetchers per provider"""
+    fetchers = {"azure": fetch_azure_pr_outcomes}
+    if os.getenv("GITHUB_TOKEN"):
+        graphql_client = get_github_graphql_client()
+        fetchers["github"] = lambda entries: asyncio.to_thread(fetch_github_outcomes, graphql_client, entries)
+    return fetchers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan context manager for startup and shutdown"""
+    global redis_client, job_store, worker_pool, pr_tracker
     logger.info(f"Starting {SERVICE_NAME} v{SERVICE_VERSION}")
 
     # Startup tasks
-    # Initialize any required background services here
+    precompile_templates()
+    redis_client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    job_store = ScaffoldJobStore(redis_client)
+    worker_pool = ScaffoldWorkerPool(
+        job_store,
+        execute_scaffold_job,
+        concurrency=int(os.getenv("SCAFFOLD_WORKER_CONCURRENCY", "4"))
+    )
+    await worker_pool.start()
+    sweeper = asyncio.create_task(client_pool.run_sweeper())
+    pr_tracker = get_pr_tracker(redis_client)
+    pr_poller = asyncio.create_task(pr_tracker.run_poller(
+        pr_fetchers(), on_pull_request_resolved,
+        interval=float(os.getenv("PR_TRACKER_POLL_TICK_SECONDS", "60"))
+    ))
 
     yield
 
     # Shutdown tasks
     logger.info(f"Shutting down {SERVICE_NAME}")
+    pr_poller.cancel()
+    await worker_pool.stop()
+    await redis_client.close()
 
     # Clean up clients
-    for client in azure_repos_clients.values():
-        try:
-            await client.close()
-        except Exception as e:
-            logger.error(f"Error closing client: {e}")
+    sweeper.cancel()
+    await client_pool.close()
 
 # FastAPI app initialization
 app = FastAPI(
@@ -118,6 +303,11 @@ async def health_check() -> HealthResponse:
         }
     )
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (push contention, etc.)"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 async def root():
     """Root endpoint with service information"""
@@ -128,99 +318,211 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "scaffolds": {
                 "list": "/scaffolds",
                 "create": "/scaffolds POST",
-                "status": "/scaffolds/{work_item_id}"
+                "bulk": "/scaffolds/bulk POST",
+                "bulk_status": "/scaffolds/bulk/{job_id}",
+                "status": "/scaffolds/{work_item_id}",
+                "job": "/scaffolds/jobs/{job_id}",
+                "events": "/scaffolds/jobs/{job_id}/events"
             },
             "work_items": {
                 "update": "/work-items POST"
+            },
+            "tasks": {
+                "status": "/tasks/{task_id}"
+            },
+            "webhooks": {
+                "github": "/webhooks/github POST",
+                "azure_repos": "/webhooks/azure-repos POST"
             }
         }
     }
 
-@app.post("/scaffolds", response_model=ScaffoldResponse)
-async def scaffold_program(
-    request: ScaffoldRequest,
-    background_tasks: BackgroundTasks
-) -> ScaffoldResponse:
-    """Scaffold a new program in Azure Repos
+@app.post("/scaffolds", response_model=ScaffoldJobResponse, status_code=202)
+async def scaffold_program(request: ScaffoldRequest) -> JSONResponse:
+    """Queue scaffolding of a new program in Azure Repos
 
-    This endpoint takes a work item ID and scaffolds a complete program
-    structure in Azure Repos with the specified framework and options.
+    Returns immediately with a job ID; the scaffold (branch, commit, pull
+    request) runs on the service's scaffold workers. Progress is available
+    from the status URL and as a server-sent-events stream.
     """
-    try:
-        logger.info(f"Initiating scaffold for work item #{request.work_item_id}")
-
-        # Create Azure DevOps clients if not cached
-        client_key = f"{request.organization_url}:{request.project_name}"
-        if client_key not in azure_devops_clients:
-            pat = os.getenv("AZURE_DEVOPS_PAT")
-            if not pat:
-                raise HTTPException(status_code=500, detail="Azure DevOps PAT not configured")
-
-            azure_devops_clients[client_key] = AzureDevOpsClient(
-                organization_url=request.organization_url,
-                project_name=request.project_name,
-                personal_access_token=pat
-            )
-
-        if client_key not in azure_repos_clients:
-            azure_repos_clients[client_key] = AzureReposClient(
-                organization_url=request.organization_url,
-                project_name=request.project_name,
-                repository_name=request.repository_name,
-                personal_access_token=pat
-            )
-
-        # Create dev agent instance
-        dev_agent = dev_agents.get(client_key)
-        if not dev_agent:
-            dev_agent = DevAgent(
-                azure_devops_client=azure_devops_clients[client_key],
-                azure_repos_client=azure_repos_clients[client_key]
-            )
-            dev_agents[client_key] = dev_agent
-
-        # Generate scaffold specification
-        scaffold_spec = ScaffoldSpec(
-            framework=request.framework,
-            include_frontend=request.include_frontend,
-            template_url=request.template_url
-        )
+    check_scaffold_template(request.framework, request.template_url)
+    if not os.getenv("AZURE_DEVOPS_PAT"):
+        raise HTTPException(status_code=500, detail="Azure DevOps PAT not configured")
 
-        # Queue background task for scaffold execution
-        # In production, this would queue to Redis/Celery
-        response = await dev_agent.scaffold_program(
-            scaffold_spec=scaffold_spec,
-            work_item_id=request.work_item_id
-        )
+    try:
+        job = await job_store.create(request.work_item_id, request.model_dump())
+    except Exception as e:
+        logger.error(f"Failed to queue scaffold for work item #{request.work_item_id}: {e}")
+        raise HTTPException(status_code=503, detail="Scaffold queue unavailable")
+
+    logger.info(f"Scaffold queued for work item #{request.work_item_id}", job_id=job["job_id"])
+    response = ScaffoldJobResponse(
+        job_id=job["job_id"],
+        work_item_id=request.work_item_id,
+        status=job["status"],
+        status_url=f"/scaffolds/jobs/{job['job_id']}",
+        events_url=f"/scaffolds/jobs/{job['job_id']}/events"
+    )
+    return JSONResponse(status_code=202, content=response.model_dump())
 
-        logger.info(f"Scaffold completed for work item #{request.work_item_id}")
-        return ScaffoldResponse(**response.dict())
+@app.post("/scaffolds/bulk", response_model=BulkScaffoldResponse, status_code=202)
+async def bulk_scaffold_programs(request: BulkScaffoldRequest) -> JSONResponse:
+    """Queue the same scaffold into many repositories
 
+    Targets run concurrently (SCAFFOLD_ORG_CONCURRENCY per organization) on
+    pooled clients. Each target is a regular scaffold job with its own status
+    and events; the bulk status URL aggregates them.
+    """
+    check_scaffold_template(request.framework, request.template_url)
+    if not os.getenv("AZURE_DEVOPS_PAT"):
+        raise HTTPException(status_code=500, detail="Azure DevOps PAT not configured")
+
+    common = request.model_dump(exclude={"targets"})
+    targets = [
+        ScaffoldRequest(**dict(
+            common,
+            organization_url=target.organization_url or request.organization_url,
+            project_name=target.project_name,
+            repository_name=target.repository_name,
+            work_item_id=target.work_item_id or request.work_item_id
+        )).model_dump()
+        for target in request.targets
+    ]
+    try:
+        bulk, children = await job_store.create_bulk(request.work_item_id, request.model_dump(), targets)
     except Exception as e:
-        logger.error(f"Scaffold failed for work item #{request.work_item_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Scaffold failed: {str(e)}")
+        logger.error(f"Failed to queue bulk scaffold for work item #{request.work_item_id}: {e}")
+        raise HTTPException(status_code=503, detail="Scaffold queue unavailable")
+
+    logger.info(f"Bulk scaffold queued for work item #{request.work_item_id}",
+                job_id=bulk["job_id"], targets=len(children))
+    response = BulkScaffoldResponse(
+        job_id=bulk["job_id"],
+        work_item_id=request.work_item_id,
+        status=bulk["status"],
+        status_url=f"/scaffolds/bulk/{bulk['job_id']}",
+        targets=[{
+            "job_id": child["job_id"],
+            "project_name": child["request"]["project_name"],
+            "repository_name": child["request"]["repository_name"],
+            "status_url": f"/scaffolds/jobs/{child['job_id']}",
+        } for child in children]
+    )
+    return JSONResponse(status_code=202, content=response.model_dump())
+
+@app.get("/scaffolds/bulk/{job_id}")
+async def get_bulk_scaffold(job_id: str):
+    """Aggregate progress and per-repository status of a bulk scaffold"""
+    job = await job_store.get(job_id)
+    progress = await job_store.bulk_progress(job_id) if job else None
+    if not progress:
+        raise HTTPException(status_code=404, detail=f"Bulk scaffold job {job_id} not found")
+    return dict(progress, status=job["status"], phase=job["phase"])
 
 @app.get("/scaffolds/{work_item_id}")
 async def get_scaffold_status(work_item_id: int):
-    """Get status of a scaffolding operation"""
-    # In production, this would query Redis/database for task status
-    return {
-        "work_item_id": work_item_id,
-        "status": "completed",  # Placeholder
-        "message": "Scaffold completed successfully"
-    }
+    """Get status of the latest scaffolding job for a work item"""
+    job = await job_store.latest_for_work_item(work_item_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"No scaffold job for work item #{work_item_id}")
+    return job
+
+@app.get("/scaffolds/jobs/{job_id}")
+async def get_scaffold_job(job_id: str):
+    """Get status and progress events of a scaffolding job"""
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Scaffold job {job_id} not found")
+    return job
+
+@app.get("/scaffolds/jobs/{job_id}/events")
+async def stream_scaffold_events(job_id: str):
+    """Server-sent events stream of a scaffolding job's progress"""
+    if not await job_store.get(job_id):
+        raise HTTPException(status_code=404, detail=f"Scaffold job {job_id} not found")
+
+    finished = {ScaffoldJobStatus.COMPLETED.value, ScaffoldJobStatus.FAILED.value}
+
+    async def event_stream():
+        sent = 0
+        while True:
+            # The record expires with its events; nothing more will arrive
+            if not await job_store.exists(job_id):
+                return
+            events = await job_store.events(job_id, start=sent)
+            for event in events:
+                yield f"event: {event['phase']}\ndata: {dumps(event).decode()}\n\n"
+                if event["status"] in finished:
+                    return
+            sent += len(events)
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.get("/tasks/{task_id}")
+def get_task_status(task_id: str):
+    """Current state and transition history of a dev task (from Redis, not the audit service)"""
+    state = get_task_state_store().get(task_id)
+    if not state:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return state
+
+async def _resume_from_webhook(parsed) -> Dict[str, Any]:
+    if parsed is None:
+        return {"status": "ignored"}
+    key, outcome = parsed
+    context = await pr_tracker.resolve(key, outcome)
+    if context is None:
+        return {"status": "untracked", "pull_request": key}
+    await on_pull_request_resolved(key, context, outcome)
+    return {"status": "resumed", "pull_request": key, "outcome": outcome}
+
+def webhook_secret(name: str) -> Optional[str]:
+    """Secret from ``name``; without one, webhooks are refused unless WEBHOOKS_ALLOW_UNAUTHENTICATED=true"""
+    secret = os.getenv(name)
+    if secret:
+        return secret
+    if os.getenv("WEBHOOKS_ALLOW_UNAUTHENTICATED", "false").lower() == "true":
+        return None
+    raise HTTPException(status_code=503, detail=f"Webhook not configured: {name} is not set")
+
+@app.post("/webhooks/github")
+async def github_webhook(request: Request):
+    """GitHub pull_request webhook; resumes the task waiting on a merged or closed PR"""
+    body = await request.body()
+    secret = webhook_secret("GITHUB_WEBHOOK_SECRET")
+    if secret is not None and not verify_github_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    return await _resume_from_webhook(parse_github_event(request.headers.get("X-GitHub-Event"), loads(body)))
+
+@app.post("/webhooks/azure-repos")
+async def azure_repos_webhook(request: Request):
+    """Azure Repos pull request service hook; resumes the task waiting on a completed or abandoned PR"""
+    secret = webhook_secret("AZURE_REPOS_WEBHOOK_SECRET")
+    if secret is not None and not verify_basic_auth_secret(secret, request.headers.get("Authorization")):
+        raise HTTPException(status_code=401, detail="Invalid service hook credentials")
+    return await _resume_from_webhook(parse_azure_event(loads(await request.body())))
 
 @app.post("/work-items")
 async def update_work_item(request: WorkItemUpdateRequest):
     """Update Azure DevOps work item status and metadata"""
+    organization_url = request.organization_url or os.getenv("AZURE_DEVOPS_ORG_URL")
+    project_name = request.project_name or os.getenv("AZURE_DEVOPS_PROJECT")
+    if not organization_url or not project_name:
+        raise HTTPException(status_code=400, detail="Azure DevOps organization and project are required")
+    if not os.getenv("AZURE_DEVOPS_PAT"):
+        raise HTTPException(status_code=500, detail="Azure DevOps PAT not configured")
+
     try:
         logger.info(f"Updating work item #{request.work_item_id}")
-
-        # This would use the Azure DevOps client to update the work item
-        # For now, return success response
+        async with lease_work_item_client(organization_url, project_name) as ado_client:
+            # State and comment in one JSON-patch round trip
+            await ado_client.update_work_item(request.work_item_id, state=request.status.value,
+                                              comment=request.comment)
         return {
             "work_item_id": request.work_item_id,
             "status": "updated",
@@ -228,6 +530,9 @@ async def update_work_item(request: WorkItemUpdateRequest):
             "metadata": request.metadata
         }
 
+    except AzureDevOpsAPIError as e:
+        logger.error(f"Work item update failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Work item update failed: {str(e)}")
     except Exception as e:
         logger.error(f"Work item update failed: {e}")
         raise HTTPException(status_code=500, detail=f"Work item update failed: {str(e)}")
@@ -248,7 +553,7 @@ async def get_capabilities():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     logger.error(f"HTTP {exc.status_code}: {exc.detail}")
-    return {"detail": exc.detail}
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 if __name__ == "__main__":
     import uvicorn
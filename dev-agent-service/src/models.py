@@ -33,6 +33,23 @@ class WorkStatusResponse(BaseModel):
     updated_at: datetime
 
 
+class WorkItemStatus(str, Enum):
+    NEW = "New"
+    ACTIVE = "Active"
+    IN_PROGRESS = "In Progress"
+    BLOCKED = "Blocked"
+    DONE = "Done"
+    CLOSED = "Closed"
+
+
+class HealthResponse(BaseModel):
+    service_name: str
+    version: str
+    status: str
+    uptime_seconds: Optional[float] = None
+    dependencies: Dict[str, bool] = {}
+
+
 class AuditEvent(BaseModel):
     correlation_id: str
     task_id: str
@@ -41,3 +58,10 @@ class AuditEvent(BaseModel):
     new_state: TaskStatus
     timestamp: str
     service: str = "dev-agent-service"
+
+
+class ScaffoldJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -0,0 +1,275 @@
+"""
+Event-driven pull request completion tracking.
+
+Tasks that open a pull request register it here and return instead of
+waiting. The tracker keeps the PR -> task mapping in Redis and resolves it
+when the PR merges or closes, from either source:
+
+- webhooks: GitHub ``pull_request`` (closed) and Azure Repos
+  ``git.pullrequest.updated`` / ``git.pullrequest.merged`` service hooks;
+- a low-frequency batched poll as a fallback for missed deliveries: due PRs
+  are claimed in batches and checked per provider (one GraphQL query per
+  hundred GitHub PRs), with no loop per PR.
+
+Resolution is one-shot (GETDEL), so a webhook and a poll racing for the same
+PR resume the task once.
+
+Keys (``key_prefix`` defaults to ``pr_tracker``):
+    {prefix}:pr:{key}    JSON context of the waiting task
+    {prefix}:due         sorted set of PR keys by next poll time
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from src.codec import dumps, loads
+from src.github_ratelimit import BACKGROUND, request_priority
+from src.utils import get_logger, get_env_var
+
+MERGED = "merged"
+CLOSED = "closed"
+
+PR_TRACKED = Gauge('dev_agent_pr_tracker_pending', 'Pull requests waiting for merge or close')
+PR_RESOLVED = Counter('dev_agent_pr_tracker_resolved_total', 'Tracked pull requests resolved',
+                      ['provider', 'outcome', 'source'])
+
+# Fetcher: [(key, context)] -> {key: outcome} for PRs that are no longer open
+Fetcher = Callable[[List[Tuple[str, Dict[str, Any]]]], Awaitable[Dict[str, str]]]
+ResolvedHandler = Callable[[str, Dict[str, Any], str], Awaitable[None]]
+
+
+def github_pr_key(repository: str, number: int) -> str:
+    """Tracker key for a GitHub PR; ``repository`` is ``owner/name``."""
+    return f"github:{repository.lower()}#{number}"
+
+
+def azure_pr_key(repository_id: str, pull_request_id: int) -> str:
+    """Tracker key for an Azure Repos PR (repository IDs are unique across organizations)."""
+    return f"azure:{repository_id.lower()}#{pull_request_id}"
+
+
+def provider_of(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class PRTracker:
+    """PR -> task mapping and poll schedule in Redis (redis.asyncio)."""
+
+    def __init__(
+        self,
+        redis_client,
+        poll_interval: float = 900.0,
+        key_prefix: str = "pr_tracker",
+        ttl_seconds: int = 30 * 24 * 3600,
+        clock: Callable[[], float] = time.time
+    ):
+        self.redis = redis_client
+        self.poll_interval = poll_interval
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.logger = get_logger()
+
+    def _pr_key(self, key: str) -> str:
+        return f"{self.key_prefix}:pr:{key}"
+
+    @property
+    def _due_key(self) -> str:
+        return f"{self.key_prefix}:due"
+
+    async def track(self, key: str, context: Dict[str, Any]) -> None:
+        """Wait for PR ``key``; ``context`` is handed back when it resolves."""
+        now = self.clock()
+        pipe = self.redis.pipeline()
+        pipe.set(self._pr_key(key), dumps(dict(context, tracked_at=now)), ex=self.ttl_seconds)
+        pipe.zadd(self._due_key, {key: now + self.poll_interval})
+        await pipe.execute()
+
+    async def resolve(self, key: str, outcome: str, source: str = "webhook") -> Optional[Dict[str, Any]]:
+        """Stop tracking ``key``; returns its context, or None if not tracked (or already resolved)."""
+        pipe = self.redis.pipeline()
+        pipe.getdel(self._pr_key(key))
+        pipe.zrem(self._due_key, key)
+        raw, _ = await pipe.execute()
+        if raw is None:
+            return None
+        PR_RESOLVED.labels(provider=provider_of(key), outcome=outcome, source=source).inc()
+        return loads(raw)
+
+    async def pending(self) -> int:
+        return await self.redis.zcard(self._due_key)
+
+    async def claim_due(self, limit: int = 500) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Take up to ``limit`` PRs whose poll time has passed and push their
+        next poll out by ``poll_interval``.
+        """
+        now = self.clock()
+        keys = [k.decode() if isinstance(k, bytes) else k
+                for k in await self.redis.zrangebyscore(self._due_key, "-inf", now, start=0, num=limit)]
+        if not keys:
+            return []
+
+        pipe = self.redis.pipeline()
+        pipe.mget([self._pr_key(key) for key in keys])
+        pipe.zadd(self._due_key, {key: now + self.poll_interval for key in keys}, xx=True)
+        contexts, _ = await pipe.execute()
+
+        claimed, expired = [], []
+        for key, raw in zip(keys, contexts):
+            if raw is None:
+                expired.append(key)  # Context hit its TTL
+            else:
+                claimed.append((key, loads(raw)))
+        if expired:
+            await self.redis.zrem(self._due_key, *expired)
+        return claimed
+
+    async def poll_once(self, fetchers: Dict[str, Fetcher], on_resolved: ResolvedHandler, limit: int = 500) -> int:
+        """Check one batch of due PRs with the provider fetchers; returns how many resolved."""
+        by_provider: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for key, context in await self.claim_due(limit):
+            by_provider.setdefault(provider_of(key), []).append((key, context))
+
+        PR_TRACKED.set(await self.pending())
+        resolved = 0
+        for provider, entries in by_provider.items():
+            fetcher = fetchers.get(provider)
+            if fetcher is None:
+                continue
+            try:
+                outcomes = await fetcher(entries)
+            except Exception as e:
+                # Entries were already rescheduled; they are retried next interval
+                self.logger.error("Pull request poll failed", provider=provider, prs=len(entries), error=str(e))
+                continue
+            for key, outcome in outcomes.items():
+                context = await self.resolve(key, outcome, source="poll")
+                if context is not None:
+                    await on_resolved(key, context, outcome)
+                    resolved += 1
+        return resolved
+
+    async def run_poller(self, fetchers: Dict[str, Fetcher], on_resolved: ResolvedHandler,
+                         interval: float = 60.0, limit: int = 500) -> None:
+        """Background loop calling poll_once(); cancel the task to stop it."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.poll_once(fetchers, on_resolved, limit=limit)
+            except Exception as e:
+                self.logger.error("Pull request poller failed", error=str(e))
+
+
+def get_pr_tracker(redis_client) -> PRTracker:
+    """Tracker on ``redis_client`` polling every PR_TRACKER_POLL_INTERVAL_SECONDS."""
+    return PRTracker(redis_client, poll_interval=float(get_env_var("PR_TRACKER_POLL_INTERVAL_SECONDS", "900")))
+
+
+async def track_pull_request(key: str, context: Dict[str, Any]) -> None:
+    """Register a PR from a process without a long-lived tracker (Celery workers)."""
+    import redis.asyncio as aioredis
+
+    client = aioredis.from_url(get_env_var("REDIS_URL", "redis://localhost:6379/0"))
+    try:
+        await get_pr_tracker(client).track(key, context)
+    finally:
+        await client.close()
+
+
+# Webhooks
+
+def verify_github_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check ``X-Hub-Signature-256`` against the webhook secret."""
+    if not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_basic_auth_secret(secret: str, authorization: Optional[str]) -> bool:
+    """Check the password of an Azure DevOps service hook's basic authentication."""
+    if not authorization or not authorization.lower().startswith("basic "):
+        return False
+    try:
+        _, _, password = base64.b64decode(authorization[6:]).decode("utf-8").partition(":")
+    except ValueError:
+        return False
+    return hmac.compare_digest(password, secret)
+
+
+def parse_github_event(event: Optional[str], payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(key, outcome) for a closed pull request event, otherwise None."""
+    if event != "pull_request" or payload.get("action") != "closed":
+        return None
+    pull = payload["pull_request"]
+    return (github_pr_key(payload["repository"]["full_name"], pull["number"]),
+            MERGED if pull.get("merged") else CLOSED)
+
+
+def azure_outcome(status: Optional[str]) -> Optional[str]:
+    """Outcome for an Azure Repos PR status; None while active."""
+    return {"completed": MERGED, "abandoned": CLOSED}.get(status)
+
+
+def parse_azure_event(payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(key, outcome) for a completed or abandoned pull request, otherwise None."""
+    if payload.get("eventType") not in ("git.pullrequest.updated", "git.pullrequest.merged"):
+        return None
+    resource = payload.get("resource") or {}
+    outcome = azure_outcome(resource.get("status"))
+    if outcome is None:
+        return None
+    return azure_pr_key(resource["repository"]["id"], resource["pullRequestId"]), outcome
+
+
+# Poll fetchers
+
+_GITHUB_STATES = {"MERGED": MERGED, "CLOSED": CLOSED}
+
+
+def fetch_github_outcomes(graphql_client, entries: Iterable[Tuple[str, Dict[str, Any]]],
+                          batch_size: int = 100) -> Dict[str, str]:
+    """
+    States of many GitHub PRs with one GraphQL query per ``batch_size`` PRs
+    (aliased ``repository { pullRequest }`` selections). Blocking; paced as
+    background work so polling never eats the quota interactive calls need.
+    """
+    with request_priority(BACKGROUND):
+        return _fetch_github_outcomes(graphql_client, list(entries), batch_size)
+
+
+def _fetch_github_outcomes(graphql_client, entries: List[Tuple[str, Dict[str, Any]]],
+                           batch_size: int) -> Dict[str, str]:
+    outcomes = {}
+    for offset in range(0, len(entries), batch_size):
+        batch = entries[offset:offset + batch_size]
+        by_repo: Dict[str, List[Tuple[str, int]]] = {}
+        for key, _ in batch:
+            repository, _, number = key.split(":", 1)[1].rpartition("#")
+            by_repo.setdefault(repository, []).append((key, int(number)))
+
+        selections, aliases = [], {}
+        for i, (repository, pulls) in enumerate(by_repo.items()):
+            owner, name = repository.split("/")
+            fields = " ".join(f"p{number}: pullRequest(number: {number}) {{ state }}" for _, number in pulls)
+            selections.append(f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {fields} }}")
+            aliases[f"r{i}"] = pulls
+
+        # Partial data: a deleted repository or PR must not fail the whole batch
+        data = graphql_client.execute("query PullRequestStates {\n  " + "\n  ".join(selections) + "\n}", {},
+                                      partial=True)
+        for alias, pulls in aliases.items():
+            repository = data.get(alias) or {}
+            for key, number in pulls:
+                state = (repository.get(f"p{number}") or {}).get("state")
+                if state in _GITHUB_STATES:
+                    outcomes[key] = _GITHUB_STATES[state]
+    return outcomes
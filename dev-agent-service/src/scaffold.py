@@ -0,0 +1,165 @@
+"""
+Scaffold generation for new programs.
+
+Built-in templates cover the frameworks accepted by ``POST /scaffolds``
+(fastapi, flask, django) and an optional React frontend; ``template_url``
+points at a git repository used as the template instead. Templates use
+``string.Template`` placeholders (``$project_name``, ``$work_item_id``) and
+are compiled and rendered through the TemplateStore (src/templates.py).
+"""
+
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from src.templates import CompiledTemplate, TemplateStore, get_template_store
+from src.utils import get_logger, get_env_var
+
+
+class ScaffoldSpec(BaseModel):
+    """What to scaffold into the target repository."""
+    framework: str = "fastapi"
+    include_frontend: bool = False
+    template_url: Optional[str] = None
+
+
+_COMMON = {
+    "README.md": "# $project_name\n\nScaffolded by dev-agent-service for work item #$work_item_id.\n",
+    ".gitignore": "__pycache__/\n*.pyc\n.env\n.venv/\nnode_modules/\n",
+}
+
+_FRAMEWORKS = {
+    "fastapi": {
+        "app/__init__.py": "",
+        "app/main.py": (
+            "from fastapi import FastAPI\n\n"
+            "app = FastAPI(title=\"$project_name\")\n\n\n"
+            "@app.get(\"/health\")\n"
+            "async def health():\n"
+            "    return {\"status\": \"healthy\"}\n"
+        ),
+        "requirements.txt": "fastapi\nuvicorn[standard]\n",
+        "tests/test_health.py": (
+            "from fastapi.testclient import TestClient\n"
+            "from app.main import app\n\n\n"
+            "def test_health():\n"
+            "    assert TestClient(app).get(\"/health\").json() == {\"status\": \"healthy\"}\n"
+        ),
+    },
+    "flask": {
+        "app/__init__.py": (
+            "from flask import Flask\n\n\n"
+            "def create_app():\n"
+            "    app = Flask(\"$project_name\")\n\n"
+            "    @app.get(\"/health\")\n"
+            "    def health():\n"
+            "        return {\"status\": \"healthy\"}\n\n"
+            "    return app\n"
+        ),
+        "wsgi.py": "from app import create_app\n\napp = create_app()\n",
+        "requirements.txt": "flask\ngunicorn\n",
+    },
+    "django": {
+        "manage.py": (
+            "import os\nimport sys\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    os.environ.setdefault(\"DJANGO_SETTINGS_MODULE\", \"project.settings\")\n"
+            "    from django.core.management import execute_from_command_line\n"
+            "    execute_from_command_line(sys.argv)\n"
+        ),
+        "project/__init__.py": "",
+        "project/settings.py": (
+            "SECRET_KEY = \"change-me\"\nDEBUG = False\nALLOWED_HOSTS = [\"*\"]\n"
+            "ROOT_URLCONF = \"project.urls\"\nINSTALLED_APPS = [\"django.contrib.contenttypes\"]\n"
+        ),
+        "project/urls.py": (
+            "from django.http import JsonResponse\nfrom django.urls import path\n\n"
+            "urlpatterns = [path(\"health\", lambda request: JsonResponse({\"status\": \"healthy\"}))]\n"
+        ),
+        "requirements.txt": "django\n",
+    },
+}
+
+_FRONTEND = {
+    "frontend/package.json": (
+        "{\n  \"name\": \"$project_name-frontend\",\n  \"private\": true,\n"
+        "  \"scripts\": {\"dev\": \"vite\", \"build\": \"vite build\"},\n"
+        "  \"dependencies\": {\"react\": \"^18.2.0\", \"react-dom\": \"^18.2.0\"},\n"
+        "  \"devDependencies\": {\"vite\": \"^5.0.0\", \"@vitejs/plugin-react\": \"^4.2.0\"}\n}\n"
+    ),
+    "frontend/index.html": (
+        "<!doctype html>\n<html>\n  <body>\n    <div id=\"root\"></div>\n"
+        "    <script type=\"module\" src=\"/src/main.jsx\"></script>\n  </body>\n</html>\n"
+    ),
+    "frontend/src/main.jsx": (
+        "import React from 'react'\nimport { createRoot } from 'react-dom/client'\n\n"
+        "createRoot(document.getElementById('root')).render(<h1>$project_name</h1>)\n"
+    ),
+}
+
+SUPPORTED_FRAMEWORKS = sorted(_FRAMEWORKS)
+
+
+def _builtin_key(framework: str, include_frontend: bool) -> str:
+    return f"builtin:{framework}" + ("+frontend" if include_frontend else "")
+
+
+def _builtin_template(store: TemplateStore, framework: str, include_frontend: bool) -> CompiledTemplate:
+    key = _builtin_key(framework, include_frontend)
+    compiled = store.get(key)
+    if compiled is None:
+        files = dict(_COMMON)
+        files.update(_FRAMEWORKS[framework])
+        if include_frontend:
+            files.update(_FRONTEND)
+        compiled = store.register(key, files)
+    return compiled
+
+
+def precompile_templates(store: Optional[TemplateStore] = None,
+                         template_urls: Optional[List[str]] = None) -> int:
+    """
+    Compile every built-in framework/frontend combination and the remote
+    ``template_urls`` (default: SCAFFOLD_PRECOMPILE_TEMPLATE_URLS, comma
+    separated); returns the count. A remote template that fails to load is
+    logged and compiled on first use instead.
+    """
+    store = store or get_template_store()
+    if template_urls is None:
+        configured = get_env_var("SCAFFOLD_PRECOMPILE_TEMPLATE_URLS", "")
+        template_urls = [url.strip() for url in configured.split(",") if url.strip()]
+
+    for framework in _FRAMEWORKS:
+        for include_frontend in (False, True):
+            _builtin_template(store, framework, include_frontend)
+    compiled = len(_FRAMEWORKS) * 2
+    for template_url in template_urls:
+        try:
+            store.load_remote(template_url)
+            compiled += 1
+        except Exception as e:
+            get_logger().warning("Failed to precompile template", template_url=template_url, error=str(e))
+    return compiled
+
+
+def render_scaffold(
+    spec: ScaffoldSpec,
+    project_name: str,
+    work_item_id: int,
+    store: Optional[TemplateStore] = None
+) -> Dict[str, Union[str, bytes]]:
+    """
+    Render the file tree for ``spec`` as path -> content.
+
+    Remote templates are fetched (or read from the disk cache) on first use,
+    which blocks; callers on an event loop should run this in a thread.
+    """
+    store = store or get_template_store()
+    if spec.template_url:
+        compiled = store.load_remote(spec.template_url)
+    elif spec.framework in _FRAMEWORKS:
+        compiled = _builtin_template(store, spec.framework, spec.include_frontend)
+    else:
+        raise ValueError(f"Unsupported framework '{spec.framework}'")
+
+    return store.render(compiled, {"project_name": project_name, "work_item_id": work_item_id})
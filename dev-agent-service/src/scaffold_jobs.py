@@ -0,0 +1,403 @@
+"""
+Queued scaffold jobs with per-phase progress kept in Redis.
+
+``POST /scaffolds`` only records a job and pushes its ID onto a Redis list;
+a bounded pool of in-service async workers pops jobs and runs the scaffold
+phases (branch, commit, pull request). Every phase transition is appended to
+the job's event list so status reads and the SSE stream see real progress,
+and queued jobs survive a service restart.
+
+A worker moves the job ID it takes into its pool's processing list (BLMOVE)
+and removes it once the job has finished, so a job is never only in a
+crashed worker's memory. Pools refresh a heartbeat key; the processing
+lists of pools whose heartbeat has expired (and the pool's own list, on
+startup) are pushed back onto the queue. Delivery is at least once: a job
+recorded as completed or failed before the crash is not run again.
+
+``POST /scaffolds/bulk`` records one job per target repository plus a bulk
+job listing them; only the bulk job is queued. Its worker runs the targets
+concurrently, bounded per organization (``OrgLimiter``), so each target
+keeps its own status and events and the bulk job reports aggregate progress.
+
+Keys (``key_prefix`` defaults to ``scaffold``):
+    {prefix}:queue               list of queued job IDs
+    {prefix}:processing:{name}   job IDs taken by worker pool ``name``
+    {prefix}:worker:{name}       heartbeat of worker pool ``name`` (expires)
+    {prefix}:job:{id}            hash with the job state (bulk jobs: ``children``)
+    {prefix}:job:{id}:events     list of JSON progress events
+    {prefix}:work-item:{id}      latest job ID for a work item
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.codec import dumps, loads
+from src.models import ScaffoldJobStatus
+from src.utils import get_logger
+
+PHASES = ["branch", "commit", "pull_request"]
+
+JobHandler = Callable[[Dict[str, Any], "ScaffoldJobStore"], Awaitable[Dict[str, Any]]]
+
+
+class ScaffoldJobStore:
+    """Job records, progress events and the job queue in Redis (redis.asyncio)."""
+
+    def __init__(self, redis_client, key_prefix: str = "scaffold", ttl_seconds: int = 7 * 24 * 3600):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.key_prefix}:job:{job_id}"
+
+    def _events_key(self, job_id: str) -> str:
+        return f"{self.key_prefix}:job:{job_id}:events"
+
+    @property
+    def _queue_key(self) -> str:
+        return f"{self.key_prefix}:queue"
+
+    def _processing_key(self, worker_name: str) -> str:
+        return f"{self.key_prefix}:processing:{worker_name}"
+
+    def _worker_key(self, worker_name: str) -> str:
+        return f"{self.key_prefix}:worker:{worker_name}"
+
+    def _stage_job(self, pipe, work_item_id: int, request: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+        """Add a new job record and its 'queued' event to ``pipe``."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "work_item_id": work_item_id,
+            "status": ScaffoldJobStatus.QUEUED.value,
+            "phase": "queued",
+            "request": request,
+            "created_at": now,
+            "updated_at": now,
+            **extra,
+        }
+        event = {"phase": "queued", "status": ScaffoldJobStatus.QUEUED.value, "timestamp": now, "detail": {}}
+        pipe.hset(self._job_key(job_id), mapping={key: dumps(value) for key, value in job.items()})
+        pipe.expire(self._job_key(job_id), self.ttl_seconds)
+        pipe.rpush(self._events_key(job_id), dumps(event))
+        pipe.expire(self._events_key(job_id), self.ttl_seconds)
+        pipe.set(f"{self.key_prefix}:work-item:{work_item_id}", job_id, ex=self.ttl_seconds)
+        return job
+
+    async def create(self, work_item_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a new job and queue it."""
+        pipe = self.redis.pipeline()
+        job = self._stage_job(pipe, work_item_id, request)
+        pipe.lpush(self._queue_key, job["job_id"])
+        await pipe.execute()
+        return job
+
+    async def create_bulk(
+        self,
+        work_item_id: int,
+        request: Dict[str, Any],
+        targets: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Record one job per target request plus a bulk job listing them, and
+        queue only the bulk job; its worker fans the targets out.
+        """
+        pipe = self.redis.pipeline()
+        children = [self._stage_job(pipe, target["work_item_id"], target) for target in targets]
+        bulk = self._stage_job(pipe, work_item_id, request, children=[child["job_id"] for child in children])
+        for child in children:
+            pipe.hset(self._job_key(child["job_id"]), "parent_id", dumps(bulk["job_id"]))
+        pipe.lpush(self._queue_key, bulk["job_id"])
+        await pipe.execute()
+        return bulk, children
+
+    async def exists(self, job_id: str) -> bool:
+        return bool(await self.redis.exists(self._job_key(job_id)))
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.hgetall(self._job_key(job_id))
+        if not raw:
+            return None
+        job = {(k.decode() if isinstance(k, bytes) else k): loads(v) for k, v in raw.items()}
+        job["events"] = await self.events(job_id)
+        return job
+
+    async def latest_for_work_item(self, work_item_id: int) -> Optional[Dict[str, Any]]:
+        job_id = await self.redis.get(f"{self.key_prefix}:work-item:{work_item_id}")
+        if not job_id:
+            return None
+        return await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+
+    async def events(self, job_id: str, start: int = 0) -> List[Dict[str, Any]]:
+        return [loads(event) for event in await self.redis.lrange(self._events_key(job_id), start, -1)]
+
+    async def record(
+        self,
+        job_id: str,
+        phase: str,
+        status: ScaffoldJobStatus,
+        **detail: Any
+    ) -> Dict[str, Any]:
+        """Append a progress event and update the job's current phase/status."""
+        event = {"phase": phase, "status": status.value, "timestamp": time.time(), "detail": detail}
+        fields = {"phase": phase, "status": status.value, "updated_at": event["timestamp"]}
+        if "result" in detail:
+            fields["result"] = detail["result"]
+        if "error" in detail:
+            fields["error"] = detail["error"]
+
+        pipe = self.redis.pipeline()
+        pipe.rpush(self._events_key(job_id), dumps(event))
+        pipe.expire(self._events_key(job_id), self.ttl_seconds)
+        pipe.hset(self._job_key(job_id), mapping={key: dumps(value) for key, value in fields.items()})
+        await pipe.execute()
+        return event
+
+    async def bulk_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Per-target status and aggregate counts of a bulk job."""
+        raw = await self.redis.hget(self._job_key(job_id), "children")
+        if raw is None:
+            return None
+        child_ids = loads(raw)
+
+        pipe = self.redis.pipeline()
+        for child_id in child_ids:
+            pipe.hmget(self._job_key(child_id), ["status", "phase", "request", "result", "error"])
+        rows = await pipe.execute()
+
+        counts = {status.value: 0 for status in ScaffoldJobStatus}
+        targets = []
+        for child_id, row in zip(child_ids, rows):
+            status, phase, request, result, error = (loads(value) if value is not None else None for value in row)
+            status = status or ScaffoldJobStatus.FAILED.value  # Expired child records
+            counts[status] += 1
+            targets.append({
+                "job_id": child_id,
+                "organization_url": (request or {}).get("organization_url"),
+                "project_name": (request or {}).get("project_name"),
+                "repository_name": (request or {}).get("repository_name"),
+                "status": status,
+                "phase": phase,
+                "result": result,
+                "error": error,
+            })
+
+        finished = counts[ScaffoldJobStatus.COMPLETED.value] + counts[ScaffoldJobStatus.FAILED.value]
+        return {
+            "job_id": job_id,
+            "total": len(child_ids),
+            "counts": counts,
+            "progress": finished / len(child_ids) if child_ids else 1.0,
+            "targets": targets,
+        }
+
+    async def next_job(self, worker_name: str, timeout: int = 5) -> Optional[str]:
+        """
+        Block up to ``timeout`` seconds for the next queued job ID, moving it
+        into ``worker_name``'s processing list until ``ack``.
+        """
+        job_id = await self.redis.blmove(self._queue_key, self._processing_key(worker_name), timeout,
+                                         "RIGHT", "LEFT")
+        if not job_id:
+            return None
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    async def ack(self, worker_name: str, job_id: str) -> None:
+        """Drop a finished job from ``worker_name``'s processing list."""
+        await self.redis.lrem(self._processing_key(worker_name), 1, job_id)
+
+    async def heartbeat(self, worker_name: str, ttl_seconds: int) -> None:
+        await self.redis.set(self._worker_key(worker_name), time.time(), ex=ttl_seconds)
+
+    async def requeue(self, worker_name: str) -> int:
+        """Push ``worker_name``'s unacknowledged jobs back onto the queue, next in line."""
+        requeued = 0
+        while await self.redis.lmove(self._processing_key(worker_name), self._queue_key, "LEFT", "RIGHT"):
+            requeued += 1
+        return requeued
+
+    async def requeue_orphaned(self) -> Dict[str, int]:
+        """Requeue the processing lists of worker pools whose heartbeat has expired."""
+        prefix = self._processing_key("")
+        requeued = {}
+        async for key in self.redis.scan_iter(match=f"{prefix}*"):
+            worker_name = (key.decode() if isinstance(key, bytes) else key)[len(prefix):]
+            if not await self.redis.exists(self._worker_key(worker_name)):
+                count = await self.requeue(worker_name)
+                if count:
+                    requeued[worker_name] = count
+        return requeued
+
+
+class OrgLimiter:
+    """Caps concurrently running scaffold targets per Azure DevOps organization."""
+
+    def __init__(self, per_org: int = 8):
+        self.per_org = per_org
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def limit(self, organization_url: str):
+        key = organization_url.rstrip("/").lower()
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self.per_org)
+        async with semaphore:
+            yield
+
+
+class ScaffoldWorkerPool:
+    """Fixed number of async consumers draining the scaffold queue."""
+
+    def __init__(self, store: ScaffoldJobStore, handler: JobHandler, concurrency: int = 4,
+                 name: Optional[str] = None, heartbeat_seconds: float = 10.0):
+        """
+        Args:
+            name: Processing list and heartbeat name; unique per running pool
+                (defaults to host name and process ID)
+            heartbeat_seconds: Heartbeat refresh interval; a pool silent for
+                three intervals is considered dead and its jobs are requeued
+        """
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_seconds = heartbeat_seconds
+        self.logger = get_logger()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        # Jobs left by an earlier run under this name, then by dead pools
+        requeued = await self.store.requeue(self.name)
+        await self.store.heartbeat(self.name, self._heartbeat_ttl)
+        orphaned = await self.store.requeue_orphaned()
+        if requeued or orphaned:
+            self.logger.warning("Requeued unfinished scaffold jobs", own=requeued, orphaned=orphaned)
+
+        self._tasks = [asyncio.create_task(self._consume(i)) for i in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        self.logger.info("Scaffold workers started", concurrency=self.concurrency, name=self.name)
+
+    @property
+    def _heartbeat_ttl(self) -> int:
+        return max(1, int(self.heartbeat_seconds * 3))
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self.store.heartbeat(self.name, self._heartbeat_ttl)
+                orphaned = await self.store.requeue_orphaned()
+                if orphaned:
+                    self.logger.warning("Requeued scaffold jobs of dead workers", orphaned=orphaned)
+            except Exception as e:
+                self.logger.error("Scaffold worker heartbeat failed", name=self.name, error=str(e))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _consume(self, worker_id: int) -> None:
+        while True:
+            try:
+                job_id = await self.store.next_job(self.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Scaffold queue read failed", worker=worker_id, error=str(e))
+                await asyncio.sleep(1)
+                continue
+            if job_id:
+                try:
+                    await self.run_job(job_id)
+                finally:
+                    await self.store.ack(self.name, job_id)
+
+    async def run_children(self, job: Dict[str, Any], limiter: OrgLimiter) -> Dict[str, Any]:
+        """
+        Run a bulk job's target jobs concurrently, at most ``limiter.per_org``
+        at a time per organization; returns the aggregate progress.
+        """
+        async def _run(child_id: str) -> None:
+            child = await self.store.get(child_id)
+            if child is None:
+                return
+            async with limiter.limit(child["request"]["organization_url"]):
+                await self.run_job(child_id)
+
+        await asyncio.gather(*(_run(child_id) for child_id in job["children"]))
+        progress = await self.store.bulk_progress(job["job_id"])
+        return {key: value for key, value in progress.items() if key != "targets"}
+
+    async def run_job(self, job_id: str) -> None:
+        """Run one job, recording completion or failure."""
+        job = await self.store.get(job_id)
+        if job is None:
+            self.logger.warning("Queued scaffold job expired", job_id=job_id)
+            return
+        if job["status"] in (ScaffoldJobStatus.COMPLETED.value, ScaffoldJobStatus.FAILED.value):
+            # Requeued after a crash that happened once the job had finished
+            return
+
+        try:
+            result = await self.handler(job, self.store)
+            await self.store.record(job_id, "completed", ScaffoldJobStatus.COMPLETED, result=result)
+        except asyncio.CancelledError:
+            await self.store.record(job_id, job.get("phase") or "queued", ScaffoldJobStatus.FAILED,
+                                    error="Service shutting down")
+            raise
+        except Exception as e:
+            current = await self.store.get(job_id)
+            self.logger.error("Scaffold job failed", job_id=job_id, error=str(e))
+            await self.store.record(job_id, current["phase"] if current else "", ScaffoldJobStatus.FAILED,
+                                    error=str(e))
+
+
+async def run_scaffold_phases(
+    job: Dict[str, Any],
+    store: ScaffoldJobStore,
+    repos_client,
+    files: Dict[str, str],
+    base_branch: str = "main"
+) -> Dict[str, Any]:
+    """Branch, commit and pull-request phases of a scaffold job."""
+    job_id = job["job_id"]
+    work_item_id = job["work_item_id"]
+    branch = f"scaffold/wi-{work_item_id}"
+
+    await store.record(job_id, "branch", ScaffoldJobStatus.RUNNING, branch=branch)
+    await repos_client.create_branch(base_branch, branch)
+
+    await store.record(job_id, "commit", ScaffoldJobStatus.RUNNING, files=len(files))
+    commit_id, commit_url = await repos_client.commit_changes(
+        branch, files, "Scaffold program", work_item_id=work_item_id
+    )
+
+    await store.record(job_id, "pull_request", ScaffoldJobStatus.RUNNING, commit_id=commit_id)
+    pr = await repos_client.create_pull_request(
+        source_branch=branch,
+        target_branch=base_branch,
+        title=f"Scaffold for work item #{work_item_id}",
+        description=f"Scaffolded {job['request'].get('framework', '')} program.",
+        work_item_id=work_item_id,
+        correlation_id=job_id
+    )
+
+    return {
+        "repository_url": f"{repos_client.organization_url}/{repos_client.project_name}/_git/{repos_client.repository_name}",
+        "branch": branch,
+        "commit_hash": commit_id,
+        "commit_url": commit_url,
+        "pull_request_url": pr["pullRequestUrl"],
+        "pull_request_id": pr["pullRequestId"],
+        "repository_id": pr.get("data", {}).get("repository", {}).get("id"),
+    }
@@ -0,0 +1,253 @@
+"""
+Scaffold template store.
+
+Templates are compiled once into memory (``CompiledTemplate``, at most
+``max_compiled``, least recently used dropped first) and rendered output is
+memoized by ``(template_hash, parameters)``, so a repeated scaffold is a
+dictionary copy. Remote templates (``template_url``, a git repository,
+optionally ``url#ref``) are fetched once and kept on disk under
+``{cache_dir}/{url hash}/{commit}``; the ref -> commit resolution is cached
+for ``ref_ttl`` seconds and skipped entirely for URLs pinned to a commit.
+
+Template URLs come from API requests and end up on a git command line, so
+only https URLs on allowed hosts are accepted (``check_url``) and git itself
+is restricted to the same transports.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from src.utils import get_logger, get_env_var
+from src.workspace import GitCommandError
+
+TemplateBody = Union[str, bytes]
+
+_COMMIT_RE = re.compile(r"^[0-9a-f]{40}$")
+# Branch/tag names and commit IDs; never an option (leading '-') or a revision expression
+_REF_RE = re.compile(r"^(?!-)(?!.*\.\.)[A-Za-z0-9._/-]+$")
+
+DEFAULT_ALLOWED_HOSTS = ("github.com", "dev.azure.com")
+
+
+class CompiledTemplate:
+    """A template tree with each text file pre-parsed for substitution."""
+
+    def __init__(self, name: str, files: Mapping[str, TemplateBody]):
+        self.name = name
+        digest = hashlib.sha256()
+        self._files: Dict[str, Union[Template, TemplateBody]] = {}
+        for path in sorted(files):
+            body = files[path]
+            raw = body.encode("utf-8") if isinstance(body, str) else body
+            digest.update(path.encode("utf-8") + b"\0" + raw + b"\0")
+            # Only text with placeholders needs substitution at render time
+            self._files[path] = Template(body) if isinstance(body, str) and "$" in body else body
+        self.template_hash = digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def render(self, params: Mapping[str, object]) -> Dict[str, TemplateBody]:
+        return {
+            path: body.safe_substitute(params) if isinstance(body, Template) else body
+            for path, body in self._files.items()
+        }
+
+
+class TemplateStore:
+    """Compiled templates in memory, remote template trees on disk, memoized renders."""
+
+    def __init__(self, cache_dir: str, ref_ttl: float = 300.0, max_rendered: int = 256,
+                 git_binary: str = "git", schemes: Iterable[str] = ("https",),
+                 allowed_hosts: Optional[Iterable[str]] = DEFAULT_ALLOWED_HOSTS,
+                 max_compiled: int = 64):
+        """
+        Args:
+            max_compiled: Compiled templates kept in memory; evicted ones are
+                recompiled (remote ones from the disk cache) on next use
+            schemes: URL schemes (and git transports) remote templates may use
+            allowed_hosts: Hosts remote templates may come from; None allows any host
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ref_ttl = ref_ttl
+        self.max_rendered = max_rendered
+        self.max_compiled = max_compiled
+        self.git_binary = git_binary
+        self.schemes = tuple(schemes)
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts) if allowed_hosts is not None else None
+        self.logger = get_logger()
+
+        self._lock = threading.Lock()
+        self._compiled: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+        self._refs: Dict[str, Tuple[str, float]] = {}
+        self._rendered: "OrderedDict[Tuple[str, Tuple], Dict[str, TemplateBody]]" = OrderedDict()
+        self.render_hits = 0
+        self.render_misses = 0
+
+    def register(self, key: str, files: Mapping[str, TemplateBody]) -> CompiledTemplate:
+        """Compile and keep a template tree under ``key``."""
+        compiled = CompiledTemplate(key, files)
+        with self._lock:
+            self._compiled[key] = compiled
+            self._compiled.move_to_end(key)
+            while len(self._compiled) > self.max_compiled:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def get(self, key: str) -> Optional[CompiledTemplate]:
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+            return compiled
+
+    def render(self, compiled: CompiledTemplate, params: Mapping[str, object]) -> Dict[str, TemplateBody]:
+        """Render ``compiled`` with ``params``; repeated renders are a dict copy."""
+        cache_key = (compiled.template_hash, tuple(sorted((k, str(v)) for k, v in params.items())))
+        with self._lock:
+            rendered = self._rendered.get(cache_key)
+            if rendered is not None:
+                self._rendered.move_to_end(cache_key)
+                self.render_hits += 1
+                return dict(rendered)
+            self.render_misses += 1
+
+        rendered = compiled.render(params)
+        with self._lock:
+            self._rendered[cache_key] = rendered
+            while len(self._rendered) > self.max_rendered:
+                self._rendered.popitem(last=False)
+        return dict(rendered)
+
+    # Remote templates
+
+    def check_url(self, template_url: str) -> Tuple[str, str]:
+        """
+        Split ``url#ref`` and check both are safe to hand to git.
+
+        Raises ValueError unless the URL uses an allowed scheme and host and
+        the ref is a plain branch, tag or commit name.
+        """
+        url, _, ref = template_url.partition("#")
+        if not url or url.startswith("-") or any(ch.isspace() or ord(ch) < 32 for ch in template_url):
+            raise ValueError("Invalid template URL")
+        parts = urlsplit(url)
+        if parts.scheme.lower() not in self.schemes:
+            raise ValueError(f"Template URL must use {' or '.join(self.schemes)}")
+        if self.allowed_hosts is not None and (parts.hostname or "").lower() not in self.allowed_hosts:
+            raise ValueError(f"Template host '{parts.hostname}' is not allowed")
+        if ref and not _REF_RE.match(ref):
+            raise ValueError(f"Invalid template ref '{ref}'")
+        return url, ref or "HEAD"
+
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> str:
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        # Only the configured transports; no ext::, file:// or local paths
+        protocols = ["-c", "protocol.allow=never"]
+        for scheme in self.schemes:
+            protocols += ["-c", f"protocol.{scheme}.allow=always"]
+        result = subprocess.run([self.git_binary, *protocols, *args], cwd=cwd, env=env,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise GitCommandError(list(args), result.returncode, result.stderr)
+        return result.stdout
+
+    def resolve_commit(self, url: str, ref: str = "HEAD") -> str:
+        """Commit ID of ``ref`` at ``url``, cached for ``ref_ttl`` seconds."""
+        if _COMMIT_RE.match(ref):
+            return ref
+        cache_key = f"{url}#{ref}"
+        cached = self._refs.get(cache_key)
+        if cached and time.monotonic() - cached[1] < self.ref_ttl:
+            return cached[0]
+
+        output = self._git("ls-remote", "--", url, ref)
+        if not output.strip():
+            raise ValueError(f"Ref '{ref}' not found in template repository {url}")
+        commit = output.split()[0]
+        self._refs[cache_key] = (commit, time.monotonic())
+        return commit
+
+    def _checkout_dir(self, url: str, commit: str) -> Path:
+        return self.cache_dir / hashlib.sha1(url.encode()).hexdigest()[:16] / commit
+
+    def _fetch(self, url: str, commit: str, target: Path) -> None:
+        """Download the tree at ``commit`` into ``target`` (atomically)."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".fetch-", dir=target.parent))
+        try:
+            self._git("init", "--quiet", str(staging))
+            self._git("fetch", "--quiet", "--depth", "1", "--", url, commit, cwd=staging)
+            self._git("-c", "advice.detachedHead=false", "checkout", "--quiet", "FETCH_HEAD", cwd=staging)
+            shutil.rmtree(staging / ".git")
+            os.replace(staging, target)
+        except OSError:
+            # Another process finished the same fetch first
+            if not target.exists():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def load_remote(self, template_url: str) -> CompiledTemplate:
+        """Compiled template for ``template_url`` (``url`` or ``url#ref``)."""
+        url, ref = self.check_url(template_url)
+        commit = self.resolve_commit(url, ref)
+        key = f"{url}@{commit}"
+        compiled = self.get(key)
+        if compiled is not None:
+            return compiled
+
+        checkout = self._checkout_dir(url, commit)
+        if not checkout.exists():
+            started = time.monotonic()
+            self._fetch(url, commit, checkout)
+            self.logger.info("Template repository cached", url=url, commit=commit,
+                             duration_seconds=round(time.monotonic() - started, 3))
+
+        files: Dict[str, TemplateBody] = {}
+        for path in checkout.rglob("*"):
+            if path.is_file():
+                raw = path.read_bytes()
+                try:
+                    body: TemplateBody = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    body = raw
+                files[path.relative_to(checkout).as_posix()] = body
+        return self.register(key, files)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "compiled_templates": len(self._compiled),
+            "rendered_entries": len(self._rendered),
+            "render_hits": self.render_hits,
+            "render_misses": self.render_misses,
+        }
+
+
+_template_store: Optional[TemplateStore] = None
+
+
+def get_template_store() -> TemplateStore:
+    """Return the process-wide template store configured from the environment."""
+    global _template_store
+    if _template_store is None:
+        hosts = get_env_var("SCAFFOLD_TEMPLATE_ALLOWED_HOSTS", ",".join(DEFAULT_ALLOWED_HOSTS))
+        _template_store = TemplateStore(
+            cache_dir=get_env_var("SCAFFOLD_TEMPLATE_CACHE_DIR", "/tmp/dev-agent-templates"),
+            ref_ttl=float(get_env_var("SCAFFOLD_TEMPLATE_REF_TTL", "300")),
+            max_compiled=int(get_env_var("SCAFFOLD_TEMPLATE_MAX_COMPILED", "64")),
+            allowed_hosts=None if hosts.strip() == "*" else [host.strip() for host in hosts.split(",") if host.strip()]
+        )
+    return _template_store
@@ -1,6 +1,6 @@
 import structlog
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Optional
 from datetime import datetime
 import uuid
 import os
@@ -50,17 +50,6 @@ def get_logger(correlation_id: Optional[str] = None) -> Any:
     return logger
 
 
-# Send audit event
-def send_audit_event(audit_service_url: str, event_data: Dict[str, Any], logger: Any):
-    import requests
-    try:
-        response = requests.post(f"{audit_service_url}/audit/event", json=event_data, timeout=5)
-        if response.status_code != 200:
-            logger.warning("Failed to send audit event", status_code=response.status_code)
-    except Exception as e:
-        logger.warning("Error sending audit event", error=str(e))
-
-
 # Get environment variable with default
 def get_env_var(key: str, default: Optional[str] = None) -> str:
     return os.getenv(key, default)
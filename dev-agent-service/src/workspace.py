@@ -0,0 +1,343 @@
+"""
+Local git workspaces for dev-agent tasks.
+
+Keeps one bare clone per remote repository in a cache directory, refreshed
+with an incremental ``git fetch``. Each task gets a lightweight
+``git worktree`` on its own branch, generators write files to disk, and the
+result goes out as a single ``git push``. Files whose content already matches
+the blob at the base commit are never written, staged or pushed.
+
+The cache is bounded by size; repositories that have not been used recently
+(and have no active worktrees) are evicted first.
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from src.utils import get_logger, get_env_var
+
+# Path content is read from disk in chunks, never loaded whole
+FileContent = Union[str, bytes, Path]
+
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class GitCommandError(Exception):
+    """A git invocation exited with a non-zero status."""
+
+    def __init__(self, args: List[str], returncode: int, stderr: str):
+        self.args_list = args
+        self.returncode = returncode
+        self.stderr = stderr
+        super().__init__(f"git {' '.join(args)} failed ({returncode}): {stderr.strip()}")
+
+
+def blob_hash(content: FileContent) -> str:
+    """SHA-1 object ID git assigns to ``content`` as a blob."""
+    if isinstance(content, Path):
+        digest = hashlib.sha1(b"blob %d\0" % content.stat().st_size)
+        with content.open("rb") as source:
+            for chunk in iter(lambda: source.read(_COPY_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def basic_auth_header(username: str, token: str) -> str:
+    """``http.extraHeader`` value for token authentication over HTTPS."""
+    credentials = base64.b64encode(f"{username}:{token}".encode()).decode()
+    return f"Authorization: Basic {credentials}"
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class TaskWorkspace:
+    """A worktree checked out on a task branch."""
+
+    def __init__(self, manager: "GitWorkspaceManager", repo_path: Path, path: Path,
+                 branch: str, base_commit: str, auth_header: Optional[str]):
+        self.manager = manager
+        self.repo_path = repo_path
+        self.path = path
+        self.branch = branch
+        self.base_commit = base_commit
+        self.auth_header = auth_header
+        self._base_blobs: Optional[Dict[str, str]] = None
+        self._pending: List[str] = []
+
+    def git(self, *args: str) -> str:
+        return self.manager._git(list(args), cwd=self.path, auth_header=self.auth_header)
+
+    def base_blobs(self) -> Dict[str, str]:
+        """Path -> blob ID at the base commit (one ``ls-tree`` per workspace)."""
+        if self._base_blobs is None:
+            blobs = {}
+            output = self.git("ls-tree", "-r", "-z", "--full-tree", self.base_commit)
+            for entry in filter(None, output.split("\0")):
+                meta, path = entry.split("\t", 1)
+                _, object_type, object_id = meta.split()
+                if object_type == "blob":
+                    blobs[path] = object_id
+            self._base_blobs = blobs
+        return self._base_blobs
+
+    def write_files(self, files: Dict[str, FileContent]) -> List[str]:
+        """
+        Write generated files into the worktree.
+
+        Returns the paths that actually changed; files identical to the base
+        commit's blob are skipped without touching the disk.
+        """
+        base = self.base_blobs()
+        changed = []
+        for path, content in files.items():
+            path = path.lstrip("/")
+            if base.get(path) == blob_hash(content):
+                continue
+            target = self.path / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, Path):
+                shutil.copyfile(content, target)
+            elif isinstance(content, bytes):
+                target.write_bytes(content)
+            else:
+                target.write_text(content, encoding="utf-8")
+            changed.append(path)
+
+        self._pending.extend(p for p in changed if p not in self._pending)
+        return changed
+
+    def delete_files(self, paths: List[str]) -> List[str]:
+        """Remove tracked files; paths absent at the base commit are ignored."""
+        base = self.base_blobs()
+        removed = []
+        for path in paths:
+            path = path.lstrip("/")
+            if path in base and (self.path / path).exists():
+                (self.path / path).unlink()
+                removed.append(path)
+        self._pending.extend(p for p in removed if p not in self._pending)
+        return removed
+
+    def commit(self, message: str, author_name: str = "AI Dev Agent",
+               author_email: str = "dev-agent@ai-devops.local") -> Optional[str]:
+        """Commit pending changes; returns the new commit ID, or None if nothing changed."""
+        if not self._pending:
+            return None
+        self.git("add", "--all", "--", *self._pending)
+        if not self.git("diff", "--cached", "--name-only"):
+            self._pending.clear()
+            return None
+
+        self.git("-c", f"user.name={author_name}", "-c", f"user.email={author_email}",
+                 "commit", "--quiet", "--no-verify", "-m", message)
+        self._pending.clear()
+        return self.git("rev-parse", "HEAD").strip()
+
+    def push(self, force: bool = False) -> str:
+        """Push the task branch to the remote in one operation; returns the pushed commit."""
+        args = ["push", "--quiet", "origin", f"HEAD:refs/heads/{self.branch}"]
+        if force:
+            args.insert(1, "--force-with-lease")
+        self.git(*args)
+        return self.git("rev-parse", "HEAD").strip()
+
+    def release(self) -> None:
+        self.manager.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class GitWorkspaceManager:
+    """Bare-clone cache with per-task worktrees and LRU size-based eviction."""
+
+    def __init__(self, cache_dir: str, max_cache_bytes: int = 5 * 1024 ** 3,
+                 git_binary: str = "git", fetch_interval: float = 0.0):
+        """
+        Args:
+            cache_dir: Directory holding bare clones and task worktrees
+            max_cache_bytes: Soft cap on the total size of cached clones
+            fetch_interval: Skip re-fetching a repository fetched less than
+                this many seconds ago (0 fetches on every checkout)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.repos_dir = self.cache_dir / "repos"
+        self.worktrees_dir = self.cache_dir / "worktrees"
+        self.repos_dir.mkdir(parents=True, exist_ok=True)
+        self.worktrees_dir.mkdir(parents=True, exist_ok=True)
+        self.max_cache_bytes = max_cache_bytes
+        self.git_binary = git_binary
+        self.fetch_interval = fetch_interval
+        self.logger = get_logger()
+
+        self._lock = threading.Lock()
+        self._repo_locks: Dict[Path, threading.Lock] = {}
+        self._active: Dict[Path, int] = {}
+        self._last_fetch: Dict[Path, float] = {}
+
+    def _git(self, args: List[str], cwd: Optional[Path] = None, auth_header: Optional[str] = None) -> str:
+        command = [self.git_binary] + args
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if auth_header:
+            # Passed as config through the environment, never on argv where
+            # other local users can read it from the process list
+            index = int(env.get("GIT_CONFIG_COUNT", "0"))
+            env.update({
+                "GIT_CONFIG_COUNT": str(index + 1),
+                f"GIT_CONFIG_KEY_{index}": "http.extraHeader",
+                f"GIT_CONFIG_VALUE_{index}": auth_header,
+            })
+        result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise GitCommandError(args, result.returncode, result.stderr)
+        return result.stdout
+
+    def repo_path(self, remote_url: str) -> Path:
+        """Cache location of the bare clone for ``remote_url``."""
+        digest = hashlib.sha1(remote_url.encode()).hexdigest()[:16]
+        return self.repos_dir / f"{digest}.git"
+
+    def _repo_lock(self, repo_path: Path) -> threading.Lock:
+        with self._lock:
+            return self._repo_locks.setdefault(repo_path, threading.Lock())
+
+    def ensure_repository(self, remote_url: str, auth_header: Optional[str] = None) -> Path:
+        """Clone ``remote_url`` into the cache, or fetch incrementally if cached."""
+        repo_path = self.repo_path(remote_url)
+        with self._repo_lock(repo_path):
+            self._ensure_repository(remote_url, repo_path, auth_header)
+        return repo_path
+
+    def _ensure_repository(self, remote_url: str, repo_path: Path, auth_header: Optional[str]) -> None:
+        """ensure_repository with the repository lock held."""
+        if not (repo_path / "HEAD").exists():
+            started = time.monotonic()
+            self._git(["clone", "--bare", "--quiet", remote_url, str(repo_path)], auth_header=auth_header)
+            self._git(["config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*"], cwd=repo_path)
+            self._git(["fetch", "--quiet", "origin"], cwd=repo_path, auth_header=auth_header)
+            self.logger.info("Repository cloned into workspace cache", remote=remote_url,
+                             duration_seconds=round(time.monotonic() - started, 3))
+        elif time.time() - self._last_fetch.get(repo_path, 0) >= self.fetch_interval:
+            self._git(["fetch", "--quiet", "--prune", "origin"], cwd=repo_path, auth_header=auth_header)
+        self._last_fetch[repo_path] = time.time()
+        os.utime(repo_path)  # LRU timestamp
+
+    def checkout(self, remote_url: str, base_branch: str, branch: str, task_id: str,
+                 auth_header: Optional[str] = None) -> TaskWorkspace:
+        """
+        Create a worktree for ``task_id`` on a new ``branch`` started from
+        ``base_branch`` of the remote.
+        """
+        repo_path = self.repo_path(remote_url)
+        worktree_path = self.worktrees_dir / f"{repo_path.stem}-{task_id}"
+
+        # One lock hold from fetch to registering the worktree, so eviction
+        # cannot remove the clone in between
+        with self._repo_lock(repo_path):
+            self._ensure_repository(remote_url, repo_path, auth_header)
+            if worktree_path.exists():
+                self._remove_worktree(repo_path, worktree_path)
+            base_commit = self._git(["rev-parse", f"refs/remotes/origin/{base_branch}^{{commit}}"],
+                                    cwd=repo_path).strip()
+            self._git(["worktree", "add", "--quiet", "--force", "-B", branch, str(worktree_path), base_commit],
+                      cwd=repo_path)
+            with self._lock:
+                self._active[repo_path] = self._active.get(repo_path, 0) + 1
+
+        self.logger.info("Task worktree created", task_id=task_id, branch=branch, base_commit=base_commit)
+        return TaskWorkspace(self, repo_path, worktree_path, branch, base_commit, auth_header)
+
+    def _remove_worktree(self, repo_path: Path, worktree_path: Path) -> None:
+        try:
+            self._git(["worktree", "remove", "--force", str(worktree_path)], cwd=repo_path)
+        except GitCommandError:
+            shutil.rmtree(worktree_path, ignore_errors=True)
+        self._git(["worktree", "prune"], cwd=repo_path)
+
+    def release(self, workspace: TaskWorkspace) -> None:
+        """Remove a task's worktree and enforce the cache size cap."""
+        with self._repo_lock(workspace.repo_path):
+            self._remove_worktree(workspace.repo_path, workspace.path)
+            # The task branch lives on the remote now; keep the clone's refs small
+            try:
+                self._git(["branch", "-D", workspace.branch], cwd=workspace.repo_path)
+            except GitCommandError:
+                pass
+            with self._lock:
+                self._active[workspace.repo_path] = max(0, self._active.get(workspace.repo_path, 1) - 1)
+        self.evict()
+
+    def evict(self) -> List[Path]:
+        """
+        Drop least recently used clones until the cache fits ``max_cache_bytes``.
+
+        Clones with active worktrees, or locked by a clone, fetch or checkout
+        in progress, are skipped.
+        """
+        repos = [(path.stat().st_mtime, path, _dir_size(path)) for path in self.repos_dir.glob("*.git")]
+        total = sum(size for _, _, size in repos)
+        evicted = []
+        for _, path, size in sorted(repos):
+            if total <= self.max_cache_bytes:
+                break
+            repo_lock = self._repo_lock(path)
+            if not repo_lock.acquire(blocking=False):
+                continue
+            try:
+                # Checked under the repository lock, which checkout holds
+                # until its worktree is counted
+                with self._lock:
+                    if self._active.get(path):
+                        continue
+                shutil.rmtree(path, ignore_errors=True)
+                self._last_fetch.pop(path, None)
+            finally:
+                repo_lock.release()
+            total -= size
+            evicted.append(path)
+            self.logger.info("Evicted cold repository from workspace cache", path=str(path), size_bytes=size)
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        repos = list(self.repos_dir.glob("*.git"))
+        return {
+            "repositories": len(repos),
+            "cache_bytes": sum(_dir_size(path) for path in repos),
+            "active_worktrees": sum(self._active.values()),
+        }
+
+
+_workspace_manager: Optional[GitWorkspaceManager] = None
+
+
+def get_workspace_manager() -> GitWorkspaceManager:
+    """Return the process-wide workspace manager configured from the environment."""
+    global _workspace_manager
+    if _workspace_manager is None:
+        _workspace_manager = GitWorkspaceManager(
+            cache_dir=get_env_var("DEV_AGENT_WORKSPACE_DIR", "/tmp/dev-agent-workspaces"),
+            max_cache_bytes=int(get_env_var("DEV_AGENT_WORKSPACE_MAX_BYTES", str(5 * 1024 ** 3))),
+            fetch_interval=float(get_env_var("DEV_AGENT_WORKSPACE_FETCH_INTERVAL", "0"))
+        )
+    return _workspace_manager
@@ -1,7 +1,9 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from src.agent import process_dev_task, validate_cmme_links, simulate_development_time
+from unittest.mock import patch, AsyncMock, MagicMock
+from src.agent import process_dev_task, run_dev_task, validate_cmme_links, simulate_development_time
 from src.models import TaskStatus, WorkStartRequest
+from src import hierarchy
+from src.hierarchy import WorkItemHierarchyCache, build_node
 import time
 
 
@@ -13,6 +15,29 @@ def mock_clients():
     return mock_ado, mock_github
 
 
+@pytest.fixture(autouse=True)
+def hierarchy_cache():
+    """Fresh in-memory hierarchy cache per test."""
+    hierarchy._hierarchy_cache = WorkItemHierarchyCache()
+    yield hierarchy._hierarchy_cache
+    hierarchy._hierarchy_cache = None
+
+
+def _parent(work_item_id):
+    return {"rel": "System.LinkTypes.Hierarchy-Reverse",
+            "url": f"https://dev.azure.com/org/_apis/wit/workItems/{work_item_id}"}
+
+
+def hierarchy_loader(types):
+    """Build a node loader for a linear chain: 123 -> 1 -> 2 -> 3 with given types."""
+    chain = [123, 1, 2, 3][:len(types)]
+    nodes = {}
+    for index, (work_item_id, work_item_type) in enumerate(zip(chain, types)):
+        relations = [_parent(chain[index + 1])] if index + 1 < len(chain) else []
+        nodes[work_item_id] = build_node(work_item_id, work_item_type, relations)
+    return MagicMock(side_effect=lambda ids: [nodes[i] for i in ids if i in nodes])
+
+
 def test_simulate_development_time():
     """Test development time simulation."""
     start_time = time.time()
@@ -26,26 +51,20 @@ def test_validate_cmme_links_success(mock_clients):
     """Test successful CMMI validation."""
     mock_ado, mock_github = mock_clients
 
-    # Mock links with a Requirement
-    mock_link = MagicMock()
-    mock_link.rel = "System.LinkTypes.Hierarchy-Reverse"
-    mock_link.attributes = {"name": "Requirement"}
-    mock_ado.get_links.return_value = [mock_link]
+    # Task -> Requirement -> Feature -> Epic
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task", "Requirement", "Feature", "Epic"])
 
     result = validate_cmme_links(mock_ado, 123)
     assert result is True
-    mock_ado.get_links.assert_called_once_with(123)
+    mock_ado.get_hierarchy_nodes.assert_any_call([123])
 
 
 def test_validate_cmme_links_missing_requirement(mock_clients):
     """Test CMMI validation failure when no Requirement link."""
     mock_ado, mock_github = mock_clients
 
-    # Mock links without Requirement
-    mock_link = MagicMock()
-    mock_link.rel = "System.LinkTypes.Hierarchy-Forward"
-    mock_link.attributes = {"name": "Bug"}
-    mock_ado.get_links.return_value = [mock_link]
+    # Task parented by a Bug instead of a Requirement
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task", "Bug"])
 
     result = validate_cmme_links(mock_ado, 123)
     assert result is False
@@ -59,10 +78,7 @@ def test_process_dev_task_success(mock_update_status, mock_create_clients, mock_
     mock_create_clients.return_value = mock_clients
 
     # Mock successful validation
-    mock_link = MagicMock()
-    mock_link.rel = "System.LinkTypes.Hierarchy-Reverse"
-    mock_link.attributes = {"name": "Requirement"}
-    mock_ado.get_links.return_value = [mock_link]
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task", "Requirement", "Feature", "Epic"])
 
     # Mock repo operations
     mock_repo = MagicMock()
@@ -80,7 +96,8 @@ def test_process_dev_task_success(mock_update_status, mock_create_clients, mock_
         "requirements": "Implement feature"
     }
 
-    with patch('src.agent.simulate_development_time'):
+    with patch('src.agent.simulate_development_time'), \
+            patch('src.agent.track_pull_request', new_callable=AsyncMock) as mock_track:
         process_dev_task(task_data, "test-correlation-id")
 
     # Verify status updates were called for each state
@@ -90,14 +107,15 @@ def test_process_dev_task_success(mock_update_status, mock_create_clients, mock_
         ((mock_ado, WorkStartRequest(**task_data), "test-correlation-id", TaskStatus.SETUP, TaskStatus.CODING), {}),
         ((mock_ado, WorkStartRequest(**task_data), "test-correlation-id", TaskStatus.CODING, TaskStatus.COMMITTING), {}),
         ((mock_ado, WorkStartRequest(**task_data), "test-correlation-id", TaskStatus.COMMITTING, TaskStatus.PR_CREATED), {}),
-        ((mock_ado, WorkStartRequest(**task_data), "test-correlation-id", TaskStatus.PR_CREATED, TaskStatus.COMPLETED), {}),
     ]
 
-    assert mock_update_status.call_count == 6
+    # Completion is resumed by the PR tracker, not waited for
+    assert mock_update_status.call_count == 5
+    mock_track.assert_called_once()
 
     # Verify interactions
     mock_github.create_branch.assert_called_once_with(mock_repo, "main", "dev-dev-001")
-    mock_repo.create_file.assert_called()  # Mocked file creation
+    mock_github.commit_files.assert_called_once()  # All files in one commit
     mock_repo.create_pull.assert_called()
 
 
@@ -109,7 +127,7 @@ def test_process_dev_task_cmme_validation_fail(mock_update_status, mock_create_c
     mock_create_clients.return_value = mock_clients
 
     # Mock validation failure
-    mock_ado.get_links.return_value = []  # No links
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task"])  # No parent
 
     task_data = {
         "task_id": "DEV-001",
@@ -141,7 +159,7 @@ def test_process_dev_task_exception_handling(mock_create_clients, mock_clients):
     """Test exception handling in dev task processing."""
     mock_ado, mock_github = mock_clients
     mock_create_clients.return_value = mock_clients
-    mock_ado.get_links.side_effect = Exception("Azure DevOps error")
+    mock_ado.get_hierarchy_nodes.side_effect = Exception("Azure DevOps error")
 
     task_data = {
         "task_id": "DEV-001",
@@ -166,32 +184,63 @@ def test_process_dev_task_exception_handling(mock_create_clients, mock_clients):
             )
 
 
-def test_validate_cmme_links_with_no_attributes(mock_clients):
-    """Test validation when link has no attributes."""
+@pytest.mark.asyncio
+@patch('src.agent.update_task_status')
+async def test_run_dev_task_async_mode_blocks_through_async_client(mock_update_status, mock_clients):
+    """The non-blocking body updates ADO through the pooled async client."""
     mock_ado, mock_github = mock_clients
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task"])
+    async_ado = AsyncMock()
+
+    task_data = {
+        "task_id": "DEV-001",
+        "repository": "https://github.com/org/repo",
+        "branch": "main",
+        "azure_workitem_id": 123,
+        "requirements": "Implement feature"
+    }
+
+    with patch('src.agent.get_async_clients', return_value=(mock_ado, async_ado, mock_github)):
+        await run_dev_task(task_data, "test-correlation-id", blocking=False)
+
+    async_ado.update_work_item.assert_awaited_once_with(
+        123, state="Blocked", comment="Missing traceability links: please link to Feature/Requirement")
+    mock_ado.create_comment.assert_not_called()
+    assert mock_update_status.call_args_list[-1].args[-2:] == (TaskStatus.VALIDATING, TaskStatus.BLOCKED)
+
 
-    # Mock link without attributes
-    mock_link = MagicMock()
-    mock_link.rel = "System.LinkTypes.Hierarchy-Reverse"
-    mock_link.attributes = None
-    mock_ado.get_links.return_value = [mock_link]
+def test_validate_cmme_links_requirement_without_epic(mock_clients):
+    """Test validation fails when the Requirement's Feature has no Epic parent."""
+    mock_ado, mock_github = mock_clients
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task", "Requirement", "Feature"])
 
     result = validate_cmme_links(mock_ado, 123)
     assert result is False
 
 
-def test_validate_cmme_links_with_other_link_types(mock_clients):
-    """Test validation with different link types."""
+def test_validate_cmme_links_uses_cached_hierarchy(mock_clients, hierarchy_cache):
+    """Test repeated validation is served from the hierarchy cache."""
     mock_ado, mock_github = mock_clients
+    mock_ado.get_hierarchy_nodes = hierarchy_loader(["Task", "Requirement", "Feature", "Epic"])
 
-    # Mock various link types excluding Requirement
-    links = []
-    for link_type in ["Bug", "Feature", "Epic", "Task"]:
-        mock_link = MagicMock()
-        mock_link.rel = "System.LinkTypes.Hierarchy-Forward"
-        mock_link.attributes = {"name": link_type}
-        links.append(mock_link)
+    assert validate_cmme_links(mock_ado, 123) is True
+    calls = mock_ado.get_hierarchy_nodes.call_count
+    assert validate_cmme_links(mock_ado, 123) is True
+    assert mock_ado.get_hierarchy_nodes.call_count == calls
 
-    mock_ado.get_links.return_value = links
-    result = validate_cmme_links(mock_ado, 123)
-    assert result is False
+
+def test_prefork_child_exit_ships_buffered_audit_events():
+    """worker_process_shutdown (sent in pool children) flushes the audit buffer."""
+    from celery.signals import worker_process_shutdown
+    from src.audit import AuditBuffer
+
+    buffer = AuditBuffer("http://audit", flush_interval=0.1)
+    shipped = []
+    with patch.object(buffer, "_post_batch", side_effect=lambda batch: shipped.extend(batch) or True), \
+            patch("src.agent.get_audit_buffer", return_value=buffer), \
+            patch("src.agent.task_runner") as runner:
+        buffer.record({"event_type": "dev_task.completed"})
+        worker_process_shutdown.send(sender=None, pid=1, exitcode=0)
+
+    runner.shutdown.assert_called_once()
+    assert shipped == [{"event_type": "dev_task.completed"}]
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.async_runner import AsyncTaskRunner
+
+
+@pytest.fixture
+def runner():
+    runner = AsyncTaskRunner(max_concurrency=2, default_timeout=5)
+    yield runner
+    runner.shutdown()
+
+
+def _run_in_threads(runner, factories):
+    results = [None] * len(factories)
+
+    def worker(index, factory):
+        results[index] = runner.run(factory)
+
+    threads = [threading.Thread(target=worker, args=(i, f)) for i, f in enumerate(factories)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_runs_tasks_concurrently():
+    """Test I/O-bound tasks from many threads overlap on the shared loop."""
+    runner = AsyncTaskRunner(max_concurrency=20)
+
+    async def io_task(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    start = time.monotonic()
+    results = _run_in_threads(runner, [lambda v=v: io_task(v) for v in range(20)])
+    elapsed = time.monotonic() - start
+    runner.shutdown()
+
+    assert results == list(range(20))
+    assert elapsed < 1.0  # Sequential execution would take 4s
+
+
+def test_respects_concurrency_limit(runner):
+    """Test no more than max_concurrency tasks run at once."""
+    peak = {"running": 0, "max": 0}
+
+    async def tracked():
+        peak["running"] += 1
+        peak["max"] = max(peak["max"], peak["running"])
+        await asyncio.sleep(0.05)
+        peak["running"] -= 1
+
+    _run_in_threads(runner, [tracked for _ in range(6)])
+    assert peak["max"] == 2
+    assert runner.stats()["completed"] == 6
+
+
+def test_per_task_timeout(runner):
+    """Test tasks exceeding their timeout are cancelled and reported."""
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        runner.run(slow, timeout=0.05)
+
+    assert cancelled == [True]
+    assert runner.stats()["timed_out"] == 1
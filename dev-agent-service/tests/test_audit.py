@@ -0,0 +1,60 @@
+import json
+import time
+
+import fakeredis
+import responses
+
+from src import audit
+from src.audit import AuditBuffer, TaskStateStore, get_audit_buffer
+
+
+@responses.activate
+def test_events_are_shipped_in_batches():
+    responses.add(responses.POST, "http://audit/audit/events", status=200)
+    buffer = AuditBuffer("http://audit", batch_size=50, flush_interval=0.05)
+
+    started = time.perf_counter()
+    for i in range(120):
+        buffer.record({"task_id": f"T{i}"})
+    assert time.perf_counter() - started < 0.5  # Recording never waits on the audit service
+
+    assert buffer.flush(timeout=5)
+    shipped = [event["task_id"] for call in responses.calls for event in json.loads(call.request.body)["events"]]
+    assert sorted(shipped) == sorted(f"T{i}" for i in range(120))
+    assert len(responses.calls) < 120
+    buffer.close()
+
+
+@responses.activate
+def test_falls_back_to_single_events_without_batch_endpoint():
+    responses.add(responses.POST, "http://audit/audit/events", status=404)
+    responses.add(responses.POST, "http://audit/audit/event", status=200)
+    buffer = AuditBuffer("http://audit", flush_interval=0.05)
+
+    buffer.record({"task_id": "T1"})
+    buffer.record({"task_id": "T2"})
+    assert buffer.flush(timeout=5)
+
+    assert not buffer.batch_supported
+    assert [call.request.url for call in responses.calls].count("http://audit/audit/event") == 2
+    buffer.close()
+
+
+def test_audit_buffer_defaults_to_local_audit_service(monkeypatch):
+    """Events are not dropped when AUDIT_SERVICE_URL is unset (the pre-buffer default)."""
+    monkeypatch.delenv("AUDIT_SERVICE_URL", raising=False)
+    monkeypatch.setattr(audit, "_audit_buffer", None)
+
+    assert get_audit_buffer().audit_service_url == "http://localhost:8001"
+    assert get_audit_buffer() is get_audit_buffer()
+
+
+def test_task_state_store_keeps_history():
+    store = TaskStateStore(fakeredis.FakeRedis())
+    store.record("DEV-1", 42, "cid", None, "validating", "t0")
+    store.record("DEV-1", 42, "cid", "validating", "pr_created", "t1")
+
+    state = store.get("DEV-1")
+    assert state["status"] == "pr_created" and state["work_item_id"] == 42
+    assert [item["new_state"] for item in state["history"]] == ["validating", "pr_created"]
+    assert store.get("DEV-2") is None
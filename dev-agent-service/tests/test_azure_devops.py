@@ -1,6 +1,8 @@
+import json
+import httpx
 import pytest
 from unittest.mock import patch, MagicMock
-from src.azure_devops import AzureDevOpsClient
+from src.azure_devops import AzureDevOpsClient, AsyncAzureDevOpsClient, AzureDevOpsAPIError
 from azure.devops.exceptions import AzureDevOpsServiceError
 
 
@@ -123,3 +125,77 @@ def test_generic_retry_max_attempts(azure_client):
             azure_client.get_work_item(123)
 
         assert azure_client.wit_client.get_work_item.call_count == 3  # Max attempts
+
+
+# AsyncAzureDevOpsClient
+
+def async_client(handler):
+    return AsyncAzureDevOpsClient(
+        organization_url="https://dev.azure.com/org",
+        personal_access_token="token",
+        project_name="project",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_update_work_item_single_patch():
+    """Test comment and state are sent as one JSON-patch document."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": 123})
+
+    client = async_client(handler)
+    await client.update_work_item(123, state="Blocked", comment="Missing links")
+    await client.close()
+
+    assert len(requests) == 1
+    assert requests[0].method == "PATCH"
+    assert requests[0].headers["Content-Type"] == "application/json-patch+json"
+    assert [op["path"] for op in json.loads(requests[0].content)] == [
+        "/fields/System.History", "/fields/System.State"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_retry_on_500_without_blocking():
+    """Test server errors are retried with asyncio.sleep backoff."""
+    responses = [httpx.Response(500, text="boom"), httpx.Response(200, json={"id": 1, "fields": {}})]
+    client = async_client(lambda request: responses.pop(0))
+
+    with patch('src.azure_devops.asyncio.sleep') as mock_sleep, patch('time.sleep') as mock_time_sleep:
+        mock_sleep.return_value = None
+        result = await client.get_work_item(1)
+
+    assert result == {"id": 1, "fields": {}}
+    mock_sleep.assert_called_once()
+    mock_time_sleep.assert_not_called()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_auth_error_not_retried():
+    """Test authentication failures raise immediately."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(401, text="Unauthorized")
+
+    client = async_client(handler)
+    with pytest.raises(AzureDevOpsAPIError) as exc_info:
+        await client.create_comment(123, "test comment")
+
+    assert exc_info.value.status == 401
+    assert len(calls) == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_get_links_empty():
+    """Test get links when no relations exist."""
+    client = async_client(lambda request: httpx.Response(200, json={"id": 123, "fields": {}}))
+    assert await client.get_links(123) == []
+    await client.close()
@@ -0,0 +1,324 @@
+import base64
+import json
+import subprocess
+import tracemalloc
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.azure_repos import AzureReposClient, PushConflictError, StaleRefError, stream_push_body
+from src.workspace import GitWorkspaceManager
+
+
+HEAD = "a" * 40
+NEW_HEAD = "b" * 40
+
+
+def fake_api(existing_paths):
+    """Route _make_request calls to canned refs/items/pushes responses."""
+    calls = []
+
+    async def _request(method, endpoint, data=None, params=None, api_version="7.0"):
+        calls.append((method, endpoint, data, params))
+        if endpoint == "/refs":
+            return {"value": [{"name": "refs/heads/feature", "objectId": HEAD}]}
+        if endpoint == "/items":
+            items = [{"path": "/", "gitObjectType": "tree"}]
+            items += [{"path": path, "gitObjectType": "blob"} for path in existing_paths]
+            return {"value": items}
+        if endpoint == "/pushes":
+            return {"commits": [{"commitId": NEW_HEAD}]}
+        raise AssertionError(f"unexpected call {method} {endpoint}")
+
+    return _request, calls
+
+
+def make_client():
+    return AzureReposClient(
+        organization_url="https://dev.azure.com/org",
+        project_name="project",
+        repository_name="repo",
+        personal_access_token="token"
+    )
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_single_push():
+    """All changes go out in one push with add/edit/delete resolved from the index."""
+    repos_client = make_client()
+    request, calls = fake_api({"/README.md", "/old.txt"})
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock) as mock_audit:
+        commit_id, commit_url = await repos_client.commit_changes(
+            "feature",
+            {
+                "README.md": "updated",
+                "src/app.py": "print('hi')",
+                "logo.png": b"\x89PNG",
+                "old.txt": None,
+                "missing.txt": None,
+            },
+            "Implement task",
+            work_item_id=42
+        )
+
+    assert commit_id == NEW_HEAD
+    assert commit_url.endswith(f"/_git/repo/commit/{NEW_HEAD}")
+    assert [call[1] for call in calls] == ["/refs", "/items", "/pushes"]
+
+    push = calls[-1][2]
+    assert push["refUpdates"] == [{"name": "refs/heads/feature", "oldObjectId": HEAD}]
+    commit = push["commits"][0]
+    assert commit["comment"] == "Implement task (#42)"
+    assert commit["workItems"] == [{"id": "42"}]
+
+    changes = {change["item"]["path"]: change for change in commit["changes"]}
+    assert set(changes) == {"/README.md", "/src/app.py", "/logo.png", "/old.txt"}
+    assert changes["/README.md"]["changeType"] == "edit"
+    assert changes["/src/app.py"]["changeType"] == "add"
+    assert changes["/old.txt"]["changeType"] == "delete"
+    assert changes["/logo.png"]["newContent"] == {
+        "content": base64.b64encode(b"\x89PNG").decode(),
+        "contentType": "base64encoded"
+    }
+    mock_audit.assert_awaited_once()
+    await repos_client.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_reuses_index_for_new_head():
+    """The item index for the pushed commit is derived locally, not re-fetched."""
+    repos_client = make_client()
+    request, calls = fake_api(set())
+
+    async def _refs_follow_head(method, endpoint, data=None, params=None, api_version="7.0"):
+        if endpoint == "/refs" and any(call[1] == "/pushes" for call in calls):
+            calls.append((method, endpoint, data, params))
+            return {"value": [{"name": "refs/heads/feature", "objectId": NEW_HEAD}]}
+        return await request(method, endpoint, data, params, api_version)
+
+    with patch.object(repos_client, "_make_request", side_effect=_refs_follow_head), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        await repos_client.commit_file("feature", "a.txt", "one", "First")
+        await repos_client.commit_changes("feature", {"a.txt": "two"}, "Second")
+
+    assert [call[1] for call in calls].count("/items") == 1
+    second_push = [call for call in calls if call[1] == "/pushes"][-1][2]
+    assert second_push["commits"][0]["changes"][0]["changeType"] == "edit"
+    await repos_client.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_without_changes_is_not_retried():
+    """An empty push is a caller error, raised once instead of retried with backoff."""
+    repos_client = make_client()
+    request, calls = fake_api({"/README.md"})
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        with pytest.raises(ValueError, match="No changes to commit"):
+            await repos_client.commit_changes("feature", {"missing.txt": None}, "Nothing")
+
+    assert [call[1] for call in calls] == ["/refs", "/items"]
+    await repos_client.close()
+
+
+def stale_ref_api(existing_paths, moved_paths, rejections=1):
+    """Reject the first push(es) as stale, with ``moved_paths`` changed in between."""
+    request, calls = fake_api(existing_paths)
+    state = {"rejections": rejections}
+
+    async def _request(method, endpoint, data=None, params=None, api_version="7.0"):
+        if endpoint == "/pushes" and state["rejections"]:
+            state["rejections"] -= 1
+            calls.append((method, endpoint, data, params))
+            raise StaleRefError(409, "TF401028: The reference 'refs/heads/feature' has already been updated by another client")
+        if endpoint == "/diffs/commits":
+            calls.append((method, endpoint, data, params))
+            return {
+                "allChangesIncluded": True,
+                "changes": [{"item": {"path": path, "gitObjectType": "blob"}, "changeType": "add"} for path in moved_paths]
+            }
+        return await request(method, endpoint, data, params, api_version)
+
+    return _request, calls
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_reapplies_after_stale_ref():
+    """A stale oldObjectId re-reads the head and retries without re-fetching the index."""
+    repos_client = make_client()
+    repos_client.conflict_backoff = 0
+    request, calls = stale_ref_api({"/README.md"}, moved_paths={"/other.txt"})
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        commit_id, _ = await repos_client.commit_changes("feature", {"README.md": "mine"}, "Update readme")
+
+    assert commit_id == NEW_HEAD
+    assert [call[1] for call in calls] == ["/refs", "/items", "/pushes", "/refs", "/diffs/commits", "/pushes"]
+    assert "/other.txt" in repos_client._item_index[NEW_HEAD]
+    await repos_client.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_overlapping_conflict():
+    """Concurrent changes to the same path are surfaced instead of overwritten."""
+    repos_client = make_client()
+    repos_client.conflict_backoff = 0
+    request, calls = stale_ref_api({"/README.md"}, moved_paths={"/README.md"})
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        with pytest.raises(PushConflictError) as exc_info:
+            await repos_client.commit_changes("feature", {"README.md": "mine"}, "Update readme")
+
+    assert exc_info.value.paths == ["/README.md"]
+    assert [call[1] for call in calls].count("/pushes") == 1
+    await repos_client.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_serializes_contended_branch():
+    """Branches marked contended are pushed under the Redis branch lock."""
+    lock = MagicMock()
+    lock.acquire = AsyncMock(return_value=True)
+    lock.release = AsyncMock()
+    lock_redis = MagicMock()
+    lock_redis.lock.return_value = lock
+    lock_redis.exists = AsyncMock(return_value=1)
+    lock_redis.set = AsyncMock()
+
+    repos_client = make_client()
+    repos_client.lock_redis = lock_redis
+    repos_client.push_lock_mode = "auto"
+    request, _ = fake_api(set())
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        await repos_client.commit_changes("feature", {"a.txt": "one"}, "First")
+
+    lock_redis.exists.assert_awaited_once_with("azrepos:contended:repo:feature")
+    lock_redis.lock.assert_called_once()
+    lock.acquire.assert_awaited_once()
+    lock.release.assert_awaited_once()
+    await repos_client.close()
+
+
+def streaming_api(existing_paths):
+    """Like fake_api, but /pushes must arrive as a streamed body, which is decoded."""
+    request, calls = fake_api(existing_paths)
+    pushes = []
+
+    async def _request(method, endpoint, data=None, params=None, api_version="7.0", body=None):
+        if endpoint == "/pushes":
+            assert data is None and body is not None
+            pushes.append(json.loads(b"".join([chunk async for chunk in body])))
+        return await request(method, endpoint, data, params, api_version)
+
+    return _request, pushes
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_streams_large_push(tmp_path):
+    """Pushes above the threshold are encoded chunk by chunk into a valid /pushes body."""
+    asset = tmp_path / "bundle.js.map"
+    asset.write_bytes(bytes(range(256)) * 1000 + b"tail")
+    text = 'line "quoted" \\ tab\t caf\u00e9 \U0001f680\n' * 5000
+
+    repos_client = make_client()
+    repos_client.stream_threshold = 0
+    request, pushes = streaming_api({"/old.txt", "/README.md"})
+
+    with patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock):
+        commit_id, _ = await repos_client.commit_changes(
+            "feature",
+            {"README.md": text, "dist/bundle.js.map": asset, "logo.png": b"\x89PNG", "old.txt": None},
+            "Add bundle",
+            work_item_id=7
+        )
+
+    assert commit_id == NEW_HEAD
+    push = pushes[0]
+    assert push["refUpdates"] == [{"name": "refs/heads/feature", "oldObjectId": HEAD}]
+    commit = push["commits"][0]
+    assert commit["comment"] == "Add bundle (#7)"
+    assert commit["workItems"] == [{"id": "7"}]
+    changes = {change["item"]["path"]: change for change in commit["changes"]}
+    assert changes["/README.md"]["changeType"] == "edit"
+    assert changes["/README.md"]["newContent"] == {"contentType": "rawtext", "content": text}
+    assert changes["/dist/bundle.js.map"]["changeType"] == "add"
+    assert changes["/dist/bundle.js.map"]["newContent"]["contentType"] == "base64encoded"
+    assert base64.b64decode(changes["/dist/bundle.js.map"]["newContent"]["content"]) == asset.read_bytes()
+    assert base64.b64decode(changes["/logo.png"]["newContent"]["content"]) == b"\x89PNG"
+    assert changes["/old.txt"] == {"changeType": "delete", "item": {"path": "/old.txt"}}
+    await repos_client.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_push_body_memory_is_flat(tmp_path):
+    """Streaming a file from disk does not hold it (or its base64 form) in memory."""
+    asset = tmp_path / "fixture.bin"
+    with asset.open("wb") as f:
+        for _ in range(32):
+            f.write(bytes(range(256)) * 4096)  # 32 MiB in total
+
+    commit_data = {"comment": "Add fixture", "changes": [{"changeType": "add", "item": {"path": "/fixture.bin"}}]}
+    tracemalloc.start()
+    try:
+        total = 0
+        async for chunk in stream_push_body([], commit_data, {"/fixture.bin": asset}):
+            total += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert total > 32 * 1024 * 1024 * 4 // 3
+    assert peak < 4 * 1024 * 1024
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.mark.asyncio
+async def test_commit_changes_routes_oversized_files_to_git(tmp_path):
+    """Files above max_push_file_bytes go out with git push, not the REST API."""
+    remote = tmp_path / "org" / "project" / "_git" / "repo"
+    seed = tmp_path / "seed"
+    git("init", "--quiet", "--bare", "--initial-branch=main", str(remote))
+    git("init", "--quiet", "--initial-branch=main", str(seed))
+    (seed / "README.md").write_text("# Project\n")
+    (seed / "old.txt").write_text("old\n")
+    git("add", ".", cwd=seed)
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "--quiet", "-m", "init", cwd=seed)
+    git("push", "--quiet", str(remote), "main:feature", cwd=seed)
+
+    asset = tmp_path / "vendor.tar"
+    asset.write_bytes(b"\0" * 4096)
+    repos_client = AzureReposClient(
+        organization_url=str(tmp_path / "org"),
+        project_name="project",
+        repository_name="repo",
+        personal_access_token="token",
+        max_push_file_bytes=1024
+    )
+    request, calls = fake_api(set())
+
+    with patch("src.azure_repos.get_workspace_manager",
+               return_value=GitWorkspaceManager(cache_dir=str(tmp_path / "cache"))), \
+         patch.object(repos_client, "_make_request", side_effect=request), \
+         patch.object(repos_client, "_send_audit", new_callable=AsyncMock) as mock_audit:
+        commit_id, _ = await repos_client.commit_changes(
+            "feature", {"vendor/vendor.tar": asset, "README.md": "# Updated\n", "old.txt": None}, "Vendor deps"
+        )
+
+    assert calls == []
+    assert git("rev-parse", "refs/heads/feature", cwd=remote).strip() == commit_id
+    assert git("show", f"{commit_id}:README.md", cwd=remote) == "# Updated\n"
+    assert sorted(git("ls-tree", "-r", "--name-only", commit_id, cwd=remote).split()) == \
+        ["README.md", "vendor/vendor.tar"]
+    details = mock_audit.await_args.args[2]
+    assert details["change_counts"] == {"add": 1, "edit": 1, "delete": 1}
+    await repos_client.close()
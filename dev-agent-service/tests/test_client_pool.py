@@ -0,0 +1,106 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.azure_devops import AsyncAzureDevOpsClient
+from src.azure_repos import AzureReposClient
+from src.client_pool import ClientPool
+
+
+def fake_client():
+    client = MagicMock()
+    client.close = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_lease_reuses_client_per_key():
+    pool = ClientPool(max_size=4)
+    factory = MagicMock(side_effect=fake_client)
+
+    async with pool.lease(("repos", "org", "proj", "a"), "azure_repos", "https://dev.azure.com/org", factory) as first:
+        pass
+    async with pool.lease(("repos", "org", "proj", "a"), "azure_repos", "https://dev.azure.com/org", factory) as again:
+        pass
+    async with pool.lease(("repos", "org", "proj", "b"), "azure_repos", "https://dev.azure.com/org", factory) as other:
+        pass
+
+    assert first is again and first is not other
+    assert factory.call_count == 2
+    await pool.close()
+    first.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_skips_leased_clients():
+    pool = ClientPool(max_size=1)
+    url = "https://dev.azure.com/org"
+
+    async with pool.lease("a", "azure_repos", url, fake_client) as a:
+        async with pool.lease("b", "azure_repos", url, fake_client) as b:
+            # Both leased: pool temporarily exceeds its size
+            assert pool.stats()["size"] == 2
+        async with pool.lease("c", "azure_repos", url, fake_client):
+            pass
+
+    b.close.assert_awaited_once()
+    a.close.assert_not_awaited()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sweep_closes_idle_clients():
+    pool = ClientPool(idle_ttl=0)
+    async with pool.lease("a", "azure_repos", "https://dev.azure.com/org", fake_client) as a:
+        assert await pool.sweep() == 0
+    assert await pool.sweep() == 1
+    a.close.assert_awaited_once()
+    assert pool.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_clients_share_host_connection_pools():
+    pool = ClientPool()
+    url = "https://dev.azure.com/org"
+
+    first = AzureReposClient(url, "p1", "repo1", "token", session=pool.session_for(url))
+    second = AzureReposClient(url, "p2", "repo2", "token", session=pool.session_for(url))
+    assert first.session is second.session
+    await first.close()
+    assert not second.session.closed
+
+    devops = AsyncAzureDevOpsClient(url, "token", "p1", transport=pool.transport_for(url))
+    await devops.close()
+    assert pool.transport_for(url)._transport is pool._transports["dev.azure.com"]
+
+    await pool.close()
+    assert second.session.closed
+
+
+@pytest.mark.asyncio
+async def test_push_lock_redis_is_shared_or_closed(monkeypatch):
+    """Evicted repo clients leak no Redis connections: shared ones close with the pool, own ones with the client."""
+    monkeypatch.setenv("AZURE_REPOS_PUSH_LOCK_REDIS_URL", "redis://localhost:6379/5")
+    pool = ClientPool(max_size=1)
+    url = "https://dev.azure.com/org"
+    lock_redis = pool.redis_for("redis://localhost:6379/5")
+    assert pool.redis_for("redis://localhost:6379/5") is lock_redis
+
+    def factory(repository):
+        return lambda: AzureReposClient(url, "p", repository, "token", session=pool.session_for(url),
+                                        lock_redis=lock_redis)
+
+    with patch.object(lock_redis, "aclose", new_callable=AsyncMock) as shared_close:
+        async with pool.lease("a", "azure_repos", url, factory("a")):
+            pass
+        async with pool.lease("b", "azure_repos", url, factory("b")):
+            pass  # "a" evicted
+        shared_close.assert_not_awaited()
+        await pool.close()
+        shared_close.assert_awaited_once()
+
+    own = AzureReposClient(url, "p", "c", "token")
+    assert own.lock_redis is not None
+    with patch.object(own.lock_redis, "aclose", new_callable=AsyncMock) as own_close:
+        await own.close()
+    own_close.assert_awaited_once()
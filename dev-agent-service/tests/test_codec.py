@@ -0,0 +1,33 @@
+import pytest
+from src import codec
+
+
+@pytest.fixture(autouse=True)
+def reset_codec():
+    yield
+    codec.set_codec(None)
+
+
+def test_select_codec_falls_back_to_stdlib():
+    """Test unknown backend names fall back to stdlib json."""
+    assert codec.select_codec("does-not-exist").name == "json"
+
+
+def test_round_trip_all_available_backends():
+    """Test every installed backend encodes and decodes the same document."""
+    document = {"changes": [{"changeType": "add", "item": {"path": "/a.py"}}], "count": 1}
+    for name in ("json", "orjson", "msgspec"):
+        active = codec.select_codec(name)
+        codec.set_codec(active)
+        encoded = codec.dumps(document)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == document
+
+
+def test_dumps_datetimes_as_iso_strings():
+    """Test datetimes are encoded identically by every backend."""
+    from datetime import datetime
+
+    for name in ("json", "orjson", "msgspec"):
+        codec.set_codec(codec.select_codec(name))
+        assert codec.loads(codec.dumps({"at": datetime(2025, 1, 1)})) == {"at": "2025-01-01T00:00:00"}
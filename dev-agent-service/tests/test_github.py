@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from src.github import GitHubClient
+from src.github_ratelimit import RateLimitScheduler, token_id
 from github.GithubException import GithubException
 
 
@@ -156,3 +157,58 @@ def test_max_retries_exceeded(github_client):
             github_client.get_repo("org/repo")
 
         assert mock_repo.get_repo.call_count == 3  # Max attempts
+
+
+def test_commit_files_single_commit(github_client):
+    """Test many files are pushed as one tree, one commit and one ref update."""
+    mock_repo = MagicMock()
+    mock_ref = MagicMock()
+    mock_ref.object.sha = "head_sha"
+    mock_repo.get_git_ref.return_value = mock_ref
+    mock_head = MagicMock()
+    mock_repo.get_git_commit.return_value = mock_head
+    mock_repo.create_git_blob.side_effect = lambda content, encoding: MagicMock(sha=f"blob-{encoding}")
+    mock_commit = MagicMock(sha="new_sha")
+    mock_repo.create_git_commit.return_value = mock_commit
+
+    files = {f"src/module_{i}.py": f"# module {i}\n" for i in range(50)}
+    files["assets/logo.png"] = b"\x89PNG\r\n"
+
+    result = github_client.commit_files(mock_repo, "feature", files, "Scaffold project")
+
+    assert result == mock_commit
+    mock_repo.get_git_ref.assert_called_once_with("heads/feature")
+    # Small text files go inline in the tree; only the binary needs a blob
+    mock_repo.create_git_blob.assert_called_once()
+    assert mock_repo.create_git_blob.call_args.args[1] == "base64"
+    mock_repo.create_git_tree.assert_called_once()
+    assert len(mock_repo.create_git_tree.call_args.args[0]) == 51
+    mock_repo.create_git_commit.assert_called_once_with(
+        "Scaffold project", mock_repo.create_git_tree.return_value, [mock_head]
+    )
+    mock_ref.edit.assert_called_once_with("new_sha")
+
+
+def test_rate_limit_retry_backs_off_when_scheduler_is_not_blocking():
+    """A 403 the scheduler did not turn into a block still gets a backoff sleep."""
+    client = GitHubClient(access_token="token", etag_store=None,
+                          rate_limiter=RateLimitScheduler(sleep=lambda seconds: None))
+    mock_repo = MagicMock()
+    mock_repo.get_git_ref.side_effect = [
+        GithubException(403, {"message": "API rate limit exceeded"}),
+        MagicMock(object=MagicMock(sha="sha123"))
+    ]
+
+    with patch('src.github.time.sleep') as mock_sleep:
+        client.create_branch(mock_repo, "main", "feature-branch")
+    mock_sleep.assert_called_once_with(2)
+
+    # With the limit recorded, the scheduler does the waiting instead
+    client.rate_limiter.update(token_id("token token"), {"Retry-After": "30"}, 403)
+    mock_repo.get_git_ref.side_effect = [
+        GithubException(403, {"message": "API rate limit exceeded"}),
+        MagicMock(object=MagicMock(sha="sha123"))
+    ]
+    with patch('src.github.time.sleep') as mock_sleep:
+        client.create_branch(mock_repo, "main", "feature-branch")
+    mock_sleep.assert_not_called()
@@ -0,0 +1,69 @@
+import fakeredis
+import pytest
+import responses
+from github import Github
+
+from src.github import GitHubClient
+from src.github_cache import ConditionalRequestAdapter, DiskETagStore, MemoryETagStore, RedisETagStore, install_conditional_cache
+
+REPO_URL = "https://api.github.com:443/repos/org/repo"
+
+
+def conditional_repo_endpoint(calls):
+    def _callback(request):
+        calls.append(request.headers.get("If-None-Match"))
+        headers = {"ETag": '"v1"', "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": str(5000 - len(calls))}
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, headers, ""
+        return 200, dict(headers, **{"Content-Type": "application/json"}), '{"id": 1, "name": "repo", "full_name": "org/repo", "default_branch": "main"}'
+    return _callback
+
+
+@responses.activate
+def test_get_repo_revalidates_with_etag():
+    calls = []
+    responses.add_callback(responses.GET, REPO_URL, callback=conditional_repo_endpoint(calls))
+
+    client = GitHubClient(access_token="token", etag_store=MemoryETagStore())
+    first = client.get_repo("org/repo")
+    second = client.get_repo("org/repo")
+
+    assert first.full_name == second.full_name == "org/repo"
+    assert calls == [None, '"v1"']
+    stats = client.cache_stats.as_dict()
+    assert stats["not_modified"] == 1 and stats["requests"] == 2
+    assert stats["not_modified_ratio"] == 1.0
+    # Rate-limit headers come from the 304, not the cached response
+    assert client.github.requester.rate_limiting[0] == 4998
+
+
+def test_stores_round_trip(tmp_path):
+    entry = {"etag": '"v1"', "last_modified": None, "headers": {"ETag": '"v1"'}, "body": b"\x00{}"}
+    for store in (MemoryETagStore(), DiskETagStore(str(tmp_path)), RedisETagStore(fakeredis.FakeRedis())):
+        assert store.get("k") is None
+        store.set("k", entry)
+        assert store.get("k")["body"] == b"\x00{}"
+
+
+def test_pygithub_connection_hook_still_exists():
+    # install_conditional_cache relies on this private PyGithub attribute; if an
+    # upgrade removes it, the cache would silently stop working
+    requester = Github("token").requester
+    assert hasattr(requester, "_Requester__connectionClass")
+    assert requester._Requester__connection is None
+
+    github = Github("token")
+    install_conditional_cache(github, MemoryETagStore())
+    connection = github.requester._Requester__connectionClass("api.github.com", 443)
+    assert isinstance(connection.session.get_adapter("https://api.github.com/"), ConditionalRequestAdapter)
+
+
+def test_install_refuses_when_hook_is_missing():
+    class Requester:
+        pass
+
+    class Client:
+        requester = Requester()
+
+    with pytest.raises(RuntimeError, match="pinned"):
+        install_conditional_cache(Client(), MemoryETagStore())
@@ -0,0 +1,178 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.github_graphql import GitHubGraphQLClient, GitHubGraphQLError, blob_oid, repository_path
+
+
+class GitHubGraphQLStub:
+    """Local GraphQL endpoint keeping branches, commits and pull requests in memory."""
+
+    def __init__(self):
+        self.branches = {"main": "base-oid"}
+        self.trees = {"base-oid": {}}
+        self.files = {}
+        self.pulls = []
+        self.documents = []
+        self.commits = []
+        self.fail_pull_requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.documents.append(payload["query"])
+                body = json.dumps(stub.handle(payload["query"], payload["variables"])).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, query, variables):
+        if query.lstrip().startswith("query"):
+            if (variables["owner"], variables["name"]) != ("acme", "shop"):
+                return {"data": {"repository": None}}
+
+            def ref(name):
+                oid = self.branches.get(name.replace("refs/heads/", ""))
+                return {"target": {"oid": oid}} if oid else None
+
+            head = ref(variables["headRef"])
+            if head is not None:
+                tree = self.trees[head["target"]["oid"]]
+                for key, path in variables.items():
+                    if key.startswith("path"):
+                        head["target"]["f" + key[4:]] = {"oid": blob_oid(tree[path])} if path in tree else None
+            pulls = [p for p in self.pulls if p["head"] == variables["head"]]
+            return {"data": {"repository": {
+                "id": "R_1", "nameWithOwner": "acme/shop",
+                "base": ref(variables["base"]), "head": head,
+                "pullRequests": {"nodes": [{"number": p["number"], "url": p["url"]} for p in pulls]},
+            }}}
+
+        if self.fail_pull_requests and "pr" in variables:
+            # The mutation's earlier fields still ran; the response is an error
+            self.fail_pull_requests -= 1
+            self.handle(query, {key: value for key, value in variables.items() if key != "pr"})
+            return {"data": None, "errors": [{"message": "Something went wrong"}]}
+
+        data = {}
+        if "ref" in variables:
+            self.branches[variables["ref"]["name"].replace("refs/heads/", "")] = variables["ref"]["oid"]
+            data["createRef"] = {"ref": {"name": variables["ref"]["name"]}}
+        if "commit" in variables:
+            commit = variables["commit"]
+            branch = commit["branch"]["branchName"]
+            if self.branches.get(branch) != commit["expectedHeadOid"]:
+                return {"data": None, "errors": [{"message": "Expected branch to point to another oid"}]}
+            tree = dict(self.trees[commit["expectedHeadOid"]])
+            self.commits.append([change["path"] for change in commit["fileChanges"]["additions"]])
+            for change in commit["fileChanges"]["additions"]:
+                tree[change["path"]] = self.files[change["path"]] = base64.b64decode(change["contents"])
+            self.branches[branch] = f"commit-{len(self.documents)}"
+            self.trees[self.branches[branch]] = tree
+            data["createCommitOnBranch"] = {"commit": {"oid": self.branches[branch], "url": ""}}
+        if "pr" in variables:
+            pull = {"number": len(self.pulls) + 1, "head": variables["pr"]["headRefName"],
+                    "url": f"https://github.com/acme/shop/pull/{len(self.pulls) + 1}"}
+            self.pulls.append(pull)
+            data["createPullRequest"] = {"pullRequest": {"number": pull["number"], "url": pull["url"]}}
+        return {"data": data}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = GitHubGraphQLStub()
+    yield server
+    server.close()
+
+
+def test_repository_path():
+    assert repository_path("acme/shop") == "acme/shop"
+    assert repository_path("https://github.com/acme/shop.git") == "acme/shop"
+
+
+def test_open_pull_request_in_two_round_trips(stub):
+    client = GitHubGraphQLClient("token", endpoint=stub.url)
+
+    result = client.open_pull_request("acme/shop", "main", "dev-t1",
+                                      {"app.py": "print('hi')\n", "logo.bin": b"\x89PNG"},
+                                      "Implement T1", "Implement T1", "Closes #T1")
+
+    assert result["round_trips"] == 2
+    assert result["number"] == 1 and result["commit_oid"] == stub.branches["dev-t1"]
+    assert stub.files == {"app.py": b"print('hi')\n", "logo.bin": b"\x89PNG"}
+    mutation = stub.documents[1]
+    assert mutation.index("createRef") < mutation.index("createCommitOnBranch") < mutation.index("createPullRequest")
+
+
+
+def test_round_trips_are_counted_per_call(stub):
+    """A call overlapping another on the shared client reports only its own requests."""
+    client = GitHubGraphQLClient("token", endpoint=stub.url)
+    post = client.session.post
+    overlapping = []
+
+    def post_during_other_call(*args, **kwargs):
+        if not overlapping:
+            overlapping.append(None)
+            overlapping[0] = client.open_pull_request("acme/shop", "main", "dev-t2", {"b.py": "2"}, "m", "t", "b")
+        return post(*args, **kwargs)
+
+    client.session.post = post_during_other_call
+    result = client.open_pull_request("acme/shop", "main", "dev-t1", {"a.py": "1"}, "m", "t", "b")
+
+    assert result["round_trips"] == 2 and overlapping[0]["round_trips"] == 2
+    assert client.round_trips == 4
+
+def test_retry_skips_completed_steps(stub):
+    client = GitHubGraphQLClient("token", endpoint=stub.url)
+    client.open_pull_request("acme/shop", "main", "dev-t1", {"a.py": "1"}, "m", "t", "b")
+
+    result = client.open_pull_request("acme/shop", "main", "dev-t1", {"a.py": "2"}, "m", "t", "b")
+
+    assert result["number"] == 1 and len(stub.pulls) == 1
+    assert "createRef" not in stub.documents[-1] and "createPullRequest" not in stub.documents[-1]
+    assert stub.files["a.py"] == b"2"
+
+
+def test_retry_after_partial_mutation_does_not_commit_twice(stub):
+    client = GitHubGraphQLClient("token", endpoint=stub.url)
+    files = {"app.py": "print('hi')\n", "logo.bin": b"\x89PNG"}
+    stub.fail_pull_requests = 1
+
+    with pytest.raises(GitHubGraphQLError):
+        client.open_pull_request("acme/shop", "main", "dev-t1", files, "m", "t", "b")
+    committed = stub.branches["dev-t1"]
+
+    result = client.open_pull_request("acme/shop", "main", "dev-t1", files, "m", "t", "b")
+
+    assert result["number"] == 1 and result["commit_oid"] is None and result["round_trips"] == 2
+    assert stub.branches["dev-t1"] == committed
+    assert "createCommitOnBranch" not in stub.documents[-1]
+
+    # Only files that differ from the branch go into a new commit
+    client.open_pull_request("acme/shop", "main", "dev-t1", dict(files, **{"app.py": "print('bye')\n"}),
+                             "m", "t", "b")
+    assert stub.commits == [["app.py", "logo.bin"], ["app.py"]]
+
+
+def test_missing_repository_raises(stub):
+    client = GitHubGraphQLClient("token", endpoint=stub.url)
+    with pytest.raises(GitHubGraphQLError):
+        client.open_pull_request("acme/missing", "main", "dev-t1", {}, "m", "t", "b")
@@ -0,0 +1,92 @@
+import fakeredis
+import pytest
+
+from src.github_ratelimit import (
+    BACKGROUND, INTERACTIVE, RateLimitScheduler, RateLimitWaitExceeded, current_priority,
+    request_priority, resource_for_path
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def headers(remaining, limit=100, reset=1100, **extra):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Reset": str(reset), **extra}
+
+
+def make_scheduler(clock, redis_client=None, **kwargs):
+    return RateLimitScheduler(redis_client=redis_client, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_priority_context_and_resources():
+    assert current_priority() == INTERACTIVE
+    with request_priority(BACKGROUND):
+        assert current_priority() == BACKGROUND
+    assert current_priority() == INTERACTIVE
+    assert resource_for_path("/search/code") == "search"
+    assert resource_for_path("/graphql") == "graphql"
+    assert resource_for_path("/repos/o/r") == "core"
+
+
+def test_background_requests_are_paced_and_keep_reserve():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, background_reserve=0.5)
+    scheduler.update("t", headers(remaining=60), 200)
+
+    # 10 usable background slots over 100 seconds -> one every 10 seconds
+    for _ in range(10):
+        scheduler.acquire("t", priority=BACKGROUND)
+    assert clock.slept == [10.0] * 9
+    assert scheduler.stats("t")["core"]["remaining"] == 50
+
+    # The reserve is kept for interactive requests; background waits for the reset
+    assert scheduler.acquire("t", priority=INTERACTIVE) == 0.0
+    scheduler.max_wait = 5
+    with pytest.raises(RateLimitWaitExceeded):
+        scheduler.acquire("t", priority=BACKGROUND)
+
+
+def test_secondary_limit_blocks_every_worker():
+    clock = FakeClock()
+    redis_client = fakeredis.FakeRedis()
+    worker_a = make_scheduler(clock, redis_client)
+    worker_b = make_scheduler(clock, redis_client)
+
+    worker_a.update("t", headers(remaining=40, **{"Retry-After": "30"}), 403)
+    assert worker_b.acquire("t") == 30.0
+    assert worker_b.stats("t")["core"]["remaining"] == 39
+
+
+def test_exhausted_quota_waits_for_reset():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.update("t", headers(remaining=0), 403)
+
+    assert scheduler.acquire("t") == 100.0
+    # The window rolled over, so requests go out immediately again
+    assert scheduler.acquire("t") == 0.0
+
+
+def test_first_acquire_on_redis_with_no_state():
+    clock = FakeClock()
+    redis_client = fakeredis.FakeRedis()
+    scheduler = make_scheduler(clock, redis_client)
+
+    # Nothing stored yet (first request, or the key expired): no empty HSET
+    assert scheduler.acquire("t") == 0.0
+    assert scheduler.stats("t") == {}
+    assert scheduler.blocked_for("t") == 0.0
+
+    scheduler.update("t", headers(remaining=40, **{"Retry-After": "30"}), 429)
+    assert scheduler.blocked_for("t") == 30.0
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import MagicMock
+from src.hierarchy import (
+    WorkItemHierarchyCache,
+    build_node,
+    has_traceability_chain,
+    work_item_id_from_url,
+)
+
+
+def _link(rel, work_item_id):
+    return {"rel": rel, "url": f"https://dev.azure.com/org/_apis/wit/workItems/{work_item_id}"}
+
+
+@pytest.fixture
+def tree():
+    """Epic 1 -> Feature 2 -> Requirements 3, 4 -> Task 5 under 3."""
+    parent, child = "System.LinkTypes.Hierarchy-Reverse", "System.LinkTypes.Hierarchy-Forward"
+    return {
+        1: build_node(1, "Epic", [_link(child, 2)]),
+        2: build_node(2, "Feature", [_link(parent, 1), _link(child, 3), _link(child, 4)]),
+        3: build_node(3, "Requirement", [_link(parent, 2), _link(child, 5)]),
+        4: build_node(4, "Requirement", [_link(parent, 2)]),
+        5: build_node(5, "Task", [_link(parent, 3)]),
+    }
+
+
+@pytest.fixture
+def loader(tree):
+    return MagicMock(side_effect=lambda ids: [tree[i] for i in ids if i in tree])
+
+
+def test_work_item_id_from_url():
+    """Test IDs are parsed from relation URLs."""
+    assert work_item_id_from_url("https://dev.azure.com/org/_apis/wit/workItems/42") == 42
+    assert work_item_id_from_url("https://example.com/wiki/page") is None
+    assert work_item_id_from_url(None) is None
+
+
+def test_build_node_edges(tree):
+    """Test parent and child edges are extracted from relations."""
+    assert tree[2]["parent"] == 1
+    assert tree[2]["children"] == [3, 4]
+
+
+def test_get_ancestors_walks_to_epic(loader):
+    """Test ancestors are returned nearest first."""
+    cache = WorkItemHierarchyCache()
+    ancestors = cache.get_ancestors(5, loader)
+    assert [node["type"] for node in ancestors] == ["Requirement", "Feature", "Epic"]
+    assert has_traceability_chain(ancestors)
+
+
+def test_warm_loads_one_batch_per_level(loader):
+    """Test subtree warming issues one batched load per level and then hits cache."""
+    cache = WorkItemHierarchyCache()
+    assert cache.warm([1], loader) == 5
+    assert loader.call_count == 4  # Epic, Feature, Requirements, Task
+
+    cache.get_ancestors(5, loader)
+    assert loader.call_count == 4
+
+
+def test_invalidate_forces_reload(loader):
+    """Test invalidated nodes are reloaded on next lookup."""
+    cache = WorkItemHierarchyCache()
+    cache.get_node(3, loader)
+    cache.invalidate([3])
+    cache.get_node(3, loader)
+    assert loader.call_count == 2
+
+
+def test_get_ancestors_stops_on_cycle():
+    """Test malformed cyclic hierarchies terminate."""
+    parent = "System.LinkTypes.Hierarchy-Reverse"
+    nodes = {1: build_node(1, "Task", [_link(parent, 2)]), 2: build_node(2, "Requirement", [_link(parent, 1)])}
+    cache = WorkItemHierarchyCache()
+    ancestors = cache.get_ancestors(1, lambda ids: [nodes[i] for i in ids])
+    assert [node["id"] for node in ancestors] == [2]
+
+
+def test_traceability_chain_requires_order():
+    """Test chain must appear Requirement -> Feature -> Epic."""
+    assert not has_traceability_chain([{"type": "Feature"}, {"type": "Requirement"}, {"type": "Epic"}])
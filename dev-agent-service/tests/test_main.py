@@ -1,8 +1,19 @@
+import asyncio
+import base64
+import fakeredis
+import hashlib
+import hmac
+import json
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+from src import main
+from src.audit import TaskStateStore
 from src.main import app
-from src.models import WorkStartRequest
+from src.models import ScaffoldJobStatus, WorkStartRequest
+from src.pr_tracker import PRTracker
+from src.scaffold_jobs import ScaffoldJobStore
 
 
 client = TestClient(app)
@@ -110,3 +121,235 @@ def test_global_error_handler():
     response = client.get("/nonexistent")
     # FastAPI should handle 404 appropriately
     assert response.status_code == 404
+
+
+# Scaffold jobs, task state and metrics
+
+SCAFFOLD_REQUEST = {
+    "work_item_id": 42,
+    "organization_url": "https://dev.azure.com/org",
+    "project_name": "project",
+    "repository_name": "shop",
+    "framework": "fastapi"
+}
+
+
+@pytest.fixture
+def job_store(monkeypatch):
+    """Scaffold job store on fakeredis, as the lifespan would install it."""
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setenv("AZURE_DEVOPS_PAT", "token")
+    return store
+
+
+def test_health():
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["service_name"] == "dev-agent-service"
+
+
+def test_scaffold_is_queued_as_job(job_store):
+    """POST /scaffolds answers 202 with a job that the status URL reports."""
+    response = client.post("/scaffolds", json=SCAFFOLD_REQUEST)
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["status"] == "queued"
+    assert data["events_url"] == f"/scaffolds/jobs/{data['job_id']}/events"
+
+    job = client.get(data["status_url"]).json()
+    assert job["request"]["repository_name"] == "shop"
+    assert [event["phase"] for event in job["events"]] == ["queued"]
+    assert client.get("/scaffolds/42").json()["job_id"] == data["job_id"]
+
+
+def test_scaffold_rejects_unknown_framework(job_store):
+    response = client.post("/scaffolds", json=dict(SCAFFOLD_REQUEST, framework="rails"))
+
+    assert response.status_code == 400
+    assert "Unsupported framework" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("template_url", [
+    "--upload-pack=touch /tmp/pwned",
+    "file:///etc",
+    "https://evil.example.com/template.git",
+    "https://github.com/org/template.git#--upload-pack=x"
+])
+def test_scaffold_rejects_hostile_template_url(job_store, template_url):
+    """Template URLs git must not see are refused before anything is queued."""
+    single = client.post("/scaffolds", json=dict(SCAFFOLD_REQUEST, template_url=template_url))
+    bulk = client.post("/scaffolds/bulk", json={
+        "work_item_id": 42,
+        "organization_url": "https://dev.azure.com/org",
+        "template_url": template_url,
+        "targets": [{"project_name": "project", "repository_name": "shop"}]
+    })
+
+    assert single.status_code == 400
+    assert bulk.status_code == 400
+    assert client.get("/scaffolds/42").status_code == 404
+
+
+def test_scaffold_accepts_allowed_template_url(job_store):
+    response = client.post("/scaffolds", json=dict(SCAFFOLD_REQUEST, framework="custom",
+                                                   template_url="https://github.com/org/template.git#v1"))
+
+    assert response.status_code == 202
+
+
+def test_scaffold_job_not_found(job_store):
+    assert client.get("/scaffolds/jobs/missing").status_code == 404
+    assert client.get("/scaffolds/jobs/missing/events").status_code == 404
+    assert client.get("/scaffolds/7").status_code == 404
+
+
+def test_scaffold_events_stream_until_finished(job_store):
+    """The SSE stream replays progress events and ends with the final one."""
+    job_id = client.post("/scaffolds", json=SCAFFOLD_REQUEST).json()["job_id"]
+    asyncio.run(job_store.record(job_id, "branch", ScaffoldJobStatus.RUNNING, branch="scaffold/wi-42"))
+    asyncio.run(job_store.record(job_id, "completed", ScaffoldJobStatus.COMPLETED))
+
+    response = client.get(f"/scaffolds/jobs/{job_id}/events")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: queued", "event: branch", "event: completed"]
+
+
+
+def test_scaffold_events_stream_ends_when_job_expires(job_store, monkeypatch):
+    """A stream whose job record expires before it finishes is closed, not polled forever."""
+    job_id = client.post("/scaffolds", json=SCAFFOLD_REQUEST).json()["job_id"]
+    asyncio.run(job_store.record(job_id, "branch", ScaffoldJobStatus.RUNNING, branch="scaffold/wi-42"))
+    events = job_store.events
+    reads = []
+
+    async def events_then_expire(job_id, start=0):
+        result = await events(job_id, start)
+        reads.append(start)
+        if len(reads) == 2:  # The 404 check reads the job (and its events) first
+            await job_store.redis.delete(job_store._job_key(job_id))
+        return result
+
+    monkeypatch.setattr(job_store, "events", events_then_expire)
+    response = client.get(f"/scaffolds/jobs/{job_id}/events")
+
+    events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: queued", "event: branch"]
+
+def test_bulk_scaffold_queues_one_job_per_target(job_store):
+    response = client.post("/scaffolds/bulk", json={
+        "work_item_id": 42,
+        "organization_url": "https://dev.azure.com/org",
+        "targets": [
+            {"project_name": "project", "repository_name": "shop"},
+            {"project_name": "project", "repository_name": "billing", "work_item_id": 43}
+        ]
+    })
+
+    assert response.status_code == 202
+    data = response.json()
+    assert [target["repository_name"] for target in data["targets"]] == ["shop", "billing"]
+
+    progress = client.get(data["status_url"]).json()
+    assert progress["total"] == 2
+    assert progress["counts"]["queued"] == 2
+    assert client.get(data["targets"][1]["status_url"]).json()["work_item_id"] == 43
+
+
+def test_task_status_from_redis():
+    store = TaskStateStore(fakeredis.FakeRedis())
+    store.record("DEV-001", 123, "corr", None, "validating", "2026-01-01T00:00:00")
+    store.record("DEV-001", 123, "corr", "validating", "setup", "2026-01-01T00:00:01")
+
+    with patch('src.main.get_task_state_store', return_value=store):
+        response = client.get("/tasks/DEV-001")
+        missing = client.get("/tasks/DEV-999")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "setup"
+    assert [item["new_state"] for item in response.json()["history"]] == ["validating", "setup"]
+    assert missing.status_code == 404
+
+
+def test_prometheus_metrics():
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_work_item_update_uses_pooled_async_client(monkeypatch):
+    """POST /work-items sends state and comment as one JSON-patch request."""
+    monkeypatch.setenv("AZURE_DEVOPS_PAT", "token")
+    monkeypatch.setenv("AZURE_DEVOPS_ORG_URL", "https://dev.azure.com/org")
+    monkeypatch.setenv("AZURE_DEVOPS_PROJECT", "project")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": 123})
+
+    with patch.object(main.client_pool, "transport_for", return_value=httpx.MockTransport(handler)):
+        response = client.post("/work-items", json={"work_item_id": 123, "status": "Done", "comment": "Merged"})
+
+    assert response.status_code == 200
+    assert len(requests) == 1
+    assert requests[0].url.path == "/org/project/_apis/wit/workitems/123"
+    assert {op["path"] for op in json.loads(requests[0].content)} == {"/fields/System.History", "/fields/System.State"}
+
+
+GITHUB_EVENT = json.dumps({"action": "closed", "repository": {"full_name": "acme/shop"},
+                           "pull_request": {"number": 7, "merged": True}}).encode()
+
+
+@pytest.fixture
+def webhooks(monkeypatch):
+    monkeypatch.setattr(main, "pr_tracker", PRTracker(fakeredis.FakeAsyncRedis()))
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET", raising=False)
+    monkeypatch.delenv("AZURE_REPOS_WEBHOOK_SECRET", raising=False)
+    monkeypatch.delenv("WEBHOOKS_ALLOW_UNAUTHENTICATED", raising=False)
+    return monkeypatch
+
+
+def test_webhooks_refused_without_configured_secret(webhooks):
+    response = client.post("/webhooks/github", content=GITHUB_EVENT, headers={"X-GitHub-Event": "pull_request"})
+    assert response.status_code == 503
+    assert client.post("/webhooks/azure-repos", json={}).status_code == 503
+
+    # Explicit opt-in for local development
+    webhooks.setenv("WEBHOOKS_ALLOW_UNAUTHENTICATED", "true")
+    response = client.post("/webhooks/github", content=GITHUB_EVENT, headers={"X-GitHub-Event": "pull_request"})
+    assert response.status_code == 200
+
+
+def test_github_webhook_checks_signature(webhooks):
+    webhooks.setenv("GITHUB_WEBHOOK_SECRET", "s3cret")
+    headers = {"X-GitHub-Event": "pull_request"}
+
+    assert client.post("/webhooks/github", content=GITHUB_EVENT, headers=headers).status_code == 401
+    bad = dict(headers, **{"X-Hub-Signature-256": "sha256=" + "0" * 64})
+    assert client.post("/webhooks/github", content=GITHUB_EVENT, headers=bad).status_code == 401
+
+    signature = "sha256=" + hmac.new(b"s3cret", GITHUB_EVENT, hashlib.sha256).hexdigest()
+    response = client.post("/webhooks/github", content=GITHUB_EVENT,
+                           headers=dict(headers, **{"X-Hub-Signature-256": signature}))
+    assert response.status_code == 200
+    assert response.json() == {"status": "untracked", "pull_request": "github:acme/shop#7"}
+
+
+def test_azure_repos_webhook_checks_credentials(webhooks):
+    webhooks.setenv("AZURE_REPOS_WEBHOOK_SECRET", "s3cret")
+    event = {"eventType": "git.pullrequest.updated",
+             "resource": {"status": "active", "pullRequestId": 3, "repository": {"id": "abc"}}}
+
+    assert client.post("/webhooks/azure-repos", json=event).status_code == 401
+    wrong = "Basic " + base64.b64encode(b"hook:wrong").decode()
+    assert client.post("/webhooks/azure-repos", json=event, headers={"Authorization": wrong}).status_code == 401
+
+    right = "Basic " + base64.b64encode(b"hook:s3cret").decode()
+    response = client.post("/webhooks/azure-repos", json=event, headers={"Authorization": right})
+    assert response.status_code == 200 and response.json() == {"status": "ignored"}
@@ -0,0 +1,103 @@
+import base64
+import hashlib
+import hmac
+
+import fakeredis
+import pytest
+
+from src.github_ratelimit import BACKGROUND, current_priority
+from src.pr_tracker import (
+    CLOSED, MERGED, PRTracker, azure_pr_key, fetch_github_outcomes, github_pr_key, parse_azure_event,
+    parse_github_event, verify_basic_auth_secret, verify_github_signature
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_webhook_parsing_and_verification():
+    payload = {"action": "closed", "repository": {"full_name": "Acme/Shop"},
+               "pull_request": {"number": 7, "merged": True}}
+    assert parse_github_event("pull_request", payload) == ("github:acme/shop#7", MERGED)
+    assert parse_github_event("pull_request", dict(payload, action="opened")) is None
+
+    azure = {"eventType": "git.pullrequest.updated",
+             "resource": {"status": "abandoned", "pullRequestId": 3, "repository": {"id": "ABC"}}}
+    assert parse_azure_event(azure) == (azure_pr_key("abc", 3), CLOSED)
+    azure["resource"]["status"] = "active"
+    assert parse_azure_event(azure) is None
+
+    signature = "sha256=" + hmac.new(b"s3cret", b"{}", hashlib.sha256).hexdigest()
+    assert verify_github_signature("s3cret", b"{}", signature)
+    assert not verify_github_signature("other", b"{}", signature)
+    assert verify_basic_auth_secret("s3cret", "Basic " + base64.b64encode(b"hook:s3cret").decode())
+    assert not verify_basic_auth_secret("s3cret", None)
+
+
+@pytest.mark.asyncio
+async def test_resolve_is_one_shot():
+    tracker = PRTracker(fakeredis.FakeAsyncRedis())
+    key = github_pr_key("acme/shop", 7)
+    await tracker.track(key, {"kind": "dev_task", "task_data": {"task_id": "T1"}})
+
+    context = await tracker.resolve(key, MERGED)
+    assert context["task_data"] == {"task_id": "T1"}
+    assert await tracker.resolve(key, MERGED, source="poll") is None
+    assert await tracker.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_poll_batches_due_prs_per_provider():
+    clock = FakeClock()
+    tracker = PRTracker(fakeredis.FakeAsyncRedis(), poll_interval=60, clock=clock)
+    for number in range(1, 6):
+        await tracker.track(github_pr_key("acme/shop", number), {"n": number})
+    await tracker.track(azure_pr_key("repo-id", 9), {"n": 9})
+
+    calls, resumed = [], []
+
+    async def github(entries):
+        calls.append(len(entries))
+        return {key: MERGED for key, context in entries if context["n"] % 2}
+
+    async def on_resolved(key, context, outcome):
+        resumed.append((context["n"], outcome))
+
+    assert await tracker.poll_once({"github": github}, on_resolved) == 0  # Nothing due yet
+    clock.now += 61
+    assert await tracker.poll_once({"github": github}, on_resolved) == 3
+
+    assert calls == [5]  # One fetch for all due GitHub PRs
+    assert sorted(resumed) == [(1, MERGED), (3, MERGED), (5, MERGED)]
+    assert await tracker.pending() == 3
+    # Open PRs were rescheduled, so an immediate second poll has nothing to do
+    assert await tracker.poll_once({"github": github}, on_resolved) == 0 and calls == [5]
+
+
+def test_github_outcomes_use_one_query_per_batch():
+    class FakeGraphQL:
+        def __init__(self):
+            self.queries = []
+            self.priorities = []
+
+        def execute(self, query, variables, partial=False):
+            self.queries.append(query)
+            self.priorities.append(current_priority())
+            return {"r0": {"p1": {"state": "MERGED"}, "p2": {"state": "OPEN"}},
+                    "r1": {"p4": {"state": "CLOSED"}}}
+
+    client = FakeGraphQL()
+    entries = [(github_pr_key("acme/shop", 1), {}), (github_pr_key("acme/shop", 2), {}),
+               (github_pr_key("acme/api", 4), {})]
+
+    outcomes = fetch_github_outcomes(client, entries)
+
+    assert len(client.queries) == 1
+    assert outcomes == {"github:acme/shop#1": MERGED, "github:acme/api#4": CLOSED}
+    # Polling is paced as background work
+    assert client.priorities == [BACKGROUND]
@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+import fakeredis
+from unittest.mock import AsyncMock, MagicMock
+
+from src.models import ScaffoldJobStatus
+from src.scaffold import ScaffoldSpec, render_scaffold
+from src.scaffold_jobs import OrgLimiter, ScaffoldJobStore, ScaffoldWorkerPool, run_scaffold_phases
+
+
+def make_repos_client():
+    client = MagicMock()
+    client.organization_url = "https://dev.azure.com/org"
+    client.project_name = "project"
+    client.repository_name = "repo"
+    client.create_branch = AsyncMock(return_value="a" * 40)
+    client.commit_changes = AsyncMock(return_value=("b" * 40, "https://commit"))
+    client.create_pull_request = AsyncMock(return_value={"pullRequestId": 7, "pullRequestUrl": "https://pr/7"})
+    return client
+
+
+def test_render_scaffold_frameworks():
+    files = render_scaffold(ScaffoldSpec(framework="fastapi", include_frontend=True), "shop", 42)
+    assert "app/main.py" in files and "frontend/package.json" in files
+    assert "#42" in files["README.md"]
+    assert 'FastAPI(title="shop")' in files["app/main.py"]
+
+    with pytest.raises(ValueError):
+        render_scaffold(ScaffoldSpec(framework="rails"), "shop", 42)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_through_phases():
+    """A queued job is picked up and records branch, commit and PR progress."""
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    repos_client = make_repos_client()
+
+    async def handler(job, store):
+        return await run_scaffold_phases(job, store, repos_client, {"README.md": "# x"})
+
+    job = await store.create(42, {"framework": "fastapi"})
+    assert (await store.latest_for_work_item(42))["status"] == "queued"
+
+    pool = ScaffoldWorkerPool(store, handler, concurrency=1)
+    job_id = await store.next_job("w1", timeout=1)
+    assert job_id == job["job_id"]
+    await pool.run_job(job_id)
+
+    state = await store.get(job_id)
+    assert state["status"] == ScaffoldJobStatus.COMPLETED.value
+    assert state["result"]["pull_request_url"] == "https://pr/7"
+    assert state["result"]["branch"] == "scaffold/wi-42"
+    assert [event["phase"] for event in state["events"]] == ["queued", "branch", "commit", "pull_request", "completed"]
+    repos_client.commit_changes.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_job_failure_records_phase():
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    repos_client = make_repos_client()
+    repos_client.commit_changes.side_effect = Exception("Azure Repos API error: HTTP 500")
+
+    async def handler(job, store):
+        return await run_scaffold_phases(job, store, repos_client, {"README.md": "# x"})
+
+    job = await store.create(43, {"framework": "flask"})
+    await ScaffoldWorkerPool(store, handler).run_job(job["job_id"])
+
+    state = await store.get(job["job_id"])
+    assert state["status"] == ScaffoldJobStatus.FAILED.value
+    assert state["phase"] == "commit"
+    assert "HTTP 500" in state["error"]
+    repos_client.create_pull_request.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_bulk_job_fans_out_with_per_org_limit():
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    running = {"now": 0, "peak": 0}
+
+    async def handler(job, store):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if job["request"]["repository_name"] == "svc-3":
+            raise Exception("Azure Repos API error: HTTP 500")
+        return {"branch": "scaffold/wi-42"}
+
+    targets = [{"organization_url": "https://dev.azure.com/org", "project_name": "p",
+                "repository_name": f"svc-{i}", "work_item_id": 42} for i in range(6)]
+    bulk, children = await store.create_bulk(42, {"framework": "fastapi"}, targets)
+    assert await store.next_job("w1", timeout=1) == bulk["job_id"]  # Only the bulk job is queued
+    assert await store.next_job("w1", timeout=1) is None
+
+    pool = ScaffoldWorkerPool(store, handler)
+    summary = await pool.run_children(await store.get(bulk["job_id"]), OrgLimiter(per_org=2))
+
+    assert running["peak"] == 2
+    assert summary["total"] == 6 and summary["progress"] == 1.0
+    assert summary["counts"]["completed"] == 5 and summary["counts"]["failed"] == 1
+    progress = await store.bulk_progress(bulk["job_id"])
+    failed = [target for target in progress["targets"] if target["status"] == "failed"]
+    assert [target["repository_name"] for target in failed] == ["svc-3"]
+    assert (await store.get(children[0]["job_id"]))["parent_id"] == bulk["job_id"]
+
+
+async def wait_for(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if await condition():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_crashed_workers_are_requeued():
+    """A job taken by a worker that died is run by the next pool that starts."""
+    redis = fakeredis.FakeAsyncRedis()
+    store = ScaffoldJobStore(redis)
+    job = await store.create(44, {"framework": "fastapi"})
+    assert await store.next_job("crashed", timeout=1) == job["job_id"]
+    assert await redis.lrange("scaffold:queue", 0, -1) == []
+    assert await redis.lrange("scaffold:processing:crashed", 0, -1) == [job["job_id"].encode()]
+
+    handled = []
+
+    async def handler(job, store):
+        handled.append(job["job_id"])
+        return {}
+
+    next_job = store.next_job
+
+    async def blocking_next_job(worker_name, timeout=5):
+        # fakeredis answers BLMOVE on an empty list at once instead of blocking
+        job_id = await next_job(worker_name, timeout=timeout)
+        if job_id is None:
+            await asyncio.sleep(0.01)
+        return job_id
+
+    store.next_job = blocking_next_job
+    pool = ScaffoldWorkerPool(store, handler, concurrency=1, name="w2")
+    await pool.start()
+    try:
+        assert await wait_for(lambda: _status_is(store, job["job_id"], "completed"))
+        # Acknowledged jobs leave the processing list
+        assert await wait_for(lambda: _list_empty(redis, "scaffold:processing:w2"))
+    finally:
+        await pool.stop()
+    assert handled == [job["job_id"]]
+    assert await redis.exists("scaffold:processing:crashed") == 0
+
+
+@pytest.mark.asyncio
+async def test_live_workers_keep_their_jobs_and_restarts_requeue_their_own():
+    redis = fakeredis.FakeAsyncRedis()
+    store = ScaffoldJobStore(redis)
+    live, own = await store.create(45, {}), await store.create(46, {})
+    await store.next_job("live", timeout=1)
+    await store.heartbeat("live", 30)
+    await store.next_job("w1", timeout=1)
+    await store.heartbeat("w1", 30)  # Heartbeat of the previous run is still fresh
+
+    assert await store.requeue_orphaned() == {}
+    assert await store.requeue("w1") == 1
+    assert await redis.lrange("scaffold:queue", 0, -1) == [own["job_id"].encode()]
+    assert await redis.lrange("scaffold:processing:live", 0, -1) == [live["job_id"].encode()]
+
+
+@pytest.mark.asyncio
+async def test_requeued_finished_job_is_not_run_again():
+    store = ScaffoldJobStore(fakeredis.FakeAsyncRedis())
+    handler = AsyncMock(return_value={})
+    job = await store.create(47, {})
+    await store.record(job["job_id"], "completed", ScaffoldJobStatus.COMPLETED, result={})
+
+    await ScaffoldWorkerPool(store, handler).run_job(job["job_id"])
+
+    handler.assert_not_awaited()
+
+
+async def _status_is(store, job_id, status):
+    return (await store.get(job_id))["status"] == status
+
+
+async def _list_empty(redis, key):
+    return await redis.llen(key) == 0
@@ -0,0 +1,143 @@
+import shutil
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from src.scaffold import ScaffoldSpec, precompile_templates, render_scaffold
+from src.templates import TemplateStore
+from src.workspace import GitCommandError
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def template_repo(tmp_path):
+    """Local bare repository holding a custom template; returns (path, commit)."""
+    remote = tmp_path / "template.git"
+    seed = tmp_path / "seed"
+    git("init", "--quiet", "--bare", "--initial-branch=main", str(remote))
+    git("init", "--quiet", "--initial-branch=main", str(seed))
+    (seed / "service").mkdir()
+    (seed / "service" / "app.py").write_text("NAME = '$project_name'\n")
+    (seed / "logo.bin").write_bytes(b"\xff\xfe$project_name")
+    git("add", ".", cwd=seed)
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "--quiet", "-m", "template", cwd=seed)
+    git("push", "--quiet", str(remote), "main", cwd=seed)
+    return str(remote), git("rev-parse", "HEAD", cwd=seed).strip()
+
+
+def test_render_is_memoized(tmp_path):
+    store = TemplateStore(cache_dir=str(tmp_path / "templates"))
+    assert precompile_templates(store) == 6
+    spec = ScaffoldSpec(framework="flask")
+
+    first = render_scaffold(spec, "shop", 1, store=store)
+    first["wsgi.py"] = "mutated by caller"
+    second = render_scaffold(spec, "shop", 1, store=store)
+
+    assert second["wsgi.py"] != "mutated by caller"
+    assert store.render_misses == 1 and store.render_hits == 1
+    assert render_scaffold(spec, "other", 1, store=store)["app/__init__.py"].count("other") == 1
+    assert store.render_misses == 2
+
+
+def local_store(cache_dir):
+    """Store that may fetch file:// templates (production only allows https)."""
+    return TemplateStore(cache_dir=cache_dir, schemes=("file",), allowed_hosts=None)
+
+
+def test_remote_template_cached_on_disk(tmp_path, template_repo):
+    path, commit = template_repo
+    url = f"file://{path}"
+    cache_dir = str(tmp_path / "templates")
+    store = local_store(cache_dir)
+
+    files = render_scaffold(ScaffoldSpec(template_url=url), "shop", 7, store=store)
+    assert files["service/app.py"] == "NAME = 'shop'\n"
+    assert files["logo.bin"] == b"\xff\xfe$project_name"  # binary files are not substituted
+
+    # A pinned commit is served from the disk cache without touching the remote
+    shutil.rmtree(path)
+    fresh_store = local_store(cache_dir)
+    files = render_scaffold(ScaffoldSpec(template_url=f"{url}#{commit}"), "shop", 7, store=fresh_store)
+    assert files["service/app.py"] == "NAME = 'shop'\n"
+
+
+
+def test_compiled_templates_are_bounded(tmp_path):
+    store = TemplateStore(cache_dir=str(tmp_path / "templates"), max_compiled=2)
+    store.register("a", {"a.txt": "$project_name"})
+    store.register("b", {"b.txt": "$project_name"})
+    assert store.get("a") is not None  # Now the most recently used
+    store.register("c", {"c.txt": "$project_name"})
+
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["compiled_templates"] == 2
+
+    # Evicted built-in templates are compiled again on use
+    precompile_templates(store)
+    assert render_scaffold(ScaffoldSpec(framework="flask"), "shop", 1, store=store)["wsgi.py"]
+
+
+def test_precompile_loads_configured_remote_templates(tmp_path, template_repo, monkeypatch):
+    path, commit = template_repo
+    store = local_store(str(tmp_path / "templates"))
+    monkeypatch.setenv("SCAFFOLD_PRECOMPILE_TEMPLATE_URLS", f"file://{path}#{commit}, file:///missing.git")
+
+    assert precompile_templates(store) == 7  # The unreachable template is skipped
+
+    assert store.get(f"file://{path}@{commit}") is not None
+
+@pytest.mark.parametrize("template_url", [
+    "--upload-pack=touch /tmp/pwned",
+    "-u touch /tmp/pwned",
+    "ext::sh -c touch% /tmp/pwned",
+    "file:///etc",
+    "/etc",
+    "../../etc",
+    "http://github.com/org/template.git",
+    "ssh://git@github.com/org/template.git",
+    "https://evil.example.com/org/template.git",
+    "https://github.com.evil.example.com/org/template.git",
+    "https://github.com/org/template.git#--upload-pack=touch /tmp/pwned",
+    "https://github.com/org/template.git#-delete",
+    "https://github.com/org/template.git#main..HEAD",
+    "https://github.com/org/template.git\n--upload-pack=x",
+])
+def test_hostile_template_urls_never_reach_git(tmp_path, template_url):
+    store = TemplateStore(cache_dir=str(tmp_path / "templates"))
+
+    with patch.object(store, "_git") as git_call:
+        with pytest.raises(ValueError):
+            store.load_remote(template_url)
+
+    git_call.assert_not_called()
+
+
+def test_allowed_template_url(tmp_path):
+    store = TemplateStore(cache_dir=str(tmp_path / "templates"))
+
+    assert store.check_url("https://github.com/org/template.git") == ("https://github.com/org/template.git", "HEAD")
+    assert store.check_url("https://dev.azure.com/org/p/_git/t#release/1.2")[1] == "release/1.2"
+
+
+def test_git_is_limited_to_allowed_transports(tmp_path, template_repo):
+    """Even a URL that slips past check_url cannot use a transport outside ``schemes``."""
+    path, _ = template_repo
+    store = TemplateStore(cache_dir=str(tmp_path / "templates"), allowed_hosts=None)
+
+    with pytest.raises(GitCommandError):
+        store.resolve_commit(path, "main")
+    with pytest.raises(GitCommandError):
+        store.resolve_commit(f"file://{path}", "main")
+
+    with patch("src.templates.subprocess.run") as run:
+        run.return_value.returncode = 0
+        run.return_value.stdout = "a" * 40 + "\trefs/heads/main\n"
+        store.resolve_commit("https://github.com/org/template.git", "main")
+    command = run.call_args.args[0]
+    assert command[1:5] == ["-c", "protocol.allow=never", "-c", "protocol.https.allow=always"]
+    assert command[5:] == ["ls-remote", "--", "https://github.com/org/template.git", "main"]
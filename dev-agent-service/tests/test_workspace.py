@@ -0,0 +1,129 @@
+import subprocess
+import pytest
+
+from src.workspace import GitWorkspaceManager, basic_auth_header, blob_hash
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Local bare repository with one commit on main."""
+    remote_path = tmp_path / "remote.git"
+    seed = tmp_path / "seed"
+    git("init", "--quiet", "--bare", "--initial-branch=main", str(remote_path))
+    git("init", "--quiet", "--initial-branch=main", str(seed))
+    (seed / "README.md").write_text("# Project\n")
+    (seed / "app.py").write_text("print('v1')\n")
+    git("add", ".", cwd=seed)
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "--quiet", "-m", "init", cwd=seed)
+    git("push", "--quiet", str(remote_path), "main", cwd=seed)
+    return str(remote_path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return GitWorkspaceManager(cache_dir=str(tmp_path / "cache"))
+
+
+def test_blob_hash_matches_git(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("hello\n")
+    assert blob_hash("hello\n") == git("hash-object", str(path)).strip()
+
+
+def test_checkout_write_commit_push(manager, remote):
+    """Unchanged files are skipped and the task branch is pushed once."""
+    workspace = manager.checkout(remote, "main", "dev-t1", "t1")
+
+    changed = workspace.write_files({
+        "README.md": "# Project\n",  # identical to base
+        "app.py": "print('v2')\n",
+        "src/new.py": "x = 1\n",
+    })
+    assert sorted(changed) == ["app.py", "src/new.py"]
+
+    commit_id = workspace.commit("Implement t1")
+    assert workspace.push() == commit_id
+    workspace.release()
+
+    assert git("rev-parse", "refs/heads/dev-t1", cwd=remote).strip() == commit_id
+    files = git("diff", "--name-only", "main", "dev-t1", cwd=remote).split()
+    assert sorted(files) == ["app.py", "src/new.py"]
+    assert not workspace.path.exists()
+
+
+def test_commit_without_changes_returns_none(manager, remote):
+    with manager.checkout(remote, "main", "dev-t2", "t2") as workspace:
+        assert workspace.write_files({"README.md": "# Project\n"}) == []
+        assert workspace.commit("No-op") is None
+
+
+def test_second_checkout_fetches_incrementally(manager, remote, tmp_path):
+    """A cached clone is reused and sees new remote commits after fetch."""
+    with manager.checkout(remote, "main", "dev-t3", "t3") as workspace:
+        workspace.write_files({"app.py": "print('v3')\n"})
+        workspace.commit("Update app")
+        workspace.push()
+    git("update-ref", "refs/heads/main", "refs/heads/dev-t3", cwd=remote)
+
+    with manager.checkout(remote, "main", "dev-t4", "t4") as workspace:
+        assert workspace.write_files({"app.py": "print('v3')\n"}) == []
+
+    assert manager.stats()["repositories"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path, remote):
+    manager = GitWorkspaceManager(cache_dir=str(tmp_path / "cache"), max_cache_bytes=0)
+    with manager.checkout(remote, "main", "dev-t5", "t5"):
+        # Active repositories are never evicted
+        assert manager.evict() == []
+    assert manager.stats()["repositories"] == 0
+
+
+def test_write_files_from_disk(manager, remote, tmp_path):
+    """Path content is hashed and copied in chunks; unchanged files are still skipped."""
+    same = tmp_path / "README.md"
+    same.write_text("# Project\n")
+    asset = tmp_path / "bundle.bin"
+    asset.write_bytes(bytes(range(256)) * 4096)
+    assert blob_hash(asset) == git("hash-object", str(asset)).strip()
+
+    with manager.checkout(remote, "main", "dev-t5", "t5") as workspace:
+        assert workspace.write_files({"README.md": same, "vendor/bundle.bin": asset}) == ["vendor/bundle.bin"]
+        assert (workspace.path / "vendor/bundle.bin").read_bytes() == asset.read_bytes()
+
+
+def test_auth_header_is_passed_through_environment(manager, monkeypatch):
+    header = basic_auth_header("x-access-token", "secret-token")
+    calls = []
+    run = subprocess.run
+
+    def recording_run(command, **kwargs):
+        calls.append((command, kwargs["env"]))
+        return run(command, **kwargs)
+
+    monkeypatch.setattr("src.workspace.subprocess.run", recording_run)
+    assert manager._git(["config", "--get", "http.extraHeader"], auth_header=header).strip() == header
+    command, env = calls[-1]
+    assert not any("secret" in arg or header in arg for arg in command)
+
+    # Configuration already passed through the environment is kept
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", "core.abbrev")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "12")
+    assert manager._git(["config", "--get", "core.abbrev"], auth_header=header).strip() == "12"
+    assert calls[-1][1]["GIT_CONFIG_KEY_1"] == "http.extraHeader"
+
+
+def test_evict_skips_repositories_locked_by_checkout(tmp_path, remote):
+    manager = GitWorkspaceManager(cache_dir=str(tmp_path / "cache"), max_cache_bytes=0)
+    repo_path = manager.ensure_repository(remote)
+
+    # A checkout holds the repository lock from fetch until its worktree is counted
+    with manager._repo_lock(repo_path):
+        assert manager.evict() == []
+    assert repo_path.exists()
+    assert manager.evict() == [repo_path]
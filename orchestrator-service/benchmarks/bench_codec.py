@@ -0,0 +1,111 @@
+"""
+Benchmark JSON codec backends on webhook and Azure DevOps payloads.
+
+Usage:
+    python -m benchmarks.bench_codec [captured_payload.json ...]
+
+Captured payloads (e.g. service hook bodies saved from the webhook endpoint or
+``_apis/wit/workitems`` responses) can be passed as arguments. Without
+arguments, synthetic payloads of realistic size are generated: a
+``workitem.updated`` hook with long HTML history and many relations, and a
+100-item work item batch response.
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src import codec
+
+
+def _relation(index: int) -> Dict:
+    return {
+        "rel": "System.LinkTypes.Hierarchy-Forward" if index % 2 else "System.LinkTypes.Related",
+        "url": f"https://dev.azure.com/org/_apis/wit/workItems/{10000 + index}",
+        "attributes": {"isLocked": False, "name": "Child" if index % 2 else "Related"},
+    }
+
+
+def _work_item(work_item_id: int, body_size: int) -> Dict:
+    return {
+        "id": work_item_id,
+        "rev": 42,
+        "fields": {
+            "System.AreaPath": "AI-DevOps\\Platform\\Dev Agent",
+            "System.TeamProject": "AI-DevOps",
+            "System.IterationPath": "AI-DevOps\\Sprint 12",
+            "System.WorkItemType": "Task",
+            "System.State": "Ready for Development",
+            "System.Title": f"Implement scaffold pipeline stage {work_item_id}",
+            "System.Description": "<div>" + ("Acceptance criteria line. " * (body_size // 25)) + "</div>",
+            "System.History": "<p>" + ("Discussion entry with <b>markup</b>. " * (body_size // 40)) + "</p>",
+            "Microsoft.VSTS.Common.Priority": 2,
+            "System.Tags": "dev-agent; scaffold; cmmi",
+        },
+        "relations": [_relation(i) for i in range(60)],
+        "url": f"https://dev.azure.com/org/_apis/wit/workItems/{work_item_id}",
+    }
+
+
+def synthetic_payloads() -> List[Tuple[str, bytes]]:
+    """Build realistic-size payloads when no captures are supplied."""
+    work_item = _work_item(4242, body_size=60_000)
+    hook = {
+        "id": "b0c2f0e4-1a2b-4c3d-9e8f-001122334455",
+        "eventType": "workitem.updated",
+        "publisherId": "tfs",
+        "message": {"text": "Task #4242 updated", "html": "<a>Task #4242</a> updated"},
+        "detailedMessage": {"text": "Task #4242 updated\r\n" * 50},
+        "resource": {
+            "id": 99,
+            "workItemId": 4242,
+            "rev": 42,
+            "fields": {key: {"oldValue": value, "newValue": value} for key, value in work_item["fields"].items()},
+            "relations": {"added": work_item["relations"][:10], "removed": []},
+            "revision": work_item,
+        },
+        "resourceVersion": "1.0",
+        "resourceContainers": {"collection": {"id": "c"}, "account": {"id": "a"}, "project": {"id": "p"}},
+        "createdDate": "2025-09-01T12:00:00Z",
+    }
+    batch = {"count": 100, "value": [_work_item(5000 + i, body_size=1_500) for i in range(100)]}
+    return [
+        ("webhook.workitem.updated", json.dumps(hook).encode()),
+        ("ado.workitems.batch", json.dumps(batch).encode()),
+    ]
+
+
+def captured_payloads(paths: List[str]) -> List[Tuple[str, bytes]]:
+    return [(Path(path).name, Path(path).read_bytes()) for path in paths]
+
+
+def _best(func, number: int) -> float:
+    """Best-of-five per-call time in milliseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def run(payloads: List[Tuple[str, bytes]], number: int = 20) -> None:
+    backends = [name for name in ("json", "orjson", "msgspec") if codec._BACKENDS[name][0]()]
+    print(f"{'payload':<28}{'size':>10}  {'backend':<8}{'decode ms':>11}{'webhook ms':>12}{'encode ms':>11}")
+
+    for label, body in payloads:
+        document = json.loads(body)
+        for backend in backends:
+            active = codec.select_codec(backend)
+            codec.set_codec(active)
+            codec._webhook_decoder = None
+
+            decode_ms = _best(lambda: active.loads(body), number)
+            encode_ms = _best(lambda: active.dumps(document), number)
+            webhook_ms = _best(lambda: codec.decode_webhook(body), number) if "eventType" in document else float("nan")
+
+            print(f"{label:<28}{len(body) / 1024:>8.0f}KB  {backend:<8}{decode_ms:>11.3f}{webhook_ms:>12.3f}{encode_ms:>11.3f}")
+
+    codec.set_codec(None)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(captured_payloads(args) if args else synthetic_payloads())
@@ -5,6 +5,8 @@ from uptime import boottime  # type: ignore
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from src.utils import get_logger, generate_correlation_id, get_env_var
+from src.codec import dumps, loads
+from src.hierarchy import build_node, get_hierarchy_cache
 from src.models import (
     ProjectStatus,
     WorkItemState,
@@ -59,7 +61,7 @@ class AzureDevOpsClient:
         }
 
         if data:
-            request_kwargs['json'] = data
+            request_kwargs['content'] = dumps(data)
         if params:
             request_kwargs['params'] = params
 
@@ -73,7 +75,7 @@ class AzureDevOpsClient:
                             error=error_detail)
             raise Exception(f"Azure DevOps API error: HTTP {response.status_code} - {error_detail}")
 
-        return response.json()
+        return loads(response.content)
 
     async def get_project_status(self, project_name: str) -> str:
         """
@@ -204,15 +206,37 @@ class AzureDevOpsClient:
 
         return await self._make_request("PATCH", endpoint, data=operations)
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=60)
+    )
+    async def get_hierarchy_nodes(self, work_item_ids: List[int]) -> List[Dict[str, Any]]:
+        """Batch-fetch work items with relations as hierarchy cache nodes (max 200 IDs)."""
+        endpoint = "_apis/wit/workitemsbatch?api-version=7.0"
+        payload = {
+            "ids": work_item_ids,
+            "$expand": "Relations",
+            "errorPolicy": "Omit"
+        }
+
+        result = await self._make_request("POST", endpoint, data=payload)
+
+        return [
+            build_node(item['id'],
+                       item.get('fields', {}).get('System.WorkItemType', 'Unknown'),
+                       item.get('relations', []))
+            for item in result.get('value', []) if item
+        ]
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=60)
     )
     async def get_work_item_links(self, work_item_id: int) -> List[Dict[str, Any]]:
-        """Get work item relations/links for CMMI validation."""
+        """Get work item relations/links for CMMI validation (served from the hierarchy cache)."""
         try:
-            work_item = await self.get_work_item(work_item_id)
-            return work_item.get('relations', [])
+            node = await get_hierarchy_cache().get_node(work_item_id, self.get_hierarchy_nodes)
+            return node.get('relations', []) if node else []
         except Exception as e:
             self.logger.error("Failed to get work item links",
                             work_item_id=work_item_id,
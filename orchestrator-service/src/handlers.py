@@ -21,9 +21,10 @@ from src.models import (
     AuditEvent
 )
 from src.azure_devops import AzureDevOpsClient
+from src.codec import WebhookPayload, dumps
 
 
-async def handle_workitem_webhook(event: Dict[str, Any], correlation_id: str):
+async def handle_workitem_webhook(event: WebhookPayload, correlation_id: str):
     """
     Handle Azure DevOps webhook events for work item updates.
 
@@ -31,14 +32,15 @@ async def handle_workitem_webhook(event: Dict[str, Any], correlation_id: str):
     and route task with appropriate state management.
     """
     webhook_logger = get_logger(correlation_id)
-    webhook_logger.info("Processing work item webhook", event_type=event.get("eventType"))
+    webhook_logger.info("Processing work item webhook", event_type=event.eventType)
+    work_item_id = None
 
     try:
         # Extract work item information from webhook
-        resource = event.get("resource", {})
-        work_item_id = resource.get("workItemId")
-        work_item_type = resource.get("workItemType", "Unknown")
-        revision_count = resource.get("rev")
+        resource = event.resource
+        work_item_id = event.work_item_id
+        work_item_type = resource.workItemType or "Unknown"
+        revision_count = resource.rev
 
         if not work_item_id:
             webhook_logger.error("No work item ID in webhook event")
@@ -259,7 +261,7 @@ async def call_agent_endpoint(
         try:
             async with session.post(
                 task_url,
-                json=task_data,
+                data=dumps(task_data),
                 headers={'Content-Type': 'application/json'},
                 timeout=aiohttp.ClientTimeout(total=30)
             ) as response:
@@ -0,0 +1,177 @@
+"""
+Work item hierarchy graph cache for CMMI traceability validation.
+
+Holds parent/child edges, work item types and relations keyed by work item
+ID so link lookups do not refetch the work item. Missing nodes are loaded
+through ``_apis/wit/workitemsbatch`` (batched calls) and entries are
+invalidated from the ``/webhooks/azure-devops`` handler when a work item or
+its links change.
+
+The node layout and Redis key scheme are shared with
+``dev-agent-service/src/hierarchy.py``; pointing both services at the same
+Redis (``HIERARCHY_CACHE_REDIS_URL``) lets these invalidations reach the
+dev-agent workers.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from src.codec import dumps, loads
+from src.utils import get_logger, get_env_var
+
+PARENT_LINK = "System.LinkTypes.Hierarchy-Reverse"
+CHILD_LINK = "System.LinkTypes.Hierarchy-Forward"
+
+NodeLoader = Callable[[List[int]], Awaitable[List[Dict[str, Any]]]]
+
+
+def work_item_id_from_url(url: Optional[str]) -> Optional[int]:
+    """Extract the work item ID from a relation URL (``.../workItems/123``)."""
+    if not url:
+        return None
+    tail = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def build_node(work_item_id: int, work_item_type: str, relations: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a cache node from a work item's type and relation dicts."""
+    relations = list(relations or [])
+    parent = None
+    children = []
+    for relation in relations:
+        target = work_item_id_from_url(relation.get("url"))
+        if target is None:
+            continue
+        if relation.get("rel") == PARENT_LINK:
+            parent = target
+        elif relation.get("rel") == CHILD_LINK:
+            children.append(target)
+
+    return {
+        "id": work_item_id,
+        "type": work_item_type,
+        "parent": parent,
+        "children": children,
+        "relations": relations,
+        "cached_at": time.time(),
+    }
+
+
+class WorkItemHierarchyCache:
+    """Parent/child graph of work items with TTL and explicit invalidation."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: int = 900,
+        key_prefix: str = "wit:hierarchy",
+        batch_size: int = 200
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.batch_size = batch_size
+        self.logger = get_logger()
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, work_item_id: int) -> str:
+        return f"{self.key_prefix}:{work_item_id}"
+
+    def _read(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if self.redis is not None:
+            values = self.redis.mget([self._key(i) for i in ids])
+            return {i: loads(v) for i, v in zip(ids, values) if v}
+
+        now = time.time()
+        found = {}
+        for work_item_id in ids:
+            node = self._nodes.get(work_item_id)
+            if node and now - node["cached_at"] < self.ttl_seconds:
+                found[work_item_id] = node
+        return found
+
+    def _write(self, nodes: List[Dict[str, Any]]) -> None:
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            for node in nodes:
+                pipe.setex(self._key(node["id"]), self.ttl_seconds, dumps(node))
+            pipe.execute()
+            return
+
+        for node in nodes:
+            self._nodes[node["id"]] = node
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        """Drop cached nodes so the next lookup reloads them."""
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return
+        if self.redis is not None:
+            self.redis.delete(*[self._key(i) for i in ids])
+        for work_item_id in ids:
+            self._nodes.pop(work_item_id, None)
+
+    async def get_nodes(self, ids: Iterable[int], loader: NodeLoader) -> Dict[int, Dict[str, Any]]:
+        """Return nodes for ``ids``, loading all misses with batched calls."""
+        ids = list(dict.fromkeys(ids))
+        nodes = self._read(ids)
+        self.hits += len(nodes)
+
+        missing = [i for i in ids if i not in nodes]
+        if missing:
+            self.misses += len(missing)
+            for start in range(0, len(missing), self.batch_size):
+                loaded = await loader(missing[start:start + self.batch_size])
+                self._write(loaded)
+                nodes.update({node["id"]: node for node in loaded})
+        return nodes
+
+    async def get_node(self, work_item_id: int, loader: NodeLoader) -> Optional[Dict[str, Any]]:
+        return (await self.get_nodes([work_item_id], loader)).get(work_item_id)
+
+    def invalidate_from_webhook(self, event) -> List[int]:
+        """
+        Invalidate nodes touched by a work item webhook.
+
+        Covers the work item itself plus every work item on the other end of
+        an added or removed link, since their parent/child edges changed too.
+        """
+        ids = [event.work_item_id]
+        relations = event.resource.relations
+        if isinstance(relations, dict):
+            changed = (relations.get("added") or []) + (relations.get("removed") or [])
+        else:
+            changed = relations or []
+        for relation in changed:
+            if isinstance(relation, dict) and relation.get("rel") in (PARENT_LINK, CHILD_LINK):
+                ids.append(work_item_id_from_url(relation.get("url")))
+
+        ids = [i for i in ids if i is not None]
+        self.invalidate(ids)
+        return ids
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "local_nodes": len(self._nodes)}
+
+
+_hierarchy_cache: Optional[WorkItemHierarchyCache] = None
+
+
+def get_hierarchy_cache() -> WorkItemHierarchyCache:
+    """Return the process-wide cache (in-memory until configured on startup)."""
+    global _hierarchy_cache
+    if _hierarchy_cache is None:
+        _hierarchy_cache = WorkItemHierarchyCache()
+    return _hierarchy_cache
+
+
+def configure_hierarchy_cache(redis_client=None) -> WorkItemHierarchyCache:
+    """Install the process-wide cache, optionally backed by Redis."""
+    global _hierarchy_cache
+    _hierarchy_cache = WorkItemHierarchyCache(
+        redis_client=redis_client,
+        ttl_seconds=int(get_env_var("HIERARCHY_CACHE_TTL_SECONDS", "900") or 900)
+    )
+    return _hierarchy_cache
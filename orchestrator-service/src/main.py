@@ -2,7 +2,7 @@ import asyncio
 import os
 from typing import Dict, Any
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 import redis
 from prometheus_client import Counter, Histogram, generate_latest, start_http_server
@@ -23,6 +23,8 @@ from src.models import (
     AuditEvent
 )
 from src.azure_devops import AzureDevOpsClient
+from src.codec import WebhookPayload, decode_webhook
+from src.hierarchy import configure_hierarchy_cache, get_hierarchy_cache
 from src.bootstrap import bootstrap_project
 from src.handlers import handle_workitem_webhook, route_task_to_agent
 
@@ -88,6 +90,10 @@ async def startup_event():
         redis_client = redis.from_url(redis_url)
         logger.info("Redis client initialized")
 
+        # Work item hierarchy cache, shared with dev-agent workers through Redis
+        hierarchy_redis_url = get_env_var("HIERARCHY_CACHE_REDIS_URL")
+        configure_hierarchy_cache(redis.from_url(hierarchy_redis_url) if hierarchy_redis_url else None)
+
     except Exception as e:
         logger.error("Failed to initialize clients on startup", error=str(e))
 
@@ -181,11 +187,17 @@ async def get_project_status(project: str):
 
 
 @app.post("/webhooks/azure-devops", summary="Handle Azure DevOps webhook events")
-async def handle_webhook_event(event: Dict[Any, Any]):
+async def handle_webhook_event(request: Request):
     """Process Azure DevOps webhook events for work item updates."""
+    try:
+        event = decode_webhook(await request.body())
+    except Exception as e:
+        logger.warning("Rejected malformed webhook body", error=str(e))
+        raise HTTPException(status_code=400, detail=f"Invalid webhook payload: {str(e)}")
+
     try:
         webhook_logger = get_logger()
-        webhook_logger.debug("Received webhook event", event_type=event.get("eventType", "unknown"))
+        webhook_logger.debug("Received webhook event", event_type=event.eventType)
 
         # Process webhook asynchronously
         asyncio.create_task(handle_webhook_processing(event))
@@ -197,29 +209,34 @@ async def handle_webhook_event(event: Dict[Any, Any]):
         raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
 
 
-async def handle_webhook_processing(event: Dict[Any, Any]):
+async def handle_webhook_processing(event: WebhookPayload):
     """Process webhook event asynchronously."""
     correlation_id = generate_correlation_id()
     event_logger = get_logger(correlation_id)
 
     try:
         event_logger.info("Processing webhook event",
-                         event_type=event.get("eventType", "unknown"),
-                         work_item_id=event.get("resource", {}).get("workItemId"))
+                         event_type=event.eventType,
+                         work_item_id=event.work_item_id)
+
+        # Keep the hierarchy cache fresh before any traceability lookups
+        if event.eventType in ("workitem.created", "workitem.updated", "workitem.deleted", "workitem.restored"):
+            invalidated = get_hierarchy_cache().invalidate_from_webhook(event)
+            event_logger.debug("Hierarchy cache invalidated", work_item_ids=invalidated)
 
         # Handle work item update events
-        if event.get("eventType") == "workitem.updated":
+        if event.eventType == "workitem.updated":
             await handle_workitem_webhook(event, correlation_id)
 
         # Handle work item create events
-        elif event.get("eventType") == "workitem.created":
+        elif event.eventType == "workitem.created":
             await handle_workitem_webhook(event, correlation_id)
 
         event_logger.info("Webhook processing complete")
 
     except Exception as e:
         event_logger.error("Failed to process webhook event",
-                          event_type=event.get("eventType", "unknown"),
+                          event_type=event.eventType,
                           error=str(e))
 
 
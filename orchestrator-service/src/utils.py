@@ -60,11 +60,13 @@ async def send_audit_event_async(
 ) -> bool:
     """Send audit event asynchronously to audit service."""
     import aiohttp
+    from src.codec import dumps
     try:
         async with aiohttp.ClientSession() as session:
             async with session.post(
                 f"{audit_service_url}/audit/event",
-                json=event.dict(),
+                data=dumps(event.dict()),
+                headers={'Content-Type': 'application/json'},
                 timeout=timeout
             ) as response:
                 if response.status == 200: